@@ -1,14 +1,24 @@
 import datetime
 import logging
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 import azure.functions as func
 
 from src.config.settings import get_settings
-from src.salesforce.auth import create_jwt_assertion, get_access_token
-from src.salesforce.pubsub_client import fetch_events_via_pubsub
+from src.salesforce.auth import authenticate
+from src.salesforce.pubsub_client import ManagedSubscription, PubSubClient, fetch_events_via_pubsub
+from src.replay.batch_tuning import BatchTuningStore
 from src.replay.cursor_store import CursorStore
+from src.replay.dead_letter_store import DeadLetterStore, advance_past_dead_letters
 from src.mock_events import load_mock_events_for_topic
 from src.snowflake.connector import SnowflakeConnector
-from src.utils.transform import transform_for_snowflake
+from src.snowflake.connection_manager import is_session_expired_error
+from src.snowflake.delete_apply import DeleteApplier
+from src.spill.segment_log import SegmentLog
+from src.spill.spill_buffer import SpillBuffer
+from src.utils.routing import EventRouter
+from src.utils.transform import dirty_objects, transform_for_snowflake
 
 
 def main(myTimer: func.TimerRequest) -> None:
@@ -16,24 +26,27 @@ def main(myTimer: func.TimerRequest) -> None:
         logging.info("The timer is past due!")
 
     utc_timestamp = datetime.datetime.utcnow().replace(tzinfo=datetime.timezone.utc).isoformat()
-    logging.info("Salesforce Delete Synchronizer started at %s", utc_timestamp)
+    # Recorded with every saved cursor in cursor_history
+    run_id = uuid.uuid4().hex
+    logging.info("Salesforce Delete Synchronizer started at %s (run %s)", utc_timestamp, run_id)
 
     settings = get_settings()
 
     # Check if running in mock mode
     if settings.mock_mode:
         logging.info("Running in MOCK MODE - using mock data from %s", settings.mock_data_dir)
-        access_token, instance_url, tenant_id = None, None, None
-    else:
-        # Authenticate to Salesforce
-        assertion = create_jwt_assertion(
-            client_id=settings.sf_client_id,
-            username=settings.sf_username,
-            audience=settings.sf_audience,
-            private_key_path=settings.sf_private_key_path,
-        )
-        access_token, instance_url, tenant_id = get_access_token(settings.sf_login_url, assertion)
-        logging.info("Authenticated to Salesforce - Org ID: %s", tenant_id)
+    access_token, instance_url, tenant_id = None, None, None
+
+    def refresh_access_token() -> tuple[str, str, str]:
+        """Re-authenticate after the Pub/Sub API rejects the session; later topics reuse the new token"""
+        nonlocal access_token, instance_url, tenant_id
+        access_token, instance_url, tenant_id = authenticate(settings)
+        logging.info("Refreshed Salesforce access token - Org ID: %s", tenant_id)
+        if pubsub_client is not None:
+            pubsub_client.access_token, pubsub_client.instance_url, pubsub_client.tenant_id = (
+                access_token, instance_url, tenant_id
+            )
+        return access_token, instance_url, tenant_id
 
     # Connect to Snowflake (used for both cursor storage and event insertion)
     snowflake_conn = SnowflakeConnector(
@@ -44,25 +57,157 @@ def main(myTimer: func.TimerRequest) -> None:
         database=settings.snowflake_database,
         schema=settings.snowflake_schema,
         table=settings.snowflake_table,
+        backend=settings.warehouse_backend,
+        sqlite_path=settings.warehouse_sqlite_path,
     )
     
-    try:
+    # Topics whose replay position Salesforce tracks (ManagedSubscribe); cursor_store is their fallback
+    managed = {} if settings.mock_mode else settings.sf_managed_subscriptions
+    # One channel for the whole run, opened and warmed up during startup
+    pubsub_client: PubSubClient | None = None
+    managed_sessions: dict[str, ManagedSubscription] = {}
+    cursor_store: CursorStore | None = None
+
+    def get_cursor_store() -> CursorStore:
+        """Create the cursor store on first use so fully managed runs skip its round trips"""
+        nonlocal cursor_store
+        if cursor_store is None:
+            cursor_store = CursorStore(snowflake_conn.connection, run_id=run_id)
+            logging.info("Initialized cursor store in Snowflake")
+        return cursor_store
+
+    insert_seconds = 0.0
+    # Objects with delete_tracker rows loaded by this run (including spilled rows from earlier runs)
+    loaded_objects: set[str] = set()
+
+    def load(rows: list) -> int:
+        """Insert rows into Snowflake, accumulating insert time for batch tuning"""
+        nonlocal insert_seconds
+        insert_started = time.perf_counter()
+        inserted = snowflake_conn.insert_events(rows)
+        insert_seconds += time.perf_counter() - insert_started
+        loaded_objects.update(dirty_objects(rows))
+        logging.info("Successfully inserted %d events into Snowflake %s.%s.%s", 
+                    inserted, 
+                    settings.snowflake_database, 
+                    settings.snowflake_schema, 
+                    settings.snowflake_table)
+        return inserted
+
+    # Topics read from cursor_store; managed topics fall back to it only if their subscription fails
+    cursor_topics = [t for t in settings.sf_topic_names if t not in managed]
+    startup_seconds: dict[str, float] = {}
+
+    def open_warehouse() -> tuple:
+        """Snowflake login, delete_tracker's DDL, then the cursor read and batch tuning load"""
+        started = time.perf_counter()
         snowflake_conn.connect()
+        # Same connection as the reads below, so the DDL runs before them rather than on another thread
         snowflake_conn.ensure_table_exists()
-        
-        # Initialize cursor store with Snowflake connection
-        cursor_store = CursorStore(snowflake_conn.connection)
-        logging.info("Initialized cursor store in Snowflake")
+        # Fetch all cursors for unmanaged topics in a single query (performance optimization)
+        cursors = get_cursor_store().get_cursors_for_topics(cursor_topics) if cursor_topics else {}
+
+        # Per-topic batch sizes learned from previous runs (stored next to cursor_store)
+        tuning_store = None
+        controllers = {}
+        if settings.batch_autotune and not settings.mock_mode:
+            try:
+                tuning_store = BatchTuningStore(snowflake_conn.connection)
+                controllers = tuning_store.load_controllers(
+                    settings.sf_topic_names,
+                    min_size=settings.batch_min_events,
+                    max_size=settings.batch_max_events,
+                    target_seconds=settings.batch_target_seconds,
+                )
+            except Exception as e:
+                logging.warning("Batch autotuning disabled for this run: %s", e)
+                tuning_store, controllers = None, {}
+
+        startup_seconds["snowflake"] = time.perf_counter() - started
+        return cursors, tuning_store, controllers
 
-        # Fetch all cursors for configured topics in a single query (performance optimization)
-        cursors = cursor_store.get_cursors_for_topics(settings.sf_topic_names)
-        logging.info("Fetched cursors for %d/%d topics", len(cursors), len(settings.sf_topic_names))
+    def authenticate_timed() -> tuple[str, str, str]:
+        started = time.perf_counter()
+        credentials = authenticate(settings)
+        startup_seconds["auth"] = time.perf_counter() - started
+        return credentials
+
+    def warm_up_pubsub(auth_future: Future) -> None:
+        """Open the Pub/Sub channel and prefetch topic schemas as soon as a token is available"""
+        nonlocal pubsub_client
+        started = time.perf_counter()
+        pubsub_client = PubSubClient(*auth_future.result())
+        pubsub_client.warm_up(settings.sf_topic_names)
+        startup_seconds["pubsub"] = time.perf_counter() - started
+
+    try:
+        # Startup steps run concurrently and are joined only where one needs another, so the
+        # first Subscribe waits for the slowest step rather than the sum of all of them
+        startup_started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=4, thread_name_prefix="startup") as startup:
+            warehouse_future = startup.submit(open_warehouse)
+            if not settings.mock_mode:
+                auth_future = startup.submit(authenticate_timed)
+                warm_up_future = startup.submit(warm_up_pubsub, auth_future)
+
+                # Authenticate to Salesforce
+                access_token, instance_url, tenant_id = auth_future.result()
+                logging.info("Authenticated to Salesforce - Org ID: %s", tenant_id)
+            cursors, tuning_store, controllers = warehouse_future.result()
+            if not settings.mock_mode:
+                try:
+                    warm_up_future.result()
+                except Exception as e:
+                    # Not fatal: each topic opens its own channel instead
+                    logging.warning("Pub/Sub warm-up failed (%s); connecting per topic", e)
+                    if pubsub_client is not None:
+                        pubsub_client.close()
+                    pubsub_client = None
+        logging.info("Startup finished in %.2fs (%s)", time.perf_counter() - startup_started,
+                     ", ".join("%s %.2fs" % step for step in startup_seconds.items()))
+        logging.info("Fetched cursors for %d/%d topics (%d managed)", len(cursors), len(cursor_topics), len(managed))
+
+        # Local write-ahead spill log: fetch appends to it, the load stage drains it into Snowflake
+        spill = SpillBuffer(SegmentLog(settings.spill_dir)) if settings.spill_dir else None
+        if spill is not None:
+            # Finish loading what earlier runs fetched before pulling anything new
+            spill.drain(load)
+            insert_seconds = 0.0
 
         collected = []
         latest_per_topic: dict[str, bytes] = {}
+        events_per_topic: dict[str, int] = {}
+        # Undecodable / unmappable events, written in one batch before any cursor moves past them
+        dead_letters: list[dict] = []
+
+        def collect(topic: str, events: list) -> None:
+            for event in events:
+                collected.append(event)
+                # Track latest replay_id for this topic
+                latest_per_topic[topic] = event["replay_id"]
+            events_per_topic[topic] = len(events)
+            logging.info("Fetched %d events from topic %s", len(events), topic)
 
         # Subscribe to each topic via Pub/Sub API or use mock data
         for topic in settings.sf_topic_names:
+            if topic in managed:
+                session = None
+                try:
+                    if pubsub_client is None:
+                        pubsub_client = PubSubClient(access_token, instance_url, tenant_id)
+                        pubsub_client.connect()
+                    session = ManagedSubscription(pubsub_client, topic, managed[topic])
+                    collect(topic, session.fetch(max_events=settings.batch_events, controller=controllers.get(topic)))
+                    # Kept open so the last replay_id can be committed after the insert
+                    managed_sessions[topic] = session
+                    continue
+                except Exception as e:
+                    if session is not None:
+                        session.close()
+                    logging.warning("Managed subscription %s unavailable for %s (%s); falling back to cursor_store",
+                                    managed[topic], topic, e)
+                    cursors.update(get_cursor_store().get_cursors_for_topics([topic]))
+
             replay_id = cursors.get(topic)  # Lookup from pre-fetched dictionary
             
             if replay_id:
@@ -72,9 +217,11 @@ def main(myTimer: func.TimerRequest) -> None:
 
             try:
                 if settings.mock_mode:
-                    # Load mock events from JSON files
+                    # Stream mock events from JSON / NDJSON files, resuming after the saved cursor
                     logging.info("Loading mock events for %s", topic)
-                    events = load_mock_events_for_topic(settings.mock_data_dir, topic)
+                    events = load_mock_events_for_topic(
+                        settings.mock_data_dir, topic, replay_id=replay_id, max_events=settings.batch_max_events,
+                    )
                 else:
                     # Fetch events via Pub/Sub API
                     if replay_id:
@@ -88,7 +235,8 @@ def main(myTimer: func.TimerRequest) -> None:
                     logging.info("  - instance_url: %s", instance_url)
                     logging.info("  - tenant_id: %s", tenant_id)
                     logging.info("  - replay_id: %s", "Present (%d bytes)" % len(replay_id) if replay_id else "None")
-                    logging.info("  - max_events: 100")
+                    controller = controllers.get(topic)
+                    logging.info("  - max_events: %d", controller.batch_size if controller else settings.batch_events)
                     logging.info("=" * 80)
                     
                     events = fetch_events_via_pubsub(
@@ -97,7 +245,13 @@ def main(myTimer: func.TimerRequest) -> None:
                         tenant_id=tenant_id,
                         topic_name=topic,
                         replay_id=replay_id,
-                        max_events=100,
+                        max_events=settings.batch_events,
+                        controller=controller,
+                        token_provider=refresh_access_token,
+                        max_retries=settings.pubsub_max_retries,
+                        retry_base_seconds=settings.pubsub_retry_base_seconds,
+                        dead_letters=dead_letters,
+                        client=pubsub_client,
                     )
                     
                     logging.info("=" * 80)
@@ -108,45 +262,114 @@ def main(myTimer: func.TimerRequest) -> None:
                         logging.info("  - first event keys: %s", list(events[0].keys()) if events else "N/A")
                     logging.info("=" * 80)
 
-                for event in events:
-                    collected.append(event)
-                    # Track latest replay_id for this topic
-                    latest_per_topic[topic] = event["replay_id"]
-
-                logging.info("Fetched %d events from topic %s", len(events), topic)
+                collect(topic, events)
 
             except Exception as e:
                 logging.error("Error fetching events from topic %s: %s", topic, e)
+                # Don't learn from a partial run
+                controllers.pop(topic, None)
                 continue
 
+        if pubsub_client is not None:
+            # Left on the shared client by managed subscriptions
+            dead_letters.extend(pubsub_client.dead_letters)
+
+        snowflake_events = []
         if collected:
             # Transform events for Snowflake
-            snowflake_events = transform_for_snowflake(collected)
+            # Shared delete channels are routed by payload / key prefix (ENTITYIDMAP loaded only if needed)
+            router = EventRouter(prefix_loader=lambda: snowflake_conn.fetch_key_prefixes(
+                settings.entity_id_map_table,
+                settings.entity_id_map_prefix_column,
+                settings.entity_id_map_object_column,
+            ))
+            snowflake_events = transform_for_snowflake(collected, router, dead_letters)
             logging.info("Transformed %d events for Snowflake", len(snowflake_events))
-            
-            # Insert events to Snowflake
-            try:
-                inserted = snowflake_conn.insert_events(snowflake_events)
-                logging.info("Successfully inserted %d events into Snowflake %s.%s.%s", 
-                            inserted, 
-                            settings.snowflake_database, 
-                            settings.snowflake_schema, 
-                            settings.snowflake_table)
-            except Exception as e:
-                logging.error("Error inserting events to Snowflake: %s", e)
-                # Don't update cursors if insert failed
-                raise
+
+        if dead_letters:
+            # Written before the insert so a failure here leaves nothing loaded twice on the next run
+            DeadLetterStore(snowflake_conn.connection).add_all(dead_letters)
+            # Stored, so the cursors can move past them (a trailing bad event isn't re-fetched every run)
+            advance_past_dead_letters(latest_per_topic, dead_letters)
+
+        if snowflake_events:
+            if spill is not None:
+                # Durable once spilled, so replay positions can advance before the load
+                spill.append(snowflake_events)
+            else:
+                # Insert events to Snowflake
+                try:
+                    load(snowflake_events)
+                except Exception as e:
+                    logging.error("Error inserting events to Snowflake: %s", e)
+                    # Don't update cursors if insert failed
+                    raise
         else:
             logging.info("No new events to process.")
 
+        # Commit managed subscriptions once per topic; a failed commit falls back to cursor_store
+        for topic, session in managed_sessions.items():
+            replay_id = latest_per_topic.pop(topic, None)
+            if replay_id and not session.commit(replay_id):
+                logging.warning("Saving replay_id for %s to cursor_store instead", topic)
+                latest_per_topic[topic] = replay_id
+
         # Update cursors in Snowflake (only if we successfully processed events or had no errors)
         for topic, replay_id in latest_per_topic.items():
-            cursor_store.set(topic, replay_id)
+            get_cursor_store().set(topic, replay_id)
+
+        if spill is not None:
+            try:
+                spill.drain(load)
+            except Exception as e:
+                logging.error("Error loading spilled events to Snowflake (kept in %s for the next run): %s",
+                              settings.spill_dir, e)
+                raise
+
+        if settings.apply_deletes and loaded_objects:
+            # Only objects that received new deletes; quiet runs call no procedures at all
+            try:
+                try:
+                    procedures = snowflake_conn.fetch_delete_procedures(
+                        settings.entity_mapping_table,
+                        settings.entity_mapping_object_column,
+                        settings.entity_mapping_procedure_column,
+                    )
+                except Exception as e:
+                    logging.warning("Could not load delete procedures from %s, using the built-in map: %s",
+                                    settings.entity_mapping_table, e)
+                    procedures = {}
+                applier = DeleteApplier(snowflake_conn.connection, settings.execution_tracker_table, procedures)
+                applier.record(applier.apply(loaded_objects))
+            except Exception as e:
+                # Events and cursors are saved; the tracker rows stay 'open' for the next apply
+                logging.error("Error applying deletes for %s: %s", ", ".join(sorted(loaded_objects)), e)
+
+        if collected:
+            # Attribute the single batched insert to topics by event count
+            for topic, controller in controllers.items():
+                count = events_per_topic.get(topic, 0)
+                controller.record_insert(count, insert_seconds * count / len(collected))
+
+        if tuning_store and controllers:
+            for controller in controllers.values():
+                controller.finish_run()
+            try:
+                tuning_store.save(list(controllers.values()))
+            except Exception as e:
+                logging.warning("Could not save batch tuning: %s", e)
             
     except Exception as e:
         logging.error("Fatal error in synchronizer: %s", e)
+        if is_session_expired_error(e):
+            # Don't hand an expired session to the next warm invocation
+            snowflake_conn.invalidate()
         raise
     finally:
+        for session in managed_sessions.values():
+            session.close()
+        if pubsub_client is not None:
+            pubsub_client.close()
         snowflake_conn.close()
 
     logging.info("Salesforce Delete Synchronizer completed at %s", datetime.datetime.utcnow().isoformat())
@@ -0,0 +1,70 @@
+"""
+Run the delete synchronizer, notification engine and validator test suites in one pytest session.
+
+Each Function app keeps its tests in a top-level ``tests`` package, and the
+delete synchronizer and notification engine import their code as the top-level
+``src`` package (``src/`` here, ``notification_engine/src/``), so modules such
+as ``src.snowflake.connector`` and ``tests.test_connection_manager`` exist in
+more than one app. While a test module is collected or a test runs, its app's
+``src`` and ``tests`` modules are swapped into ``sys.modules`` and its directory
+is put first on ``sys.path``; the other apps' modules are set aside until needed.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+from types import ModuleType
+from typing import Dict, Optional
+
+import pytest
+
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# App directories, most specific first
+_APPS = (os.path.join(_ROOT, "notification_engine"), os.path.join(_ROOT, "validation"), _ROOT)
+
+# Top-level packages more than one app defines
+_APP_PACKAGES = ("src", "tests")
+
+_set_aside: Dict[str, Dict[str, ModuleType]] = {app: {} for app in _APPS}
+_active: Optional[str] = None
+
+
+def _app_for(path) -> str:
+    path = os.path.abspath(str(path))
+    for app in _APPS:
+        if path == app or path.startswith(app + os.sep):
+            return app
+    return _ROOT
+
+
+def _is_app_module(name: str) -> bool:
+    return name.split(".", 1)[0] in _APP_PACKAGES
+
+
+def _activate(app: str) -> None:
+    """Make ``src`` and ``tests`` resolve to the given app's packages"""
+    global _active
+    if app == _active:
+        return
+
+    loaded = {name: module for name, module in sys.modules.items() if _is_app_module(name)}
+    for name in loaded:
+        del sys.modules[name]
+    if _active is not None:
+        _set_aside[_active] = loaded
+        sys.path.remove(_active)
+
+    sys.modules.update(_set_aside[app])
+    sys.path.insert(0, app)
+    _active = app
+
+
+def pytest_collectstart(collector) -> None:
+    _activate(_app_for(collector.path))
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_protocol(item, nextitem) -> None:
+    _activate(_app_for(item.path))
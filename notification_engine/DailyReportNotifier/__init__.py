@@ -1,9 +1,11 @@
 import azure.functions as func
 import logging
 from datetime import datetime, timedelta
+from ..src.config.settings import Settings
 from ..src.snowflake.connector import SnowflakeConnector
 from ..src.email.email_service import EmailService
-from ..src.processors.report_processor import ReportProcessor
+from ..src.processors.report_processor import ReportAccumulator, ReportProcessor
+from ..src.processors.trends import build_trends
 
 def main(mytimer: func.TimerRequest) -> None:
     """
@@ -15,6 +17,7 @@ def main(mytimer: func.TimerRequest) -> None:
     if mytimer.past_due:
         logging.info('The timer is past due!')
     
+    snowflake_conn = None
     try:
         # Get yesterday's date for reporting
         yesterday = (datetime.utcnow() - timedelta(days=1)).date()
@@ -25,23 +28,50 @@ def main(mytimer: func.TimerRequest) -> None:
         email_service = EmailService()
         report_processor = ReportProcessor()
         
-        # Fetch execution records from Snowflake
-        records = snowflake_conn.fetch_daily_executions(yesterday)
-        logging.info(f'Retrieved {len(records)} execution records')
+        if Settings.REPORT_PROCESSOR_MODE == 'sql':
+            # Consolidate inside Snowflake with one aggregating query
+            report_data = snowflake_conn.fetch_consolidated_report(yesterday)
+            logging.info(f'Consolidated {len(report_data)} report rows in Snowflake')
+            
+            if not report_data:
+                logging.info('No execution records found for yesterday. Skipping email.')
+                return
+        else:
+            # Stream execution records from Snowflake, consolidating as they arrive
+            accumulator = ReportAccumulator(report_processor)
+            accumulator.add_all(snowflake_conn.iter_daily_executions(yesterday))
+            logging.info(f'Retrieved {accumulator.record_count} execution records')
+            
+            if not accumulator.record_count:
+                logging.info('No execution records found for yesterday. Skipping email.')
+                return
+            
+            # Consolidated report rows
+            report_data = accumulator.rows()
         
-        if not records:
-            logging.info('No execution records found for yesterday. Skipping email.')
-            return
+        # Maintain the daily rollup and render N-day trends from it (no EXECUTION_TRACKER rescan)
+        trends = None
+        if Settings.TREND_DAYS > 0:
+            try:
+                snowflake_conn.update_daily_rollup(yesterday)
+                trend_start = yesterday - timedelta(days=Settings.TREND_DAYS - 1)
+                trends = build_trends(snowflake_conn.fetch_rollup(trend_start, yesterday), trend_start, yesterday)
+            except Exception as e:
+                logging.warning(f'Trends unavailable, sending report without them: {str(e)}')
         
-        # Process records into consolidated report
-        report_data = report_processor.consolidate_executions(records)
+        # Per-owner digests (ENTITYMAPPING.MAIL_ID) in addition to the subscriber report
+        owners = snowflake_conn.fetch_object_owners() if Settings.OWNER_DIGESTS else None
         
         # Generate and send email
-        email_service.send_daily_report(yesterday, report_data)
+        email_service.send_daily_report(yesterday, report_data, owners, trends, Settings.TREND_DAYS)
         
         logging.info('Daily report sent successfully')
         
     except Exception as e:
         logging.error(f'Error in Daily Report Notifier: {str(e)}', exc_info=True)
         raise
+    finally:
+        # Hand the pooled session back (rolled back / reset) for the next warm invocation
+        if snowflake_conn is not None:
+            snowflake_conn.close()
 
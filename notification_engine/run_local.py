@@ -80,9 +80,11 @@ def load_settings():
 
 def run_report(target_date):
     """Run the daily report for a specific date"""
+    from src.config.settings import Settings
     from src.snowflake.connector import SnowflakeConnector
     from src.email.email_service import EmailService
-    from src.processors.report_processor import ReportProcessor
+    from src.processors.report_processor import ReportAccumulator, ReportProcessor
+    from src.processors.trends import build_trends
     
     logging.info(f'Generating report for date: {target_date}')
     
@@ -92,18 +94,26 @@ def run_report(target_date):
         email_service = EmailService()
         report_processor = ReportProcessor()
         
-        # Fetch execution records from Snowflake
-        logging.info('Fetching execution records from Snowflake...')
-        records = snowflake_conn.fetch_daily_executions(target_date)
-        logging.info(f'Retrieved {len(records)} execution records')
-        
-        if not records:
-            logging.info('No execution records found for this date. No email sent.')
-            return
-        
-        # Process records into consolidated report
-        logging.info('Processing and consolidating records...')
-        report_data = report_processor.consolidate_executions(records)
+        if Settings.REPORT_PROCESSOR_MODE == 'sql':
+            # Consolidate inside Snowflake with one aggregating query
+            logging.info('Consolidating execution records in Snowflake...')
+            report_data = snowflake_conn.fetch_consolidated_report(target_date)
+            
+            if not report_data:
+                logging.info('No execution records found for this date. No email sent.')
+                return
+        else:
+            # Stream execution records from Snowflake, consolidating as they arrive
+            logging.info('Fetching and consolidating execution records from Snowflake...')
+            accumulator = ReportAccumulator(report_processor)
+            accumulator.add_all(snowflake_conn.iter_daily_executions(target_date))
+            logging.info(f'Retrieved {accumulator.record_count} execution records')
+            
+            if not accumulator.record_count:
+                logging.info('No execution records found for this date. No email sent.')
+                return
+            
+            report_data = accumulator.rows()
         logging.info(f'Consolidated into {len(report_data)} report rows')
         
         # Display report preview
@@ -116,9 +126,20 @@ def run_report(target_date):
                         f"Status={row['status']}")
         logging.info('--- End Preview ---\n')
         
+        # Maintain the daily rollup and render N-day trends from it (no EXECUTION_TRACKER rescan)
+        trends = None
+        if Settings.TREND_DAYS > 0:
+            try:
+                snowflake_conn.update_daily_rollup(target_date)
+                trend_start = target_date - timedelta(days=Settings.TREND_DAYS - 1)
+                trends = build_trends(snowflake_conn.fetch_rollup(trend_start, target_date), trend_start, target_date)
+            except Exception as e:
+                logging.warning(f'Trends unavailable, sending report without them: {str(e)}')
+        
         # Generate and send email
         logging.info('Sending email...')
-        email_service.send_daily_report(target_date, report_data)
+        owners = snowflake_conn.fetch_object_owners() if Settings.OWNER_DIGESTS else None
+        email_service.send_daily_report(target_date, report_data, owners, trends, Settings.TREND_DAYS)
         
         logging.info('✅ Daily report sent successfully!')
         
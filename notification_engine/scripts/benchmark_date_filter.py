@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark: DATE(INSERTED_DATE) = ? versus a half-open INSERTED_DATE range.
+
+Builds a synthetic EXECUTION_TRACKER in SQLite (an index on INSERTED_DATE
+stands in for Snowflake's micro-partition pruning, since the table is
+naturally clustered by insertion time) and runs the daily and weekly
+report queries both ways, reporting the query plan, the amount of work the
+engine did (VM steps) and wall time.
+
+Usage:
+    python scripts/benchmark_date_filter.py
+    python scripts/benchmark_date_filter.py --rows 1000000 --days 365
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.snowflake.connector import EXECUTION_COLUMNS, date_range_filter
+
+TYPES = ['adf/upsert/Account', 'adf/upsert/Event', 'adf/upsert/Task', 'azure_func/delete/', 'azure_func/validation']
+
+# The progress handler fires every PROGRESS_STEP VM instructions
+PROGRESS_STEP = 1000
+
+
+def build_tracker(conn, rows, days, end_date):
+    """Create and fill EXECUTION_TRACKER with rows spread evenly over the last `days` days"""
+    conn.execute("""
+        CREATE TABLE EXECUTION_TRACKER (
+            ID INTEGER PRIMARY KEY, TYPE TEXT, STATUS TEXT, LOG_MESSAGE TEXT,
+            REPORT TEXT, OBJECT_NAME TEXT, INSERTED_DATE TEXT
+        )
+    """)
+    start = datetime.combine(end_date - timedelta(days=days - 1), datetime.min.time())
+    step = timedelta(days=days) / rows
+    rng = random.Random(42)
+
+    def generate():
+        for i in range(rows):
+            record_type = rng.choice(TYPES)
+            report = json.dumps({'inserted': rng.randint(0, 500), 'updated': rng.randint(0, 50),
+                                 'note': 'x' * rng.randint(50, 300)})
+            yield (i + 1, record_type, 'Success', '', report, record_type.split('/')[-1],
+                   str(start + step * i))
+
+    conn.executemany("INSERT INTO EXECUTION_TRACKER VALUES (?, ?, ?, ?, ?, ?, ?)", generate())
+    conn.execute("CREATE INDEX IDX_EXECUTION_TRACKER_INSERTED_DATE ON EXECUTION_TRACKER (INSERTED_DATE)")
+    conn.commit()
+
+
+def run_query(conn, query, params):
+    """Return (plan, rows returned, VM steps, elapsed ms) for a query"""
+    plan = ' / '.join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params))
+
+    steps = [0]
+
+    def count_step():
+        steps[0] += PROGRESS_STEP
+        return 0
+
+    conn.set_progress_handler(count_step, PROGRESS_STEP)
+    started = time.perf_counter()
+    returned = sum(1 for _ in conn.execute(query, params))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    conn.set_progress_handler(None, 0)
+    return plan, returned, steps[0], elapsed_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=200000, help='Synthetic tracker rows')
+    parser.add_argument('--days', type=int, default=365, help='Days of history the rows span')
+    args = parser.parse_args()
+
+    end_date = date(2025, 11, 3)
+    conn = sqlite3.connect(':memory:')
+    print(f'Building EXECUTION_TRACKER with {args.rows:,} rows over {args.days} days...')
+    build_tracker(conn, args.rows, args.days, end_date)
+
+    columns = ', '.join(EXECUTION_COLUMNS)
+    scenarios = [('daily', end_date, end_date), ('weekly', end_date - timedelta(days=6), end_date)]
+
+    for label, start_date, last_date in scenarios:
+        where_clause, params = date_range_filter(start_date, last_date, placeholder='?')
+        variants = {
+            'DATE() filter': (
+                f"SELECT {columns} FROM EXECUTION_TRACKER "
+                f"WHERE DATE(INSERTED_DATE) BETWEEN ? AND ? ORDER BY INSERTED_DATE, ID",
+                (start_date.isoformat(), last_date.isoformat())
+            ),
+            'half-open range': (
+                f"SELECT {columns} FROM EXECUTION_TRACKER WHERE {where_clause} ORDER BY INSERTED_DATE, ID",
+                tuple(str(value) for value in params)
+            ),
+        }
+
+        print(f'\n{label} report ({start_date} to {last_date}):')
+        results = {}
+        for name, (query, query_params) in variants.items():
+            plan, returned, steps, elapsed_ms = run_query(conn, query, query_params)
+            results[name] = (returned, steps)
+            print(f'  {name:<16} rows={returned:<8,} vm_steps~{steps:<12,} {elapsed_ms:8.1f} ms  plan: {plan}')
+
+        if results['DATE() filter'][0] != results['half-open range'][0]:
+            print('  WARNING: the two filters returned different row counts')
+        reduction = results['DATE() filter'][1] / max(results['half-open range'][1], PROGRESS_STEP)
+        print(f'  work reduction: {reduction:,.0f}x')
+
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -10,6 +10,7 @@ class Settings:
     SNOWFLAKE_WAREHOUSE = os.getenv('SNOWFLAKE_WAREHOUSE')
     SNOWFLAKE_DATABASE = os.getenv('SNOWFLAKE_DATABASE', 'IC_CRM_DB')
     SNOWFLAKE_SCHEMA = os.getenv('SNOWFLAKE_SCHEMA', 'IC_CRM')
+    FETCH_BATCH_SIZE = int(os.getenv('FETCH_BATCH_SIZE', '500'))
     
     # Email settings
     SMTP_HOST = os.getenv('SMTP_HOST')
@@ -19,6 +20,16 @@ class Settings:
     SMTP_USE_TLS = os.getenv('SMTP_USE_TLS', 'true').lower() == 'true'
     SENDER_EMAIL = os.getenv('SENDER_EMAIL')
     SUBSCRIBER_EMAILS = os.getenv('SUBSCRIBER_EMAILS', '').split(',')
+    SMTP_MAX_CONNECTIONS = int(os.getenv('SMTP_MAX_CONNECTIONS', '2'))
+    SMTP_MAX_RETRIES = int(os.getenv('SMTP_MAX_RETRIES', '3'))
+    # Also send each ENTITYMAPPING.MAIL_ID owner a digest of just their objects
+    OWNER_DIGESTS = os.getenv('OWNER_DIGESTS', 'false').lower() == 'true'
+    
+    # Days of history shown as trends (from EXECUTION_DAILY_ROLLUP); 0 disables the rollup and trends
+    TREND_DAYS = int(os.getenv('TREND_DAYS', '0'))
+    
+    # Report consolidation: 'python' (ReportProcessor) or 'sql' (pushed down into Snowflake)
+    REPORT_PROCESSOR_MODE = os.getenv('REPORT_PROCESSOR_MODE', 'python').lower()
     
     @classmethod
     def validate(cls):
@@ -41,4 +52,7 @@ class Settings:
         
         if not cls.SUBSCRIBER_EMAILS or cls.SUBSCRIBER_EMAILS == ['']:
             raise ValueError("SUBSCRIBER_EMAILS must contain at least one email")
+        
+        if cls.REPORT_PROCESSOR_MODE not in ('python', 'sql'):
+            raise ValueError("REPORT_PROCESSOR_MODE must be 'python' or 'sql'")
 
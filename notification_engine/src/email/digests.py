@@ -0,0 +1,86 @@
+import re
+from typing import Any, Dict, Iterable, List, Tuple
+
+_MAIL_ID_SEPARATORS = re.compile(r'[,;\s]+')
+
+
+class Digest:
+    """A report (subset) and the recipients that receive it"""
+
+    def __init__(self, recipients: List[str], rows: List[Dict[str, Any]], full_report: bool = False):
+        self.recipients = recipients
+        self.rows = rows
+        self.full_report = full_report
+
+    def __repr__(self):
+        return f'Digest(recipients={self.recipients}, objects={len(self.rows)}, full_report={self.full_report})'
+
+
+def parse_mail_ids(value: str) -> List[str]:
+    """Split an ENTITYMAPPING.MAIL_ID value (comma/semicolon/space separated) into addresses"""
+    return [address for address in _MAIL_ID_SEPARATORS.split(value or '') if address]
+
+
+def build_object_owners(mappings: Iterable[Tuple[str, str, str]]) -> Dict[str, List[str]]:
+    """
+    Build a lookup of object name -> owner emails from ENTITYMAPPING rows.
+
+    Report rows are named after either the entity or its Salesforce object,
+    so both names are indexed (case-insensitively).
+
+    Args:
+        mappings: (ENTITYNAME, MAPPINGTO_SALESFORCE, MAIL_ID) tuples
+
+    Returns:
+        Dict of lowercased object name to owner email addresses
+    """
+    owners: Dict[str, List[str]] = {}
+    for entity_name, sf_object, mail_id in mappings:
+        addresses = parse_mail_ids(mail_id)
+        for name in (entity_name, sf_object):
+            if not name:
+                continue
+            entry = owners.setdefault(name.lower(), [])
+            entry.extend(address for address in addresses if address not in entry)
+    return owners
+
+
+def build_digests(report_data: List[Dict[str, Any]], subscribers: List[str],
+                  owners: Dict[str, List[str]] = None) -> List[Digest]:
+    """
+    Split the report into one digest per group of recipients.
+
+    Subscribers receive the full report in a single message, as before. Object
+    owners who are not subscribers receive only the rows for the objects they
+    own; owners whose filtered rows are identical share one digest, which is
+    rendered once and delivered to each of them separately (see EmailService).
+
+    Args:
+        report_data: Consolidated report rows
+        subscribers: Addresses that receive the full report
+        owners: Lowercased object name -> owner addresses (see build_object_owners)
+
+    Returns:
+        List of digests to deliver
+    """
+    digests = []
+    if subscribers:
+        digests.append(Digest(list(subscribers), report_data, full_report=True))
+
+    subscribed = {address.lower() for address in subscribers}
+    rows_by_owner: Dict[str, List[Dict[str, Any]]] = {}
+    for row in report_data:
+        for address in (owners or {}).get(str(row['object_name']).lower(), []):
+            if address.lower() not in subscribed:
+                rows_by_owner.setdefault(address, []).append(row)
+
+    # Group owners that would receive exactly the same rows
+    groups: Dict[Tuple[int, ...], Digest] = {}
+    for address, rows in rows_by_owner.items():
+        key = tuple(id(row) for row in rows)
+        if key in groups:
+            groups[key].recipients.append(address)
+        else:
+            groups[key] = Digest([address], rows)
+    digests.extend(groups.values())
+    return digests
@@ -1,59 +1,99 @@
 import logging
-import smtplib
 from datetime import date
 from typing import List, Dict, Any
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from ..config.settings import Settings
+from .digests import Digest, build_digests
 from .email_template import EmailTemplate
+from .smtp_pool import SmtpDeliveryPool
 
 class EmailService:
     """Handles email notifications via SMTP"""
-    
-    def __init__(self):
+
+    def __init__(self, smtp_factory=None):
         Settings.validate()
         self.sender = Settings.SENDER_EMAIL
         self.subscribers = [email.strip() for email in Settings.SUBSCRIBER_EMAILS if email.strip()]
-    
-    def send_daily_report(self, report_date: date, report_data: List[Dict[str, Any]]):
+        self.smtp_factory = smtp_factory
+
+    def _create_pool(self) -> SmtpDeliveryPool:
+        return SmtpDeliveryPool(
+            host=Settings.SMTP_HOST,
+            port=Settings.SMTP_PORT,
+            username=Settings.SMTP_USERNAME,
+            password=Settings.SMTP_PASSWORD,
+            use_tls=Settings.SMTP_USE_TLS,
+            max_connections=Settings.SMTP_MAX_CONNECTIONS,
+            max_retries=Settings.SMTP_MAX_RETRIES,
+            smtp_factory=self.smtp_factory
+        )
+
+    def _build_message(self, report_date: date, digest: Digest, trends: List[Dict[str, Any]] = None,
+                       trend_days: int = 0) -> MIMEMultipart:
+        if trends and not digest.full_report:
+            # Owners only see trends for the objects in their digest
+            objects = {row['object_name'] for row in digest.rows}
+            trends = [trend for trend in trends if trend['object_name'] in objects]
+
+        subject = f"Daily Execution Report - {report_date.strftime('%Y-%m-%d')}"
+        if not digest.full_report:
+            subject += ' (your objects)'
+
+        message = MIMEMultipart('alternative')
+        message['Subject'] = subject
+        message['From'] = self.sender
+        message['To'] = ', '.join(digest.recipients)
+        message.attach(MIMEText(EmailTemplate.generate_report_html(report_date, digest.rows, trends, trend_days), 'html'))
+        return message
+
+    def send_daily_report(self, report_date: date, report_data: List[Dict[str, Any]],
+                          owners: Dict[str, List[str]] = None, trends: List[Dict[str, Any]] = None,
+                          trend_days: int = 0):
         """
         Send daily consolidated execution report to subscribers.
-        
+
+        Subscribers get the full report; object owners (from ENTITYMAPPING.MAIL_ID)
+        get a digest filtered to their objects. Owners sharing a digest get the same
+        rendered message in separate envelopes, each addressed only to them. All
+        messages go out over a pool of reused, authenticated SMTP sessions.
+
         Args:
             report_date: The date the report covers
             report_data: List of report rows with keys: object_name, inserted, updated, deleted, status, log_message
+            owners: Optional lowercased object name -> owner emails for per-owner digests
+            trends: Optional per-object trend rows rendered as sparklines
+            trend_days: Length of the trend window
         """
-        if not self.subscribers:
+        digests = build_digests(report_data, self.subscribers, owners)
+        if not digests:
             logging.warning('No subscribers configured. Skipping email.')
             return
-        
-        # Generate email content
-        subject = f"Daily Execution Report - {report_date.strftime('%Y-%m-%d')}"
-        html_content = EmailTemplate.generate_report_html(report_date, report_data)
-        
-        # Create message
-        message = MIMEMultipart('alternative')
-        message['Subject'] = subject
-        message['From'] = self.sender
-        message['To'] = ', '.join(self.subscribers)
-        
-        # Attach HTML content
-        html_part = MIMEText(html_content, 'html')
-        message.attach(html_part)
-        
-        try:
-            # Connect to SMTP server and send
-            with smtplib.SMTP(Settings.SMTP_HOST, Settings.SMTP_PORT) as server:
-                if Settings.SMTP_USE_TLS:
-                    server.starttls()
-                
-                server.login(Settings.SMTP_USERNAME, Settings.SMTP_PASSWORD)
-                server.sendmail(self.sender, self.subscribers, message.as_string())
-            
-            logging.info(f'Email sent successfully via SMTP ({Settings.SMTP_HOST}:{Settings.SMTP_PORT})')
-            logging.info(f'Sent to: {", ".join(self.subscribers)}')
-            
-        except Exception as e:
-            logging.error(f'Failed to send email via SMTP: {str(e)}')
-            raise
 
+        deliveries = []
+        sent_digests = []
+        for digest in digests:
+            message = self._build_message(report_date, digest, trends, trend_days)
+            # Owners don't see each other's addresses; subscribers share one message as before
+            envelopes = [digest.recipients] if digest.full_report else [[address] for address in digest.recipients]
+            for recipients in envelopes:
+                message.replace_header('To', ', '.join(recipients))
+                deliveries.append((self.sender, recipients, message.as_string()))
+                sent_digests.append(digest)
+
+        with self._create_pool() as pool:
+            errors = pool.send_all(deliveries)
+
+        failed = 0
+        for (_, recipients, _), digest, error in zip(deliveries, sent_digests, errors):
+            if error is None:
+                logging.info(f'Sent to: {", ".join(recipients)} ({len(digest.rows)} objects)')
+            else:
+                logging.error(f'Failed to send email to {", ".join(recipients)}: {str(error)}')
+                failed += 1
+
+        logging.info(f'Sent {len(deliveries) - failed}/{len(deliveries)} emails via SMTP '
+                     f'({Settings.SMTP_HOST}:{Settings.SMTP_PORT}, {pool.sessions_opened} session(s))')
+
+        if failed:
+            raise Exception(f'Failed to send {failed} of {len(deliveries)} report emails')
@@ -1,51 +1,16 @@
+import html
+import io
 from datetime import date
-from typing import List, Dict, Any
+from typing import List, Dict, Any, TextIO
 
-class EmailTemplate:
-    """HTML email template generator"""
-    
-    @staticmethod
-    def generate_report_html(report_date: date, report_data: List[Dict[str, Any]]) -> str:
-        """
-        Generate HTML email content with execution report table.
-        
-        Args:
-            report_date: The date the report covers
-            report_data: List of report rows
-            
-        Returns:
-            HTML string
-        """
-        # Generate table rows
-        rows_html = []
-        for row in report_data:
-            status_class = 'status-success' if row['status'].lower() == 'success' else 'status-error'
-            
-            rows_html.append(f"""
-                <tr>
-                    <td>{row['object_name']}</td>
-                    <td class="number">{row['inserted']}</td>
-                    <td class="number">{row['updated']}</td>
-                    <td class="number">{row['deleted']}</td>
-                    <td class="{status_class}">{row['status']}</td>
-                    <td class="log-message">{row['log_message']}</td>
-                </tr>
-            """)
-        
-        table_rows = '\n'.join(rows_html)
-        
-        # Calculate summary stats
-        total_inserted = sum(row['inserted'] for row in report_data)
-        total_updated = sum(row['updated'] for row in report_data)
-        total_deleted = sum(row['deleted'] for row in report_data)
-        failed_count = sum(1 for row in report_data if row['status'].lower() != 'success')
-        
-        html = f"""
+# Static parts of the document are built once at import time; only the summary
+# values and the table rows are rendered per report.
+_DOCUMENT_HEAD = """
         <!DOCTYPE html>
         <html>
         <head>
             <style>
-                body {{
+                body {
                     font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
                     line-height: 1.6;
                     color: #333;
@@ -53,23 +18,23 @@ class EmailTemplate:
                     margin: 0 auto;
                     padding: 20px;
                     background-color: #f5f5f5;
-                }}
-                .container {{
+                }
+                .container {
                     background-color: white;
                     border-radius: 8px;
                     padding: 30px;
                     box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-                }}
-                h1 {{
+                }
+                h1 {
                     color: #2c3e50;
                     margin-bottom: 10px;
-                }}
-                .date {{
+                }
+                .date {
                     color: #7f8c8d;
                     font-size: 14px;
                     margin-bottom: 20px;
-                }}
-                .summary {{
+                }
+                .summary {
                     background-color: #f8f9fa;
                     padding: 15px;
                     border-radius: 6px;
@@ -77,76 +42,89 @@ class EmailTemplate:
                     display: flex;
                     gap: 30px;
                     flex-wrap: wrap;
-                }}
-                .summary-item {{
+                }
+                .summary-item {
                     flex: 1;
                     min-width: 150px;
-                }}
-                .summary-label {{
+                }
+                .summary-label {
                     font-size: 12px;
                     color: #6c757d;
                     text-transform: uppercase;
                     margin-bottom: 5px;
-                }}
-                .summary-value {{
+                }
+                .summary-value {
                     font-size: 24px;
                     font-weight: bold;
                     color: #2c3e50;
-                }}
-                .summary-value.error {{
+                }
+                .summary-value.error {
                     color: #dc3545;
-                }}
-                table {{
+                }
+                table {
                     width: 100%;
                     border-collapse: collapse;
                     margin-top: 20px;
-                }}
-                th {{
+                }
+                th {
                     background-color: #2c3e50;
                     color: white;
                     padding: 12px;
                     text-align: left;
                     font-weight: 600;
-                }}
-                td {{
+                }
+                td {
                     padding: 12px;
                     border-bottom: 1px solid #dee2e6;
-                }}
-                tr:hover {{
+                }
+                tr:hover {
                     background-color: #f8f9fa;
-                }}
-                .number {{
+                }
+                .number {
                     text-align: right;
                     font-family: 'Courier New', monospace;
-                }}
-                .status-success {{
+                }
+                .status-success {
                     color: #28a745;
                     font-weight: 600;
-                }}
-                .status-error {{
+                }
+                .status-error {
                     color: #dc3545;
                     font-weight: 600;
-                }}
-                .log-message {{
+                }
+                .log-message {
                     font-size: 13px;
                     color: #6c757d;
                     max-width: 300px;
                     word-wrap: break-word;
-                }}
-                .footer {{
+                }
+                .sparkline {
+                    font-family: 'Courier New', monospace;
+                    font-size: 16px;
+                    letter-spacing: 1px;
+                    color: #2c3e50;
+                }
+                h2 {
+                    color: #2c3e50;
+                    font-size: 18px;
+                    margin-top: 30px;
+                }
+                .footer {
                     margin-top: 30px;
                     padding-top: 20px;
                     border-top: 1px solid #dee2e6;
                     font-size: 12px;
                     color: #6c757d;
                     text-align: center;
-                }}
+                }
             </style>
         </head>
         <body>
             <div class="container">
                 <h1>Daily Execution Report</h1>
-                <div class="date">Report Date: {report_date.strftime('%A, %B %d, %Y')}</div>
+"""
+
+_SUMMARY_TEMPLATE = """                <div class="date">Report Date: {report_date}</div>
                 
                 <div class="summary">
                     <div class="summary-item">
@@ -163,7 +141,7 @@ class EmailTemplate:
                     </div>
                     <div class="summary-item">
                         <div class="summary-label">Failed Executions</div>
-                        <div class="summary-value{'error' if failed_count > 0 else ''}">{failed_count}</div>
+                        <div class="{failed_class}">{failed_count}</div>
                     </div>
                 </div>
                 
@@ -179,17 +157,141 @@ class EmailTemplate:
                         </tr>
                     </thead>
                     <tbody>
-                        {table_rows}
-                    </tbody>
+"""
+
+_ROW_TEMPLATE = """                        <tr>
+                            <td>{object_name}</td>
+                            <td class="number">{inserted}</td>
+                            <td class="number">{updated}</td>
+                            <td class="number">{deleted}</td>
+                            <td class="{status_class}">{status}</td>
+                            <td class="log-message">{log_message}</td>
+                        </tr>
+"""
+
+_TABLE_TAIL = """                    </tbody>
                 </table>
-                
+"""
+
+_TRENDS_HEAD = """                
+                <h2>Trends (last {days} days)</h2>
+                <table>
+                    <thead>
+                        <tr>
+                            <th>Object Name</th>
+                            <th>Daily Changes</th>
+                            <th style="text-align: right;">Total Changes</th>
+                            <th>Daily Failures</th>
+                            <th style="text-align: right;">Days With Failures</th>
+                        </tr>
+                    </thead>
+                    <tbody>
+"""
+
+_TREND_ROW_TEMPLATE = """                        <tr>
+                            <td>{object_name}</td>
+                            <td class="sparkline">{activity_sparkline}</td>
+                            <td class="number">{total_activity:,}</td>
+                            <td class="sparkline">{failure_sparkline}</td>
+                            <td class="number">{failure_days}</td>
+                        </tr>
+"""
+
+_DOCUMENT_TAIL = """                
                 <div class="footer">
                     This is an automated report generated by the Notification Engine.
                 </div>
             </div>
         </body>
         </html>
+"""
+
+
+def _escape(value: Any) -> str:
+    """HTML-escape a value for element content or attributes (None renders as empty)"""
+    return html.escape('' if value is None else str(value))
+
+
+def _is_success(row: Dict[str, Any]) -> bool:
+    return (row['status'] or '').lower() == 'success'
+
+
+class EmailTemplate:
+    """HTML email template generator"""
+    
+    @staticmethod
+    def generate_report_html(report_date: date, report_data: List[Dict[str, Any]],
+                             trends: List[Dict[str, Any]] = None, trend_days: int = 0) -> str:
         """
+        Generate HTML email content with execution report table.
         
-        return html
-
+        Args:
+            report_date: The date the report covers
+            report_data: List of report rows
+            trends: Optional per-object trend rows rendered as sparklines
+            trend_days: Length of the trend window
+            
+        Returns:
+            HTML string
+        """
+        buffer = io.StringIO()
+        EmailTemplate.write_report_html(buffer, report_date, report_data, trends, trend_days)
+        return buffer.getvalue()
+    
+    @staticmethod
+    def write_report_html(out: TextIO, report_date: date, report_data: List[Dict[str, Any]],
+                          trends: List[Dict[str, Any]] = None, trend_days: int = 0):
+        """
+        Stream the report document into a text buffer, escaping all row values.
+        
+        Rows are written one at a time, so rendering stays linear in the number of rows.
+        
+        Args:
+            out: Writable text stream (e.g. io.StringIO)
+            report_date: The date the report covers
+            report_data: List of report rows
+            trends: Optional per-object trend rows (see processors.trends.build_trends)
+            trend_days: Length of the trend window, for the section heading
+        """
+        # Calculate summary stats
+        total_inserted = sum(row['inserted'] for row in report_data)
+        total_updated = sum(row['updated'] for row in report_data)
+        total_deleted = sum(row['deleted'] for row in report_data)
+        failed_count = sum(1 for row in report_data if not _is_success(row))
+        
+        out.write(_DOCUMENT_HEAD)
+        out.write(_SUMMARY_TEMPLATE.format(
+            report_date=report_date.strftime('%A, %B %d, %Y'),
+            total_inserted=total_inserted,
+            total_updated=total_updated,
+            total_deleted=total_deleted,
+            failed_class='summary-value error' if failed_count > 0 else 'summary-value',
+            failed_count=failed_count
+        ))
+        
+        for row in report_data:
+            out.write(_ROW_TEMPLATE.format(
+                object_name=_escape(row['object_name']),
+                inserted=_escape(row['inserted']),
+                updated=_escape(row['updated']),
+                deleted=_escape(row['deleted']),
+                status_class='status-success' if _is_success(row) else 'status-error',
+                status=_escape(row['status']),
+                log_message=_escape(row['log_message'])
+            ))
+        
+        out.write(_TABLE_TAIL)
+        
+        if trends:
+            out.write(_TRENDS_HEAD.format(days=trend_days))
+            for trend in trends:
+                out.write(_TREND_ROW_TEMPLATE.format(
+                    object_name=_escape(trend['object_name']),
+                    activity_sparkline=trend['activity_sparkline'],
+                    total_activity=trend['total_activity'],
+                    failure_sparkline=trend['failure_sparkline'],
+                    failure_days=trend['failure_days']
+                ))
+            out.write(_TABLE_TAIL)
+        
+        out.write(_DOCUMENT_TAIL)
@@ -0,0 +1,136 @@
+import logging
+import queue
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+
+def is_transient_smtp_error(error: Exception) -> bool:
+    """Return True for failures worth retrying (4xx replies, dropped connections, network errors)"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in error.recipients.values()]
+        return bool(codes) and all(400 <= code < 500 for code in codes)
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, (smtplib.SMTPServerDisconnected, OSError))
+
+
+class SmtpDeliveryPool:
+    """
+    Delivers messages over a small pool of reused, authenticated SMTP sessions.
+
+    Each session does TLS and login once and then sends many messages. At most
+    max_connections messages are in flight at once, one per session. Transient
+    failures drop the session and retry on a fresh one with exponential backoff;
+    permanent (5xx) failures are not retried.
+    """
+
+    def __init__(self, host: str, port: int, username: Optional[str] = None, password: Optional[str] = None,
+                 use_tls: bool = True, max_connections: int = 2, max_retries: int = 3,
+                 retry_backoff_seconds: float = 1.0, smtp_factory: Callable[..., smtplib.SMTP] = None):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.max_connections = max(1, max_connections)
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self._smtp_factory = smtp_factory or smtplib.SMTP
+        self._idle: 'queue.LifoQueue[smtplib.SMTP]' = queue.LifoQueue()
+        self.sessions_opened = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _open_session(self) -> smtplib.SMTP:
+        server = self._smtp_factory(self.host, self.port)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.username:
+                server.login(self.username, self.password)
+        except Exception:
+            self._discard(server)
+            raise
+        self.sessions_opened += 1
+        logging.info(f'Opened SMTP session to {self.host}:{self.port}')
+        return server
+
+    def _acquire(self) -> smtplib.SMTP:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._open_session()
+
+    def _discard(self, server: smtplib.SMTP):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def send(self, sender: str, recipients: List[str], message: str):
+        """
+        Send one message, retrying transient failures on a fresh session.
+
+        Args:
+            sender: Envelope sender
+            recipients: Envelope recipients
+            message: Serialized message (e.g. MIMEMultipart.as_string())
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            server = None
+            try:
+                server = self._acquire()
+                refused = server.sendmail(sender, recipients, message)
+                self._idle.put(server)
+                if refused:
+                    logging.warning(f'SMTP server refused recipients: {", ".join(refused)}')
+                return
+            except Exception as e:
+                if server is not None:
+                    self._discard(server)
+                if not is_transient_smtp_error(e) or attempt > self.max_retries:
+                    raise
+                delay = self.retry_backoff_seconds * (2 ** (attempt - 1))
+                logging.warning(f'Transient SMTP error ({e}); retrying in {delay:.1f}s '
+                                f'(attempt {attempt}/{self.max_retries})')
+                time.sleep(delay)
+
+    def send_all(self, deliveries: List[Tuple[str, List[str], str]]) -> List[Optional[Exception]]:
+        """
+        Send many messages with bounded concurrency.
+
+        Args:
+            deliveries: (sender, recipients, message) tuples
+
+        Returns:
+            One entry per delivery: None if sent, otherwise the final exception
+        """
+        def deliver(delivery):
+            try:
+                self.send(*delivery)
+                return None
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=min(self.max_connections, max(1, len(deliveries)))) as executor:
+            return list(executor.map(deliver, deliveries))
+
+    def close(self):
+        """Quit all idle sessions"""
+        while True:
+            try:
+                server = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(server)
@@ -1,70 +1,73 @@
 import json
 import logging
-from typing import List, Dict, Any
+from typing import Iterable, List, Dict, Any
 
 class ReportProcessor:
     """Process execution records into consolidated report format"""
     
-    def consolidate_executions(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def consolidate_executions(self, records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Consolidate multiple execution records into report rows.
         Each row contains: Object Name, Inserted, Updated, Deleted, Status, Log Message
         
         Args:
-            records: List of execution records from database
+            records: Execution records from database (any iterable, e.g. a streaming cursor)
             
         Returns:
             List of consolidated report rows
         """
-        consolidated = {}
+        accumulator = ReportAccumulator(self)
+        accumulator.add_all(records)
+        return accumulator.rows()
+    
+    def consolidate_record(self, record: Dict[str, Any], consolidated: Dict[str, Dict[str, Any]]):
+        """
+        Fold a single execution record into the consolidated rows (keyed by object name).
         
-        for record in records:
-            record_type = record.get('TYPE', '')
-            status = record.get('STATUS', '')
-            log_message = record.get('LOG_MESSAGE', '')
-            report_data = record.get('REPORT')
-            
-            # Parse the report JSON if it exists
-            if report_data:
-                if isinstance(report_data, str):
-                    try:
-                        report_data = json.loads(report_data)
-                    except json.JSONDecodeError:
-                        logging.warning(f'Failed to parse REPORT for record {record.get("ID")}')
-                        report_data = {}
-            else:
-                report_data = {}
-            
-            # Process based on type
-            if 'adf/upsert/' in record_type:
-                self._process_upsert(record_type, status, log_message, report_data, consolidated)
-            
-            elif 'azure_func/delete/' in record_type:
-                self._process_delete(record_type, status, log_message, report_data, consolidated)
-            
-            elif 'azure_func/validation' in record_type:
-                self._process_validation(record_type, status, log_message, report_data, consolidated)
-            
-            else:
-                # Generic fallback
-                object_name = record_type.split('/')[-1] if '/' in record_type else record_type
-                key = object_name
-                
-                if key not in consolidated:
-                    consolidated[key] = {
-                        'object_name': object_name,
-                        'inserted': 0,
-                        'updated': 0,
-                        'deleted': 0,
-                        'status': status,
-                        'log_message': log_message
-                    }
+        Args:
+            record: Execution record from database
+            consolidated: Report rows accumulated so far, updated in place
+        """
+        record_type = record.get('TYPE', '')
+        status = record.get('STATUS', '')
+        log_message = record.get('LOG_MESSAGE', '')
+        report_data = record.get('REPORT')
         
-        # Convert to list and sort by object name
-        report_list = list(consolidated.values())
-        report_list.sort(key=lambda x: x['object_name'])
+        # Parse the report JSON if it exists
+        if report_data:
+            if isinstance(report_data, str):
+                try:
+                    report_data = json.loads(report_data)
+                except json.JSONDecodeError:
+                    logging.warning(f'Failed to parse REPORT for record {record.get("ID")}')
+                    report_data = {}
+        else:
+            report_data = {}
         
-        return report_list
+        # Process based on type
+        if 'adf/upsert/' in record_type:
+            self._process_upsert(record_type, status, log_message, report_data, consolidated)
+        
+        elif 'azure_func/delete/' in record_type:
+            self._process_delete(record_type, status, log_message, report_data, consolidated)
+        
+        elif 'azure_func/validation' in record_type:
+            self._process_validation(record_type, status, log_message, report_data, consolidated)
+        
+        else:
+            # Generic fallback
+            object_name = record_type.split('/')[-1] if '/' in record_type else record_type
+            key = object_name
+            
+            if key not in consolidated:
+                consolidated[key] = {
+                    'object_name': object_name,
+                    'inserted': 0,
+                    'updated': 0,
+                    'deleted': 0,
+                    'status': status,
+                    'log_message': log_message
+                }
     
     def _process_upsert(self, record_type: str, status: str, log_message: str, 
                         report_data: dict, consolidated: dict):
@@ -141,3 +144,33 @@ class ReportProcessor:
                     if log_message:
                         consolidated[key]['log_message'] = log_message
 
+
+class ReportAccumulator:
+    """
+    Incrementally consolidates execution records as they arrive.
+    
+    Only the per-object report rows are kept, so memory stays flat no matter
+    how many executions ran that day; each record's REPORT JSON is parsed
+    and discarded as soon as it has been folded in.
+    """
+    
+    def __init__(self, processor: ReportProcessor = None):
+        self.processor = processor or ReportProcessor()
+        self.record_count = 0
+        self._consolidated: Dict[str, Dict[str, Any]] = {}
+    
+    def add(self, record: Dict[str, Any]):
+        """Fold one execution record into the report"""
+        self.processor.consolidate_record(record, self._consolidated)
+        self.record_count += 1
+    
+    def add_all(self, records: Iterable[Dict[str, Any]]):
+        """Fold every record from an iterable (consumed lazily)"""
+        for record in records:
+            self.add(record)
+    
+    def rows(self) -> List[Dict[str, Any]]:
+        """Return the consolidated report rows sorted by object name"""
+        report_list = list(self._consolidated.values())
+        report_list.sort(key=lambda x: x['object_name'])
+        return report_list
@@ -0,0 +1,172 @@
+from typing import Any, Dict, List, Sequence
+
+# SQL fragments that differ between Snowflake and the SQLite stand-in used by tests
+DIALECTS = {
+    'snowflake': {
+        'parse_json': 'TRY_PARSE_JSON(REPORT)',
+        'is_object': 'IS_OBJECT({json})',
+        'json_number': 'COALESCE(TRY_TO_NUMBER({json}:{field}::STRING), 0)',
+        'flatten': 'LATERAL FLATTEN(input => {json})',
+        'flat_number': 'COALESCE(TRY_TO_NUMBER(f.VALUE::STRING), 0)',
+        'flat_string': 'f.VALUE::STRING',
+        'contains': "POSITION('{needle}' IN {column}) > 0",
+        'last_segment': "SPLIT_PART({column}, '/', -1)",
+    },
+    'sqlite': {
+        'parse_json': 'CASE WHEN json_valid(REPORT) THEN REPORT END',
+        'is_object': "json_type({json}) = 'object'",
+        'json_number': "COALESCE(CAST(json_extract({json}, '$.{field}') AS INTEGER), 0)",
+        'flatten': 'json_each({json})',
+        'flat_number': 'COALESCE(CAST(f.value AS INTEGER), 0)',
+        'flat_string': 'f.value',
+        'contains': "INSTR({column}, '{needle}') > 0",
+        'last_segment': "REPLACE({column}, RTRIM({column}, REPLACE({column}, '/', '')), '')",
+    },
+}
+
+
+class SqlReportProcessor:
+    """
+    Consolidate execution records inside the warehouse with one aggregating query.
+
+    Produces the same rows as ReportProcessor (the reference implementation):
+    counts are summed per object, and status/log message follow the same
+    "first record, then last non-success record" rules, evaluated in
+    INSERTED_DATE, ID order.
+    """
+
+    def __init__(self, dialect: str = 'snowflake'):
+        if dialect not in DIALECTS:
+            raise ValueError(f"Unsupported SQL dialect: {dialect}")
+        self.dialect = dialect
+
+    def _contributions_ctes(self, where_clause: str) -> str:
+        """
+        CTEs shared by the report and rollup queries: matching records, and one
+        "contribution" row per (record, object) the reference processor would touch.
+        """
+        d = DIALECTS[self.dialect]
+        is_upsert = d['contains'].format(column='r.TYPE', needle='adf/upsert/')
+        is_delete = d['contains'].format(column='r.TYPE', needle='azure_func/delete/')
+        is_validation = d['contains'].format(column='r.TYPE', needle='azure_func/validation')
+        last_segment = d['last_segment'].format(column='r.TYPE')
+        is_object = d['is_object'].format(json='r.R')
+        flatten = d['flatten'].format(json='r.R')
+
+        return f"""
+        WITH records AS (
+            SELECT ID, TYPE, STATUS, LOG_MESSAGE, INSERTED_DATE, {d['parse_json']} AS R
+            FROM EXECUTION_TRACKER
+            WHERE {where_clause}
+        ),
+        contributions AS (
+            SELECT r.ID, r.INSERTED_DATE, {last_segment} AS OBJECT_NAME, 'upsert' AS KIND,
+                   {d['json_number'].format(json='r.R', field='inserted')} AS INSERTED,
+                   {d['json_number'].format(json='r.R', field='updated')} AS UPDATED,
+                   0 AS DELETED,
+                   r.STATUS, r.LOG_MESSAGE
+            FROM records r
+            WHERE {is_upsert}
+            UNION ALL
+            SELECT r.ID, r.INSERTED_DATE, f.KEY, 'delete', 0, 0, {d['flat_number']}, r.STATUS, r.LOG_MESSAGE
+            FROM records r, {flatten} f
+            WHERE {is_delete} AND NOT ({is_upsert}) AND {is_object}
+            UNION ALL
+            SELECT r.ID, r.INSERTED_DATE, f.KEY, 'validation', 0, 0, 0, {d['flat_string']}, r.LOG_MESSAGE
+            FROM records r, {flatten} f
+            WHERE {is_validation} AND NOT ({is_upsert}) AND NOT ({is_delete}) AND {is_object}
+            UNION ALL
+            SELECT r.ID, r.INSERTED_DATE, {last_segment}, 'generic', 0, 0, 0, r.STATUS, r.LOG_MESSAGE
+            FROM records r
+            WHERE NOT ({is_upsert}) AND NOT ({is_delete}) AND NOT ({is_validation})
+        )"""
+
+    def build_query(self, where_clause: str) -> str:
+        """
+        Build the consolidation query over EXECUTION_TRACKER rows matching where_clause.
+
+        Args:
+            where_clause: SQL predicate selecting the records (may contain driver placeholders)
+
+        Returns:
+            Query returning OBJECT_NAME, INSERTED, UPDATED, DELETED, STATUS, LOG_MESSAGE per object
+        """
+        return self._contributions_ctes(where_clause) + """,
+        ordered AS (
+            SELECT c.*,
+                   ROW_NUMBER() OVER (PARTITION BY OBJECT_NAME ORDER BY INSERTED_DATE, ID) AS FIRST_RN
+            FROM contributions c
+        ),
+        status_candidates AS (
+            SELECT OBJECT_NAME, STATUS,
+                   ROW_NUMBER() OVER (PARTITION BY OBJECT_NAME ORDER BY INSERTED_DATE DESC, ID DESC) AS LAST_RN
+            FROM ordered
+            WHERE FIRST_RN = 1 OR (KIND <> 'generic' AND LOWER(STATUS) <> 'success')
+        ),
+        log_candidates AS (
+            SELECT OBJECT_NAME,
+                   CASE WHEN FIRST_RN = 1 AND KIND = 'validation' AND LOWER(STATUS) = 'success'
+                        THEN '' ELSE LOG_MESSAGE END AS LOG_MESSAGE,
+                   ROW_NUMBER() OVER (PARTITION BY OBJECT_NAME ORDER BY INSERTED_DATE DESC, ID DESC) AS LAST_RN
+            FROM ordered
+            WHERE FIRST_RN = 1 OR (KIND <> 'generic' AND LOWER(STATUS) <> 'success' AND LOG_MESSAGE <> '')
+        ),
+        totals AS (
+            SELECT OBJECT_NAME, SUM(INSERTED) AS INSERTED, SUM(UPDATED) AS UPDATED, SUM(DELETED) AS DELETED
+            FROM contributions
+            GROUP BY OBJECT_NAME
+        )
+        SELECT t.OBJECT_NAME, t.INSERTED, t.UPDATED, t.DELETED, s.STATUS, l.LOG_MESSAGE
+        FROM totals t
+        JOIN status_candidates s ON s.OBJECT_NAME = t.OBJECT_NAME AND s.LAST_RN = 1
+        JOIN log_candidates l ON l.OBJECT_NAME = t.OBJECT_NAME AND l.LAST_RN = 1
+        """
+
+    def build_rollup_query(self, where_clause: str) -> str:
+        """
+        Build the per-object daily rollup over EXECUTION_TRACKER rows matching where_clause.
+
+        Args:
+            where_clause: SQL predicate selecting the records (may contain driver placeholders)
+
+        Returns:
+            Query returning OBJECT_NAME, INSERTED, UPDATED, DELETED, RUNS, FAILURES per object
+        """
+        return self._contributions_ctes(where_clause) + """
+        SELECT OBJECT_NAME,
+               SUM(INSERTED) AS INSERTED,
+               SUM(UPDATED) AS UPDATED,
+               SUM(DELETED) AS DELETED,
+               COUNT(*) AS RUNS,
+               SUM(CASE WHEN LOWER(STATUS) <> 'success' THEN 1 ELSE 0 END) AS FAILURES
+        FROM contributions
+        GROUP BY OBJECT_NAME
+        """
+
+    def consolidate(self, cursor, where_clause: str, params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+        """
+        Run the consolidation query and return report rows sorted by object name.
+
+        Args:
+            cursor: Open DB-API cursor
+            where_clause: SQL predicate selecting the records
+            params: Values for the placeholders in where_clause
+
+        Returns:
+            List of consolidated report rows (same shape as ReportProcessor output)
+        """
+        cursor.execute(self.build_query(where_clause), params)
+        report_list = [
+            {
+                'object_name': object_name,
+                'inserted': int(inserted),
+                'updated': int(updated),
+                'deleted': int(deleted),
+                'status': status,
+                'log_message': log_message
+            }
+            for object_name, inserted, updated, deleted, status, log_message in cursor.fetchall()
+        ]
+        # Sort client-side so ordering matches the Python processor regardless of collation
+        report_list.sort(key=lambda x: x['object_name'])
+        return report_list
@@ -0,0 +1,56 @@
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List
+
+SPARK_CHARS = '▁▂▃▄▅▆▇█'
+
+
+def sparkline(values: List[float]) -> str:
+    """Render values as a unicode sparkline scaled to the series maximum"""
+    if not values:
+        return ''
+    peak = max(values)
+    if peak <= 0:
+        return SPARK_CHARS[0] * len(values)
+    top = len(SPARK_CHARS) - 1
+    return ''.join(SPARK_CHARS[round(max(value, 0) / peak * top)] for value in values)
+
+
+def build_trends(rollup_rows: Iterable[Dict[str, Any]], start_date: date, end_date: date) -> List[Dict[str, Any]]:
+    """
+    Turn EXECUTION_DAILY_ROLLUP rows into per-object daily series.
+
+    Days without a rollup row count as zero activity.
+
+    Args:
+        rollup_rows: Rows with keys report_date, object_name, inserted, updated, deleted, failures
+        start_date: First day of the trend window
+        end_date: Last day of the trend window
+
+    Returns:
+        List of trend rows sorted by object name, with per-day 'activity' (inserted + updated + deleted)
+        and 'failures' series and their sparklines
+    """
+    days = [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+    day_index = {day: position for position, day in enumerate(days)}
+
+    trends: Dict[str, Dict[str, Any]] = {}
+    for row in rollup_rows:
+        position = day_index.get(row['report_date'])
+        if position is None:
+            continue
+        trend = trends.setdefault(row['object_name'], {
+            'object_name': row['object_name'],
+            'activity': [0] * len(days),
+            'failures': [0] * len(days),
+        })
+        trend['activity'][position] += row['inserted'] + row['updated'] + row['deleted']
+        trend['failures'][position] += row['failures']
+
+    trend_list = list(trends.values())
+    for trend in trend_list:
+        trend['total_activity'] = sum(trend['activity'])
+        trend['failure_days'] = sum(1 for failures in trend['failures'] if failures)
+        trend['activity_sparkline'] = sparkline(trend['activity'])
+        trend['failure_sparkline'] = sparkline(trend['failures'])
+    trend_list.sort(key=lambda x: x['object_name'])
+    return trend_list
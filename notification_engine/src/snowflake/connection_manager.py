@@ -0,0 +1,323 @@
+"""
+Snowflake connection reuse across warm Azure Function invocations.
+
+This module is shared by the delete synchronizer (src/snowflake), the
+notification engine (notification_engine/src/snowflake) and the validator
+(validation/src). Each Function app is deployed on its own, so it is kept as
+identical copies; change all three together.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Snowflake error numbers raised when a session can no longer be used
+# (390112: session no longer exists, 390114: authentication token expired)
+SESSION_EXPIRED_ERRNOS = frozenset({390112, 390114})
+
+# Connections idle for longer than this are pinged before being handed out again
+HEALTH_CHECK_IDLE_SECONDS = 60
+
+# Session context restored on release, in the order USE statements are issued
+SESSION_CONTEXT = ("role", "warehouse", "database", "schema")
+
+_der_key_cache: Dict[str, bytes] = {}
+_der_key_lock = threading.Lock()
+
+
+def der_from_pem(pem: bytes) -> bytes:
+    """
+    Convert an unencrypted PEM private key to PKCS8 DER bytes.
+
+    The result is cached by the PEM content's hash, so warm invocations skip the
+    parse and a rotated key is picked up automatically.
+
+    Args:
+        pem: PEM encoded private key
+
+    Returns:
+        DER encoded private key bytes (format required by snowflake-connector-python)
+    """
+    digest = hashlib.sha256(pem).hexdigest()
+    with _der_key_lock:
+        cached = _der_key_cache.get(digest)
+        if cached is not None:
+            return cached
+
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives import serialization
+
+    private_key = serialization.load_pem_private_key(pem, password=None, backend=default_backend())
+    private_key_bytes = private_key.private_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    )
+
+    with _der_key_lock:
+        # Only the current key is kept
+        _der_key_cache.clear()
+        _der_key_cache[digest] = private_key_bytes
+
+    return private_key_bytes
+
+
+def load_private_key_der(private_key_path: str) -> bytes:
+    """
+    Load an unencrypted PEM private key file and return it as PKCS8 DER bytes (see der_from_pem).
+
+    Args:
+        private_key_path: Path to the PEM encoded private key
+    """
+    if not private_key_path:
+        raise ValueError("Private key path not provided")
+
+    key_path = Path(private_key_path)
+    if not key_path.exists():
+        raise FileNotFoundError(f"Private key file not found: {private_key_path}")
+
+    return der_from_pem(key_path.read_bytes())
+
+
+def is_session_expired_error(error: BaseException) -> bool:
+    """Return True if the error means the Snowflake session must be re-established"""
+    errno = getattr(error, "errno", None)
+    if errno in SESSION_EXPIRED_ERRNOS:
+        return True
+    message = str(error).lower()
+    return "session no longer exists" in message or "authentication token has expired" in message
+
+
+def _default_connect(**conn_params: Any):
+    import snowflake.connector
+
+    return snowflake.connector.connect(**conn_params)
+
+
+def _same_identifier(current: str, expected: str) -> bool:
+    return current.strip('"').upper() == expected.strip('"').upper()
+
+
+class _PooledConnection:
+    __slots__ = ("connection", "last_used", "context", "in_use")
+
+    def __init__(self, connection, context: Dict[str, str]):
+        self.connection = connection
+        self.last_used = time.monotonic()
+        self.context = context
+        # Checked out by a caller; never handed to anyone else until released
+        self.in_use = True
+
+
+class ConnectionManager:
+    """Reuses Snowflake connections across warm Azure Function invocations
+
+    Connections are keyed by their connection parameters and live at module
+    level, so a warm worker skips the login/OCSP handshake on later runs.
+    Sessions are opened with ``client_session_keep_alive`` and are health
+    checked before reuse; expired or closed sessions are replaced transparently.
+
+    A connection is checked out by one caller at a time: a concurrent caller
+    with the same parameters gets a connection of its own. Callers hand
+    connections back with release(), which rolls back any open transaction and
+    restores the role / warehouse / database / schema; one idle connection per
+    set of parameters is kept warm.
+    """
+
+    def __init__(
+        self,
+        connect_fn: Optional[Callable[..., Any]] = None,
+        health_check_idle_seconds: float = HEALTH_CHECK_IDLE_SECONDS,
+    ):
+        self._connect_fn = connect_fn or _default_connect
+        self._health_check_idle_seconds = health_check_idle_seconds
+        self._connections: Dict[Tuple, List[_PooledConnection]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _pool_key(conn_params: Dict[str, Any]) -> Tuple:
+        # The key material itself is not part of the identity of a connection
+        return tuple(sorted(
+            (name, value) for name, value in conn_params.items() if name != "private_key"
+        ))
+
+    def _is_healthy(self, pooled: _PooledConnection) -> bool:
+        connection = pooled.connection
+        is_closed = getattr(connection, "is_closed", None)
+        if callable(is_closed) and is_closed():
+            return False
+
+        if time.monotonic() - pooled.last_used < self._health_check_idle_seconds:
+            return True
+
+        cursor = None
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            return True
+        except Exception as e:
+            if is_session_expired_error(e):
+                logging.info("Pooled Snowflake session expired, reconnecting")
+            else:
+                logging.warning("Pooled Snowflake connection failed health check: %s", e)
+            return False
+        finally:
+            if cursor is not None:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+
+    @staticmethod
+    def _close_quietly(connection) -> None:
+        try:
+            connection.close()
+        except Exception as e:
+            logging.debug("Ignoring error while closing stale Snowflake connection: %s", e)
+
+    def _find(self, connection) -> Optional[Tuple[Tuple, _PooledConnection]]:
+        for key, entries in self._connections.items():
+            for pooled in entries:
+                if pooled.connection is connection:
+                    return key, pooled
+        return None
+
+    def _remove(self, key: Tuple, pooled: _PooledConnection) -> None:
+        entries = self._connections[key]
+        entries.remove(pooled)
+        if not entries:
+            del self._connections[key]
+
+    def acquire(self, private_key_loader: Optional[Callable[[], bytes]] = None, **conn_params: Any):
+        """
+        Check out a live Snowflake connection for the given parameters.
+
+        Args:
+            private_key_loader: Called to obtain DER key bytes only when a new
+                connection has to be opened
+            **conn_params: Keyword arguments for ``snowflake.connector.connect``
+
+        Returns:
+            A healthy Snowflake connection no other caller holds (an idle pooled
+            one when possible); hand it back with release()
+        """
+        key = self._pool_key(conn_params)
+
+        with self._lock:
+            for pooled in list(self._connections.get(key, ())):
+                if pooled.in_use:
+                    continue
+                if self._is_healthy(pooled):
+                    pooled.in_use = True
+                    pooled.last_used = time.monotonic()
+                    logging.info("Reusing warm Snowflake connection")
+                    return pooled.connection
+                self._remove(key, pooled)
+                self._close_quietly(pooled.connection)
+
+        # Logged in outside the lock so other callers aren't held up by it
+        params = dict(conn_params)
+        params.setdefault("client_session_keep_alive", True)
+        if private_key_loader is not None:
+            params["private_key"] = private_key_loader()
+
+        connection = self._connect_fn(**params)
+        context = {name: conn_params[name] for name in SESSION_CONTEXT if conn_params.get(name)}
+        with self._lock:
+            self._connections.setdefault(key, []).append(_PooledConnection(connection, context))
+        return connection
+
+    def release(self, connection) -> None:
+        """
+        Hand a checked-out connection back to the pool, resetting its session for the next invocation.
+
+        Any open transaction is rolled back, and a role / warehouse / database /
+        schema changed with USE is switched back to the one it was opened with.
+        A connection that can't be reset, or that isn't needed because another
+        idle one is already kept for the same parameters, is closed and dropped
+        instead. Connections that aren't checked out are left alone.
+        """
+        with self._lock:
+            found = self._find(connection)
+            if found is None or not found[1].in_use:
+                return
+            key, pooled = found
+
+        # The caller still holds the connection, so the reset runs outside the lock
+        cursor = None
+        try:
+            connection.rollback()
+            for name, expected in pooled.context.items():
+                current = getattr(connection, name, None)
+                if isinstance(current, str) and not _same_identifier(current, expected):
+                    if cursor is None:
+                        cursor = connection.cursor()
+                    logging.info("Restoring Snowflake session %s to %s", name, expected)
+                    cursor.execute(f"USE {name.upper()} {expected}")
+            reset = True
+        except Exception as e:
+            logging.warning("Could not reset pooled Snowflake session, closing it: %s", e)
+            reset = False
+        finally:
+            if cursor is not None:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+
+        with self._lock:
+            if self._find(connection) is None:
+                return
+            idle = any(not other.in_use for other in self._connections[key])
+            if reset and not idle:
+                pooled.in_use = False
+                pooled.last_used = time.monotonic()
+                return
+            self._remove(key, pooled)
+        self._close_quietly(connection)
+
+    def invalidate(self, connection) -> None:
+        """Drop a connection from the pool (e.g. after it hit an expired session)"""
+        with self._lock:
+            found = self._find(connection)
+            if found is not None:
+                self._remove(*found)
+        self._close_quietly(connection)
+
+    def close_all(self) -> None:
+        """Close every pooled connection"""
+        with self._lock:
+            pooled_connections = [pooled for entries in self._connections.values() for pooled in entries]
+            self._connections.clear()
+        for pooled in pooled_connections:
+            self._close_quietly(pooled.connection)
+
+
+# One pool per backend ("snowflake", or e.g. "sqlite" for local load tests)
+_managers: Dict[str, ConnectionManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_connection_manager(backend: str = "snowflake",
+                           connect_fn: Optional[Callable[..., Any]] = None) -> ConnectionManager:
+    """
+    Return the module-level pool for a backend, creating it on first use
+
+    Args:
+        backend: Pool name
+        connect_fn: Opens a connection for a non-Snowflake backend; only used when the pool is created
+    """
+    with _managers_lock:
+        manager = _managers.get(backend)
+        if manager is None:
+            if backend != "snowflake" and connect_fn is None:
+                raise ValueError(f"Unknown warehouse backend: {backend}")
+            manager = ConnectionManager(connect_fn=connect_fn)
+            _managers[backend] = manager
+        return manager
@@ -1,9 +1,54 @@
-import snowflake.connector
 import logging
-from datetime import date
-from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives import serialization
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterator, List, Tuple
 from ..config.settings import Settings
+from ..email.digests import build_object_owners
+from ..processors.sql_report_processor import SqlReportProcessor
+from .connection_manager import get_connection_manager, is_session_expired_error, load_private_key_der
+from .result_rows import fetch_rows, iter_rows
+
+# Columns the report path needs (OBJECT_NAME and anything added later are never read)
+EXECUTION_COLUMNS = ('ID', 'TYPE', 'STATUS', 'LOG_MESSAGE', 'REPORT', 'INSERTED_DATE')
+
+
+ROLLUP_TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS EXECUTION_DAILY_ROLLUP (
+    REPORT_DATE DATE NOT NULL,
+    OBJECT_NAME VARCHAR NOT NULL,
+    INSERTED NUMBER(38,0),
+    UPDATED NUMBER(38,0),
+    DELETED NUMBER(38,0),
+    RUNS NUMBER(38,0),
+    FAILURES NUMBER(38,0),
+    UPDATED_AT TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(),
+    PRIMARY KEY (REPORT_DATE, OBJECT_NAME)
+)
+"""
+
+
+def date_range_filter(start_date: date, end_date: date = None, placeholder: str = '%s') -> Tuple[str, tuple]:
+    """
+    Build a half-open INSERTED_DATE range covering start_date..end_date (inclusive days).
+    
+    Comparing the bare column (instead of DATE(INSERTED_DATE) = ...) lets Snowflake
+    prune micro-partitions on EXECUTION_TRACKER rather than scanning the whole table.
+    
+    Args:
+        start_date: First day to include
+        end_date: Last day to include (defaults to start_date)
+        placeholder: Driver parameter placeholder
+        
+    Returns:
+        Tuple of (where clause, params)
+    """
+    end_date = end_date or start_date
+    if end_date < start_date:
+        raise ValueError(f'end_date {end_date} is before start_date {start_date}')
+    
+    range_start = datetime.combine(start_date, time.min)
+    range_end = datetime.combine(end_date + timedelta(days=1), time.min)
+    return f'INSERTED_DATE >= {placeholder} AND INSERTED_DATE < {placeholder}', (range_start, range_end)
+
 
 class SnowflakeConnector:
     """Handles Snowflake database connections and queries"""
@@ -11,37 +56,21 @@ class SnowflakeConnector:
     def __init__(self):
         Settings.validate()
         self.connection = None
+        self.rollup_table_ready = False
     
     def _load_private_key(self):
-        """Load and parse private key from file"""
-        with open(Settings.SNOWFLAKE_PRIVATE_KEY_PATH, 'rb') as key_file:
-            private_key_data = key_file.read()
-        
-        # Load the private key (no passphrase)
-        private_key = serialization.load_pem_private_key(
-            private_key_data,
-            password=None,
-            backend=default_backend()
-        )
-        
-        # Serialize to DER format (required by Snowflake connector)
-        private_key_der = private_key.private_bytes(
-            encoding=serialization.Encoding.DER,
-            format=serialization.PrivateFormat.PKCS8,
-            encryption_algorithm=serialization.NoEncryption()
-        )
-        
-        return private_key_der
+        """Load private key as DER bytes (cached across warm invocations)"""
+        return load_private_key_der(Settings.SNOWFLAKE_PRIVATE_KEY_PATH)
     
     def _get_connection(self):
-        """Create and return Snowflake connection"""
+        """Return a Snowflake connection, reusing the warm pooled session when possible"""
         if not self.connection:
             logging.info('Connecting to Snowflake using private key authentication')
             
-            self.connection = snowflake.connector.connect(
+            self.connection = get_connection_manager().acquire(
+                private_key_loader=self._load_private_key,
                 account=Settings.SNOWFLAKE_ACCOUNT,
                 user=Settings.SNOWFLAKE_USER,
-                private_key=self._load_private_key(),
                 warehouse=Settings.SNOWFLAKE_WAREHOUSE,
                 database=Settings.SNOWFLAKE_DATABASE,
                 schema=Settings.SNOWFLAKE_SCHEMA
@@ -49,54 +78,243 @@ class SnowflakeConnector:
         
         return self.connection
     
+    def _invalidate_if_expired(self, error: Exception):
+        """Drop the pooled connection if its session expired so the next call reconnects"""
+        if self.connection and is_session_expired_error(error):
+            get_connection_manager().invalidate(self.connection)
+            self.connection = None
+    
     def fetch_daily_executions(self, target_date: date) -> list:
         """
         Fetch all execution records for a specific date.
         
+        Materializes every row; prefer iter_daily_executions() for large days.
+        
         Args:
             target_date: The date to fetch records for
             
         Returns:
             List of execution records with columns: ID, TYPE, STATUS, LOG_MESSAGE, REPORT, INSERTED_DATE
         """
-        query = """
-        SELECT 
-            ID,
-            TYPE,
-            STATUS,
-            LOG_MESSAGE,
-            REPORT,
-            INSERTED_DATE
+        return list(self.iter_daily_executions(target_date))
+    
+    def iter_daily_executions(self, target_date: date, batch_size: int = None) -> Iterator[dict]:
+        """
+        Stream execution records for a specific date (see iter_executions).
+        
+        Args:
+            target_date: The date to fetch records for
+            batch_size: Rows per fetchmany() call (defaults to Settings.FETCH_BATCH_SIZE)
+            
+        Yields:
+            Execution records with columns: ID, TYPE, STATUS, LOG_MESSAGE, REPORT, INSERTED_DATE
+        """
+        return self.iter_executions(target_date, target_date, batch_size)
+    
+    def iter_executions(self, start_date: date, end_date: date = None, batch_size: int = None) -> Iterator[dict]:
+        """
+        Stream execution records inserted between start_date and end_date (inclusive),
+        one Arrow result batch at a time. Use a multi-day range for weekly/monthly digests.
+        
+        Only one batch is held in memory, so callers that consolidate records
+        as they arrive keep memory flat regardless of the range's volume. Records
+        are read-only mappings over the batch's columns (see result_rows), so a
+        column is only converted to Python values if a caller reads it.
+        
+        Args:
+            start_date: First day to include
+            end_date: Last day to include (defaults to start_date)
+            batch_size: Rows per fetchmany() call when Arrow batches are unavailable
+                (defaults to Settings.FETCH_BATCH_SIZE)
+            
+        Yields:
+            Execution records with columns: ID, TYPE, STATUS, LOG_MESSAGE, REPORT, INSERTED_DATE
+        """
+        where_clause, params = date_range_filter(start_date, end_date)
+        query = f"""
+        SELECT {', '.join(EXECUTION_COLUMNS)}
         FROM EXECUTION_TRACKER
-        WHERE DATE(INSERTED_DATE) = %s
-        ORDER BY INSERTED_DATE
+        WHERE {where_clause}
+        ORDER BY INSERTED_DATE, ID
         """
+        batch_size = batch_size or Settings.FETCH_BATCH_SIZE
         
         try:
             conn = self._get_connection()
             cursor = conn.cursor()
             
-            logging.info(f'Executing query for date: {target_date}')
-            cursor.execute(query, (target_date,))
+            try:
+                logging.info(f'Executing query for {start_date} to {end_date or start_date}')
+                cursor.execute(query, params)
+                yield from iter_rows(cursor, EXECUTION_COLUMNS, batch_size)
+            finally:
+                cursor.close()
             
-            # Fetch all results
-            columns = [desc[0] for desc in cursor.description]
-            results = []
+        except Exception as e:
+            logging.error(f'Error fetching executions from Snowflake: {str(e)}')
+            self._invalidate_if_expired(e)
+            raise
+    
+    def fetch_consolidated_report(self, start_date: date, end_date: date = None, processor=None) -> list:
+        """
+        Consolidate execution records inside Snowflake with one aggregating query.
+        
+        Args:
+            start_date: First day to include
+            end_date: Last day to include (defaults to start_date)
+            processor: SqlReportProcessor to use (defaults to the Snowflake dialect)
+            
+        Returns:
+            List of consolidated report rows (same shape as ReportProcessor output)
+        """
+        processor = processor or SqlReportProcessor('snowflake')
+        where_clause, params = date_range_filter(start_date, end_date)
+        
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            
+            try:
+                logging.info(f'Executing consolidation query for {start_date} to {end_date or start_date}')
+                return processor.consolidate(cursor, where_clause, params)
+            finally:
+                cursor.close()
+            
+        except Exception as e:
+            logging.error(f'Error consolidating executions in Snowflake: {str(e)}')
+            self._invalidate_if_expired(e)
+            raise
+    
+    def fetch_object_owners(self) -> Dict[str, List[str]]:
+        """
+        Fetch object owners from ENTITYMAPPING.MAIL_ID.
+        
+        Returns:
+            Dict of lowercased entity/Salesforce object name to owner email addresses
+        """
+        query = """
+        SELECT ENTITYNAME, MAPPINGTO_SALESFORCE, MAIL_ID
+        FROM ENTITYMAPPING
+        WHERE MAIL_ID IS NOT NULL
+        """
+        
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
             
-            for row in cursor:
-                record = dict(zip(columns, row))
-                results.append(record)
+            try:
+                cursor.execute(query)
+                return build_object_owners(cursor.fetchall())
+            finally:
+                cursor.close()
             
+        except Exception as e:
+            logging.error(f'Error fetching object owners from Snowflake: {str(e)}')
+            self._invalidate_if_expired(e)
+            raise
+    
+    def ensure_rollup_table(self):
+        """Create EXECUTION_DAILY_ROLLUP (one row per day and object) if it doesn't exist"""
+        if self.rollup_table_ready:
+            return
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(ROLLUP_TABLE_DDL)
+            self.rollup_table_ready = True
+        finally:
             cursor.close()
-            return results
+    
+    def update_daily_rollup(self, report_date: date, processor=None) -> int:
+        """
+        Recompute one day's per-object rollup from EXECUTION_TRACKER and MERGE it into
+        EXECUTION_DAILY_ROLLUP. Only that day's partitions are read, and re-running a
+        day replaces its rows, so the rollup can be maintained incrementally.
+        
+        Args:
+            report_date: Day to roll up
+            processor: SqlReportProcessor to build the aggregation with (defaults to Snowflake)
+            
+        Returns:
+            Number of rollup rows inserted or updated
+        """
+        processor = processor or SqlReportProcessor('snowflake')
+        where_clause, params = date_range_filter(report_date)
+        query = f"""
+        MERGE INTO EXECUTION_DAILY_ROLLUP t
+        USING (
+            SELECT %s::DATE AS REPORT_DATE, d.*
+            FROM ({processor.build_rollup_query(where_clause)}) d
+        ) s
+        ON t.REPORT_DATE = s.REPORT_DATE AND t.OBJECT_NAME = s.OBJECT_NAME
+        WHEN MATCHED THEN UPDATE SET
+            INSERTED = s.INSERTED, UPDATED = s.UPDATED, DELETED = s.DELETED,
+            RUNS = s.RUNS, FAILURES = s.FAILURES,
+            UPDATED_AT = CURRENT_TIMESTAMP()
+        WHEN NOT MATCHED THEN INSERT
+            (REPORT_DATE, OBJECT_NAME, INSERTED, UPDATED, DELETED, RUNS, FAILURES)
+        VALUES
+            (s.REPORT_DATE, s.OBJECT_NAME, s.INSERTED, s.UPDATED, s.DELETED, s.RUNS, s.FAILURES)
+        """
+        
+        try:
+            self.ensure_rollup_table()
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            
+            try:
+                logging.info(f'Updating daily rollup for {report_date}')
+                cursor.execute(query, (report_date,) + params)
+                merged = cursor.rowcount or 0
+                conn.commit()
+                return merged
+            finally:
+                cursor.close()
             
         except Exception as e:
-            logging.error(f'Error fetching executions from Snowflake: {str(e)}')
+            logging.error(f'Error updating daily rollup in Snowflake: {str(e)}')
+            self._invalidate_if_expired(e)
+            raise
+    
+    def fetch_rollup(self, start_date: date, end_date: date) -> List[dict]:
+        """
+        Fetch pre-aggregated daily rollup rows for a date range (O(days x objects), not O(records)).
+        
+        Args:
+            start_date: First day to include
+            end_date: Last day to include
+            
+        Returns:
+            List of read-only row mappings with keys report_date, object_name, inserted,
+            updated, deleted, runs, failures
+        """
+        query = """
+        SELECT REPORT_DATE, OBJECT_NAME, INSERTED, UPDATED, DELETED, RUNS, FAILURES
+        FROM EXECUTION_DAILY_ROLLUP
+        WHERE REPORT_DATE >= %s AND REPORT_DATE <= %s
+        ORDER BY REPORT_DATE, OBJECT_NAME
+        """
+        
+        try:
+            self.ensure_rollup_table()
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            
+            try:
+                cursor.execute(query, (start_date, end_date))
+                columns = [desc[0].lower() for desc in cursor.description]
+                return fetch_rows(cursor, columns)
+            finally:
+                cursor.close()
+            
+        except Exception as e:
+            logging.error(f'Error fetching daily rollup from Snowflake: {str(e)}')
+            self._invalidate_if_expired(e)
             raise
     
     def close(self):
-        """Close the database connection"""
+        """Release the database connection back to the pool (session reset) for the next warm invocation"""
         if self.connection:
-            self.connection.close()
+            get_connection_manager().release(self.connection)
             self.connection = None
 
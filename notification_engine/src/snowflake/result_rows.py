@@ -0,0 +1,155 @@
+"""
+Column-oriented access to Snowflake result sets.
+
+Large results are read as Arrow batches (cursor.fetch_arrow_batches) and a
+column is converted to Python values with one call the first time it is read,
+instead of the connector building a tuple per row and the caller a dict per
+row. Row is a read-only, dict-style view into a batch, so code written against
+row dicts keeps working.
+
+Cursors without Arrow results (pyarrow not installed, non-Arrow result format,
+other DB-API drivers such as sqlite3 in tests) are read with fetchmany() into
+the same batches.
+"""
+import logging
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+
+class RowBatch:
+    """One batch of a result set, held column by column"""
+
+    __slots__ = ('columns', 'num_rows', '_positions', '_values', '_table')
+
+    def __init__(self, columns: Sequence[str], num_rows: int, values: Optional[List[list]] = None, table=None):
+        self.columns = list(columns)
+        self.num_rows = num_rows
+        self._positions: Dict[str, int] = {name: i for i, name in enumerate(self.columns)}
+        self._values: List[Optional[list]] = values if values is not None else [None] * len(self.columns)
+        self._table = table
+
+    @classmethod
+    def from_arrow(cls, columns: Sequence[str], table) -> 'RowBatch':
+        """Wrap a pyarrow Table; columns are converted lazily"""
+        return cls(columns, table.num_rows, table=table)
+
+    @classmethod
+    def from_rows(cls, columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> 'RowBatch':
+        """Transpose DB-API row tuples into columns"""
+        values = [list(column) for column in zip(*rows)] if rows else [[] for _ in columns]
+        return cls(columns, len(rows), values=values)
+
+    def column(self, name: str) -> list:
+        """
+        Python values of one column.
+
+        Raises:
+            KeyError: If the result has no such column
+        """
+        position = self._positions[name]
+        values = self._values[position]
+        if values is None:
+            values = self._table.column(position).to_pylist()
+            self._values[position] = values
+        return values
+
+    def tuples(self) -> Iterator[tuple]:
+        """Rows as plain tuples, in column order"""
+        return zip(*(self.column(name) for name in self.columns))
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    def __iter__(self) -> Iterator['Row']:
+        return (Row(self, index) for index in range(self.num_rows))
+
+
+class Row(Mapping):
+    """Read-only mapping of column name to value for one row of a RowBatch"""
+
+    __slots__ = ('_batch', '_index')
+
+    def __init__(self, batch: RowBatch, index: int):
+        self._batch = batch
+        self._index = index
+
+    def __getitem__(self, name: str) -> Any:
+        batch = self._batch
+        values = batch._values[batch._positions[name]]
+        if values is None:
+            values = batch.column(name)
+        return values[self._index]
+
+    def get(self, name: str, default: Any = None) -> Any:
+        # Mapping.get goes through __getitem__ and a KeyError; this is on the per-record hot path
+        batch = self._batch
+        position = batch._positions.get(name)
+        if position is None:
+            return default
+        values = batch._values[position]
+        if values is None:
+            values = batch.column(name)
+        return values[self._index]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._batch.columns)
+
+    def __len__(self) -> int:
+        return len(self._batch.columns)
+
+    def __repr__(self):
+        return f'Row({dict(self)!r})'
+
+
+def _arrow_batches(cursor):
+    """Iterator of pyarrow Tables for the last query, or None if the cursor can't produce them"""
+    fetch_arrow_batches = getattr(cursor, 'fetch_arrow_batches', None)
+    if fetch_arrow_batches is None:
+        return None
+    try:
+        return fetch_arrow_batches()
+    except Exception as e:
+        # Raised before any row is consumed, so fetchmany() still sees the whole result
+        logging.debug(f'Arrow batches unavailable, fetching rows instead: {e}')
+        return None
+
+
+def iter_batches(cursor, columns: Optional[Sequence[str]] = None, batch_size: int = 1000) -> Iterator[RowBatch]:
+    """
+    Stream the last query's result as column-oriented batches.
+
+    Arrow batches follow Snowflake's result chunks; the fetchmany() fallback
+    reads batch_size rows at a time. Only one batch is held in memory.
+
+    Args:
+        cursor: Cursor the query was executed on
+        columns: Names to expose the columns under (defaults to cursor.description)
+        batch_size: Rows per fetchmany() call when Arrow batches are unavailable
+
+    Yields:
+        Non-empty RowBatch objects
+    """
+    names = list(columns) if columns else [desc[0] for desc in cursor.description]
+    tables = _arrow_batches(cursor)
+    if tables is not None:
+        for table in tables:
+            if table.num_rows:
+                yield RowBatch.from_arrow(names, table)
+        return
+
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield RowBatch.from_rows(names, rows)
+
+
+def iter_rows(cursor, columns: Optional[Sequence[str]] = None, batch_size: int = 1000) -> Iterator[Row]:
+    """Stream the last query's result as Row mappings (see iter_batches)"""
+    for batch in iter_batches(cursor, columns, batch_size):
+        yield from batch
+
+
+def fetch_rows(cursor, columns: Optional[Sequence[str]] = None, batch_size: int = 1000) -> List[Row]:
+    """Materialize the last query's result as Row mappings (see iter_batches)"""
+    return list(iter_rows(cursor, columns, batch_size))
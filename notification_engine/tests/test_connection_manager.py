@@ -0,0 +1,174 @@
+"""Unit tests for Snowflake connection reuse"""
+import unittest
+from src.snowflake.connection_manager import ConnectionManager, is_session_expired_error
+
+
+class FakeSessionExpired(Exception):
+    errno = 390112
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, query):
+        if self.connection.expired:
+            raise FakeSessionExpired('Session no longer exists')
+        self.connection.executed.append(query)
+
+    def fetchone(self):
+        return (1,)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, **params):
+        self.params = params
+        self.closed = False
+        self.expired = False
+        self.executed = []
+        self.rollbacks = 0
+        # Current session context, as snowflake.connector reports it (upper case)
+        self.warehouse = params.get('warehouse', '').upper() or None
+        self.schema = params.get('schema', '').upper() or None
+
+    def rollback(self):
+        if self.expired:
+            raise FakeSessionExpired('Session no longer exists')
+        self.rollbacks += 1
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def is_closed(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+
+
+class TestConnectionManager(unittest.TestCase):
+    """Test connection pooling across invocations"""
+
+    def setUp(self):
+        self.opened = []
+        self.key_loads = 0
+
+        def connect(**params):
+            connection = FakeConnection(**params)
+            self.opened.append(connection)
+            return connection
+
+        def load_key():
+            self.key_loads += 1
+            return b'der-bytes'
+
+        self.load_key = load_key
+        self.manager = ConnectionManager(connect_fn=connect, health_check_idle_seconds=0)
+
+    def test_reuses_healthy_connection(self):
+        """Acquiring again after a release returns the pooled connection"""
+        first = self.manager.acquire(private_key_loader=self.load_key, account='acct', user='u')
+        self.manager.release(first)
+        second = self.manager.acquire(private_key_loader=self.load_key, account='acct', user='u')
+
+        self.assertIs(first, second)
+        self.assertEqual(len(self.opened), 1)
+        self.assertEqual(self.key_loads, 1)
+        self.assertTrue(first.params['client_session_keep_alive'])
+        self.assertEqual(first.params['private_key'], b'der-bytes')
+
+    def test_reconnects_expired_session(self):
+        """An expired session is replaced transparently"""
+        first = self.manager.acquire(private_key_loader=self.load_key, account='acct', user='u')
+        self.manager.release(first)
+        first.expired = True
+
+        second = self.manager.acquire(private_key_loader=self.load_key, account='acct', user='u')
+
+        self.assertIsNot(first, second)
+        self.assertTrue(first.closed)
+        self.assertEqual(len(self.opened), 2)
+
+    def test_reconnects_closed_connection(self):
+        """A connection closed elsewhere is not handed out again"""
+        first = self.manager.acquire(account='acct', user='u')
+        self.manager.release(first)
+        first.close()
+
+        second = self.manager.acquire(account='acct', user='u')
+
+        self.assertIsNot(first, second)
+
+    def test_separate_pool_entries_per_params(self):
+        """Different connection parameters get different connections"""
+        first = self.manager.acquire(account='acct', user='u', warehouse='A')
+        second = self.manager.acquire(account='acct', user='u', warehouse='B')
+
+        self.assertIsNot(first, second)
+
+    def test_concurrent_callers_get_their_own_connection(self):
+        """A connection checked out by one caller is not handed to another"""
+        first = self.manager.acquire(account='acct', user='u')
+        second = self.manager.acquire(account='acct', user='u')
+
+        self.assertIsNot(first, second)
+
+        self.manager.release(second)
+        self.assertEqual((first.rollbacks, second.rollbacks), (0, 1))
+        self.assertIs(self.manager.acquire(account='acct', user='u'), second)
+
+    def test_release_keeps_one_idle_connection(self):
+        first = self.manager.acquire(account='acct', user='u')
+        second = self.manager.acquire(account='acct', user='u')
+
+        self.manager.release(first)
+        self.manager.release(second)
+
+        self.assertFalse(first.closed)
+        self.assertTrue(second.closed)
+        self.assertIs(self.manager.acquire(account='acct', user='u'), first)
+
+    def test_release_ignores_connections_not_checked_out(self):
+        """A second release (or one from a caller that doesn't hold it) leaves the session alone"""
+        first = self.manager.acquire(account='acct', user='u')
+        self.manager.release(first)
+        self.manager.release(first)
+        self.manager.release(FakeConnection())
+
+        self.assertEqual(first.rollbacks, 1)
+        self.assertFalse(first.closed)
+
+    def test_release_rolls_back_and_restores_session_context(self):
+        """A released session is rolled back and switched back to its warehouse / schema"""
+        first = self.manager.acquire(account='acct', user='u', warehouse='wh_xs', schema='IC_CRM')
+        first.schema = 'SCRATCH'
+
+        self.manager.release(first)
+        second = self.manager.acquire(account='acct', user='u', warehouse='wh_xs', schema='IC_CRM')
+
+        self.assertIs(first, second)
+        self.assertEqual(first.rollbacks, 1)
+        self.assertIn('USE SCHEMA IC_CRM', first.executed)
+        self.assertNotIn('USE WAREHOUSE wh_xs', first.executed)
+
+    def test_release_drops_session_that_cannot_be_reset(self):
+        first = self.manager.acquire(account='acct', user='u')
+        first.expired = True
+
+        self.manager.release(first)
+
+        self.assertTrue(first.closed)
+        self.assertIsNot(self.manager.acquire(account='acct', user='u'), first)
+
+    def test_is_session_expired_error(self):
+        """Expired session errors are recognised by errno or message"""
+        self.assertTrue(is_session_expired_error(FakeSessionExpired()))
+        self.assertTrue(is_session_expired_error(Exception('Authentication token has expired.')))
+        self.assertFalse(is_session_expired_error(Exception('Table does not exist')))
+
+
+if __name__ == '__main__':
+    unittest.main()
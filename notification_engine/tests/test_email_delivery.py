@@ -0,0 +1,220 @@
+"""Unit tests for per-owner digests and pooled SMTP delivery"""
+import smtplib
+import socket
+import unittest
+from datetime import date
+from email import message_from_string
+from unittest import mock
+from src.config.settings import Settings
+from src.email.digests import build_digests, build_object_owners, parse_mail_ids
+from src.email.email_service import EmailService
+from src.email.smtp_pool import SmtpDeliveryPool, is_transient_smtp_error
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:  # optional local SMTP stand-in
+    Controller = None
+
+
+def make_row(object_name, status='Success'):
+    return {'object_name': object_name, 'inserted': 1, 'updated': 0, 'deleted': 0,
+            'status': status, 'log_message': ''}
+
+
+class FakeSMTP:
+    """Records TLS/login/sendmail calls; can fail the next N sendmail calls"""
+
+    instances = []
+    fail_next = []
+
+    def __init__(self, host, port):
+        self.tls = False
+        self.logins = 0
+        self.sent = []
+        self.messages = []
+        self.quit_called = False
+        FakeSMTP.instances.append(self)
+
+    def starttls(self):
+        self.tls = True
+
+    def login(self, username, password):
+        self.logins += 1
+
+    def sendmail(self, sender, recipients, message):
+        if FakeSMTP.fail_next:
+            raise FakeSMTP.fail_next.pop(0)
+        self.sent.append((sender, tuple(recipients)))
+        self.messages.append(message_from_string(message))
+        return {}
+
+    def quit(self):
+        self.quit_called = True
+
+
+class TestDigests(unittest.TestCase):
+    """Test splitting the report by recipient"""
+
+    def setUp(self):
+        self.report = [make_row('Account'), make_row('Contact'), make_row('Opportunity', 'Failed')]
+        self.owners = build_object_owners([
+            ('Account', 'Account', 'sales@example.com; ops@example.com'),
+            ('Contact', 'Contact', 'sales@example.com,ops@example.com'),
+            ('Opp', 'Opportunity', 'deals@example.com ops@example.com'),
+        ])
+
+    def test_parse_mail_ids(self):
+        self.assertEqual(parse_mail_ids(' a@x.com;b@x.com , c@x.com '), ['a@x.com', 'b@x.com', 'c@x.com'])
+        self.assertEqual(parse_mail_ids(None), [])
+
+    def test_subscribers_get_full_report_owners_get_their_objects(self):
+        digests = build_digests(self.report, ['ops@example.com'], self.owners)
+
+        self.assertTrue(digests[0].full_report)
+        self.assertEqual(digests[0].recipients, ['ops@example.com'])
+        self.assertEqual(len(digests[0].rows), 3)
+
+        by_recipient = {tuple(d.recipients): [r['object_name'] for r in d.rows] for d in digests[1:]}
+        # ops@ is a subscriber, so it is not sent a second, filtered copy
+        self.assertEqual(by_recipient, {
+            ('sales@example.com',): ['Account', 'Contact'],
+            ('deals@example.com',): ['Opportunity'],
+        })
+
+    def test_owners_with_identical_rows_share_a_digest(self):
+        owners = build_object_owners([('Account', 'Account', 'a@example.com, b@example.com')])
+        digests = build_digests(self.report, [], owners)
+
+        self.assertEqual(len(digests), 1)
+        self.assertEqual(digests[0].recipients, ['a@example.com', 'b@example.com'])
+
+
+class TestEmailService(unittest.TestCase):
+    """Test the messages built for subscribers and owners"""
+
+    def setUp(self):
+        FakeSMTP.instances = []
+        FakeSMTP.fail_next = []
+        patcher = mock.patch.multiple(
+            Settings, SNOWFLAKE_ACCOUNT='acct', SNOWFLAKE_USER='user', SNOWFLAKE_PRIVATE_KEY_PATH='key.p8',
+            SMTP_HOST='smtp.test', SMTP_USERNAME='user', SMTP_PASSWORD='secret', SENDER_EMAIL='from@example.com',
+            SUBSCRIBER_EMAILS=['ops@example.com', 'lead@example.com'], SMTP_MAX_CONNECTIONS=1, SMTP_MAX_RETRIES=0
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_owners_sharing_a_digest_get_separate_envelopes(self):
+        owners = build_object_owners([('Account', 'Account', 'a@example.com, b@example.com')])
+
+        EmailService(smtp_factory=FakeSMTP).send_daily_report(date(2025, 11, 3), [make_row('Account')], owners)
+
+        session = FakeSMTP.instances[0]
+        self.assertEqual([recipients for _, recipients in session.sent], [
+            ('ops@example.com', 'lead@example.com'), ('a@example.com',), ('b@example.com',),
+        ])
+        self.assertEqual([message['To'] for message in session.messages],
+                         ['ops@example.com, lead@example.com', 'a@example.com', 'b@example.com'])
+        owner_bodies = {message.get_payload()[0].get_payload() for message in session.messages[1:]}
+        self.assertEqual(len(owner_bodies), 1)
+
+
+class TestSmtpDeliveryPool(unittest.TestCase):
+    """Test session reuse, bounded concurrency and retries"""
+
+    def setUp(self):
+        FakeSMTP.instances = []
+        FakeSMTP.fail_next = []
+
+    def make_pool(self, **kwargs):
+        options = dict(host='smtp.test', port=587, username='user', password='secret',
+                       max_connections=2, max_retries=2, retry_backoff_seconds=0, smtp_factory=FakeSMTP)
+        options.update(kwargs)
+        return SmtpDeliveryPool(**options)
+
+    def test_reuses_authenticated_sessions(self):
+        """Many messages go over at most max_connections sessions, each logged in once"""
+        deliveries = [('from@example.com', [f'to{i}@example.com'], 'msg') for i in range(20)]
+
+        with self.make_pool() as pool:
+            errors = pool.send_all(deliveries)
+
+        self.assertEqual(errors, [None] * 20)
+        self.assertLessEqual(len(FakeSMTP.instances), 2)
+        self.assertEqual(sum(len(s.sent) for s in FakeSMTP.instances), 20)
+        for session in FakeSMTP.instances:
+            self.assertTrue(session.tls)
+            self.assertEqual(session.logins, 1)
+            self.assertTrue(session.quit_called)
+
+    def test_retries_transient_failure_on_fresh_session(self):
+        FakeSMTP.fail_next = [smtplib.SMTPServerDisconnected('gone')]
+
+        with self.make_pool(max_connections=1) as pool:
+            errors = pool.send_all([('from@example.com', ['to@example.com'], 'msg')])
+
+        self.assertEqual(errors, [None])
+        self.assertEqual(len(FakeSMTP.instances), 2)
+        self.assertEqual(FakeSMTP.instances[1].sent, [('from@example.com', ('to@example.com',))])
+
+    def test_permanent_failure_is_not_retried(self):
+        FakeSMTP.fail_next = [smtplib.SMTPDataError(554, b'rejected')]
+
+        with self.make_pool(max_connections=1) as pool:
+            errors = pool.send_all([('from@example.com', ['to@example.com'], 'msg')])
+
+        self.assertIsInstance(errors[0], smtplib.SMTPDataError)
+        self.assertEqual(len(FakeSMTP.instances), 1)
+
+    def test_gives_up_after_max_retries(self):
+        FakeSMTP.fail_next = [smtplib.SMTPResponseException(421, b'busy')] * 3
+
+        with self.make_pool(max_connections=1, max_retries=2) as pool:
+            errors = pool.send_all([('from@example.com', ['to@example.com'], 'msg')])
+
+        self.assertIsInstance(errors[0], smtplib.SMTPResponseException)
+        self.assertEqual(len(FakeSMTP.instances), 3)
+
+    def test_error_classification(self):
+        self.assertTrue(is_transient_smtp_error(smtplib.SMTPServerDisconnected()))
+        self.assertTrue(is_transient_smtp_error(ConnectionResetError()))
+        self.assertTrue(is_transient_smtp_error(smtplib.SMTPRecipientsRefused({'a@x.com': (451, b'later')})))
+        self.assertFalse(is_transient_smtp_error(smtplib.SMTPRecipientsRefused({'a@x.com': (550, b'no')})))
+        self.assertFalse(is_transient_smtp_error(smtplib.SMTPAuthenticationError(535, b'bad creds')))
+
+
+@unittest.skipIf(Controller is None, 'aiosmtpd not installed')
+class TestSmtpDeliveryPoolAgainstLocalServer(unittest.TestCase):
+    """End-to-end delivery against a local aiosmtpd server"""
+
+    def setUp(self):
+        self.received = []
+        received = self.received
+
+        class Handler:
+            async def handle_DATA(self, server, session, envelope):
+                received.append((envelope.mail_from, tuple(envelope.rcpt_tos)))
+                return '250 OK'
+
+        # The controller probes its own port on start, so pick a free one up front
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            self.port = probe.getsockname()[1]
+        self.controller = Controller(Handler(), hostname='127.0.0.1', port=self.port)
+        self.controller.start()
+
+    def tearDown(self):
+        self.controller.stop()
+
+    def test_delivers_all_messages(self):
+        deliveries = [('from@example.com', [f'to{i}@example.com'], 'Subject: t\r\n\r\nbody') for i in range(5)]
+
+        with SmtpDeliveryPool('127.0.0.1', self.port, use_tls=False, max_connections=2) as pool:
+            errors = pool.send_all(deliveries)
+
+        self.assertEqual(errors, [None] * 5)
+        self.assertEqual(sorted(r[1][0] for r in self.received), sorted(d[1][0] for d in deliveries))
+        self.assertLessEqual(pool.sessions_opened, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
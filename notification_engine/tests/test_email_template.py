@@ -33,7 +33,7 @@ class TestEmailTemplate(unittest.TestCase):
         
         # Check for key elements
         self.assertIn('Daily Execution Report', html)
-        self.assertIn('Sunday, November 03, 2025', html)
+        self.assertIn('Monday, November 03, 2025', html)
         self.assertIn('Account', html)
         self.assertIn('Event', html)
         self.assertIn('100', html)
@@ -58,6 +58,46 @@ class TestEmailTemplate(unittest.TestCase):
         self.assertIn('Daily Execution Report', html)
         self.assertIn('0', html)  # All counts should be 0
 
+    
+    def test_escapes_row_values(self):
+        """Test error text and object names are HTML-escaped"""
+        report_data = [{
+            'object_name': 'Account<script>',
+            'inserted': 1,
+            'updated': 0,
+            'deleted': 0,
+            'status': 'Failed',
+            'log_message': 'Error: "x" < 5 & <b>bad</b>'
+        }]
+        
+        html = EmailTemplate.generate_report_html(date(2025, 11, 3), report_data)
+        
+        self.assertNotIn('<script>', html)
+        self.assertNotIn('<b>bad</b>', html)
+        self.assertIn('Account&lt;script&gt;', html)
+        self.assertIn('Error: &quot;x&quot; &lt; 5 &amp; &lt;b&gt;bad&lt;/b&gt;', html)
+        self.assertIn('class="summary-value error"', html)
+    
+    def test_large_report(self):
+        """Test thousands of rows render completely"""
+        report_data = [
+            {
+                'object_name': f'Object{i}',
+                'inserted': i,
+                'updated': 0,
+                'deleted': 0,
+                'status': 'Success',
+                'log_message': None
+            }
+            for i in range(5000)
+        ]
+        
+        html = EmailTemplate.generate_report_html(date(2025, 11, 3), report_data)
+        
+        self.assertEqual(html.count('<tr>'), 5001)  # header + rows
+        self.assertIn('Object4999', html)
+        self.assertIn(f'{sum(range(5000)):,}', html)
+
 
 if __name__ == '__main__':
     unittest.main()
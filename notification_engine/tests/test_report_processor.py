@@ -1,7 +1,7 @@
 """Unit tests for report processor"""
 import unittest
 from datetime import datetime
-from src.processors.report_processor import ReportProcessor
+from src.processors.report_processor import ReportAccumulator, ReportProcessor
 
 
 class TestReportProcessor(unittest.TestCase):
@@ -106,6 +106,35 @@ class TestReportProcessor(unittest.TestCase):
         self.assertEqual(account_row['updated'], 20)
         self.assertEqual(account_row['deleted'], 5)
 
+    def test_accumulator_consumes_stream(self):
+        """Test incremental consolidation from a generator matches batch consolidation"""
+        def records():
+            for i in range(1, 4):
+                yield {
+                    'ID': i,
+                    'TYPE': 'adf/upsert/Account',
+                    'STATUS': 'Success',
+                    'LOG_MESSAGE': '',
+                    'REPORT': '{"inserted": 10, "updated": 1}',
+                    'INSERTED_DATE': datetime.now()
+                }
+            yield {
+                'ID': 4,
+                'TYPE': 'azure_func/delete/',
+                'STATUS': 'Success',
+                'LOG_MESSAGE': '',
+                'REPORT': '{"Account": 2}',
+                'INSERTED_DATE': datetime.now()
+            }
+        
+        accumulator = ReportAccumulator(self.processor)
+        accumulator.add_all(records())
+        
+        self.assertEqual(accumulator.record_count, 4)
+        self.assertEqual(accumulator.rows(), self.processor.consolidate_executions(records()))
+        account_row = accumulator.rows()[0]
+        self.assertEqual((account_row['inserted'], account_row['updated'], account_row['deleted']), (30, 3, 2))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,114 @@
+"""Unit tests for column-oriented result batches"""
+import unittest
+from src.snowflake.result_rows import RowBatch, fetch_rows, iter_batches, iter_rows
+
+
+class FakeArrowColumn:
+    def __init__(self, values, conversions):
+        self.values = values
+        self.conversions = conversions
+
+    def to_pylist(self):
+        self.conversions.append(self.values)
+        return list(self.values)
+
+
+class FakeArrowTable:
+    """Stands in for pyarrow.Table (num_rows / column(i).to_pylist())"""
+
+    def __init__(self, columns, conversions):
+        self._columns = [FakeArrowColumn(values, conversions) for values in columns]
+        self.num_rows = len(columns[0]) if columns else 0
+
+    def column(self, position):
+        return self._columns[position]
+
+
+class ArrowCursor:
+    description = [('ID',), ('STATUS',), ('REPORT',)]
+
+    def __init__(self, tables):
+        self.tables = tables
+
+    def fetch_arrow_batches(self):
+        return iter(self.tables)
+
+    def fetchmany(self, size):
+        raise AssertionError('fetchmany() should not be used when Arrow batches are available')
+
+
+class RowCursor:
+    description = [('ID',), ('STATUS',), ('REPORT',)]
+
+    def __init__(self, rows, arrow_error=None):
+        self.rows = list(rows)
+        self.arrow_error = arrow_error
+
+    def fetch_arrow_batches(self):
+        if self.arrow_error:
+            raise self.arrow_error
+        raise AssertionError('unexpected Arrow fetch')
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+
+class TestArrowBatches(unittest.TestCase):
+    """Test reading Arrow result batches"""
+
+    def setUp(self):
+        self.conversions = []
+        self.cursor = ArrowCursor([
+            FakeArrowTable([[1, 2], ['Success', 'Failed'], ['{}', '{"inserted": 3}']], self.conversions),
+            FakeArrowTable([[], [], []], self.conversions),
+            FakeArrowTable([[3], ['Success'], [None]], self.conversions),
+        ])
+
+    def test_rows_read_like_dicts(self):
+        """Rows support item access, get() and comparison with dicts"""
+        rows = fetch_rows(self.cursor)
+
+        self.assertEqual([row['ID'] for row in rows], [1, 2, 3])
+        self.assertEqual(rows[1], {'ID': 2, 'STATUS': 'Failed', 'REPORT': '{"inserted": 3}'})
+        self.assertIsNone(rows[2].get('REPORT'))
+        self.assertEqual(rows[0].get('OBJECT_NAME', ''), '')
+        with self.assertRaises(KeyError):
+            rows[0]['OBJECT_NAME']
+
+    def test_columns_are_converted_once_and_only_when_read(self):
+        """Reading STATUS from every row converts that column once per batch and nothing else"""
+        statuses = [row['STATUS'] for row in iter_rows(self.cursor)]
+
+        self.assertEqual(statuses, ['Success', 'Failed', 'Success'])
+        self.assertEqual(self.conversions, [['Success', 'Failed'], ['Success']])
+
+    def test_empty_batches_are_skipped(self):
+        batches = list(iter_batches(self.cursor, columns=['id', 'status', 'report']))
+
+        self.assertEqual([len(batch) for batch in batches], [2, 1])
+        self.assertEqual(list(batches[0].tuples()), [(1, 'Success', '{}'), (2, 'Failed', '{"inserted": 3}')])
+        self.assertEqual(batches[1].columns, ['id', 'status', 'report'])
+
+
+class TestRowFallback(unittest.TestCase):
+    """Test cursors without Arrow results"""
+
+    def test_fetchmany_when_arrow_is_unavailable(self):
+        """A cursor whose Arrow fetch fails (e.g. pyarrow missing) is read with fetchmany()"""
+        cursor = RowCursor([(i, 'Success', '{}') for i in range(5)], arrow_error=RuntimeError('no pyarrow'))
+
+        batches = list(iter_batches(cursor, batch_size=2))
+
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        self.assertEqual(batches[2].column('ID'), [4])
+
+    def test_from_rows_transposes_tuples(self):
+        batch = RowBatch.from_rows(['A', 'B'], [(1, 'x'), (2, 'y')])
+
+        self.assertEqual(batch.column('B'), ['x', 'y'])
+        self.assertEqual([dict(row) for row in batch], [{'A': 1, 'B': 'x'}, {'A': 2, 'B': 'y'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
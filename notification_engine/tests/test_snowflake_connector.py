@@ -0,0 +1,109 @@
+"""Unit tests for streaming execution records from Snowflake"""
+import sqlite3
+import unittest
+from datetime import date, datetime
+from src.snowflake.connector import SnowflakeConnector, date_range_filter
+
+
+class FakeCursor:
+    description = [('ID',), ('TYPE',), ('STATUS',), ('LOG_MESSAGE',), ('REPORT',), ('INSERTED_DATE',)]
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.fetch_sizes = []
+        self.closed = False
+
+    def execute(self, query, params):
+        self.params = params
+
+    def fetchmany(self, size):
+        self.fetch_sizes.append(size)
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+
+class TestIterDailyExecutions(unittest.TestCase):
+    """Test batched streaming of EXECUTION_TRACKER rows"""
+
+    def setUp(self):
+        rows = [(i, 'adf/upsert/Account', 'Success', '', '{}', None) for i in range(5)]
+        self.cursor = FakeCursor(rows)
+        # Bypass Settings.validate(); only the connection is needed here
+        self.connector = SnowflakeConnector.__new__(SnowflakeConnector)
+        self.connector.connection = FakeConnection(self.cursor)
+
+    def test_streams_in_batches(self):
+        """Rows are fetched batch_size at a time and yielded as dicts"""
+        stream = self.connector.iter_daily_executions(date(2025, 11, 3), batch_size=2)
+
+        first = next(stream)
+        self.assertEqual(first['ID'], 0)
+        self.assertEqual(first['TYPE'], 'adf/upsert/Account')
+        self.assertEqual(self.cursor.fetch_sizes, [2])
+
+        rest = list(stream)
+        self.assertEqual([r['ID'] for r in rest], [1, 2, 3, 4])
+        self.assertEqual(self.cursor.fetch_sizes, [2, 2, 2, 2])
+        self.assertTrue(self.cursor.closed)
+
+    def test_fetch_daily_executions_returns_list(self):
+        """The materializing API is kept for callers that need a list"""
+        records = self.connector.fetch_daily_executions(date(2025, 11, 3))
+        self.assertEqual(len(records), 5)
+        self.assertEqual(self.cursor.params, (datetime(2025, 11, 3), datetime(2025, 11, 4)))
+
+    def test_multi_day_range(self):
+        """A weekly digest covers its last day up to (not including) the next midnight"""
+        list(self.connector.iter_executions(date(2025, 11, 3), date(2025, 11, 9)))
+        self.assertEqual(self.cursor.params, (datetime(2025, 11, 3), datetime(2025, 11, 10)))
+
+
+class TestDateRangeFilter(unittest.TestCase):
+    """Test the half-open INSERTED_DATE predicate"""
+
+    def test_bare_column_comparison(self):
+        """The column is compared directly so partitions/indexes can be pruned"""
+        where_clause, params = date_range_filter(date(2025, 11, 3))
+
+        self.assertEqual(where_clause, 'INSERTED_DATE >= %s AND INSERTED_DATE < %s')
+        self.assertNotIn('DATE(', where_clause)
+        self.assertEqual(params, (datetime(2025, 11, 3), datetime(2025, 11, 4)))
+
+    def test_range_uses_index_search(self):
+        """On an indexed stand-in table the range is a SEARCH, while DATE() forces a full SCAN"""
+        conn = sqlite3.connect(':memory:')
+        conn.execute("CREATE TABLE EXECUTION_TRACKER (ID INTEGER PRIMARY KEY, TYPE TEXT, INSERTED_DATE TEXT)")
+        conn.execute("CREATE INDEX IDX_INSERTED_DATE ON EXECUTION_TRACKER (INSERTED_DATE)")
+        where_clause, params = date_range_filter(date(2025, 11, 3), placeholder='?')
+
+        range_plan = conn.execute(
+            f"EXPLAIN QUERY PLAN SELECT TYPE FROM EXECUTION_TRACKER WHERE {where_clause}",
+            [str(value) for value in params]
+        ).fetchall()
+        date_plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT TYPE FROM EXECUTION_TRACKER WHERE DATE(INSERTED_DATE) = ?",
+            ['2025-11-03']
+        ).fetchall()
+        conn.close()
+
+        self.assertTrue(range_plan[0][3].startswith('SEARCH'))
+        self.assertTrue(date_plan[0][3].startswith('SCAN'))
+
+    def test_rejects_inverted_range(self):
+        with self.assertRaises(ValueError):
+            date_range_filter(date(2025, 11, 9), date(2025, 11, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""Parity tests for SQL pushdown consolidation"""
+import json
+import sqlite3
+import unittest
+from src.processors.report_processor import ReportProcessor
+from src.processors.sql_report_processor import SqlReportProcessor
+
+
+# (ID, TYPE, STATUS, LOG_MESSAGE, REPORT, INSERTED_DATE)
+FIXTURE_RECORDS = [
+    (1, 'adf/upsert/Account', 'Success', '', json.dumps({'inserted': 100, 'updated': 20}), '2025-11-03 01:00:00'),
+    (2, 'adf/upsert/Account', 'Failed', 'Connection timeout', json.dumps({'inserted': 5}), '2025-11-03 02:00:00'),
+    (3, 'adf/upsert/Account', 'Success', 'ok', json.dumps({'inserted': 7, 'updated': 1}), '2025-11-03 03:00:00'),
+    (4, 'adf/upsert/Event', 'Failed', None, json.dumps({'inserted': 1, 'updated': 2}), '2025-11-03 01:30:00'),
+    (5, 'adf/upsert/Event', 'Failed', '', 'not json', '2025-11-03 04:00:00'),
+    (6, 'azure_func/delete/', 'Success', '', json.dumps({'Account': 5, 'Task': '12', 'Fund': {'n': 1}}), '2025-11-03 05:00:00'),
+    (7, 'azure_func/delete/', 'Error', 'Procedure failed', json.dumps({'Task': 3}), '2025-11-03 05:00:00'),
+    (8, 'azure_func/validation', 'Success', 'Count mismatch on Opportunity',
+     json.dumps({'Account': 'Success', 'Opportunity': 'Failed', 'Contact': 'Success'}), '2025-11-03 06:00:00'),
+    (9, 'azure_func/validation', 'Success', '', json.dumps({'Opportunity': 'Success', 'Contact': 'Warning'}), '2025-11-03 07:00:00'),
+    (10, 'custom/job/Investment', 'Running', 'started', None, '2025-11-03 08:00:00'),
+    (11, 'custom/job/Investment', 'Failed', 'ignored', None, '2025-11-03 09:00:00'),
+    (12, 'adf/upsert/Investment', 'Failed', 'upsert failed', json.dumps({'updated': 4}), '2025-11-03 10:00:00'),
+    (13, 'Standalone', 'Success', '', '', '2025-11-03 11:00:00'),
+    (14, 'azure_func/delete/', 'Success', '', json.dumps(['not', 'an', 'object']), '2025-11-03 12:00:00'),
+]
+
+
+class TestSqlReportProcessor(unittest.TestCase):
+    """Compare SQL pushdown against the reference Python processor"""
+
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute("""
+            CREATE TABLE EXECUTION_TRACKER (
+                ID INTEGER PRIMARY KEY, TYPE TEXT, STATUS TEXT, LOG_MESSAGE TEXT,
+                REPORT TEXT, OBJECT_NAME TEXT, INSERTED_DATE TEXT
+            )
+        """)
+        self.conn.executemany(
+            "INSERT INTO EXECUTION_TRACKER (ID, TYPE, STATUS, LOG_MESSAGE, REPORT, INSERTED_DATE) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            FIXTURE_RECORDS
+        )
+
+    def tearDown(self):
+        self.conn.close()
+
+    def _python_report(self, records):
+        columns = ['ID', 'TYPE', 'STATUS', 'LOG_MESSAGE', 'REPORT', 'INSERTED_DATE']
+        ordered = sorted(records, key=lambda r: (r[5], r[0]))
+        return ReportProcessor().consolidate_executions(dict(zip(columns, r)) for r in ordered)
+
+    def _sql_report(self, where_clause='1 = 1', params=()):
+        return SqlReportProcessor('sqlite').consolidate(self.conn.cursor(), where_clause, params)
+
+    def test_parity_with_python_processor(self):
+        """Both implementations produce identical reports on the fixture data"""
+        # A non-object REPORT on a delete record crashes the reference processor, so leave it out here
+        records = [r for r in FIXTURE_RECORDS if r[0] != 14]
+        self.conn.execute("DELETE FROM EXECUTION_TRACKER WHERE ID = 14")
+
+        self.assertEqual(self._sql_report(), self._python_report(records))
+
+    def test_expected_rows(self):
+        """Spot-check the consolidated values"""
+        rows = {row['object_name']: row for row in self._sql_report()}
+
+        self.assertEqual((rows['Account']['inserted'], rows['Account']['updated'], rows['Account']['deleted']),
+                         (112, 21, 5))
+        self.assertEqual(rows['Account']['status'], 'Failed')
+        self.assertEqual(rows['Account']['log_message'], 'Connection timeout')
+        self.assertEqual(rows['Task']['deleted'], 15)
+        self.assertEqual(rows['Task']['status'], 'Error')
+        self.assertEqual(rows['Fund']['deleted'], 0)
+        self.assertEqual(rows['Opportunity']['status'], 'Failed')
+        self.assertEqual(rows['Contact']['status'], 'Warning')
+        self.assertEqual(rows['Investment']['status'], 'Failed')
+        self.assertEqual(rows['Investment']['log_message'], 'upsert failed')
+
+    def test_where_clause_filters_records(self):
+        """Only records matching the predicate are consolidated"""
+        where_clause = 'INSERTED_DATE < ?'
+        params = ('2025-11-03 02:30:00',)
+        expected = self._python_report([r for r in FIXTURE_RECORDS if r[5] < params[0]])
+
+        self.assertEqual(self._sql_report(where_clause, params), expected)
+
+    def test_snowflake_query(self):
+        """The Snowflake dialect uses PARSE_JSON/FLATTEN and keeps driver placeholders"""
+        query = SqlReportProcessor('snowflake').build_query('DATE(INSERTED_DATE) = %s')
+
+        self.assertIn('TRY_PARSE_JSON(REPORT)', query)
+        self.assertIn('LATERAL FLATTEN(input => r.R)', query)
+        self.assertIn('DATE(INSERTED_DATE) = %s', query)
+
+    def test_unknown_dialect(self):
+        with self.assertRaises(ValueError):
+            SqlReportProcessor('oracle')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+"""Unit tests for the daily rollup and trend rendering"""
+import json
+import sqlite3
+import unittest
+from datetime import date
+from src.email.email_template import EmailTemplate
+from src.processors.sql_report_processor import SqlReportProcessor
+from src.processors.trends import build_trends, sparkline
+
+
+class TestSparkline(unittest.TestCase):
+    """Test sparkline scaling"""
+
+    def test_scales_to_peak(self):
+        self.assertEqual(sparkline([0, 4, 8]), '▁▅█')
+
+    def test_flat_and_empty_series(self):
+        self.assertEqual(sparkline([0, 0, 0]), '▁▁▁')
+        self.assertEqual(sparkline([]), '')
+
+
+class TestDailyRollup(unittest.TestCase):
+    """Roll up EXECUTION_TRACKER one day at a time and build trends from the rollup"""
+
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute("""
+            CREATE TABLE EXECUTION_TRACKER (
+                ID INTEGER PRIMARY KEY, TYPE TEXT, STATUS TEXT, LOG_MESSAGE TEXT,
+                REPORT TEXT, OBJECT_NAME TEXT, INSERTED_DATE TEXT
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE EXECUTION_DAILY_ROLLUP (
+                REPORT_DATE TEXT, OBJECT_NAME TEXT, INSERTED INTEGER, UPDATED INTEGER, DELETED INTEGER,
+                RUNS INTEGER, FAILURES INTEGER,
+                PRIMARY KEY (REPORT_DATE, OBJECT_NAME)
+            )
+        """)
+        self.conn.executemany(
+            "INSERT INTO EXECUTION_TRACKER (TYPE, STATUS, LOG_MESSAGE, REPORT, INSERTED_DATE) VALUES (?, ?, ?, ?, ?)",
+            [
+                ('adf/upsert/Account', 'Success', '', json.dumps({'inserted': 10, 'updated': 2}), '2025-11-01 01:00:00'),
+                ('adf/upsert/Account', 'Failed', 'boom', json.dumps({'inserted': 1}), '2025-11-01 02:00:00'),
+                ('azure_func/delete/', 'Success', '', json.dumps({'Account': 3, 'Task': 4}), '2025-11-01 03:00:00'),
+                ('adf/upsert/Account', 'Success', '', json.dumps({'inserted': 20}), '2025-11-03 01:00:00'),
+            ]
+        )
+        self.processor = SqlReportProcessor('sqlite')
+
+    def tearDown(self):
+        self.conn.close()
+
+    def update_rollup(self, day):
+        """SQLite stand-in for SnowflakeConnector.update_daily_rollup's MERGE"""
+        query = self.processor.build_rollup_query('INSERTED_DATE >= ? AND INSERTED_DATE < ?')
+        self.conn.execute(f"""
+            INSERT INTO EXECUTION_DAILY_ROLLUP
+            SELECT ?, * FROM ({query}) WHERE true
+            ON CONFLICT (REPORT_DATE, OBJECT_NAME) DO UPDATE SET
+                INSERTED = excluded.INSERTED, UPDATED = excluded.UPDATED, DELETED = excluded.DELETED,
+                RUNS = excluded.RUNS, FAILURES = excluded.FAILURES
+        """, (day.isoformat(), f'{day} 00:00:00', f'{date.fromordinal(day.toordinal() + 1)} 00:00:00'))
+
+    def rollup_rows(self):
+        cursor = self.conn.execute("SELECT * FROM EXECUTION_DAILY_ROLLUP ORDER BY REPORT_DATE, OBJECT_NAME")
+        columns = [desc[0].lower() for desc in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        for row in rows:
+            row['report_date'] = date.fromisoformat(row['report_date'])
+        return rows
+
+    def test_rollup_is_incremental_and_idempotent(self):
+        for day in (date(2025, 11, 1), date(2025, 11, 2), date(2025, 11, 3)):
+            self.update_rollup(day)
+        self.update_rollup(date(2025, 11, 1))  # re-running a day replaces its rows
+
+        rows = {(r['report_date'], r['object_name']): r for r in self.rollup_rows()}
+
+        self.assertEqual(len(rows), 3)
+        account = rows[(date(2025, 11, 1), 'Account')]
+        self.assertEqual((account['inserted'], account['updated'], account['deleted']), (11, 2, 3))
+        self.assertEqual((account['runs'], account['failures']), (3, 1))
+        self.assertEqual(rows[(date(2025, 11, 1), 'Task')]['deleted'], 4)
+
+    def test_trends_from_rollup(self):
+        for day in (date(2025, 11, 1), date(2025, 11, 2), date(2025, 11, 3)):
+            self.update_rollup(day)
+
+        trends = build_trends(self.rollup_rows(), date(2025, 10, 31), date(2025, 11, 3))
+
+        self.assertEqual([t['object_name'] for t in trends], ['Account', 'Task'])
+        account = trends[0]
+        self.assertEqual(account['activity'], [0, 16, 0, 20])
+        self.assertEqual(account['failure_days'], 1)
+        self.assertEqual(account['total_activity'], 36)
+        self.assertEqual(len(account['activity_sparkline']), 4)
+        self.assertEqual(account['failure_sparkline'], '▁█▁▁')
+
+        html = EmailTemplate.generate_report_html(date(2025, 11, 3), [], trends, 4)
+        self.assertIn('Trends (last 4 days)', html)
+        self.assertIn(account['activity_sparkline'], html)
+
+
+if __name__ == '__main__':
+    unittest.main()
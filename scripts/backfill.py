@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Backfill delete_tracker for a past time window
+
+Looks up, per topic, the last cursor saved before --from and the first cursor
+saved after --to in cursor_history, replays the events in between from the
+Pub/Sub API (several topics in parallel), stages the transformed rows in a
+temporary table and merges them into delete_tracker. Records already tracked
+are skipped, so a window can be backfilled more than once. cursor_store is
+never changed.
+
+Salesforce keeps platform events for 72 hours, so only recent windows can be
+replayed. In mock mode the events come from mock_data/ instead.
+
+Usage:
+    python scripts/backfill.py --from "2025-10-16 00:00:00" --to "2025-10-17 00:00:00"
+    python scripts/backfill.py --from "2025-10-16 06:00:00" --topic /event/Delete_Logs__e --workers 8
+    python scripts/backfill.py --from "2025-10-16 00:00:00" --dry-run
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import logging
+import os
+import sys
+import threading
+from typing import Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from src.replay.backfill import plan_ranges, replay_id_int, run_backfill  # noqa: E402
+from src.utils.routing import EventRouter  # noqa: E402
+from src.utils.transform import transform_for_snowflake  # noqa: E402
+
+
+def _timestamp(value: str) -> str:
+    """Validate a UTC timestamp argument and normalize it for Snowflake"""
+    try:
+        return datetime.datetime.fromisoformat(value).strftime("%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid timestamp: {value!r} (expected e.g. 2025-10-16 06:00:00)")
+
+
+def _make_fetch(settings, batch_size: int):
+    """Fetch callable for run_backfill, sharing one Salesforce session across worker threads"""
+    if settings.mock_mode:
+        from src.mock_events import load_mock_events_for_topic
+
+        def fetch_mock(topic: str, replay_id: Optional[bytes]) -> List[Dict]:
+            return load_mock_events_for_topic(settings.mock_data_dir, topic, replay_id=replay_id, max_events=batch_size)
+
+        return fetch_mock
+
+    from src.replay.batch_tuning import BatchSizeController
+    from src.salesforce.auth import authenticate
+    from src.salesforce.pubsub_client import fetch_events_via_pubsub
+
+    credentials = list(authenticate(settings))
+    lock = threading.Lock()
+
+    def refresh_access_token() -> tuple[str, str, str]:
+        with lock:
+            credentials[:] = authenticate(settings)
+            return tuple(credentials)
+
+    def fetch(topic: str, replay_id: Optional[bytes]) -> List[Dict]:
+        access_token, instance_url, tenant_id = credentials
+        # A fixed-size controller pulls the whole page on one stream, 100 events per FetchRequest
+        controller = BatchSizeController(
+            topic, batch_size=batch_size, min_size=batch_size, max_size=batch_size, memory_probe=lambda: None,
+        )
+        return fetch_events_via_pubsub(
+            access_token=access_token,
+            instance_url=instance_url,
+            tenant_id=tenant_id,
+            topic_name=topic,
+            replay_id=replay_id,
+            controller=controller,
+            token_provider=refresh_access_token,
+            max_retries=settings.pubsub_max_retries,
+            retry_base_seconds=settings.pubsub_retry_base_seconds,
+        )
+
+    return fetch
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Backfill delete_tracker from historical cursors")
+    parser.add_argument("--from", dest="start", type=_timestamp, required=True,
+                        help="Start of the window (UTC), e.g. '2025-10-16 00:00:00'")
+    parser.add_argument("--to", dest="end", type=_timestamp,
+                        help="End of the window (UTC); default: up to the newest event")
+    parser.add_argument("--topic", action="append", help="Topic to backfill (repeatable, default: SF_TOPIC_NAMES)")
+    parser.add_argument("--workers", type=int, default=4, help="Topics replayed in parallel")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Events fetched per Subscribe stream")
+    parser.add_argument("--dry-run", action="store_true", help="Show the replay ranges without fetching")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    from src.config.settings import get_settings
+    from src.replay.cursor_store import CursorStore
+    from src.snowflake.connector import SnowflakeConnector
+
+    settings = get_settings()
+    topics = args.topic or settings.sf_topic_names
+    snowflake_conn = SnowflakeConnector(
+        account=settings.snowflake_account,
+        user=settings.snowflake_user,
+        private_key_path=settings.snowflake_private_key_path,
+        warehouse=settings.snowflake_warehouse,
+        database=settings.snowflake_database,
+        schema=settings.snowflake_schema,
+        table=settings.snowflake_table,
+        backend=settings.warehouse_backend,
+        sqlite_path=settings.warehouse_sqlite_path,
+    )
+    try:
+        snowflake_conn.connect()
+        cursor_store = CursorStore(snowflake_conn.connection)
+        start_cursors = cursor_store.get_history_cursors(topics, args.start)
+        end_cursors = cursor_store.get_history_cursors(topics, args.end, after=True) if args.end else {}
+        ranges = plan_ranges(topics, start_cursors, end_cursors)
+
+        for replay_range in ranges:
+            start, end = replay_range.start_replay_id, replay_range.end_replay_id
+            print(f"{replay_range.topic}: after {replay_id_int(start) if start else 'EARLIEST'} "
+                  f"up to {replay_id_int(end) if end else 'newest'}")
+        if args.dry_run or not ranges:
+            return 0
+
+        router = EventRouter(prefix_loader=lambda: snowflake_conn.fetch_key_prefixes(
+            settings.entity_id_map_table,
+            settings.entity_id_map_prefix_column,
+            settings.entity_id_map_object_column,
+        ))
+        # Load ENTITYIDMAP once here rather than racing for it on the worker threads
+        router.key_prefixes()
+
+        def transform(events: List[Dict]) -> List[Dict]:
+            skipped: List[Dict] = []
+            rows = transform_for_snowflake(events, router, skipped)
+            if skipped:
+                logging.warning("Skipped %d unmappable event(s) from %s", len(skipped), events[0]["topic"])
+            return rows
+
+        staging_table = f"{settings.snowflake_table}_backfill"
+        snowflake_conn.create_staging_table(staging_table)
+        staged = run_backfill(
+            ranges,
+            _make_fetch(settings, args.batch_size),
+            transform,
+            lambda rows: snowflake_conn.stage_events(staging_table, rows),
+            workers=args.workers,
+        )
+        failed = sorted(topic for topic, count in staged.items() if count < 0)
+        inserted = snowflake_conn.merge_staged_events(staging_table)
+
+        print(f"Staged {sum(c for c in staged.values() if c > 0)} rows from {len(staged)} topic(s); "
+              f"{inserted} new rows merged into {settings.snowflake_table}")
+        if failed:
+            print("Failed topics (re-run with --topic): " + ", ".join(failed))
+            return 1
+        return 0
+    finally:
+        snowflake_conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
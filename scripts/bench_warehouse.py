@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark the warehouse paths against the local SQLite backend
+
+Runs the insert, cursor, staged merge and apply (DELETE_<object> procedure)
+paths of SnowflakeConnector / CursorStore on a fresh SQLite file with
+deterministic data, and reports the time per stage. Useful for comparing a
+change to one of these paths before and after, without Snowflake; absolute
+numbers are not comparable to Snowflake.
+
+Usage:
+    python scripts/bench_warehouse.py
+    python scripts/bench_warehouse.py --events 100000 --topics 10 --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from src.replay.cursor_store import CursorStore  # noqa: E402
+from src.snowflake.connector import SnowflakeConnector  # noqa: E402
+from src.warehouse.sqlite_backend import delete_procedure, register_procedure  # noqa: E402
+
+OBJECTS = ("Account", "Contact", "Opportunity", "Task", "Event")
+
+
+def make_rows(count: int) -> List[Dict]:
+    """Deterministic delete tracker rows spread over OBJECTS"""
+    return [
+        {"object_name": OBJECTS[n % len(OBJECTS)], "record_id": f"REC{n:012d}", "deleted_by": f"USR{n % 97:012d}",
+         "status": "open"}
+        for n in range(count)
+    ]
+
+
+def timed(results: Dict[str, float], name: str, fn: Callable[[], object]) -> object:
+    started = time.perf_counter()
+    value = fn()
+    results[name] = (time.perf_counter() - started) * 1000
+    return value
+
+
+def run(events: int, topics: int, path: str) -> Dict[str, float]:
+    conn = SnowflakeConnector("local", "local", "local", "LOCAL", "PUBLIC", "delete_tracker", "",
+                              backend="sqlite", sqlite_path=path)
+    conn.connect()
+    conn.ensure_table_exists()
+    rows = make_rows(events)
+    results: Dict[str, float] = {}
+
+    timed(results, "insert_events", lambda: conn.insert_events(rows))
+
+    store = CursorStore(conn.connection, run_id="bench")
+    topic_names = [f"/event/Bench{t}_Delete__e" for t in range(topics)]
+    timed(results, "cursor_set", lambda: [store.set(topic, (events + n).to_bytes(8, "big"))
+                                         for n, topic in enumerate(topic_names)])
+    timed(results, "cursor_get", lambda: store.get_cursors_for_topics(topic_names))
+
+    conn.create_staging_table("delete_tracker_backfill")
+    timed(results, "stage_events", lambda: conn.stage_events("delete_tracker_backfill", rows + make_rows(events // 10)))
+    timed(results, "merge_staged_events", lambda: conn.merge_staged_events("delete_tracker_backfill"))
+
+    cursor = conn.connection.cursor()
+    try:
+        for object_name in OBJECTS:
+            cursor.execute(f"CREATE TABLE {object_name} (id VARCHAR(18), name VARCHAR(255))")
+            cursor.executemany(f"INSERT INTO {object_name} VALUES (%s, %s)",
+                               [(row["record_id"], "x") for row in rows if row["object_name"] == object_name])
+            register_procedure(f"DELETE_{object_name}", delete_procedure(object_name, object_name))
+        timed(results, "apply_deletes", lambda: [cursor.execute(f"CALL DELETE_{o}()") for o in OBJECTS])
+    finally:
+        cursor.close()
+    conn.invalidate()
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark warehouse paths on the local SQLite backend")
+    parser.add_argument("--events", type=int, default=20000, help="Delete events to insert")
+    parser.add_argument("--topics", type=int, default=10, help="Topics to save cursors for")
+    parser.add_argument("--json", action="store_true", help="Emit a machine-readable report")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = run(args.events, args.topics, os.path.join(tmp, "bench.db"))
+
+    if args.json:
+        print(json.dumps({"events": args.events, "topics": args.topics, "ms": results}, indent=2))
+    else:
+        for name, ms in results.items():
+            print(f"{name:<22}{ms:>10.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
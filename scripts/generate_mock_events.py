@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Generate large synthetic delete event streams for mock mode
+
+Writes one NDJSON file per topic ("mock_data/<event>.ndjson", optionally
+gzipped) in the format src/mock_events.py streams: one event per line, with
+8-byte big-endian replay IDs that increase monotonically, so mock mode can
+resume from its cursor and pull batches from millions of events without
+loading the file into memory.
+
+Per-object topics ("/event/<Object>_Delete__e") get events for their object.
+Any other topic is treated as a shared delete channel: events are spread over
+all known objects and a share of them carry no ObjectName, so they must be
+routed by record ID key prefix.
+
+Usage:
+    python scripts/generate_mock_events.py --topic /event/Account_Delete__e --count 1000000
+    python scripts/generate_mock_events.py --topic /event/Delete_Logs__e --count 5000000 --gzip
+    python scripts/generate_mock_events.py --topic /event/Delete_Logs__e --count 100000 --append
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import gzip
+import json
+import os
+import random
+import re
+import sys
+import time
+from typing import Dict, Iterator, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DELETE_TOPIC_PATTERN = re.compile(r"^/event/(?P<object>\w+?)_Delete__e$")
+
+# Key prefixes used for generated record IDs (standard objects match src/utils/routing.py)
+OBJECT_KEY_PREFIXES = {
+    "Account": "001",
+    "Contact": "003",
+    "Opportunity": "006",
+    "Task": "00T",
+    "Event": "00U",
+    "ActivityContent": "0XX",
+    "Fund": "a0F",
+    "Investment": "a0I",
+    "LegalEntity": "a0L",
+    "LP_Consultant_Relationship": "a0R",
+}
+
+BASE62 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+
+# Events are buffered and written this many lines at a time
+WRITE_CHUNK_LINES = 10000
+
+
+def base62(number: int, width: int) -> str:
+    """Fixed-width base62 string, as used in Salesforce record IDs"""
+    digits = []
+    while number:
+        number, remainder = divmod(number, 62)
+        digits.append(BASE62[remainder])
+    return "".join(reversed(digits)).rjust(width, "0")
+
+
+def salesforce_id(key_prefix: str, number: int) -> str:
+    """15-character record ID: key prefix, pod "3t" and a base62 counter"""
+    return f"{key_prefix}3t{base62(number, 10)}"
+
+
+def generate_events(
+    topic: str,
+    count: int,
+    start_replay_id: int = 1,
+    rng: Optional[random.Random] = None,
+    start_epoch: float = 1760572800.0,
+    seconds_between: float = 2.0,
+    users: int = 200,
+    object_name_share: float = 0.5,
+) -> Iterator[Dict]:
+    """
+    Yield synthetic delete events for one topic
+
+    Args:
+        topic: Topic name; "/event/<Object>_Delete__e" or a shared channel
+        count: Number of events
+        start_replay_id: Replay ID of the first event (incremented by one per event)
+        rng: Random source (seed it for reproducible files)
+        start_epoch: DeletedDate of the first event, in seconds since the epoch
+        seconds_between: Average spacing of DeletedDate
+        users: Number of distinct deleting users
+        object_name_share: Share of shared-channel events that name their object
+
+    Yields:
+        Event dictionaries in the mock JSON format (replay IDs base64-encoded)
+    """
+    rng = rng or random.Random()
+    match = DELETE_TOPIC_PATTERN.match(topic)
+    event_name = topic.split("/")[-1]
+    objects = [match.group("object")] if match else list(OBJECT_KEY_PREFIXES)
+    deleted_at = start_epoch
+    user_ids = [salesforce_id("005", user) for user in range(users)]
+
+    for n in range(count):
+        replay_id = base64.b64encode((start_replay_id + n).to_bytes(8, "big")).decode("ascii")
+        object_name = objects[0] if match else rng.choice(objects)
+        user_id = rng.choice(user_ids)
+        deleted_at += rng.uniform(0, 2 * seconds_between)
+
+        payload = {
+            "RecordId": salesforce_id(OBJECT_KEY_PREFIXES.get(object_name, "a0Z"), start_replay_id + n),
+            "DeletedBy": user_id,
+            "DeletedDate": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(deleted_at)),
+            "OwnerId": user_id,
+        }
+        if match or rng.random() < object_name_share:
+            payload = {"ObjectName": object_name, **payload}
+
+        yield {
+            "replay_id": replay_id,
+            "topic": topic,
+            "event_id": f"mock-{event_name.lower()}-{start_replay_id + n:012d}",
+            "schema_id": f"mock-schema-{event_name.lower()}",
+            "payload": payload,
+            "latest_replay_id": replay_id,
+        }
+
+
+def last_replay_id(path: str) -> int:
+    """Replay ID of the last event in an existing NDJSON file (0 if empty or missing)"""
+    if not os.path.exists(path):
+        return 0
+    last_line = b""
+    if path.endswith(".gz"):
+        with gzip.open(path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    last_line = line
+    else:
+        with open(path, "rb") as f:
+            # Read back from the end until a complete line is in the buffer
+            size = f.seek(0, os.SEEK_END)
+            block = 4096
+            while True:
+                f.seek(max(0, size - block))
+                lines = [line for line in f.read().splitlines() if line.strip()]
+                if not lines or len(lines) > 1 or block >= size:
+                    break
+                block *= 2
+            if lines:
+                last_line = lines[-1]
+    if not last_line:
+        return 0
+    return int.from_bytes(base64.b64decode(json.loads(last_line)["replay_id"]), "big")
+
+
+def write_events(path: str, events: Iterator[Dict], append: bool = False) -> int:
+    """
+    Write events as NDJSON (gzip if path ends with ".gz")
+
+    Returns:
+        Number of events written
+    """
+    mode = "ab" if append else "wb"
+    written = 0
+    with (gzip.open(path, mode) if path.endswith(".gz") else open(path, mode)) as f:
+        chunk: List[str] = []
+        for event in events:
+            chunk.append(json.dumps(event, separators=(",", ":")))
+            if len(chunk) >= WRITE_CHUNK_LINES:
+                f.write(("\n".join(chunk) + "\n").encode("utf-8"))
+                written += len(chunk)
+                chunk = []
+        if chunk:
+            f.write(("\n".join(chunk) + "\n").encode("utf-8"))
+            written += len(chunk)
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate synthetic delete events for mock mode")
+    parser.add_argument("--topic", action="append", required=True, help="Topic to generate (repeatable)")
+    parser.add_argument("--count", type=int, default=100000, help="Events per topic")
+    parser.add_argument("--out", default=os.path.join(REPO_ROOT, "mock_data"), help="Output directory")
+    parser.add_argument("--gzip", action="store_true", help="Write <event>.ndjson.gz")
+    parser.add_argument("--append", action="store_true",
+                        help="Append to an existing file, continuing after its last replay ID")
+    parser.add_argument("--seed", type=int, help="Random seed for reproducible output")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    os.makedirs(args.out, exist_ok=True)
+    for topic in args.topic:
+        event_name = topic.split("/")[-1]
+        path = os.path.join(args.out, f"{event_name}.ndjson" + (".gz" if args.gzip else ""))
+        start = last_replay_id(path) + 1 if args.append else 1
+
+        started = time.perf_counter()
+        written = write_events(path, generate_events(topic, args.count, start, rng), append=args.append)
+        elapsed = time.perf_counter() - started
+        print(f"{topic}: wrote {written} events to {path} "
+              f"(replay IDs {start}..{start + written - 1}, {elapsed:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Cold-start import profile for the Function apps
+
+Imports each Function's entry module in a fresh interpreter with
+``python -X importtime``, parses the timings and reports:
+
+- the cumulative import time of the entry module (checked against a budget)
+- the most expensive top-level packages by self time
+- heavy modules that must stay lazy but were imported anyway
+
+Exits non-zero if any Function is over budget, imports a forbidden module
+or fails to import, so it can run as a CI gate.
+
+Usage:
+    python scripts/profile_imports.py
+    python scripts/profile_imports.py --function TimerPoller --top 15
+    python scripts/profile_imports.py --budget SyncValidator=250 --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass(frozen=True)
+class FunctionProfileTarget:
+    name: str
+    cwd: str
+    module: str
+    budget_ms: float
+    forbidden: tuple[str, ...] = ()
+
+
+# Modules that are only needed on some code paths and must not load at import time
+_CLIENT_LIBRARIES = (
+    "snowflake.connector",
+    "grpc",
+    "fastavro",
+    "jwt",
+    "cryptography",
+    "requests",
+    "pandas",
+    "simple_salesforce",
+)
+
+FUNCTIONS: Dict[str, FunctionProfileTarget] = {
+    "TimerPoller": FunctionProfileTarget(
+        name="TimerPoller",
+        cwd=REPO_ROOT,
+        module="TimerPoller",
+        budget_ms=250,
+        forbidden=_CLIENT_LIBRARIES,
+    ),
+    "DailyReportNotifier": FunctionProfileTarget(
+        name="DailyReportNotifier",
+        cwd=REPO_ROOT,
+        module="notification_engine.DailyReportNotifier",
+        budget_ms=250,
+        forbidden=_CLIENT_LIBRARIES,
+    ),
+    "SyncValidator": FunctionProfileTarget(
+        name="SyncValidator",
+        cwd=os.path.join(REPO_ROOT, "validation"),
+        module="SyncValidator",
+        budget_ms=250,
+        forbidden=_CLIENT_LIBRARIES,
+    ),
+}
+
+
+@dataclass(frozen=True)
+class ImportRecord:
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+@dataclass
+class ImportProfile:
+    target: FunctionProfileTarget
+    records: List[ImportRecord] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def entry(self) -> Optional[ImportRecord]:
+        """The entry module's own record (its cumulative time is the cold-start cost)"""
+        for record in reversed(self.records):
+            if record.name == self.target.module:
+                return record
+        return None
+
+    @property
+    def total_ms(self) -> Optional[float]:
+        entry = self.entry
+        # A failed import's timing (which includes traceback formatting) is meaningless
+        return entry.cumulative_us / 1000 if entry and self.error is None else None
+
+    @property
+    def forbidden_loaded(self) -> List[str]:
+        return find_forbidden(self.records, self.target.forbidden)
+
+    @property
+    def over_budget(self) -> bool:
+        return self.total_ms is not None and self.total_ms > self.target.budget_ms
+
+    @property
+    def ok(self) -> bool:
+        return self.total_ms is not None and not self.over_budget and not self.forbidden_loaded
+
+
+def parse_importtime(output: str) -> List[ImportRecord]:
+    """
+    Parse ``-X importtime`` stderr into records
+
+    Lines look like ``import time:       412 |       1830 |   json.decoder``
+    where the indentation of the module name gives its nesting depth.
+    Non-importtime lines (warnings, tracebacks) are ignored.
+    """
+    records = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|", 2)
+        if len(parts) != 3:
+            continue
+        self_field, cumulative_field, name_field = parts
+        try:
+            self_us = int(self_field)
+            cumulative_us = int(cumulative_field)
+        except ValueError:
+            # Header line: "self [us] | cumulative | imported package"
+            continue
+        name = name_field.rstrip()
+        stripped = name.lstrip(" ")
+        depth = (len(name) - len(stripped) - 1) // 2
+        records.append(ImportRecord(stripped, self_us, cumulative_us, max(depth, 0)))
+    return records
+
+
+def top_packages(records: Iterable[ImportRecord], limit: int = 10) -> List[tuple[str, float]]:
+    """Self time aggregated per top-level package, most expensive first (ms)"""
+    totals: Dict[str, int] = {}
+    for record in records:
+        package = record.name.split(".", 1)[0]
+        totals[package] = totals.get(package, 0) + record.self_us
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+    return [(package, us / 1000) for package, us in ranked[:limit]]
+
+
+def find_forbidden(records: Iterable[ImportRecord], forbidden: Iterable[str]) -> List[str]:
+    """Return the forbidden modules (or their submodules) that were imported"""
+    loaded = {record.name for record in records}
+    hits = []
+    for module in forbidden:
+        prefix = module + "."
+        if module in loaded or any(name.startswith(prefix) for name in loaded):
+            hits.append(module)
+    return hits
+
+
+def profile_function(target: FunctionProfileTarget, python: str = sys.executable) -> ImportProfile:
+    """Import the target's entry module in a fresh interpreter and parse the timings"""
+    env = dict(os.environ)
+    env.pop("PYTHONPATH", None)
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {target.module}"],
+        cwd=target.cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    profile = ImportProfile(target=target, records=parse_importtime(result.stderr))
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if line and not line.startswith("import time:")]
+        profile.error = errors[-1] if errors else f"exit code {result.returncode}"
+    return profile
+
+
+def format_report(profile: ImportProfile, top: int) -> str:
+    target = profile.target
+    lines = [f"== {target.name} ({target.module}) =="]
+    if profile.error:
+        lines.append(f"  FAILED to import: {profile.error}")
+    total = profile.total_ms
+    if total is not None:
+        status = "OVER BUDGET" if profile.over_budget else "ok"
+        lines.append(f"  cold-start imports: {total:.1f} ms (budget {target.budget_ms:.0f} ms) {status}")
+    forbidden = profile.forbidden_loaded
+    if forbidden:
+        lines.append(f"  eagerly imported (should be lazy): {', '.join(forbidden)}")
+    if profile.records:
+        lines.append(f"  top {top} packages by self time:")
+        for package, ms in top_packages(profile.records, top):
+            lines.append(f"    {ms:8.1f} ms  {package}")
+    return "\n".join(lines)
+
+
+def _parse_budgets(values: List[str]) -> Dict[str, float]:
+    budgets = {}
+    for value in values:
+        name, _, ms = value.partition("=")
+        if name not in FUNCTIONS or not ms:
+            raise argparse.ArgumentTypeError(f"Invalid budget {value!r}; expected <Function>=<ms>")
+        budgets[name] = float(ms)
+    return budgets
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Profile cold-start imports of the Function apps")
+    parser.add_argument("--function", action="append", choices=sorted(FUNCTIONS),
+                        help="Function to profile (repeatable, default: all)")
+    parser.add_argument("--budget", action="append", default=[], metavar="FUNCTION=MS",
+                        help="Override a Function's cold-start budget in milliseconds")
+    parser.add_argument("--top", type=int, default=10, help="Number of packages to list")
+    parser.add_argument("--json", action="store_true", help="Emit a machine-readable report")
+    args = parser.parse_args(argv)
+
+    try:
+        budgets = _parse_budgets(args.budget)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    profiles = []
+    for name in args.function or list(FUNCTIONS):
+        target = FUNCTIONS[name]
+        if name in budgets:
+            target = FunctionProfileTarget(target.name, target.cwd, target.module, budgets[name], target.forbidden)
+        profiles.append(profile_function(target))
+
+    if args.json:
+        print(json.dumps([
+            {
+                "function": profile.target.name,
+                "module": profile.target.module,
+                "import_ms": profile.total_ms,
+                "budget_ms": profile.target.budget_ms,
+                "forbidden_loaded": profile.forbidden_loaded,
+                "top_packages": top_packages(profile.records, args.top),
+                "error": profile.error,
+                "ok": profile.ok,
+            }
+            for profile in profiles
+        ], indent=2))
+    else:
+        print("\n\n".join(format_report(profile, args.top) for profile in profiles))
+
+    return 0 if all(profile.ok for profile in profiles) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
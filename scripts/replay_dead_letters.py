@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Replay dead-lettered delete events into DELETE_TRACKER
+
+Events that failed to decode or could not be mapped to an object are kept in
+the dead_letters table (see src/replay/dead_letter_store.py) instead of being
+dropped. After fixing the cause (a schema change, a missing ENTITYIDMAP row,
+...) run this tool to decode / route them again and insert them. Letters that
+still fail keep their latest error; cursors are never touched.
+
+Usage:
+    python scripts/replay_dead_letters.py
+    python scripts/replay_dead_letters.py --topic /event/Delete_Logs__e --limit 100
+    python scripts/replay_dead_letters.py --dry-run
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import logging
+import os
+import sys
+from typing import Callable, Dict, List, Optional, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from src.replay.dead_letter_store import STAGE_DECODE, DeadLetterStore  # noqa: E402
+from src.utils.routing import EventRouter  # noqa: E402
+from src.utils.transform import transform_for_snowflake  # noqa: E402
+
+
+def replay_letters(
+    letters: List[Dict],
+    decode: Callable[[str, bytes], Dict],
+    router: Optional[EventRouter] = None,
+) -> Tuple[List[Dict], List[int], List[Tuple[int, str]]]:
+    """
+    Decode (if needed) and transform dead letters again
+
+    Args:
+        letters: Dead letters from DeadLetterStore.fetch_pending
+        decode: Callable turning (schema_id, raw Avro payload) into a payload dictionary
+        router: EventRouter used for the transform
+
+    Returns:
+        (rows to insert, ids of letters that produced a row, [(id, error)] of letters that failed again)
+    """
+    rows: List[Dict] = []
+    replayed: List[int] = []
+    failures: List[Tuple[int, str]] = []
+
+    for letter in letters:
+        event = {
+            "topic": letter["topic"],
+            "event_id": letter["event_id"],
+            "schema_id": letter["schema_id"],
+            "replay_id": letter["replay_id"],
+            "payload": letter["decoded_payload"],
+        }
+        if letter["stage"] == STAGE_DECODE or event["payload"] is None:
+            try:
+                event["payload"] = decode(letter["schema_id"], letter["payload"])
+            except Exception as e:
+                failures.append((letter["id"], f"decode: {e}"))
+                continue
+
+        still_dead: List[Dict] = []
+        transformed = transform_for_snowflake([event], router, still_dead)
+        if still_dead:
+            failures.append((letter["id"], still_dead[0]["error"]))
+            continue
+        rows.extend(transformed)
+        replayed.append(letter["id"])
+
+    return rows, replayed, failures
+
+
+def _avro_decoder(settings) -> Callable[[str, bytes], Dict]:
+    """Decoder that fetches schemas through the Pub/Sub client (authenticates on first use)"""
+    client = None
+
+    def decode(schema_id: str, payload: bytes) -> Dict:
+        nonlocal client
+        if client is None:
+            from src.salesforce.auth import authenticate
+            from src.salesforce.pubsub_client import PubSubClient
+
+            client = PubSubClient(*authenticate(settings))
+        import fastavro
+
+        return fastavro.schemaless_reader(io.BytesIO(payload), client.get_schema(schema_id))
+
+    return decode
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay dead-lettered delete events into DELETE_TRACKER")
+    parser.add_argument("--topic", help="Only replay dead letters from this topic")
+    parser.add_argument("--limit", type=int, default=500, help="Maximum number of dead letters to replay")
+    parser.add_argument("--dry-run", action="store_true", help="Decode and route, but don't insert or update")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    from src.config.settings import get_settings
+    from src.snowflake.connector import SnowflakeConnector
+
+    settings = get_settings()
+    snowflake_conn = SnowflakeConnector(
+        account=settings.snowflake_account,
+        user=settings.snowflake_user,
+        private_key_path=settings.snowflake_private_key_path,
+        warehouse=settings.snowflake_warehouse,
+        database=settings.snowflake_database,
+        schema=settings.snowflake_schema,
+        table=settings.snowflake_table,
+        backend=settings.warehouse_backend,
+        sqlite_path=settings.warehouse_sqlite_path,
+    )
+    try:
+        snowflake_conn.connect()
+        store = DeadLetterStore(snowflake_conn.connection)
+        letters = store.fetch_pending(topic=args.topic, limit=args.limit)
+        if not letters:
+            print("No pending dead letters.")
+            return 0
+
+        router = EventRouter(prefix_loader=lambda: snowflake_conn.fetch_key_prefixes(
+            settings.entity_id_map_table,
+            settings.entity_id_map_prefix_column,
+            settings.entity_id_map_object_column,
+        ))
+        rows, replayed, failures = replay_letters(letters, _avro_decoder(settings), router)
+
+        for letter_id, error in failures:
+            print(f"dead letter {letter_id}: {error}")
+        print(f"{len(replayed)} of {len(letters)} dead letter(s) replayable, {len(failures)} still failing")
+        if args.dry_run:
+            return 0 if not failures else 1
+
+        snowflake_conn.insert_events(rows)
+        store.mark_replayed(replayed)
+        store.record_failures(failures)
+    finally:
+        snowflake_conn.close()
+
+    return 0 if not failures else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 import os
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 try:
     from dotenv import load_dotenv  # type: ignore
@@ -20,6 +20,7 @@ class Settings:
     sf_audience: str
     sf_private_key_path: str
     sf_topic_names: List[str]
+    sf_managed_subscriptions: Dict[str, str]
     
     snowflake_account: str
     snowflake_user: str
@@ -28,10 +29,37 @@ class Settings:
     snowflake_database: str
     snowflake_schema: str
     snowflake_table: str
+
+    # "snowflake", or "sqlite" to run against a local file for offline load tests
+    warehouse_backend: str
+    warehouse_sqlite_path: str
     
+    entity_id_map_table: str
+    entity_id_map_prefix_column: str
+    entity_id_map_object_column: str
+
+    # Run the delete procedure after each run for the objects that received new deletes
+    apply_deletes: bool
+    execution_tracker_table: str
+    entity_mapping_table: str
+    entity_mapping_object_column: str
+    entity_mapping_procedure_column: str
+
+    spill_dir: str
+
     mock_mode: bool
     mock_data_dir: str
 
+    batch_autotune: bool
+    # Events fetched per topic when autotuning is off
+    batch_events: int
+    batch_min_events: int
+    batch_max_events: int
+    batch_target_seconds: float
+
+    pubsub_max_retries: int
+    pubsub_retry_base_seconds: float
+
 
 _settings: Settings | None = None
 
@@ -40,6 +68,16 @@ def _env(name: str, default: str = "") -> str:
     return os.getenv(name, default)
 
 
+def _parse_managed_subscriptions(value: str) -> Dict[str, str]:
+    """Parse "topic=DeveloperName,topic=DeveloperName" into a topic -> managed subscription mapping"""
+    subscriptions = {}
+    for item in value.split(","):
+        topic, sep, developer_name = item.partition("=")
+        if sep and topic.strip() and developer_name.strip():
+            subscriptions[topic.strip()] = developer_name.strip()
+    return subscriptions
+
+
 def get_settings() -> Settings:
     global _settings
     if _settings is not None:
@@ -55,6 +93,7 @@ def get_settings() -> Settings:
         sf_audience=_env("SF_AUDIENCE", "https://login.salesforce.com"),
         sf_private_key_path=_env("SF_PRIVATE_KEY_PATH", "certs/private.key"),
         sf_topic_names=topic_names,
+        sf_managed_subscriptions=_parse_managed_subscriptions(_env("SF_MANAGED_SUBSCRIPTIONS")),
         snowflake_account=_env("SNOWFLAKE_ACCOUNT"),
         snowflake_user=_env("SNOWFLAKE_USER"),
         snowflake_private_key_path=_env("SNOWFLAKE_PRIVATE_KEY_PATH", "certs/rsa_key.p8"),
@@ -62,8 +101,26 @@ def get_settings() -> Settings:
         snowflake_database=_env("SNOWFLAKE_DATABASE"),
         snowflake_schema=_env("SNOWFLAKE_SCHEMA", "PUBLIC"),
         snowflake_table=_env("SNOWFLAKE_TABLE", "delete_tracker"),
+        warehouse_backend=_env("WAREHOUSE_BACKEND", "snowflake").lower(),
+        warehouse_sqlite_path=_env("WAREHOUSE_SQLITE_PATH", "local_warehouse.db"),
+        entity_id_map_table=_env("ENTITYIDMAP_TABLE", "ENTITYIDMAP"),
+        entity_id_map_prefix_column=_env("ENTITYIDMAP_PREFIX_COLUMN", "KEYPREFIX"),
+        entity_id_map_object_column=_env("ENTITYIDMAP_OBJECT_COLUMN", "ENTITYNAME"),
+        apply_deletes=_env("APPLY_DELETES", "false").lower() in ("true", "1", "yes"),
+        execution_tracker_table=_env("EXECUTION_TRACKER_TABLE", "EXECUTION_TRACKER"),
+        entity_mapping_table=_env("ENTITYMAPPING_TABLE", "ENTITYMAPPING"),
+        entity_mapping_object_column=_env("ENTITYMAPPING_OBJECT_COLUMN", "ENTITYNAME"),
+        entity_mapping_procedure_column=_env("ENTITYMAPPING_PROCEDURE_COLUMN", "DELETE_PROCEDURE"),
+        spill_dir=_env("SPILL_DIR"),
         mock_mode=_env("MOCK_MODE", "false").lower() in ("true", "1", "yes"),
         mock_data_dir=_env("MOCK_DATA_DIR", "mock_data"),
+        batch_autotune=_env("BATCH_AUTOTUNE", "false").lower() in ("true", "1", "yes"),
+        batch_events=int(_env("BATCH_EVENTS", "100")),
+        batch_min_events=int(_env("BATCH_MIN_EVENTS", "10")),
+        batch_max_events=int(_env("BATCH_MAX_EVENTS", "1000")),
+        batch_target_seconds=float(_env("BATCH_TARGET_SECONDS", "10")),
+        pubsub_max_retries=int(_env("PUBSUB_MAX_RETRIES", "3")),
+        pubsub_retry_base_seconds=float(_env("PUBSUB_RETRY_BASE_SECONDS", "1")),
     )
 
     return _settings
@@ -1,67 +1,166 @@
 """Mock event loader for testing without Salesforce connectivity"""
 
+import base64
+import gzip
 import json
 import logging
 import os
-import base64
-from typing import Dict, List
+from itertools import islice
+from typing import BinaryIO, Dict, Iterator, List, Optional
+
+# Looked up in this order; NDJSON sources are streamed line by line
+MOCK_FILE_SUFFIXES = (".ndjson", ".ndjson.gz", ".json")
 
 
-def load_mock_events_for_topic(mock_data_dir: str, topic_name: str) -> List[Dict]:
+def find_mock_file(mock_data_dir: str, topic_name: str) -> Optional[str]:
     """
-    Load mock events from JSON file for a given topic.
-    
+    Locate the mock data file for a topic.
+
     Args:
         mock_data_dir: Directory containing mock data files
         topic_name: Full topic name (e.g., "/event/ActivityContent_Delete__e")
-        
+
     Returns:
-        List of mock event dictionaries
+        Path of the first existing "<event>.ndjson", "<event>.ndjson.gz" or "<event>.json", or None
     """
     # Extract event name from topic path (e.g., "/event/ActivityContent_Delete__e" -> "ActivityContent_Delete__e")
     event_name = topic_name.split("/")[-1]
-    file_path = os.path.join(mock_data_dir, f"{event_name}.json")
-    
-    if not os.path.exists(file_path):
-        logging.info("No mock data file found for %s at %s", topic_name, file_path)
-        return []
-    
-    try:
+    for suffix in MOCK_FILE_SUFFIXES:
+        file_path = os.path.join(mock_data_dir, f"{event_name}{suffix}")
+        if os.path.isfile(file_path):
+            return file_path
+    return None
+
+
+def _decode_replay_ids(event: Dict) -> Dict:
+    """Convert replay_id / latest_replay_id from base64 strings to bytes"""
+    if isinstance(event.get("replay_id"), str):
+        event["replay_id"] = base64.b64decode(event["replay_id"])
+    if isinstance(event.get("latest_replay_id"), str):
+        event["latest_replay_id"] = base64.b64decode(event["latest_replay_id"])
+    return event
+
+
+def _line_at(f: BinaryIO, offset: int) -> tuple:
+    """(start, line) of the first line starting at or after offset"""
+    if offset == 0:
+        f.seek(0)
+    else:
+        # Finish the line that offset falls into (a no-op read of "\n" if offset starts a line)
+        f.seek(offset - 1)
+        f.readline()
+    start = f.tell()
+    return start, f.readline()
+
+
+def _seek_past(f: BinaryIO, replay_id: bytes) -> None:
+    """
+    Position f at the first line whose replay_id is greater than replay_id.
+
+    NDJSON mock files are written in replay_id order (see scripts/generate_mock_events.py),
+    so resuming from a cursor is a binary search over byte offsets instead of a full scan.
+    """
+    lo, hi = 0, os.fstat(f.fileno()).st_size
+    while lo < hi:
+        mid = (lo + hi) // 2
+        _, line = _line_at(f, mid)
+        if not line.strip() or base64.b64decode(json.loads(line)["replay_id"]) > replay_id:
+            hi = mid
+        else:
+            lo = mid + 1
+    start, _ = _line_at(f, lo)
+    f.seek(start)
+
+
+def iter_mock_events(mock_data_dir: str, topic_name: str, replay_id: Optional[bytes] = None) -> Iterator[Dict]:
+    """
+    Stream mock events for a topic, parsing NDJSON lazily.
+
+    Args:
+        mock_data_dir: Directory containing mock data files
+        topic_name: Full topic name (e.g., "/event/ActivityContent_Delete__e")
+        replay_id: Only yield events after this replay_id (mock cursor), like Subscribe with CUSTOM replay
+
+    Yields:
+        Mock event dictionaries with replay IDs as bytes
+    """
+    file_path = find_mock_file(mock_data_dir, topic_name)
+    if file_path is None:
+        logging.info("No mock data file found for %s in %s", topic_name, mock_data_dir)
+        return
+
+    if file_path.endswith(".json"):
+        # Small hand-written fixtures: a single JSON array
         with open(file_path, "r") as f:
             mock_events = json.load(f)
-        
-        # Convert replay_id from base64 string to bytes
         for event in mock_events:
-            if isinstance(event.get("replay_id"), str):
-                event["replay_id"] = base64.b64decode(event["replay_id"])
-            if isinstance(event.get("latest_replay_id"), str):
-                event["latest_replay_id"] = base64.b64decode(event["latest_replay_id"])
-        
-        logging.info("Loaded %d mock events for %s from %s", len(mock_events), topic_name, file_path)
+            event = _decode_replay_ids(event)
+            if replay_id is None or event["replay_id"] > replay_id:
+                yield event
+        return
+
+    compressed = file_path.endswith(".gz")
+    with (gzip.open(file_path, "rb") if compressed else open(file_path, "rb")) as f:
+        if replay_id is not None and not compressed:
+            _seek_past(f, replay_id)
+        for line in f:
+            if not line.strip():
+                continue
+            event = _decode_replay_ids(json.loads(line))
+            # gzip streams can't seek, so they skip to the cursor linearly
+            if replay_id is not None and compressed and event["replay_id"] <= replay_id:
+                continue
+            yield event
+
+
+def load_mock_events_for_topic(
+    mock_data_dir: str,
+    topic_name: str,
+    replay_id: Optional[bytes] = None,
+    max_events: Optional[int] = None,
+) -> List[Dict]:
+    """
+    Load mock events from JSON / NDJSON file for a given topic.
+
+    Args:
+        mock_data_dir: Directory containing mock data files
+        topic_name: Full topic name (e.g., "/event/ActivityContent_Delete__e")
+        replay_id: Only return events after this replay_id
+        max_events: Maximum number of events to return (None = all)
+
+    Returns:
+        List of mock event dictionaries
+    """
+    events = iter_mock_events(mock_data_dir, topic_name, replay_id)
+    try:
+        mock_events = list(islice(events, max_events))
+        if mock_events:
+            logging.info("Loaded %d mock events for %s", len(mock_events), topic_name)
         return mock_events
-        
+
     except Exception as e:
-        logging.error("Error loading mock data from %s: %s", file_path, e)
+        logging.error("Error loading mock data for %s from %s: %s", topic_name, mock_data_dir, e)
         return []
+    finally:
+        events.close()
 
 
 def get_mock_events(mock_data_dir: str, topic_names: List[str]) -> Dict[str, List[Dict]]:
     """
     Load mock events for multiple topics.
-    
+
     Args:
         mock_data_dir: Directory containing mock data files
         topic_names: List of topic names to load
-        
+
     Returns:
         Dictionary mapping topic names to list of mock events
     """
     mock_data = {}
-    
+
     for topic in topic_names:
         events = load_mock_events_for_topic(mock_data_dir, topic)
         if events:
             mock_data[topic] = events
-    
-    return mock_data
 
+    return mock_data
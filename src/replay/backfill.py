@@ -0,0 +1,126 @@
+"""Replay topics between historical cursors in parallel (see scripts/backfill.py)"""
+
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+@dataclass(frozen=True)
+class ReplayRange:
+    """Events of one topic after start_replay_id up to and including end_replay_id"""
+
+    topic: str
+    start_replay_id: Optional[bytes]  # None replays from EARLIEST
+    end_replay_id: Optional[bytes]  # None replays up to the newest event
+
+
+def replay_id_int(replay_id: bytes) -> int:
+    """Replay IDs are big-endian counters, so they compare as unsigned integers"""
+    return int.from_bytes(replay_id, byteorder="big", signed=False)
+
+
+def plan_ranges(
+    topics: List[str],
+    start_cursors: Dict[str, bytes],
+    end_cursors: Dict[str, bytes],
+) -> List[ReplayRange]:
+    """
+    Build one replay range per topic from cursor_history lookups
+
+    Args:
+        topics: Topics to backfill
+        start_cursors: Last cursor saved before the window (CursorStore.get_history_cursors)
+        end_cursors: First cursor saved after the window (after=True)
+
+    Returns:
+        Ranges to replay; topics whose window is empty are left out
+    """
+    ranges = []
+    for topic in topics:
+        start, end = start_cursors.get(topic), end_cursors.get(topic)
+        if start is None:
+            logging.warning("No cursor history before the window for %s; replaying from EARLIEST", topic)
+        if start is not None and end is not None and replay_id_int(end) <= replay_id_int(start):
+            logging.info("Nothing to backfill for %s", topic)
+            continue
+        ranges.append(ReplayRange(topic, start, end))
+    return ranges
+
+
+def iter_range(
+    replay_range: ReplayRange,
+    fetch: Callable[[str, Optional[bytes]], List[Dict]],
+) -> Iterator[List[Dict]]:
+    """
+    Page through a replay range
+
+    Args:
+        replay_range: Range to replay
+        fetch: Callable returning the next events of a topic after a replay_id (empty when drained)
+
+    Yields:
+        Batches of events, with events past end_replay_id dropped
+    """
+    end = replay_id_int(replay_range.end_replay_id) if replay_range.end_replay_id is not None else None
+    cursor = replay_range.start_replay_id
+
+    while True:
+        batch = fetch(replay_range.topic, cursor)
+        if not batch:
+            return
+        if end is not None:
+            in_range = [event for event in batch if replay_id_int(event["replay_id"]) <= end]
+            if in_range:
+                yield in_range
+            if len(in_range) < len(batch) or replay_id_int(batch[-1]["replay_id"]) >= end:
+                return
+        else:
+            yield batch
+        cursor = batch[-1]["replay_id"]
+
+
+def run_backfill(
+    ranges: List[ReplayRange],
+    fetch: Callable[[str, Optional[bytes]], List[Dict]],
+    transform: Callable[[List[Dict]], List[Dict]],
+    stage: Callable[[List[Dict]], int],
+    workers: int = 4,
+) -> Dict[str, int]:
+    """
+    Replay ranges concurrently and stage the transformed rows
+
+    Topics are fetched and transformed on worker threads; rows are staged on the
+    calling thread as each topic finishes, so one database connection suffices.
+
+    Args:
+        ranges: Ranges to replay
+        fetch: See iter_range (called from worker threads)
+        transform: Turns events into delete tracker rows
+        stage: Writes rows to the staging table
+
+    Returns:
+        Dictionary mapping topics to the number of rows staged (-1 for topics that failed)
+    """
+    def replay(replay_range: ReplayRange) -> List[Dict]:
+        rows: List[Dict] = []
+        events = 0
+        for batch in iter_range(replay_range, fetch):
+            events += len(batch)
+            rows.extend(transform(batch))
+        logging.info("Replayed %d events from %s", events, replay_range.topic)
+        return rows
+
+    staged: Dict[str, int] = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(replay, replay_range): replay_range.topic for replay_range in ranges}
+        for future in as_completed(futures):
+            topic = futures[future]
+            try:
+                staged[topic] = stage(future.result())
+            except Exception as e:
+                logging.error("Backfill of %s failed: %s", topic, e)
+                staged[topic] = -1
+    return staged
@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import snowflake.connector
+
+
+# Pub/Sub API rejects FetchRequest.num_requested above 100
+MAX_NUM_REQUESTED = 100
+
+# Decoded events (dicts, transformed rows, insert parameters) take several times
+# their Avro payload size in memory; budget conservatively.
+DECODED_SIZE_FACTOR = 8
+
+# Weight of the newest run in the per-event cost averages
+EWMA_ALPHA = 0.3
+
+
+def available_memory_bytes() -> Optional[int]:
+    """
+    Best-effort memory headroom for this worker: the lower of the cgroup (v2)
+    limit minus current usage and the host's MemAvailable. None if unknown.
+    """
+    candidates = []
+    try:
+        with open("/sys/fs/cgroup/memory.max") as f:
+            limit = f.read().strip()
+        if limit != "max":
+            with open("/sys/fs/cgroup/memory.current") as f:
+                candidates.append(int(limit) - int(f.read().strip()))
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    candidates.append(int(line.split()[1]) * 1024)
+                    break
+    except (OSError, ValueError):
+        pass
+    return max(0, min(candidates)) if candidates else None
+
+
+class BatchSizeController:
+    """
+    Learns how many events to pull from one topic per invocation.
+
+    The batch is split into FetchRequests of at most MAX_NUM_REQUESTED events
+    sent on the same Subscribe stream, so busy topics can pull several hundred
+    events per run while quiet topics keep asking for a handful. After each run
+    the size is:
+
+    - doubled when the topic filled the batch and the projected decode + insert
+      time still fits target_seconds,
+    - cut to what fits target_seconds when per-event cost grows,
+    - shrunk towards twice the observed volume when the topic drained early,
+    - capped by memory headroom (average payload x DECODED_SIZE_FACTOR),
+
+    and clamped to [min_size, max_size].
+    """
+
+    def __init__(
+        self,
+        topic: str,
+        batch_size: int = MAX_NUM_REQUESTED,
+        avg_decode_seconds: float = 0.0,
+        avg_insert_seconds: float = 0.0,
+        avg_payload_bytes: float = 0.0,
+        min_size: int = 10,
+        max_size: int = 1000,
+        target_seconds: float = 10.0,
+        memory_fraction: float = 0.25,
+        memory_probe: Callable[[], Optional[int]] = available_memory_bytes,
+    ):
+        self.topic = topic
+        self.min_size = max(1, min_size)
+        self.max_size = max(self.min_size, max_size)
+        self.target_seconds = target_seconds
+        self.memory_fraction = memory_fraction
+        self.memory_probe = memory_probe
+        self.batch_size = self._clamp(batch_size)
+        self.avg_decode_seconds = avg_decode_seconds
+        self.avg_insert_seconds = avg_insert_seconds
+        self.avg_payload_bytes = avg_payload_bytes
+        self._reset_run()
+
+    def _reset_run(self) -> None:
+        self.run_events = 0
+        self.run_payload_bytes = 0
+        self.run_decode_seconds = 0.0
+        self.run_insert_seconds = 0.0
+        self.drained = False
+
+    def _clamp(self, size: int) -> int:
+        return max(self.min_size, min(self.max_size, int(size)))
+
+    def memory_cap(self) -> Optional[int]:
+        """Largest batch that fits the memory budget, or None if it can't be estimated"""
+        headroom = self.memory_probe()
+        if headroom is None or self.avg_payload_bytes <= 0:
+            return None
+        return int(headroom * self.memory_fraction / (self.avg_payload_bytes * DECODED_SIZE_FACTOR))
+
+    def next_request(self, fetched: int) -> int:
+        """
+        num_requested for the next FetchRequest on the stream, or 0 to stop.
+
+        Args:
+            fetched: Events already received in this run
+        """
+        remaining = self.batch_size - fetched
+        return max(0, min(MAX_NUM_REQUESTED, remaining))
+
+    def record_decode(self, events: int, payload_bytes: int, seconds: float) -> None:
+        """Account for one decoded FetchResponse"""
+        self.run_events += events
+        self.run_payload_bytes += payload_bytes
+        self.run_decode_seconds += seconds
+
+    def record_insert(self, events: int, seconds: float) -> None:
+        """Account for the time spent inserting this topic's events"""
+        if events:
+            self.run_insert_seconds += seconds
+
+    def mark_drained(self) -> None:
+        """The topic had fewer events ready than requested"""
+        self.drained = True
+
+    def finish_run(self) -> int:
+        """
+        Fold this run's measurements into the averages and pick the next batch size.
+
+        Returns:
+            The new batch size
+        """
+        events = self.run_events
+        if events:
+            self.avg_decode_seconds = self._ewma(self.avg_decode_seconds, self.run_decode_seconds / events)
+            self.avg_insert_seconds = self._ewma(self.avg_insert_seconds, self.run_insert_seconds / events)
+            self.avg_payload_bytes = self._ewma(self.avg_payload_bytes, self.run_payload_bytes / events)
+
+        per_event = self.avg_decode_seconds + self.avg_insert_seconds
+        time_cap = int(self.target_seconds / per_event) if per_event > 0 else None
+
+        if self.drained or events < self.batch_size:
+            size = max(events * 2, self.min_size)
+        elif time_cap is None or per_event * self.batch_size * 2 <= self.target_seconds:
+            size = self.batch_size * 2
+        else:
+            size = self.batch_size
+
+        for cap in (time_cap, self.memory_cap()):
+            if cap is not None:
+                size = min(size, cap)
+
+        previous, self.batch_size = self.batch_size, self._clamp(size)
+        if self.batch_size != previous:
+            logging.info(
+                "Batch size for %s: %d -> %d (events=%d, %.1f ms/event, drained=%s)",
+                self.topic, previous, self.batch_size, events, per_event * 1000, self.drained,
+            )
+        self._reset_run()
+        return self.batch_size
+
+    def _ewma(self, average: float, sample: float) -> float:
+        if average <= 0:
+            return sample
+        return EWMA_ALPHA * sample + (1 - EWMA_ALPHA) * average
+
+
+class BatchTuningStore:
+    """Stores learned per-topic batch sizes in Snowflake next to cursor_store"""
+
+    def __init__(self, snowflake_connection: snowflake.connector.SnowflakeConnection):
+        """
+        Initialize the store with an active Snowflake connection
+
+        Args:
+            snowflake_connection: Active Snowflake connection object
+        """
+        self.connection = snowflake_connection
+        self._ensure_table_exists()
+
+    def _ensure_table_exists(self) -> None:
+        """Create batch_tuning table if it doesn't exist"""
+        create_table_sql = """
+        CREATE TABLE IF NOT EXISTS batch_tuning (
+            topic VARCHAR(255) PRIMARY KEY,
+            batch_size INTEGER,
+            avg_decode_seconds FLOAT,
+            avg_insert_seconds FLOAT,
+            avg_payload_bytes FLOAT,
+            last_updated TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP()
+        )
+        """
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(create_table_sql)
+            self.connection.commit()
+            logging.info("Ensured batch_tuning table exists in Snowflake")
+        except Exception as e:
+            logging.error("Error creating batch_tuning table: %s", e)
+            raise
+        finally:
+            cursor.close()
+
+    def load_controllers(self, topics: List[str], **tuning) -> Dict[str, BatchSizeController]:
+        """
+        Build one controller per topic, seeded with its learned state when present
+
+        Args:
+            topics: Topic names
+            **tuning: BatchSizeController limits (min_size, max_size, target_seconds, ...)
+
+        Returns:
+            Dictionary mapping topic names to controllers
+        """
+        state: Dict[str, tuple] = {}
+        if topics:
+            cursor = self.connection.cursor()
+            try:
+                placeholders = ", ".join(["%s"] * len(topics))
+                cursor.execute(
+                    "SELECT topic, batch_size, avg_decode_seconds, avg_insert_seconds, avg_payload_bytes "
+                    f"FROM batch_tuning WHERE topic IN ({placeholders})",
+                    topics,
+                )
+                for row in cursor.fetchall():
+                    state[row[0]] = row[1:]
+                logging.info("Retrieved batch tuning for %d/%d topics", len(state), len(topics))
+            except Exception as e:
+                # Fall back to defaults; tuning is an optimization, not a requirement
+                logging.error("Error retrieving batch tuning: %s", e)
+            finally:
+                cursor.close()
+
+        controllers = {}
+        for topic in topics:
+            if topic in state:
+                batch_size, decode_s, insert_s, payload = state[topic]
+                controllers[topic] = BatchSizeController(
+                    topic,
+                    batch_size=batch_size or MAX_NUM_REQUESTED,
+                    avg_decode_seconds=decode_s or 0.0,
+                    avg_insert_seconds=insert_s or 0.0,
+                    avg_payload_bytes=payload or 0.0,
+                    **tuning,
+                )
+            else:
+                controllers[topic] = BatchSizeController(topic, **tuning)
+        return controllers
+
+    def save(self, controllers: List[BatchSizeController]) -> None:
+        """
+        Persist learned batch sizes and averages
+
+        Args:
+            controllers: Controllers whose run has been finished
+        """
+        if not controllers:
+            return
+        cursor = self.connection.cursor()
+        try:
+            rows = ", ".join(["(%s, %s, %s, %s, %s)"] * len(controllers))
+            params: list = []
+            for c in controllers:
+                params.extend([c.topic, c.batch_size, c.avg_decode_seconds, c.avg_insert_seconds, c.avg_payload_bytes])
+            merge_sql = f"""
+            MERGE INTO batch_tuning AS target
+            USING (
+                SELECT column1 AS topic, column2 AS batch_size, column3 AS avg_decode_seconds,
+                       column4 AS avg_insert_seconds, column5 AS avg_payload_bytes
+                FROM VALUES {rows}
+            ) AS source
+            ON target.topic = source.topic
+            WHEN MATCHED THEN
+                UPDATE SET
+                    batch_size = source.batch_size,
+                    avg_decode_seconds = source.avg_decode_seconds,
+                    avg_insert_seconds = source.avg_insert_seconds,
+                    avg_payload_bytes = source.avg_payload_bytes,
+                    last_updated = CURRENT_TIMESTAMP()
+            WHEN NOT MATCHED THEN
+                INSERT (topic, batch_size, avg_decode_seconds, avg_insert_seconds, avg_payload_bytes, last_updated)
+                VALUES (source.topic, source.batch_size, source.avg_decode_seconds,
+                        source.avg_insert_seconds, source.avg_payload_bytes, CURRENT_TIMESTAMP())
+            """
+            cursor.execute(merge_sql, params)
+            self.connection.commit()
+            logging.info("Saved batch tuning for %d topics to Snowflake", len(controllers))
+        except Exception as e:
+            logging.error("Error saving batch tuning: %s", e)
+            raise
+        finally:
+            cursor.close()
@@ -1,21 +1,25 @@
 from __future__ import annotations
 
 import logging
-from typing import Optional
-import snowflake.connector
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import snowflake.connector
 
 
 class CursorStore:
     """Stores replay IDs in Snowflake for persistent, cross-instance storage"""
 
-    def __init__(self, snowflake_connection: snowflake.connector.SnowflakeConnection):
+    def __init__(self, snowflake_connection: snowflake.connector.SnowflakeConnection, run_id: Optional[str] = None):
         """
         Initialize cursor store with an active Snowflake connection
         
         Args:
             snowflake_connection: Active Snowflake connection object
+            run_id: Identifier of the current run, recorded in cursor_history
         """
         self.connection = snowflake_connection
+        self.run_id = run_id
         self._ensure_table_exists()
 
     def _ensure_table_exists(self) -> None:
@@ -27,13 +31,23 @@ class CursorStore:
             last_updated TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP()
         )
         """
+        # Append-only log of every saved cursor, so a past position can be replayed (see scripts/backfill.py)
+        create_history_sql = """
+        CREATE TABLE IF NOT EXISTS cursor_history (
+            topic VARCHAR(255),
+            replay_id BINARY,
+            run_id VARCHAR(64),
+            recorded_at TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP()
+        )
+        """
         cursor = self.connection.cursor()
         try:
             cursor.execute(create_table_sql)
+            cursor.execute(create_history_sql)
             self.connection.commit()
-            logging.info("Ensured cursor_store table exists in Snowflake")
+            logging.info("Ensured cursor_store and cursor_history tables exist in Snowflake")
         except Exception as e:
-            logging.error("Error creating cursor_store table: %s", e)
+            logging.error("Error creating cursor_store tables: %s", e)
             raise
         finally:
             cursor.close()
@@ -97,6 +111,11 @@ class CursorStore:
                 VALUES (source.topic, source.replay_id, CURRENT_TIMESTAMP())
             """
             cursor.execute(merge_sql, (topic, replay_id))
+            cursor.execute(
+                "INSERT INTO cursor_history (topic, replay_id, run_id, recorded_at) "
+                "VALUES (%s, %s, %s, CURRENT_TIMESTAMP())",
+                (topic, replay_id, self.run_id),
+            )
             self.connection.commit()
             
             # Convert replay_id to integer for logging
@@ -178,3 +197,39 @@ class CursorStore:
             return {}
         finally:
             cursor.close()
+
+    def get_history_cursors(self, topics: list[str], as_of: str, after: bool = False) -> dict[str, bytes]:
+        """
+        Get the cursors recorded in cursor_history around a point in time
+        
+        Args:
+            topics: List of topic names
+            as_of: Timestamp (e.g., "2025-10-16 00:00:00", UTC like CURRENT_TIMESTAMP())
+            after: False for the last cursor saved at or before as_of (where a replay starts),
+                True for the first cursor saved at or after it (where a replay ends)
+            
+        Returns:
+            Dictionary mapping topic names to replay_ids (only for topics with history in range)
+        """
+        if not topics:
+            return {}
+        
+        placeholders = ", ".join(["%s"] * len(topics))
+        comparison, order = (">=", "ASC") if after else ("<=", "DESC")
+        query = f"""
+        SELECT topic, replay_id
+        FROM cursor_history
+        WHERE topic IN ({placeholders}) AND recorded_at {comparison} %s
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY topic ORDER BY recorded_at {order}) = 1
+        """
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(query, [*topics, as_of])
+            result = {}
+            for topic, replay_id in cursor.fetchall():
+                if replay_id:
+                    result[topic] = bytes(replay_id)
+            logging.info("Retrieved %d historical cursors %s %s", len(result), "after" if after else "as of", as_of)
+            return result
+        finally:
+            cursor.close()
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import json
+import logging
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import snowflake.connector
+
+
+# Where an event failed
+STAGE_DECODE = "decode"
+STAGE_TRANSFORM = "transform"
+
+
+def make_dead_letter(
+    event: Dict,
+    stage: str,
+    error: str,
+    payload: Optional[bytes] = None,
+) -> Dict:
+    """
+    Build a dead letter from a (partially) processed event
+
+    Args:
+        event: Event dictionary (topic, event_id, schema_id, replay_id, and payload if decoded)
+        stage: STAGE_DECODE or STAGE_TRANSFORM
+        error: Why the event could not be processed
+        payload: Raw Avro payload bytes, when decoding failed
+
+    Returns:
+        Dead letter dictionary accepted by DeadLetterStore.add_all
+    """
+    return {
+        "topic": event.get("topic"),
+        "event_id": event.get("event_id"),
+        "schema_id": event.get("schema_id"),
+        "replay_id": event.get("replay_id"),
+        "payload": payload,
+        "decoded_payload": event.get("payload") if payload is None else None,
+        "stage": stage,
+        "error": error,
+    }
+
+
+def advance_past_dead_letters(latest_per_topic: Dict[str, bytes], letters: List[Dict]) -> None:
+    """
+    Move each topic's cursor past its dead-lettered replay_ids
+
+    Events that fail to decode are not returned by the fetch, so a cursor built from
+    decoded events alone would fetch (and dead-letter) a trailing bad event on every run.
+    Call only once the dead letters are stored.
+
+    Args:
+        latest_per_topic: Topic -> latest replay_id to save, updated in place
+        letters: Dead letters written in this run
+    """
+    for letter in letters:
+        topic, replay_id = letter.get("topic"), letter.get("replay_id")
+        if not topic or not replay_id:
+            continue
+        current = latest_per_topic.get(topic)
+        if current is None or int.from_bytes(replay_id, "big") > int.from_bytes(current, "big"):
+            latest_per_topic[topic] = replay_id
+
+
+class DeadLetterStore:
+    """Stores events that could not be decoded or mapped, so they can be replayed after a fix"""
+
+    def __init__(self, snowflake_connection: snowflake.connector.SnowflakeConnection):
+        """
+        Initialize the dead letter store with an active Snowflake connection
+
+        Args:
+            snowflake_connection: Active Snowflake connection object
+        """
+        self.connection = snowflake_connection
+        self._ensure_table_exists()
+
+    def _ensure_table_exists(self) -> None:
+        """Create dead_letters table if it doesn't exist"""
+        create_table_sql = """
+        CREATE TABLE IF NOT EXISTS dead_letters (
+            id INTEGER AUTOINCREMENT,
+            topic VARCHAR(255),
+            event_id VARCHAR(255),
+            schema_id VARCHAR(255),
+            replay_id BINARY,
+            payload BINARY,
+            decoded_payload VARCHAR,
+            stage VARCHAR(32),
+            error VARCHAR,
+            attempts INTEGER DEFAULT 0,
+            created_at TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(),
+            replayed_at TIMESTAMP_NTZ,
+            PRIMARY KEY (id)
+        )
+        """
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(create_table_sql)
+            self.connection.commit()
+            logging.info("Ensured dead_letters table exists in Snowflake")
+        except Exception as e:
+            logging.error("Error creating dead_letters table: %s", e)
+            raise
+        finally:
+            cursor.close()
+
+    def add_all(self, letters: List[Dict]) -> int:
+        """
+        Write a batch of dead letters in one MERGE keyed on (topic, replay_id)
+
+        An event that is fetched again (e.g. before its cursor was saved) updates its
+        existing row with the latest stage / error instead of adding a duplicate.
+
+        Args:
+            letters: Dead letters from make_dead_letter
+
+        Returns:
+            Number of distinct dead letters written
+        """
+        if not letters:
+            return 0
+        # One source row per key; Snowflake rejects a MERGE that matches a target row twice
+        unique = list({(letter["topic"], letter["replay_id"]): letter for letter in letters}.values())
+        rows = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s)"] * len(unique))
+        params: list = []
+        for letter in unique:
+            params.extend([
+                letter["topic"],
+                letter["event_id"],
+                letter["schema_id"],
+                letter["replay_id"],
+                letter["payload"],
+                json.dumps(letter["decoded_payload"], default=str) if letter["decoded_payload"] is not None else None,
+                letter["stage"],
+                letter["error"],
+            ])
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(
+                f"""
+                MERGE INTO dead_letters AS target
+                USING (
+                    SELECT column1 AS topic, column2 AS event_id, column3 AS schema_id, column4 AS replay_id,
+                           column5 AS payload, column6 AS decoded_payload, column7 AS stage, column8 AS error
+                    FROM VALUES {rows}
+                ) AS source
+                ON target.topic = source.topic AND target.replay_id = source.replay_id
+                WHEN MATCHED THEN
+                    UPDATE SET stage = source.stage, error = source.error
+                WHEN NOT MATCHED THEN
+                    INSERT (topic, event_id, schema_id, replay_id, payload, decoded_payload, stage, error)
+                    VALUES (source.topic, source.event_id, source.schema_id, source.replay_id,
+                            source.payload, source.decoded_payload, source.stage, source.error)
+                """,
+                params,
+            )
+            self.connection.commit()
+            logging.warning("Wrote %d dead letter(s) to Snowflake dead_letters", len(unique))
+            return len(unique)
+        except Exception as e:
+            logging.error("Error writing dead letters: %s", e)
+            raise
+        finally:
+            cursor.close()
+
+    def fetch_pending(self, topic: Optional[str] = None, limit: int = 500) -> List[Dict]:
+        """
+        Get dead letters that have not been replayed yet, oldest first
+
+        Args:
+            topic: Optional topic filter
+            limit: Maximum number of dead letters
+
+        Returns:
+            List of dead letter dictionaries including their id
+        """
+        query = (
+            "SELECT id, topic, event_id, schema_id, replay_id, payload, decoded_payload, stage, error "
+            "FROM dead_letters WHERE replayed_at IS NULL"
+        )
+        params: list = []
+        if topic:
+            query += " AND topic = %s"
+            params.append(topic)
+        query += " ORDER BY id LIMIT %s"
+        params.append(limit)
+
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(query, params)
+            letters = []
+            for row in cursor.fetchall():
+                letter_id, topic_name, event_id, schema_id, replay_id, payload, decoded, stage, error = row
+                letters.append({
+                    "id": letter_id,
+                    "topic": topic_name,
+                    "event_id": event_id,
+                    "schema_id": schema_id,
+                    # Snowflake returns bytearray for BINARY columns
+                    "replay_id": bytes(replay_id) if replay_id is not None else None,
+                    "payload": bytes(payload) if payload is not None else None,
+                    "decoded_payload": json.loads(decoded) if decoded else None,
+                    "stage": stage,
+                    "error": error,
+                })
+            logging.info("Retrieved %d pending dead letter(s)", len(letters))
+            return letters
+        finally:
+            cursor.close()
+
+    def mark_replayed(self, ids: List[int]) -> None:
+        """Flag dead letters as successfully re-loaded"""
+        if not ids:
+            return
+        cursor = self.connection.cursor()
+        try:
+            placeholders = ", ".join(["%s"] * len(ids))
+            cursor.execute(
+                f"UPDATE dead_letters SET replayed_at = CURRENT_TIMESTAMP(), attempts = attempts + 1 "
+                f"WHERE id IN ({placeholders})",
+                ids,
+            )
+            self.connection.commit()
+        finally:
+            cursor.close()
+
+    def record_failures(self, failures: List[Tuple[int, str]]) -> None:
+        """Store the latest error for dead letters that failed to replay again"""
+        if not failures:
+            return
+        cursor = self.connection.cursor()
+        try:
+            cursor.executemany(
+                "UPDATE dead_letters SET error = %s, attempts = attempts + 1 WHERE id = %s",
+                [(error, letter_id) for letter_id, error in failures],
+            )
+            self.connection.commit()
+        finally:
+            cursor.close()
@@ -2,8 +2,11 @@ from __future__ import annotations
 
 import time
 import pathlib
-import jwt
-import requests
+
+from src.utils.lazy_import import lazy_import
+
+jwt = lazy_import("jwt")
+requests = lazy_import("requests")
 
 
 def _read_private_key(private_key_path: str) -> str:
@@ -47,3 +50,14 @@ def get_access_token(login_url: str, assertion: str) -> tuple[str, str, str]:
 
     return payload["access_token"], payload["instance_url"], org_id
 
+
+def authenticate(settings) -> tuple[str, str, str]:
+    """Run the JWT bearer flow with the configured Connected App and return (access_token, instance_url, org_id)"""
+    assertion = create_jwt_assertion(
+        client_id=settings.sf_client_id,
+        username=settings.sf_username,
+        audience=settings.sf_audience,
+        private_key_path=settings.sf_private_key_path,
+    )
+    return get_access_token(settings.sf_login_url, assertion)
+
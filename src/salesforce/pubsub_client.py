@@ -1,19 +1,80 @@
 from __future__ import annotations
 
 import logging
-import grpc
 import io
 import json
-import requests
-from typing import Dict, List, Optional, Iterator
-from fastavro import schemaless_reader
+import queue
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Iterator, Tuple
 
-from src.salesforce.proto import pubsub_api_pb2 as pb2
-from src.salesforce.proto import pubsub_api_pb2_grpc as pb2_grpc
+from src.replay.batch_tuning import MAX_NUM_REQUESTED, BatchSizeController
+from src.replay.dead_letter_store import STAGE_DECODE, make_dead_letter
+from src.utils.lazy_import import lazy_import
+
+# Loaded on first use so importing this module stays cheap
+grpc = lazy_import("grpc")
+requests = lazy_import("requests")
+fastavro = lazy_import("fastavro")
+pb2 = lazy_import("src.salesforce.proto.pubsub_api_pb2")
+pb2_grpc = lazy_import("src.salesforce.proto.pubsub_api_pb2_grpc")
 
 
 PUBSUB_GRPC_ENDPOINT = "api.pubsub.salesforce.com:7443"
 
+# Avro schemas by schema_id; an ID identifies one immutable schema version, so they are cached per worker
+_schema_cache: Dict[str, dict] = {}
+
+# Schema ID per topic from GetTopic; events carry their own schema_id, so a stale entry only costs a prefetch
+_topic_schema_ids: Dict[str, str] = {}
+
+# How long warm_up waits for the TLS handshake before giving up
+CHANNEL_READY_TIMEOUT_SECONDS = 10
+
+# Upper bound on a ManagedSubscribe stream, which stays open while events are loaded
+MANAGED_STREAM_TIMEOUT_SECONDS = 300
+
+# How fetch_events_via_pubsub reacts to a failed RPC
+RPC_RETRY = "retry"
+RPC_REAUTH = "reauth"
+RPC_FATAL = "fatal"
+
+# Status codes for blips worth reconnecting and resuming after
+RETRYABLE_STATUS_CODES = frozenset({"UNAVAILABLE", "DEADLINE_EXCEEDED", "RESOURCE_EXHAUSTED", "ABORTED", "INTERNAL"})
+
+# Salesforce reports an expired/revoked session as UNAUTHENTICATED and tags it in the trailers
+AUTH_ERROR_CODE_MARKER = ".auth."
+
+
+def classify_rpc_error(error: Exception) -> str:
+    """
+    Decide whether a failed Pub/Sub call should be retried.
+
+    Returns:
+        RPC_REAUTH for an expired session, RPC_RETRY for transient status codes,
+        RPC_FATAL for everything else (including non-gRPC errors)
+    """
+    code = getattr(error, "code", None)
+    if not callable(code):
+        return RPC_FATAL
+    status = code()
+    name = getattr(status, "name", str(status))
+
+    trailers = error.trailing_metadata() if callable(getattr(error, "trailing_metadata", None)) else None
+    error_codes = [value for key, value in (trailers or []) if key == "error-code"]
+    if name == "UNAUTHENTICATED" or any(AUTH_ERROR_CODE_MARKER in str(value) for value in error_codes):
+        return RPC_REAUTH
+    if name in RETRYABLE_STATUS_CODES:
+        return RPC_RETRY
+    return RPC_FATAL
+
+
+def backoff_delay(attempt: int, base_seconds: float = 1.0, max_seconds: float = 30.0) -> float:
+    """Exponential backoff with full jitter: uniform(0, min(max, base * 2^(attempt-1)))"""
+    return random.uniform(0, min(max_seconds, base_seconds * (2 ** (attempt - 1))))
+
 
 class PubSubClient:
     """Salesforce Pub/Sub API gRPC client for subscribing to platform events"""
@@ -24,6 +85,8 @@ class PubSubClient:
         self.tenant_id = tenant_id
         self.channel = None
         self.stub = None
+        # Events that failed to decode, kept with their raw payload for DeadLetterStore
+        self.dead_letters: List[Dict] = []
 
     def connect(self):
         """Establish gRPC connection to Salesforce Pub/Sub API"""
@@ -59,6 +122,40 @@ class PubSubClient:
         logging.info("Retrieved topic info for %s: schema_id=%s", topic_name, response.schema_id)
         return response
 
+    def get_topic_schema_id(self, topic_name: str) -> str:
+        """Current schema ID of a topic, looked up with GetTopic once per worker"""
+        schema_id = _topic_schema_ids.get(topic_name)
+        if schema_id is None:
+            schema_id = self.get_topic_info(topic_name).schema_id
+            _topic_schema_ids[topic_name] = schema_id
+        return schema_id
+
+    def warm_up(self, topic_names: List[str], timeout: float = CHANNEL_READY_TIMEOUT_SECONDS) -> None:
+        """
+        Open the channel and prefetch each topic's schema ID and Avro schema
+
+        Waits for the TLS handshake so the first Subscribe doesn't pay for it, then
+        fills the per-worker caches with the topics looked up in parallel. A topic
+        that fails here is only logged; subscribe_to_events retries it.
+
+        Args:
+            topic_names: Topics the run will subscribe to
+            timeout: Seconds to wait for the channel to become ready
+        """
+        if not self.stub:
+            self.connect()
+        grpc.channel_ready_future(self.channel).result(timeout=timeout)
+
+        def prefetch(topic_name: str) -> None:
+            try:
+                self.get_schema(self.get_topic_schema_id(topic_name))
+            except Exception as e:
+                logging.warning("Could not prefetch schema for %s: %s", topic_name, e)
+
+        if topic_names:
+            with ThreadPoolExecutor(max_workers=min(len(topic_names), 8), thread_name_prefix="schema") as pool:
+                list(pool.map(prefetch, topic_names))
+
     def fetch_avro_schema_via_rest(self, schema_id: str) -> dict:
         """
         Fetch the Avro schema (COMPACT) for a platform event via REST API.
@@ -94,19 +191,107 @@ class PubSubClient:
 
         raise RuntimeError(f"Failed to fetch schema for ID {schema_id}: {last_err}")
 
+    def get_schema(self, schema_id: str) -> dict:
+        """Avro schema for schema_id, fetched via REST once per worker"""
+        schema = _schema_cache.get(schema_id)
+        if schema is None:
+            schema = self.fetch_avro_schema_via_rest(schema_id)
+            _schema_cache[schema_id] = schema
+        else:
+            logging.debug("Using cached schema %s", schema_id)
+        return schema
+
+    def _decode_batch(
+        self,
+        fetch_response,
+        topic_name: str,
+        schema_for: Callable[[str], dict],
+        controller: Optional[BatchSizeController] = None,
+    ) -> List[Dict]:
+        """
+        Decode the events of one FetchResponse / ManagedFetchResponse
+
+        Args:
+            fetch_response: Response carrying ConsumerEvents
+            topic_name: Topic the events belong to
+            schema_for: Returns the Avro schema for an event's schema_id
+            controller: Optional batch size controller to report decode time and payload sizes to
+
+        Returns:
+            List of event dictionaries (undecodable events are added to self.dead_letters)
+        """
+        decode_seconds = 0.0
+        payload_total = 0
+        decoded_events = []
+        for ev in fetch_response.events:
+            # Defensive event access (same as continuous mode)
+            nested = getattr(ev, "event", None)
+            if not nested or not nested.payload:
+                logging.warning("No ev.event.payload; skipping event.")
+                continue
+
+            payload_bytes: bytes = nested.payload
+            event_schema_id: str = nested.schema_id
+            event_id: str = nested.id
+            replay_id_bytes: bytes = ev.replay_id
+            replay_id_int = int.from_bytes(replay_id_bytes, byteorder="big", signed=False)
+
+            logging.info(
+                "Processing event: schema_id=%s event_id=%s replay_id=%s payload_len=%d",
+                event_schema_id, event_id, replay_id_int, len(payload_bytes)
+            )
+
+            # Decode Avro payload using fastavro (same as continuous mode)
+            decode_started = time.perf_counter()
+            try:
+                decoded_payload = fastavro.schemaless_reader(io.BytesIO(payload_bytes), schema_for(event_schema_id))
+                logging.debug("Decoded event keys: %s", list(decoded_payload.keys()))
+            except Exception as decode_error:
+                logging.error("Failed to decode event %s: %s", event_id, decode_error)
+                self.dead_letters.append(make_dead_letter(
+                    {"topic": topic_name, "event_id": event_id, "schema_id": event_schema_id, "replay_id": replay_id_bytes},
+                    STAGE_DECODE, str(decode_error), payload=payload_bytes,
+                ))
+                continue
+            finally:
+                decode_seconds += time.perf_counter() - decode_started
+                payload_total += len(payload_bytes)
+
+            decoded_events.append({
+                "topic": topic_name,
+                "replay_id": replay_id_bytes,  # Keep as bytes for storage
+                "event_id": event_id,
+                "schema_id": event_schema_id,
+                "payload": decoded_payload,
+                "latest_replay_id": fetch_response.latest_replay_id,
+            })
+
+        if controller is not None:
+            controller.record_decode(len(fetch_response.events), payload_total, decode_seconds)
+        return decoded_events
+
     def subscribe_to_events(
         self,
         topic_name: str,
         replay_id: Optional[bytes] = None,
         num_requested: int = 100,
+        controller: Optional[BatchSizeController] = None,
+        already_fetched: int = 0,
     ) -> Iterator[Dict]:
         """
         Subscribe to platform events from a topic
 
+        Without a controller a single FetchRequest is sent and the first batch is
+        returned. With a controller, further FetchRequests are sent on the same
+        stream until the controller's batch size is reached or the topic drains,
+        and decode time and payload sizes are reported back to it.
+
         Args:
             topic_name: Topic to subscribe to (e.g., "/event/Delete_Logs__e")
             replay_id: Optional replay ID to resume from (bytes)
-            num_requested: Number of events to request per batch
+            num_requested: Number of events to request per batch (ignored with a controller)
+            controller: Optional per-topic batch size controller
+            already_fetched: Events received by earlier streams in this run (when resuming)
 
         Yields:
             Dict containing decoded event payload and metadata
@@ -114,14 +299,16 @@ class PubSubClient:
         if not self.stub:
             raise RuntimeError("Client not connected. Call connect() first.")
 
-        # Get topic info to retrieve schema_id
-        topic_info = self.get_topic_info(topic_name)
-        schema_id = topic_info.schema_id
-        
-        # Fetch schema via REST API (same as continuous mode)
-        schema_dict = self.fetch_avro_schema_via_rest(schema_id)
+        # Get topic info to retrieve schema_id (prefetched by warm_up on the timer path)
+        schema_id = self.get_topic_schema_id(topic_name)
+
+        # Fetch schema via REST API (same as continuous mode), cached by schema_id
+        self.get_schema(schema_id)
         logging.info("Using schema for decoding: %s", schema_id)
 
+        if controller is not None:
+            num_requested = controller.next_request(already_fetched)
+
         # Prepare initial fetch request
         if replay_id:
             fetch_request = pb2.FetchRequest(
@@ -142,16 +329,17 @@ class PubSubClient:
 
         metadata = self._get_metadata()
 
-        # For batch mode, send single request but keep generator alive
-        # The generator must stay alive for bidirectional gRPC streaming
-        import threading
-        stop_flag = threading.Event()
-        
+        # Requests are fed through a queue so more can be sent on the same stream.
+        # The generator must stay alive for bidirectional gRPC streaming; None ends it.
+        pending_requests: queue.Queue = queue.Queue()
+        pending_requests.put(fetch_request)
+
         def request_generator():
-            yield fetch_request
-            # Keep generator alive until we signal it to stop
-            # This is required for gRPC bidirectional streaming
-            stop_flag.wait()
+            while True:
+                request = pending_requests.get()
+                if request is None:
+                    return
+                yield request
 
         try:
             logging.info("Starting Subscribe RPC call for %s...", topic_name)
@@ -159,6 +347,7 @@ class PubSubClient:
             logging.info("Subscribe RPC call established, waiting for response...")
 
             response_count = 0
+            fetched = already_fetched
             for fetch_response in response_stream:
                 response_count += 1
                 logging.info("Received fetch_response #%d from stream", response_count)
@@ -181,62 +370,173 @@ class PubSubClient:
                 
                 if not events_attr:
                     logging.warning("No events in this batch - empty response or keepalive. Breaking.")
+                    if controller is not None:
+                        controller.mark_drained()
                     # No events, exit the stream
-                    stop_flag.set()  # Signal generator to stop
                     break
 
                 logging.info("Received batch of %d event(s) from %s", len(fetch_response.events), topic_name)
 
-                for ev in fetch_response.events:
-                    # Defensive event access (same as continuous mode)
-                    nested = getattr(ev, "event", None)
-                    if not nested or not nested.payload:
-                        logging.warning("No ev.event.payload; skipping event.")
-                        continue
-
-                    payload_bytes: bytes = nested.payload
-                    event_schema_id: str = nested.schema_id
-                    event_id: str = nested.id
-                    replay_id_bytes: bytes = ev.replay_id
-                    replay_id_int = int.from_bytes(replay_id_bytes, byteorder="big", signed=False)
-
-                    logging.info(
-                        "Processing event: schema_id=%s event_id=%s replay_id=%s payload_len=%d",
-                        event_schema_id, event_id, replay_id_int, len(payload_bytes)
-                    )
+                # Events on a shared channel can carry their own schema_id
+                decoded_events = self._decode_batch(
+                    fetch_response, topic_name, lambda event_schema_id: self.get_schema(event_schema_id or schema_id),
+                    controller,
+                )
+                fetched += len(fetch_response.events)
 
-                    # Decode Avro payload using fastavro (same as continuous mode)
-                    try:
-                        decoded_payload = schemaless_reader(io.BytesIO(payload_bytes), schema_dict)
-                        logging.debug("Decoded event keys: %s", list(decoded_payload.keys()))
-                    except Exception as decode_error:
-                        logging.error("Failed to decode event %s: %s", event_id, decode_error)
-                        continue
-
-                    # Yield event with metadata
-                    yield {
-                        "topic": topic_name,
-                        "replay_id": replay_id_bytes,  # Keep as bytes for storage
-                        "event_id": event_id,
-                        "schema_id": event_schema_id,
-                        "payload": decoded_payload,
-                        "latest_replay_id": latest_replay_id,
-                    }
-                
-                # After processing one batch, break (batch mode)
-                break
+                # Yield events with metadata
+                yield from decoded_events
 
-            # Signal generator to stop
-            stop_flag.set()
+                # Without a controller: one batch per invocation
+                if controller is None:
+                    break
+                if pending_num > 0:
+                    # The server had fewer events ready than requested; don't wait for the keepalive
+                    controller.mark_drained()
+                    break
+                next_num = controller.next_request(fetched)
+                if next_num <= 0:
+                    break
+                logging.info("Requesting %d more event(s) from %s (fetched %d)", next_num, topic_name, fetched)
+                pending_requests.put(pb2.FetchRequest(topic_name=topic_name, num_requested=next_num))
 
         except grpc.RpcError as e:
-            stop_flag.set()  # Signal generator to stop on error
             logging.error("gRPC error during subscription: %s - %s", e.code(), e.details())
             # Log trailing metadata for debugging (same as continuous mode)
             tr = list(e.trailing_metadata() or [])
             if tr:
                 logging.error("gRPC trailers: %s", tr)
             raise
+        finally:
+            # Signal generator to stop
+            pending_requests.put(None)
+
+
+class ManagedSubscription:
+    """
+    One ManagedSubscribe stream for a topic, where Salesforce tracks the committed replay position.
+
+    The stream is opened, a batch is fetched, and the stream is kept open until the
+    caller has loaded the events; commit() then sends a single CommitReplayRequest
+    for the last loaded replay_id. Nothing is read from or written to cursor_store.
+    """
+
+    def __init__(self, client: PubSubClient, topic_name: str, developer_name: str,
+                 stream_timeout_seconds: float = MANAGED_STREAM_TIMEOUT_SECONDS):
+        self.client = client
+        self.topic_name = topic_name
+        self.developer_name = developer_name
+        self.stream_timeout_seconds = stream_timeout_seconds
+        self._requests: Optional[queue.Queue] = None
+        self._responses = None
+
+    def open(self, num_requested: int) -> None:
+        """Start the stream; the first request names the managed subscription"""
+        if not self.client.stub:
+            raise RuntimeError("Client not connected. Call connect() first.")
+
+        self._requests = queue.Queue()
+        self._requests.put(pb2.ManagedFetchRequest(developer_name=self.developer_name, num_requested=num_requested))
+
+        def request_generator():
+            while True:
+                request = self._requests.get()
+                if request is None:
+                    return
+                yield request
+
+        logging.info("Starting ManagedSubscribe for %s (subscription %s)", self.topic_name, self.developer_name)
+        self._responses = iter(self.client.stub.ManagedSubscribe(
+            request_generator(),
+            metadata=self.client._get_metadata(),
+            timeout=self.stream_timeout_seconds,
+        ))
+
+    def fetch(self, max_events: int = 100, controller: Optional[BatchSizeController] = None) -> List[Dict]:
+        """
+        Open the stream (if needed) and receive up to max_events events from the committed position.
+
+        A failure after some events were received returns those events; they can be
+        loaded, but commit() will fail and the caller falls back to cursor_store.
+
+        Args:
+            max_events: Maximum number of events (the controller's batch size when given)
+            controller: Optional per-topic batch size controller
+
+        Returns:
+            List of event dictionaries
+        """
+        if controller is not None:
+            max_events = controller.batch_size
+        if self._responses is None:
+            self.open(min(MAX_NUM_REQUESTED, max_events))
+
+        events: List[Dict] = []
+        try:
+            for response in self._responses:
+                if response.HasField("commit_response"):
+                    continue
+                if not response.events:
+                    if controller is not None:
+                        controller.mark_drained()
+                    break
+
+                events.extend(self.client._decode_batch(response, self.topic_name, self.client.get_schema, controller))
+                if len(events) >= max_events:
+                    break
+                if response.pending_num_requested > 0:
+                    if controller is not None:
+                        controller.mark_drained()
+                    break
+                next_num = min(MAX_NUM_REQUESTED, max_events - len(events))
+                self._requests.put(pb2.ManagedFetchRequest(num_requested=next_num))
+        except Exception as e:
+            if not events:
+                raise
+            logging.error("ManagedSubscribe for %s failed after %d event(s): %s", self.topic_name, len(events), e)
+            self._responses = None
+
+        logging.info("Fetched %d events from topic %s via managed subscription", len(events), self.topic_name)
+        return events
+
+    def commit(self, replay_id: bytes) -> bool:
+        """
+        Commit replay_id on the open stream and wait for the server's acknowledgement.
+
+        Returns:
+            True if Salesforce confirmed the commit
+        """
+        if self._responses is None:
+            return False
+
+        commit_request_id = uuid.uuid4().hex
+        self._requests.put(pb2.ManagedFetchRequest(
+            commit_replay_id_request=pb2.CommitReplayRequest(commit_request_id=commit_request_id, replay_id=replay_id)
+        ))
+        replay_id_int = int.from_bytes(replay_id, byteorder="big", signed=False)
+        try:
+            for response in self._responses:
+                if not response.HasField("commit_response"):
+                    # Events delivered after the batch was cut are redelivered next run
+                    continue
+                commit = response.commit_response
+                if commit.HasField("error"):
+                    logging.error("Commit of replay_id %s for %s rejected: %s",
+                                  replay_id_int, self.topic_name, commit.error.msg)
+                    return False
+                # Commits can be compressed; any acknowledgement reflects the latest request
+                logging.info("Committed replay_id %s for %s (managed subscription %s)",
+                             replay_id_int, self.topic_name, self.developer_name)
+                return True
+        except Exception as e:
+            logging.error("Commit of replay_id %s for %s failed: %s", replay_id_int, self.topic_name, e)
+        return False
+
+    def close(self) -> None:
+        """End the request stream"""
+        if self._requests is not None:
+            self._requests.put(None)
+        self._responses = None
 
 
 def fetch_events_via_pubsub(
@@ -246,36 +546,114 @@ def fetch_events_via_pubsub(
     topic_name: str,
     replay_id: Optional[bytes] = None,
     max_events: int = 100,
+    controller: Optional[BatchSizeController] = None,
+    token_provider: Optional[Callable[[], Tuple[str, str, str]]] = None,
+    max_retries: int = 3,
+    retry_base_seconds: float = 1.0,
+    dead_letters: Optional[List[Dict]] = None,
+    client: Optional[PubSubClient] = None,
 ) -> List[Dict]:
     """
     Fetch events from a Salesforce topic via Pub/Sub API
 
+    Transient gRPC failures (see classify_rpc_error) reconnect the channel and
+    resume from the replay_id of the last event received, after a jittered
+    backoff. An expired session is refreshed through token_provider first. If
+    retries run out after some events were received, those events are returned
+    so they can still be inserted and the cursor advanced.
+
     Args:
         access_token: Salesforce access token
         instance_url: Salesforce instance URL
         tenant_id: Salesforce org/tenant ID
         topic_name: Topic to subscribe to
         replay_id: Optional replay ID to resume from
-        max_events: Maximum number of events to fetch
+        max_events: Maximum number of events to fetch (the controller's batch size when given)
+        controller: Optional per-topic batch size controller
+        token_provider: Optional callable returning a fresh (access_token, instance_url, tenant_id)
+        max_retries: Consecutive failed attempts to retry before giving up
+        retry_base_seconds: Base delay for exponential backoff
+        dead_letters: Optional list that receives events which failed to decode
+        client: Optional connected client to reuse (its own credentials are used); left open afterwards,
+            and a retry reconnects on a private client so other streams on it are not cut
 
     Returns:
         List of event dictionaries
     """
-    client = PubSubClient(access_token, instance_url, tenant_id)
+    owns_client = client is None
+    if owns_client:
+        client = PubSubClient(access_token, instance_url, tenant_id)
+    dead_letters_before = len(client.dead_letters) if dead_letters is not None else 0
     events = []
+    if controller is not None:
+        max_events = controller.batch_size
+
+    resume_from = replay_id
+    attempt = 0
+    events_at_last_failure = 0
 
     try:
-        client.connect()
+        if owns_client or not client.stub:
+            client.connect()
 
-        for event in client.subscribe_to_events(topic_name, replay_id):
-            events.append(event)
-            if len(events) >= max_events:
+        while True:
+            try:
+                for event in client.subscribe_to_events(
+                    topic_name, resume_from, controller=controller, already_fetched=len(events)
+                ):
+                    events.append(event)
+                    resume_from = event["replay_id"]
+                    if len(events) >= max_events:
+                        break
                 break
+            except Exception as e:
+                action = classify_rpc_error(e)
+                if action == RPC_REAUTH and token_provider is None:
+                    action = RPC_FATAL
+
+                # Progress since the last failure starts a fresh retry budget
+                attempt = 1 if len(events) > events_at_last_failure else attempt + 1
+                events_at_last_failure = len(events)
+
+                if action == RPC_FATAL or attempt > max_retries:
+                    if not events:
+                        raise
+                    logging.error(
+                        "Giving up on %s after %d attempt(s) (%s); keeping %d event(s) already received",
+                        topic_name, attempt, e, len(events),
+                    )
+                    break
+
+                if action == RPC_REAUTH:
+                    logging.warning("Pub/Sub session expired for %s; refreshing access token", topic_name)
+                    client.access_token, client.instance_url, client.tenant_id = token_provider()
+
+                delay = backoff_delay(attempt, retry_base_seconds)
+                logging.warning(
+                    "Pub/Sub stream for %s failed (%s: %s); reconnecting in %.1fs and resuming after %d event(s) "
+                    "(attempt %d/%d)",
+                    topic_name, action, e, delay, len(events), attempt, max_retries,
+                )
+                time.sleep(delay)
+                if owns_client:
+                    client.close()
+                else:
+                    # Managed subscriptions keep streams open on the shared channel; retry on a private one
+                    shared_client = client
+                    client = PubSubClient(shared_client.access_token, shared_client.instance_url,
+                                          shared_client.tenant_id)
+                    client.dead_letters = shared_client.dead_letters
+                    owns_client = True
+                client.connect()
 
         logging.info("Fetched %d events from topic %s", len(events), topic_name)
 
     finally:
-        client.close()
+        if dead_letters is not None:
+            # Moved out of a shared client so they are reported once
+            dead_letters.extend(client.dead_letters[dead_letters_before:])
+            del client.dead_letters[dead_letters_before:]
+        if owns_client:
+            client.close()
 
     return events
-
@@ -3,11 +3,8 @@ from __future__ import annotations
 import json
 import logging
 from typing import Dict, List
-from pathlib import Path
-from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives import serialization
-import snowflake.connector
-from snowflake.connector import DictCursor
+
+from src.snowflake.connection_manager import get_connection_manager, load_private_key_der
 
 
 class SnowflakeConnector:
@@ -25,6 +22,8 @@ class SnowflakeConnector:
         schema: str,
         table: str,
         private_key_path: str,
+        backend: str = "snowflake",
+        sqlite_path: str = "local_warehouse.db",
     ):
         self.account = account
         self.user = user
@@ -33,35 +32,28 @@ class SnowflakeConnector:
         self.database = database
         self.schema = schema
         self.table = table
+        # "sqlite" runs the same SQL against a local file (see src/warehouse/sqlite_backend.py)
+        self.backend = backend
+        self.sqlite_path = sqlite_path
         self.connection = None
 
     def _load_private_key(self) -> bytes:
-        """Load and parse RSA private key from file"""
-        if not self.private_key_path:
-            raise ValueError("Private key path not provided")
-        
-        key_path = Path(self.private_key_path)
-        if not key_path.exists():
-            raise FileNotFoundError(f"Private key file not found: {self.private_key_path}")
-        
-        with open(key_path, "rb") as key_file:
-            private_key = serialization.load_pem_private_key(
-                key_file.read(),
-                password=None,
-                backend=default_backend()
-            )
-        
-        # Serialize to DER format (required by snowflake-connector-python)
-        private_key_bytes = private_key.private_bytes(
-            encoding=serialization.Encoding.DER,
-            format=serialization.PrivateFormat.PKCS8,
-            encryption_algorithm=serialization.NoEncryption()
-        )
-        
-        return private_key_bytes
+        """Load RSA private key as DER bytes (cached across warm invocations)"""
+        return load_private_key_der(self.private_key_path)
 
     def connect(self):
-        """Establish connection to Snowflake using RSA key authentication"""
+        """Acquire a Snowflake connection using RSA key authentication
+
+        Connections are pooled at module level, so warm invocations reuse the
+        existing session instead of logging in again.
+        """
+        if self.backend == "sqlite":
+            from src.warehouse.sqlite_backend import connect_sqlite
+
+            self.connection = get_connection_manager("sqlite", connect_sqlite).acquire(database=self.sqlite_path)
+            logging.info("Connected to local SQLite warehouse %s (table %s)", self.sqlite_path, self.table)
+            return
+
         logging.info("Connecting to Snowflake using RSA key authentication")
         
         conn_params = {
@@ -70,16 +62,26 @@ class SnowflakeConnector:
             "warehouse": self.warehouse,
             "database": self.database,
             "schema": self.schema,
-            "private_key": self._load_private_key(),
         }
         
-        self.connection = snowflake.connector.connect(**conn_params)
+        self.connection = get_connection_manager().acquire(
+            private_key_loader=self._load_private_key,
+            **conn_params,
+        )
         logging.info("Connected to Snowflake: %s.%s.%s", self.database, self.schema, self.table)
 
     def close(self):
-        """Close Snowflake connection"""
+        """Release the Snowflake connection back to the pool (session reset) for reuse"""
+        if self.connection:
+            get_connection_manager(self.backend).release(self.connection)
+            self.connection = None
+            logging.info("Released Snowflake connection for reuse")
+
+    def invalidate(self):
+        """Close the Snowflake connection and drop it from the pool"""
         if self.connection:
-            self.connection.close()
+            get_connection_manager(self.backend).invalidate(self.connection)
+            self.connection = None
             logging.info("Closed Snowflake connection")
 
     def ensure_table_exists(self):
@@ -106,6 +108,56 @@ class SnowflakeConnector:
         finally:
             cursor.close()
 
+    def fetch_key_prefixes(
+        self,
+        table: str = "ENTITYIDMAP",
+        prefix_column: str = "KEYPREFIX",
+        object_column: str = "ENTITYNAME",
+    ) -> Dict[str, str]:
+        """
+        Load the Salesforce key prefix -> object name map used to route shared-channel events
+
+        Returns:
+            Dictionary mapping 3-character key prefixes to DELETE_TRACKER object names
+        """
+        if not self.connection:
+            raise RuntimeError("Not connected to Snowflake. Call connect() first.")
+
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(
+                f"SELECT {prefix_column}, {object_column} FROM {table} "
+                f"WHERE {prefix_column} IS NOT NULL AND {object_column} IS NOT NULL"
+            )
+            return {str(prefix)[:3]: name for prefix, name in cursor.fetchall()}
+        finally:
+            cursor.close()
+
+    def fetch_delete_procedures(
+        self,
+        table: str = "ENTITYMAPPING",
+        object_column: str = "ENTITYNAME",
+        procedure_column: str = "DELETE_PROCEDURE",
+    ) -> Dict[str, str]:
+        """
+        Load the object name -> delete procedure map used to apply tracked deletes
+
+        Returns:
+            Dictionary mapping DELETE_TRACKER object names to stored procedure names
+        """
+        if not self.connection:
+            raise RuntimeError("Not connected to Snowflake. Call connect() first.")
+
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(
+                f"SELECT {object_column}, {procedure_column} FROM {table} "
+                f"WHERE {object_column} IS NOT NULL AND {procedure_column} IS NOT NULL"
+            )
+            return {name: procedure for name, procedure in cursor.fetchall()}
+        finally:
+            cursor.close()
+
     def insert_events(self, events: List[Dict]) -> int:
         """
         Insert delete events into Snowflake table.
@@ -155,3 +207,91 @@ class SnowflakeConnector:
 
         return inserted
 
+    def create_staging_table(self, staging_table: str) -> None:
+        """Create an empty session-scoped staging table with the delete tracker's insert columns"""
+        if not self.connection:
+            raise RuntimeError("Not connected to Snowflake. Call connect() first.")
+
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(f"""
+            CREATE OR REPLACE TEMPORARY TABLE {staging_table} (
+                object_name VARCHAR(255),
+                record_id VARCHAR(255),
+                deleted_by VARCHAR(255),
+                status VARCHAR(255)
+            )
+            """)
+            logging.info("Created staging table: %s", staging_table)
+        finally:
+            cursor.close()
+
+    def stage_events(self, staging_table: str, events: List[Dict]) -> int:
+        """
+        Bulk insert transformed events into a staging table
+
+        Returns:
+            Number of events staged
+        """
+        if not self.connection:
+            raise RuntimeError("Not connected to Snowflake. Call connect() first.")
+
+        if not events:
+            return 0
+
+        cursor = self.connection.cursor()
+        try:
+            cursor.executemany(
+                f"INSERT INTO {staging_table} (object_name, record_id, deleted_by, status) "
+                "VALUES (%(object_name)s, %(record_id)s, %(deleted_by)s, %(status)s)",
+                [
+                    {
+                        "object_name": event.get("object_name"),
+                        "record_id": event.get("record_id"),
+                        "deleted_by": event.get("deleted_by"),
+                        "status": event.get("status", "open"),
+                    }
+                    for event in events
+                ],
+            )
+            self.connection.commit()
+            return len(events)
+        finally:
+            cursor.close()
+
+    def merge_staged_events(self, staging_table: str) -> int:
+        """
+        Merge staged events into the delete tracker table, skipping records already tracked
+
+        Rows are matched on (object_name, record_id), so merging the same
+        window twice inserts nothing the second time.
+
+        Returns:
+            Number of events inserted
+        """
+        if not self.connection:
+            raise RuntimeError("Not connected to Snowflake. Call connect() first.")
+
+        merge_sql = f"""
+        MERGE INTO {self.table} AS target
+        USING (
+            SELECT object_name, record_id, MAX(deleted_by) AS deleted_by, MAX(status) AS status
+            FROM {staging_table}
+            WHERE record_id IS NOT NULL
+            GROUP BY object_name, record_id
+        ) AS source
+        ON target.object_name = source.object_name AND target.record_id = source.record_id
+        WHEN NOT MATCHED THEN
+            INSERT (object_name, record_id, deleted_by, status)
+            VALUES (source.object_name, source.record_id, source.deleted_by, source.status)
+        """
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(merge_sql)
+            row = cursor.fetchone()
+            self.connection.commit()
+            inserted = row[0] if row else 0
+            logging.info("Merged %d new events from %s into %s", inserted, staging_table, self.table)
+            return inserted
+        finally:
+            cursor.close()
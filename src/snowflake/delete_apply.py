@@ -0,0 +1,169 @@
+"""Run the DELETE_<object> procedures for the objects that received new deletes"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+if TYPE_CHECKING:
+    import snowflake.connector
+
+
+# delete_tracker object name -> stored procedure, for the *_delete_proc.sql files in this repo.
+# Procedure names don't follow the object name (LP_Consultant_Relationship -> DELETE_lpconsultantrelationship),
+# so they are never derived from it; ENTITYMAPPING.DELETE_PROCEDURE overrides / extends this map.
+DEFAULT_DELETE_PROCEDURES: Dict[str, str] = {
+    "Account": "DELETE_account",
+    "ActivityContent": "DELETE_activitycontent",
+    "Contact": "DELETE_contact",
+    "Event": "DELETE_event",
+    "Fund": "DELETE_fund",
+    "Investment": "DELETE_investment",
+    "LegalEntity": "DELETE_legalentity",
+    "LP_Consultant_Relationship": "DELETE_lpconsultantrelationship",
+    "Opportunity": "DELETE_opportunity",
+    "Task": "DELETE_task",
+}
+
+# EXECUTION_TRACKER.TYPE of an apply row; the notification engine reads REPORT as {object: deleted}
+EXECUTION_TYPE_PREFIX = "azure_func/delete/"
+
+STATUS_SUCCESS = "Success"
+STATUS_FAILED = "Failed"
+
+# Procedure names are interpolated into CALL, so only (optionally qualified) plain identifiers are called
+_PROCEDURE_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_$]*(\.[A-Za-z_][A-Za-z0-9_$]*){0,2}$")
+
+
+def normalize_procedure_name(value: Optional[str]) -> Optional[str]:
+    """
+    Reduce an ENTITYMAPPING.DELETE_PROCEDURE value ("DELETE_x", "DELETE_x()", "CALL DELETE_x();")
+    to the procedure name, or None if it isn't a plain identifier
+    """
+    name = (value or "").strip().rstrip(";").strip()
+    if name[:5].upper() == "CALL ":
+        name = name[5:].strip()
+    if name.endswith("()"):
+        name = name[:-2].strip()
+    return name if _PROCEDURE_NAME.match(name) else None
+
+
+@dataclass(frozen=True)
+class ApplyResult:
+    """Outcome of one DELETE_<object> call"""
+
+    object_name: str
+    status: str
+    deleted: int
+    message: str
+
+
+def parse_procedure_result(object_name: str, result: object) -> ApplyResult:
+    """
+    Interpret a DELETE_<object> return value
+
+    The procedures return 'SUCCESS,<rows deleted>' and an OBJECT_CONSTRUCT with the
+    SQL error (after rolling back) when a statement fails.
+    """
+    text = str(result) if result is not None else ""
+    status, _, count = text.partition(",")
+    if status.strip().upper() == "SUCCESS":
+        try:
+            return ApplyResult(object_name, STATUS_SUCCESS, int(count or 0), "")
+        except ValueError:
+            pass
+    return ApplyResult(object_name, STATUS_FAILED, 0, text or "procedure returned no result")
+
+
+class DeleteApplier:
+    """Applies tracked deletes for a set of objects and records each outcome in EXECUTION_TRACKER"""
+
+    def __init__(self, snowflake_connection: snowflake.connector.SnowflakeConnection,
+                 execution_tracker_table: str = "EXECUTION_TRACKER",
+                 procedures: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            snowflake_connection: Active Snowflake connection object
+            execution_tracker_table: Table that receives one row per applied object
+            procedures: Object name -> delete procedure, laid over DEFAULT_DELETE_PROCEDURES
+                (e.g. from ENTITYMAPPING.DELETE_PROCEDURE)
+        """
+        self.connection = snowflake_connection
+        self.execution_tracker_table = execution_tracker_table
+        self.procedures = dict(DEFAULT_DELETE_PROCEDURES)
+        self.procedures.update(procedures or {})
+
+    def apply(self, object_names: Iterable[str]) -> List[ApplyResult]:
+        """
+        Call each object's delete procedure once, in object name order
+
+        An object without a mapped procedure, or whose procedure fails, is recorded as
+        Failed and the remaining objects are still applied; its tracker rows stay 'open'
+        for the next apply.
+
+        Args:
+            object_names: Objects with newly inserted delete_tracker rows
+
+        Returns:
+            One ApplyResult per object
+        """
+        results = []
+        cursor = self.connection.cursor()
+        try:
+            for object_name in sorted(set(object_names)):
+                procedure = normalize_procedure_name(self.procedures.get(object_name))
+                if procedure is None:
+                    message = f"no valid delete procedure mapped (got {self.procedures.get(object_name)!r})"
+                    logging.error("Not applying deletes for %r: %s", object_name, message)
+                    results.append(ApplyResult(object_name, STATUS_FAILED, 0, message))
+                    continue
+                try:
+                    cursor.execute(f"CALL {procedure}()")
+                    row = cursor.fetchone()
+                    result = parse_procedure_result(object_name, row[0] if row else None)
+                except Exception as e:
+                    result = ApplyResult(object_name, STATUS_FAILED, 0, str(e))
+
+                if result.status == STATUS_SUCCESS:
+                    logging.info("%s() deleted %d record(s)", procedure, result.deleted)
+                else:
+                    logging.error("%s() failed: %s", procedure, result.message)
+                results.append(result)
+        finally:
+            cursor.close()
+        return results
+
+    def record(self, results: List[ApplyResult]) -> int:
+        """
+        Write one EXECUTION_TRACKER row per result (TYPE azure_func/delete/<object>) in one statement
+
+        Returns:
+            Number of rows written
+        """
+        if not results:
+            return 0
+        placeholders = ", ".join(["(%s, %s, %s, %s, %s)"] * len(results))
+        params: List[object] = []
+        for result in results:
+            report: Dict[str, int] = {result.object_name: result.deleted}
+            params.extend([
+                f"{EXECUTION_TYPE_PREFIX}{result.object_name}",
+                result.status,
+                result.message,
+                json.dumps(report),
+                result.object_name,
+            ])
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(
+                f"INSERT INTO {self.execution_tracker_table} (TYPE, STATUS, LOG_MESSAGE, REPORT, OBJECT_NAME) "
+                f"VALUES {placeholders}",
+                params,
+            )
+            self.connection.commit()
+        finally:
+            cursor.close()
+        return len(results)
@@ -0,0 +1 @@
+"""Durable local spill buffer between fetch and load."""
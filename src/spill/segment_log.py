@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import re
+import struct
+import zlib
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# Each record: 4-byte big-endian length, 4-byte CRC32 of the body, body
+RECORD_HEADER = struct.Struct(">II")
+
+SEGMENT_NAME = re.compile(r"^segment-(\d{20})\.log$")
+CHECKPOINT_FILE = "checkpoint"
+
+
+@dataclass(frozen=True, order=True)
+class LogPosition:
+    """Byte offset within a numbered segment"""
+
+    segment: int
+    offset: int
+
+
+def _segment_name(segment: int) -> str:
+    return f"segment-{segment:020d}.log"
+
+
+def _fsync_dir(directory: str) -> None:
+    """Persist directory entries (new/renamed files); not supported on Windows"""
+    if os.name == "nt":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class SegmentLog:
+    """
+    Append-only, length-prefixed record log split into segment files.
+
+    append() writes a batch of records and fsyncs once, so a batch is either
+    durable or (after a crash) a torn tail that is truncated on reopen.
+    Readers walk segments through mmap starting at the checkpoint, and commit()
+    advances the checkpoint (written atomically) and deletes fully consumed
+    segments.
+    """
+
+    def __init__(self, directory: str, segment_max_bytes: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._recover_tail()
+
+    def segments(self) -> List[int]:
+        """Segment numbers present on disk, oldest first"""
+        numbers = []
+        for name in os.listdir(self.directory):
+            match = SEGMENT_NAME.match(name)
+            if match:
+                numbers.append(int(match.group(1)))
+        return sorted(numbers)
+
+    def _path(self, segment: int) -> str:
+        return os.path.join(self.directory, _segment_name(segment))
+
+    def _recover_tail(self) -> None:
+        """Truncate a partially written record left at the end of the newest segment"""
+        segments = self.segments()
+        if not segments:
+            return
+        path = self._path(segments[-1])
+        valid_end = 0
+        for position, _ in self._read_segment(segments[-1], 0):
+            valid_end = position.offset
+        size = os.path.getsize(path)
+        if size != valid_end:
+            logging.warning("Truncating torn tail of %s (%d -> %d bytes)", path, size, valid_end)
+            with open(path, "r+b") as f:
+                f.truncate(valid_end)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def checkpoint(self) -> LogPosition:
+        """Position of the first record not yet loaded"""
+        try:
+            with open(os.path.join(self.directory, CHECKPOINT_FILE)) as f:
+                segment, offset = f.read().split()
+            return LogPosition(int(segment), int(offset))
+        except FileNotFoundError:
+            segments = self.segments()
+            return LogPosition(segments[0] if segments else 0, 0)
+
+    def append(self, records: Iterable[bytes]) -> int:
+        """
+        Append a batch of records and fsync it
+
+        Args:
+            records: Record bodies
+
+        Returns:
+            Number of records written
+        """
+        segments = self.segments()
+        segment = segments[-1] if segments else self.checkpoint().segment
+        path = self._path(segment)
+        if os.path.exists(path) and os.path.getsize(path) >= self.segment_max_bytes:
+            segment += 1
+            path = self._path(segment)
+
+        created = not os.path.exists(path)
+        written = 0
+        with open(path, "ab") as f:
+            for body in records:
+                f.write(RECORD_HEADER.pack(len(body), zlib.crc32(body)))
+                f.write(body)
+                written += 1
+            f.flush()
+            os.fsync(f.fileno())
+        if created:
+            _fsync_dir(self.directory)
+        return written
+
+    def _read_segment(self, segment: int, offset: int) -> Iterator[Tuple[LogPosition, bytes]]:
+        """Yield (position after record, body) for valid records from offset; stops at a torn/corrupt record"""
+        path = self._path(segment)
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            return
+        if size <= offset:
+            return
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            while offset + RECORD_HEADER.size <= size:
+                length, crc = RECORD_HEADER.unpack_from(data, offset)
+                start = offset + RECORD_HEADER.size
+                end = start + length
+                if end > size:
+                    break
+                body = bytes(data[start:end])
+                if zlib.crc32(body) != crc:
+                    logging.error("CRC mismatch in %s at offset %d; stopping", path, offset)
+                    break
+                offset = end
+                yield LogPosition(segment, offset), body
+
+    def read(self, start: Optional[LogPosition] = None) -> Iterator[Tuple[LogPosition, bytes]]:
+        """
+        Yield (position after record, body) for every record from start (default: the checkpoint)
+
+        Pass the position of the last record loaded to commit().
+        """
+        start = start or self.checkpoint()
+        for segment in self.segments():
+            if segment < start.segment:
+                continue
+            offset = start.offset if segment == start.segment else 0
+            yield from self._read_segment(segment, offset)
+
+    def commit(self, position: LogPosition) -> None:
+        """Durably record that everything before position has been loaded, and drop consumed segments"""
+        tmp_path = os.path.join(self.directory, CHECKPOINT_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            f.write(f"{position.segment} {position.offset}")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(self.directory, CHECKPOINT_FILE))
+        _fsync_dir(self.directory)
+
+        segments = self.segments()
+        for segment in segments:
+            # Keep the newest segment so appends continue after the checkpoint
+            if segment < position.segment or (segment == position.segment and segment != segments[-1]
+                                              and position.offset >= os.path.getsize(self._path(segment))):
+                os.remove(self._path(segment))
+
+    def has_pending(self) -> bool:
+        """True if records exist past the checkpoint"""
+        for _ in self.read():
+            return True
+        return False
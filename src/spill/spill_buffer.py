@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import json
+import logging
+from typing import Callable, Dict, List
+
+from src.spill.segment_log import SegmentLog
+
+
+class SpillBuffer:
+    """
+    Hands fetched events to the loader through a SegmentLog.
+
+    The fetch stage appends transformed rows (one record per row, one fsync per
+    batch) and may advance replay positions as soon as append() returns. The load
+    stage drains the log into Snowflake and checkpoints after each loaded chunk,
+    so a failed or slow load leaves the remaining rows in the log for the next run.
+    """
+
+    def __init__(self, log: SegmentLog, drain_batch_size: int = 5000):
+        self.log = log
+        self.drain_batch_size = drain_batch_size
+
+    def append(self, rows: List[Dict]) -> int:
+        """
+        Durably spill transformed rows
+
+        Returns:
+            Number of rows written
+        """
+        written = self.log.append(json.dumps(row, separators=(",", ":")).encode("utf-8") for row in rows)
+        logging.info("Spilled %d rows to %s", written, self.log.directory)
+        return written
+
+    def drain(self, load: Callable[[List[Dict]], int]) -> int:
+        """
+        Load spilled rows in chunks, checkpointing after each successful chunk
+
+        Args:
+            load: Inserts a list of rows (e.g. SnowflakeConnector.insert_events)
+
+        Returns:
+            Number of rows drained
+        """
+        drained = 0
+        chunk: List[Dict] = []
+        position = None
+        for position, body in self.log.read():
+            chunk.append(json.loads(body))
+            if len(chunk) >= self.drain_batch_size:
+                load(chunk)
+                self.log.commit(position)
+                drained += len(chunk)
+                chunk = []
+        if chunk:
+            load(chunk)
+            self.log.commit(position)
+            drained += len(chunk)
+        if drained:
+            logging.info("Drained %d spilled rows from %s", drained, self.log.directory)
+        return drained
@@ -0,0 +1,39 @@
+"""Deferred module imports to keep Function cold starts small"""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Return a module that is only executed on first attribute access
+
+    Heavy client libraries (snowflake.connector, grpc, fastavro, ...) can be
+    bound at module level without paying their import cost until a code
+    path actually uses them.
+
+    Args:
+        name: Absolute module name (e.g. "snowflake.connector")
+
+    Returns:
+        The module (already loaded, or a lazily loading module object)
+
+    Raises:
+        ModuleNotFoundError: If the module cannot be found
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
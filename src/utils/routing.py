@@ -0,0 +1,111 @@
+"""Route delete events to the DELETE_TRACKER object name, including events from a shared delete channel"""
+
+from __future__ import annotations
+
+import logging
+import re
+import time
+from typing import Callable, Dict, Optional
+
+# Per-object topics carry the object in their name, e.g. "/event/Account_Delete__e"
+DELETE_TOPIC_PATTERN = re.compile(r"^/event/(?P<object>\w+?)_Delete__e$")
+
+# Payload fields that name the deleted object / record on a shared delete channel
+OBJECT_NAME_FIELDS = ("ObjectName", "Object_Name__c", "ObjectName__c")
+RECORD_ID_FIELDS = ("Record_Id__c", "RecordId", "Record_Id")
+DELETED_BY_FIELDS = ("Deleted_By__c", "DeletedBy")
+
+# Key prefixes of standard objects; custom objects come from ENTITYIDMAP
+STANDARD_KEY_PREFIXES = {
+    "001": "Account",
+    "003": "Contact",
+    "006": "Opportunity",
+    "00T": "Task",
+    "00U": "Event",
+}
+
+# object_name for events that can't be routed; kept so they can be investigated
+UNROUTED_OBJECT = "UNROUTED"
+
+# ENTITYIDMAP lookups are cached per worker; the map changes only when objects are added
+_prefix_cache: Dict[str, object] = {"loaded_at": None, "prefixes": None}
+
+
+def cached_key_prefixes(loader: Callable[[], Dict[str, str]], ttl_seconds: float = 3600) -> Dict[str, str]:
+    """
+    Return the key prefix -> object name map, reloading it at most every ttl_seconds
+
+    A failed reload keeps serving the previous map (or an empty one).
+    """
+    loaded_at = _prefix_cache["loaded_at"]
+    if loaded_at is not None and time.monotonic() - loaded_at < ttl_seconds:
+        return _prefix_cache["prefixes"]
+    try:
+        _prefix_cache["prefixes"] = loader()
+        _prefix_cache["loaded_at"] = time.monotonic()
+        logging.info("Loaded %d key prefixes from ENTITYIDMAP", len(_prefix_cache["prefixes"]))
+    except Exception as e:
+        logging.warning("Could not load key prefixes from ENTITYIDMAP: %s", e)
+    return _prefix_cache["prefixes"] or {}
+
+
+def first_field(payload: Dict, fields) -> Optional[str]:
+    """Return the first non-empty value among fields"""
+    for field in fields:
+        value = payload.get(field)
+        if value:
+            return value
+    return None
+
+
+class EventRouter:
+    """
+    Resolve the DELETE_TRACKER object name for an event
+
+    In order: the per-object topic name, the object named in the payload, then
+    the record ID's 3-character key prefix (standard objects + ENTITYIDMAP).
+    """
+
+    def __init__(self, prefix_loader: Optional[Callable[[], Dict[str, str]]] = None, ttl_seconds: float = 3600):
+        self.prefix_loader = prefix_loader
+        self.ttl_seconds = ttl_seconds
+        self._prefixes: Optional[Dict[str, str]] = None
+
+    def key_prefixes(self) -> Dict[str, str]:
+        """Standard prefixes overlaid with ENTITYIDMAP, loaded on first prefix lookup"""
+        if self._prefixes is None:
+            prefixes = dict(STANDARD_KEY_PREFIXES)
+            if self.prefix_loader is not None:
+                prefixes.update(cached_key_prefixes(self.prefix_loader, self.ttl_seconds))
+            self._prefixes = prefixes
+        return self._prefixes
+
+    def route(self, topic: str, payload: Dict) -> str:
+        """
+        Args:
+            topic: Topic or channel the event arrived on
+            payload: Decoded event payload
+
+        Returns:
+            Object name, or UNROUTED_OBJECT
+        """
+        match = DELETE_TOPIC_PATTERN.match(topic or "")
+        if match:
+            return match.group("object")
+
+        object_name = first_field(payload, OBJECT_NAME_FIELDS)
+        if object_name:
+            return object_name
+
+        record_id = first_field(payload, RECORD_ID_FIELDS)
+        if record_id and len(record_id) >= 3:
+            object_name = self.key_prefixes().get(record_id[:3])
+            if object_name:
+                return object_name
+
+        logging.warning("Could not route event from %s (record_id=%s)", topic, record_id)
+        return UNROUTED_OBJECT
+
+    def record_id(self, object_name: str, payload: Dict) -> Optional[str]:
+        """Record ID from "<Object>_Id__c" (per-object events) or the generic record ID fields"""
+        return payload.get(f"{object_name}_Id__c") or first_field(payload, RECORD_ID_FIELDS)
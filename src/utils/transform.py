@@ -1,13 +1,24 @@
 """Event transformation utilities for converting Salesforce events to Snowflake format"""
 
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional, Set
 import logging
 
+from src.replay.dead_letter_store import STAGE_TRANSFORM, make_dead_letter
+from src.utils.routing import DELETED_BY_FIELDS, UNROUTED_OBJECT, EventRouter, first_field
 
-def transform_for_snowflake(events: List[Dict]) -> List[Dict]:
+
+def transform_for_snowflake(
+    events: List[Dict],
+    router: Optional[EventRouter] = None,
+    dead_letters: Optional[List[Dict]] = None,
+) -> List[Dict]:
     """
     Convert Salesforce Pub/Sub events to Snowflake insert format
     
+    Events from per-object topics are named after the topic; events from a
+    shared delete channel are routed by payload object name or record ID key
+    prefix (see EventRouter).
+    
     Args:
         events: List of events from Salesforce Pub/Sub API with structure:
             {
@@ -16,6 +27,9 @@ def transform_for_snowflake(events: List[Dict]) -> List[Dict]:
                 "event_id": str,
                 "payload": dict (decoded Avro payload)
             }
+        router: Optional EventRouter (defaults to standard key prefixes only)
+        dead_letters: Optional list that receives events that can't be routed, have no
+            record ID or fail to transform; without it they are kept (or skipped on error)
     
     Returns:
         List of events formatted for Snowflake insertion:
@@ -26,6 +40,7 @@ def transform_for_snowflake(events: List[Dict]) -> List[Dict]:
                 "status": str
             }
     """
+    router = router or EventRouter()
     transformed = []
     
     for event in events:
@@ -33,17 +48,19 @@ def transform_for_snowflake(events: List[Dict]) -> List[Dict]:
             topic = event.get("topic", "")
             payload = event.get("payload", {})
             
-            # Extract object name from topic
-            # e.g., "/event/Account_Delete__e" -> "Account"
-            object_name = topic.replace("/event/", "").replace("_Delete__e", "")
+            # e.g., "/event/Account_Delete__e" -> "Account", or routed from the payload
+            object_name = router.route(topic, payload)
             
-            # Build the field name dynamically
-            # e.g., "Account" -> "Account_Id__c"
-            record_id_field = f"{object_name}_Id__c"
-            record_id = payload.get(record_id_field)
+            # e.g., "Account" -> "Account_Id__c", falling back to the generic record ID fields
+            record_id = router.record_id(object_name, payload)
+            
+            if dead_letters is not None and (object_name == UNROUTED_OBJECT or not record_id):
+                reason = "could not route event to an object" if object_name == UNROUTED_OBJECT else "no record id in payload"
+                dead_letters.append(make_dead_letter(event, STAGE_TRANSFORM, reason))
+                continue
             
             # Standard delete event fields
-            deleted_by = payload.get("Deleted_By__c")
+            deleted_by = first_field(payload, DELETED_BY_FIELDS)
             
             transformed.append({
                 "object_name": object_name,
@@ -54,7 +71,18 @@ def transform_for_snowflake(events: List[Dict]) -> List[Dict]:
             
         except Exception as e:
             logging.error("Error transforming event: %s", e)
+            if dead_letters is not None:
+                dead_letters.append(make_dead_letter(event, STAGE_TRANSFORM, str(e)))
             continue
     
     return transformed
 
+
+def dirty_objects(rows: Iterable[Dict]) -> Set[str]:
+    """
+    Objects that have delete_tracker rows in a batch of transformed events
+
+    Only these objects need their DELETE_<object> procedure run after the insert;
+    rows that could not be routed to an object are left out.
+    """
+    return {row["object_name"] for row in rows if row.get("object_name") and row["object_name"] != UNROUTED_OBJECT}
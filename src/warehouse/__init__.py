@@ -0,0 +1 @@
+"""Local warehouse backends standing in for Snowflake."""
@@ -0,0 +1,305 @@
+"""
+SQLite stand-in for the Snowflake warehouse
+
+SQLiteConnection is a DB-API connection that accepts the Snowflake SQL this
+app issues and runs it on SQLite, so SnowflakeConnector, CursorStore and the
+other stores work unchanged against a local file (WAREHOUSE_BACKEND=sqlite).
+It is meant for offline load tests and benchmarks, not as a general
+Snowflake emulator. It translates:
+
+- pyformat parameters (%s, %(name)s)
+- Snowflake types and defaults (INTEGER AUTOINCREMENT, TIMESTAMP_NTZ, CURRENT_TIMESTAMP())
+- CREATE OR REPLACE [TEMPORARY] TABLE
+- SELECT ... QUALIFY <window condition>
+- MERGE INTO ... USING ... ON ... WHEN [NOT] MATCHED THEN UPDATE / DELETE / INSERT,
+  including USING (SELECT ... FROM VALUES ...). The result row holds the
+  inserted / updated / deleted counts, like Snowflake's
+- CALL <procedure>(...), dispatched to Python callables registered with
+  register_procedure (see delete_procedure for the DELETE_<object> procedures)
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Procedures available on every connection, by upper-case name
+_procedures: Dict[str, Callable[..., Any]] = {}
+
+_NAMED_PARAM = re.compile(r"%\((\w+)\)s")
+_AUTOINCREMENT = re.compile(
+    r"(\w+)\s+(?:INTEGER|NUMBER\(38,\s*0\))(?:\s+NOT NULL)?\s+AUTOINCREMENT"
+    r"(?:\s+START\s+\d+\s+INCREMENT\s+\d+(?:\s+NOORDER)?)?",
+    re.IGNORECASE,
+)
+_CREATE_OR_REPLACE = re.compile(r"^\s*CREATE\s+OR\s+REPLACE\s+(TEMPORARY\s+|TEMP\s+)?TABLE\s+([\w.]+)", re.IGNORECASE)
+_QUALIFY = re.compile(r"^\s*SELECT\s+(?P<columns>.+?)\s+FROM\s+(?P<rest>.+?)\s+QUALIFY\s+(?P<condition>.+?)\s*;?\s*$",
+                      re.IGNORECASE | re.DOTALL)
+_MERGE_HEAD = re.compile(r"^\s*MERGE\s+INTO\s+(?P<table>[\w.]+)(?:\s+(?:AS\s+)?(?!USING\b)(?P<alias>\w+))?\s+USING\s+",
+                         re.IGNORECASE)
+_MERGE_TAIL = re.compile(r"^\s*(?:AS\s+)?(?P<alias>\w+)\s+ON\s+(?P<on>.+?)\s+(?P<clauses>WHEN\s.+?)\s*;?\s*$",
+                         re.IGNORECASE | re.DOTALL)
+_WHEN = re.compile(r"WHEN\s+(NOT\s+)?MATCHED\s+THEN\s+", re.IGNORECASE)
+_CALL = re.compile(r"^\s*CALL\s+(?:[\w]+\.)*(?P<name>\w+)\s*\((?P<args>.*)\)\s*;?\s*$", re.IGNORECASE | re.DOTALL)
+
+
+def register_procedure(name: str, procedure: Callable[..., Any]) -> None:
+    """
+    Make CALL <name>(...) run a Python callable
+
+    Args:
+        name: Procedure name (case-insensitive, without schema)
+        procedure: Called as procedure(connection, *args); its return value is the CALL's single row
+    """
+    _procedures[name.upper()] = procedure
+
+
+def delete_procedure(object_name: str, object_table: str, id_column: str = "id",
+                     tracker_table: str = "delete_tracker") -> Callable[..., str]:
+    """
+    Python equivalent of the DELETE_<object> stored procedures (e.g. account_delete_proc.sql)
+
+    Deletes rows of object_table whose id is tracked as 'open' for object_name,
+    marks those tracker rows 'applied' and returns 'SUCCESS,<rows deleted>'.
+    """
+    def procedure(connection: "SQLiteConnection") -> str:
+        cursor = connection.cursor()
+        try:
+            cursor.execute(f"""
+            MERGE INTO {object_table} a
+            USING (SELECT RECORD_ID FROM {tracker_table} WHERE STATUS = 'open' AND OBJECT_NAME = %s) b
+            ON a.{id_column} = b.RECORD_ID
+            WHEN MATCHED THEN DELETE
+            """, (object_name,))
+            deleted = cursor.fetchone()[0]
+            cursor.execute(
+                f"UPDATE {tracker_table} SET STATUS = 'applied' WHERE STATUS = 'open' AND OBJECT_NAME = %s",
+                (object_name,),
+            )
+            return f"SUCCESS,{deleted}"
+        finally:
+            cursor.close()
+
+    return procedure
+
+
+def _split_parenthesized(text: str) -> Tuple[str, str]:
+    """Split "(...) rest" into the balanced parenthesized prefix and the rest"""
+    depth = 0
+    for index, char in enumerate(text):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return text[:index + 1], text[index + 1:]
+    raise sqlite3.OperationalError("unbalanced parentheses in MERGE source")
+
+
+def translate(sql: str) -> List[str]:
+    """
+    Rewrite one Snowflake statement (other than MERGE / CALL) into SQLite statements
+
+    Returns:
+        SQLite statements to run in order; only the last one receives the parameters
+    """
+    statements = []
+    match = _CREATE_OR_REPLACE.match(sql)
+    if match:
+        temporary, table = match.group(1), match.group(2)
+        statements.append(f"DROP TABLE IF EXISTS {'temp.' if temporary else ''}{table}")
+        sql = sql[:match.start()] + f"CREATE {'TEMP ' if temporary else ''}TABLE {table}" + sql[match.end():]
+
+    autoincrement = _AUTOINCREMENT.search(sql)
+    if autoincrement:
+        column = autoincrement.group(1)
+        sql = _AUTOINCREMENT.sub(r"\1 INTEGER PRIMARY KEY AUTOINCREMENT", sql)
+        sql = re.sub(rf",\s*PRIMARY\s+KEY\s*\(\s*{column}\s*\)", "", sql, flags=re.IGNORECASE)
+
+    sql = re.sub(r"CURRENT_TIMESTAMP\(\)", "CURRENT_TIMESTAMP", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\bTIMESTAMP_NTZ(\(\d+\))?", "TIMESTAMP", sql, flags=re.IGNORECASE)
+
+    match = _QUALIFY.match(sql)
+    if match:
+        sql = (f"SELECT {match.group('columns')} FROM "
+               f"(SELECT *, ({match.group('condition')}) AS _qualify FROM {match.group('rest')}) WHERE _qualify")
+
+    statements.append(_NAMED_PARAM.sub(r":\1", sql).replace("%s", "?"))
+    return statements
+
+
+class SQLiteCursor:
+    """DB-API cursor that translates Snowflake SQL (see module docstring)"""
+
+    def __init__(self, connection: "SQLiteConnection"):
+        self.connection = connection
+        self._cursor = connection.sqlite.cursor()
+        self._rows: Optional[List[tuple]] = None
+        self.rowcount = -1
+
+    @property
+    def description(self):
+        return None if self._rows is not None else self._cursor.description
+
+    def execute(self, sql: str, params: Optional[Sequence | Dict] = None) -> "SQLiteCursor":
+        params = params if params is not None else ()
+        self._rows = None
+        with self.connection.lock:
+            if _CALL.match(sql):
+                self._call(sql, params)
+            elif _MERGE_HEAD.match(sql):
+                self._merge(sql, params)
+            else:
+                statements = translate(sql)
+                for statement in statements[:-1]:
+                    self._cursor.execute(statement)
+                self._cursor.execute(statements[-1], params)
+                self.rowcount = self._cursor.rowcount
+        return self
+
+    def executemany(self, sql: str, seq_of_params) -> "SQLiteCursor":
+        self._rows = None
+        with self.connection.lock:
+            statements = translate(sql)
+            for statement in statements[:-1]:
+                self._cursor.execute(statement)
+            self._cursor.executemany(statements[-1], seq_of_params)
+            self.rowcount = self._cursor.rowcount
+        return self
+
+    def _call(self, sql: str, params) -> None:
+        match = _CALL.match(sql)
+        name = match.group("name").upper()
+        procedure = _procedures.get(name)
+        if procedure is None:
+            raise sqlite3.OperationalError(f"Unknown procedure {name}")
+        args: tuple = ()
+        if match.group("args").strip():
+            # Evaluate literals / placeholders in the argument list with SQLite itself
+            args = tuple(self._cursor.execute(translate(f"SELECT {match.group('args')}")[-1], params).fetchone())
+        self._rows = [(procedure(self.connection, *args),)]
+        self.rowcount = 1
+
+    def _merge(self, sql: str, params) -> None:
+        head = _MERGE_HEAD.match(sql)
+        table, alias = head.group("table"), head.group("alias") or head.group("table").split(".")[-1]
+        rest = sql[head.end():].lstrip()
+        if rest.startswith("("):
+            source, rest = _split_parenthesized(rest)
+            source = re.sub(r"FROM\s+VALUES\s+(.*)\)$", r"FROM (VALUES \1))", source, flags=re.IGNORECASE | re.DOTALL)
+        else:
+            source, _, rest = rest.partition(" ")
+            rest = " " + rest
+        tail = _MERGE_TAIL.match(rest)
+        if tail is None:
+            raise sqlite3.OperationalError("unsupported MERGE statement")
+        source_alias, on = tail.group("alias"), tail.group("on")
+
+        # Snowflake hash-joins the ON keys; without indexes SQLite would compare every pair of rows
+        target_keys, source_keys = [], []
+        for left, left_column, right, right_column in re.findall(r"\b(\w+)\.(\w+)\s*=\s*(\w+)\.(\w+)", on):
+            pair = {left.lower(): left_column, right.lower(): right_column}
+            if alias.lower() in pair and source_alias.lower() in pair:
+                target_keys.append(pair[alias.lower()])
+                source_keys.append(pair[source_alias.lower()])
+        if target_keys:
+            index_name = re.sub(r"\W", "_", f"_merge_{table}_{'_'.join(target_keys)}")
+            self._cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({', '.join(target_keys)})")
+
+        # Evaluate the source and whether each source row matches against the table as it was
+        # before the MERGE, so the clauses don't see each other's changes
+        self._cursor.execute("DROP TABLE IF EXISTS temp._merge_source")
+        self._cursor.execute(
+            translate(
+                f"CREATE TEMP TABLE _merge_source AS SELECT {source_alias}.*, "
+                f"EXISTS (SELECT 1 FROM {table} AS {alias} WHERE {on}) AS _merge_matched "
+                f"FROM {source} AS {source_alias}"
+            )[-1],
+            params,
+        )
+        if source_keys:
+            self._cursor.execute(f"CREATE INDEX temp._merge_source_keys ON _merge_source ({', '.join(source_keys)})")
+
+        counts = {"INSERT": 0, "UPDATE": 0, "DELETE": 0}
+        clauses = _WHEN.split(tail.group("clauses"))[1:]
+        for negated, action in zip(clauses[0::2], clauses[1::2]):
+            action = translate(action.strip())[-1]
+            matched = f"(SELECT 1 FROM temp._merge_source AS {source_alias} WHERE _merge_matched AND {on})"
+            if negated:
+                columns, values = re.match(r"INSERT\s*(\(.*?\))\s*VALUES\s*(\(.*\))$", action,
+                                           re.IGNORECASE | re.DOTALL).groups()
+                self._cursor.execute(
+                    f"INSERT INTO {table} {columns} SELECT {values[1:-1]} "
+                    f"FROM temp._merge_source AS {source_alias} WHERE NOT _merge_matched"
+                )
+                counts["INSERT"] += self._cursor.rowcount
+            elif re.match(r"DELETE\b", action, re.IGNORECASE):
+                self._cursor.execute(f"DELETE FROM {table} AS {alias} WHERE EXISTS {matched}")
+                counts["DELETE"] += self._cursor.rowcount
+            else:
+                assignments = re.sub(r"^UPDATE\s+SET\s+", "", action, flags=re.IGNORECASE)
+                self._cursor.execute(
+                    f"UPDATE {table} AS {alias} SET {assignments} FROM temp._merge_source AS {source_alias} "
+                    f"WHERE _merge_matched AND {on}"
+                )
+                counts["UPDATE"] += self._cursor.rowcount
+        self._cursor.execute("DROP TABLE temp._merge_source")
+
+        present = [kind for kind in ("INSERT", "UPDATE", "DELETE")
+                   if any(re.match(kind, action.strip(), re.IGNORECASE) for action in clauses[1::2])]
+        self._rows = [tuple(counts[kind] for kind in present)]
+        self.rowcount = sum(counts.values())
+
+    def fetchone(self):
+        if self._rows is not None:
+            return self._rows.pop(0) if self._rows else None
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        if self._rows is not None:
+            rows, self._rows = self._rows, []
+            return rows
+        return self._cursor.fetchall()
+
+    def close(self) -> None:
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """DB-API connection over sqlite3 that behaves like an autocommit Snowflake session"""
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        # Autocommit like Snowflake; commit() is kept for code written against snowflake.connector
+        self.sqlite = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.lock = threading.RLock()
+        self._closed = False
+        if path != ":memory:":
+            self.sqlite.execute("PRAGMA journal_mode=WAL")
+            self.sqlite.execute("PRAGMA synchronous=NORMAL")
+
+    def cursor(self) -> SQLiteCursor:
+        return SQLiteCursor(self)
+
+    def commit(self) -> None:
+        pass
+
+    def rollback(self) -> None:
+        pass
+
+    def is_closed(self) -> bool:
+        return self._closed
+
+    def close(self) -> None:
+        if not self._closed:
+            self.sqlite.close()
+            self._closed = True
+
+
+def connect_sqlite(database: str = ":memory:", **_snowflake_params: Any) -> SQLiteConnection:
+    """connect_fn for ConnectionManager; Snowflake-only parameters are ignored"""
+    logging.info("Opening local SQLite warehouse at %s", database)
+    return SQLiteConnection(database)
@@ -0,0 +1,141 @@
+"""Unit tests for cursor history and the parallel backfill"""
+import unittest
+
+from src.replay.backfill import ReplayRange, iter_range, plan_ranges, run_backfill
+from src.replay.cursor_store import CursorStore
+from src.snowflake.connector import SnowflakeConnector
+
+
+def rid(n):
+    return n.to_bytes(8, "big")
+
+
+class FakeCursor:
+    def __init__(self, rows=None):
+        self.rows = rows or []
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, rows=None):
+        self.cursor_obj = FakeCursor(rows)
+        self.commits = 0
+
+    def cursor(self):
+        return self.cursor_obj
+
+    def commit(self):
+        self.commits += 1
+
+
+class FakeTopic:
+    """Pages of at most page_size events with replay IDs 1..count"""
+
+    def __init__(self, count, page_size=10, fail=False):
+        self.count = count
+        self.page_size = page_size
+        self.fail = fail
+        self.calls = 0
+
+    def fetch(self, topic, replay_id):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("stream failed")
+        start = int.from_bytes(replay_id, "big") + 1 if replay_id else 1
+        return [{"topic": topic, "replay_id": rid(n)} for n in range(start, min(start + self.page_size, self.count + 1))]
+
+
+class TestCursorHistory(unittest.TestCase):
+    def test_set_appends_history_with_run_id(self):
+        conn = FakeConnection()
+        store = CursorStore(conn, run_id="run-1")
+
+        store.set("/event/A", rid(5))
+
+        sql, params = conn.cursor_obj.executed[-1]
+        self.assertIn("INSERT INTO cursor_history", sql)
+        self.assertEqual(params, ("/event/A", rid(5), "run-1"))
+
+    def test_history_lookup_picks_one_cursor_per_topic(self):
+        conn = FakeConnection(rows=[("/event/A", bytearray(rid(7)))])
+        store = CursorStore(conn)
+
+        cursors = store.get_history_cursors(["/event/A", "/event/B"], "2025-10-16 00:00:00", after=True)
+
+        sql, params = conn.cursor_obj.executed[-1]
+        self.assertIn("recorded_at >= %s", sql)
+        self.assertIn("ORDER BY recorded_at ASC", sql)
+        self.assertEqual(params, ["/event/A", "/event/B", "2025-10-16 00:00:00"])
+        self.assertEqual(cursors, {"/event/A": rid(7)})
+
+
+class TestBackfill(unittest.TestCase):
+    def test_plan_skips_empty_windows(self):
+        ranges = plan_ranges(["/event/A", "/event/B", "/event/C"],
+                             {"/event/A": rid(10), "/event/B": rid(20)},
+                             {"/event/A": rid(50), "/event/B": rid(20)})
+
+        self.assertEqual(ranges, [ReplayRange("/event/A", rid(10), rid(50)), ReplayRange("/event/C", None, None)])
+
+    def test_iter_range_stops_at_end_cursor(self):
+        topic = FakeTopic(100)
+
+        batches = list(iter_range(ReplayRange("/event/A", rid(5), rid(32)), topic.fetch))
+
+        replay_ids = [e["replay_id"] for batch in batches for e in batch]
+        self.assertEqual(replay_ids, [rid(n) for n in range(6, 33)])
+        self.assertEqual(topic.calls, 3)
+
+    def test_iter_range_without_end_drains_topic(self):
+        topic = FakeTopic(25)
+        batches = list(iter_range(ReplayRange("/event/A", None, None), topic.fetch))
+        self.assertEqual(sum(len(b) for b in batches), 25)
+
+    def test_run_backfill_stages_each_topic_and_reports_failures(self):
+        topics = {"/event/A": FakeTopic(30), "/event/B": FakeTopic(15), "/event/C": FakeTopic(5, fail=True)}
+        staged_rows = []
+
+        def stage(rows):
+            staged_rows.extend(rows)
+            return len(rows)
+
+        staged = run_backfill(
+            [ReplayRange(t, None, None) for t in topics],
+            lambda topic, replay_id: topics[topic].fetch(topic, replay_id),
+            lambda events: [{"record_id": e["replay_id"]} for e in events],
+            stage,
+            workers=3,
+        )
+
+        self.assertEqual(staged, {"/event/A": 30, "/event/B": 15, "/event/C": -1})
+        self.assertEqual(len(staged_rows), 45)
+
+
+class TestStagedMerge(unittest.TestCase):
+    def test_merge_is_keyed_on_object_and_record(self):
+        connector = SnowflakeConnector("acct", "user", "wh", "DB", "PUBLIC", "delete_tracker", "key.p8")
+        connector.connection = FakeConnection(rows=[(12,)])
+
+        inserted = connector.merge_staged_events("delete_tracker_backfill")
+
+        sql, _ = connector.connection.cursor_obj.executed[-1]
+        self.assertEqual(inserted, 12)
+        self.assertIn("MERGE INTO delete_tracker", sql)
+        self.assertIn("target.object_name = source.object_name AND target.record_id = source.record_id", sql)
+        self.assertNotIn("WHEN MATCHED", sql)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+"""Unit tests for per-topic Pub/Sub batch size autotuning"""
+import unittest
+
+from src.replay.batch_tuning import MAX_NUM_REQUESTED, BatchSizeController, BatchTuningStore
+
+
+def no_memory_info():
+    return None
+
+
+class TestBatchSizeController(unittest.TestCase):
+    """Test how the batch size reacts to volume, latency and memory"""
+
+    def make(self, **kwargs):
+        kwargs.setdefault("memory_probe", no_memory_info)
+        return BatchSizeController("/event/Account_Delete__e", **kwargs)
+
+    def run_batch(self, controller, events, seconds_per_event=0.001, payload_bytes=500, drained=False):
+        controller.record_decode(events, events * payload_bytes, events * seconds_per_event / 2)
+        controller.record_insert(events, events * seconds_per_event / 2)
+        if drained:
+            controller.mark_drained()
+        return controller.finish_run()
+
+    def test_requests_are_split_at_api_limit(self):
+        controller = self.make(batch_size=250)
+        self.assertEqual(controller.next_request(0), MAX_NUM_REQUESTED)
+        self.assertEqual(controller.next_request(200), 50)
+        self.assertEqual(controller.next_request(250), 0)
+
+    def test_busy_topic_grows_to_max(self):
+        controller = self.make(max_size=800)
+        sizes = [self.run_batch(controller, controller.batch_size) for _ in range(4)]
+        self.assertEqual(sizes, [200, 400, 800, 800])
+
+    def test_quiet_topic_shrinks(self):
+        controller = self.make(min_size=10)
+        self.assertEqual(self.run_batch(controller, 3, drained=True), 10)
+        self.assertEqual(controller.next_request(0), 10)
+
+    def test_slow_inserts_cap_batch_to_target_time(self):
+        controller = self.make(batch_size=400, target_seconds=10.0)
+        # 50 ms per event -> 200 events fit in 10 s
+        self.assertEqual(self.run_batch(controller, 400, seconds_per_event=0.05), 200)
+
+    def test_memory_headroom_caps_batch(self):
+        # 4 MB headroom, 25% budget, 1 KB payloads x 8 -> 128 events
+        controller = self.make(memory_probe=lambda: 4 * 1024 * 1024)
+        self.assertEqual(self.run_batch(controller, 100, payload_bytes=1024), 128)
+
+    def test_measurements_reset_between_runs(self):
+        controller = self.make()
+        self.run_batch(controller, 100)
+        self.assertEqual((controller.run_events, controller.drained), (0, False))
+
+
+class FakeCursor:
+    def __init__(self, rows=None):
+        self.rows = rows or []
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, rows=None):
+        self.cursor_obj = FakeCursor(rows)
+        self.commits = 0
+
+    def cursor(self):
+        return self.cursor_obj
+
+    def commit(self):
+        self.commits += 1
+
+
+class TestBatchTuningStore(unittest.TestCase):
+    """Test loading and saving learned state"""
+
+    def test_load_seeds_known_topics_and_defaults_others(self):
+        conn = FakeConnection(rows=[("/event/A", 400, 0.002, 0.003, 900.0)])
+        store = BatchTuningStore(conn)
+
+        controllers = store.load_controllers(["/event/A", "/event/B"], max_size=500)
+
+        self.assertEqual(controllers["/event/A"].batch_size, 400)
+        self.assertEqual(controllers["/event/A"].avg_payload_bytes, 900.0)
+        self.assertEqual(controllers["/event/B"].batch_size, MAX_NUM_REQUESTED)
+        self.assertEqual(controllers["/event/B"].max_size, 500)
+
+    def test_save_merges_all_topics_in_one_statement(self):
+        conn = FakeConnection()
+        store = BatchTuningStore(conn)
+        controllers = [BatchSizeController("/event/A", batch_size=200), BatchSizeController("/event/B")]
+
+        store.save(controllers)
+
+        sql, params = conn.cursor_obj.executed[-1]
+        self.assertIn("MERGE INTO batch_tuning", sql)
+        self.assertEqual(params[0:2], ["/event/A", 200])
+        self.assertEqual(params[5:7], ["/event/B", 100])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+"""Tests for the connection pool shared by the three Function apps"""
+import filecmp
+import os
+import unittest
+
+from src.snowflake.connector import SnowflakeConnector
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestSharedConnectionManager(unittest.TestCase):
+    def test_copies_are_identical(self):
+        """Each Function app deploys its own copy; they must not drift apart"""
+        canonical = os.path.join(_ROOT, "src", "snowflake", "connection_manager.py")
+        for copy in (
+            os.path.join(_ROOT, "notification_engine", "src", "snowflake", "connection_manager.py"),
+            os.path.join(_ROOT, "validation", "src", "connection_manager.py"),
+        ):
+            self.assertTrue(filecmp.cmp(canonical, copy, shallow=False), f"{copy} differs from {canonical}")
+
+    def test_sqlite_connection_is_released_for_reuse(self):
+        conn = SnowflakeConnector("acct", "user", "wh", "DB", "PUBLIC", "delete_tracker", "key.p8",
+                                  backend="sqlite", sqlite_path=":memory:")
+        conn.connect()
+        first = conn.connection
+        conn.close()
+        conn.connect()
+        try:
+            self.assertIs(conn.connection, first)
+        finally:
+            conn.invalidate()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+"""Unit tests for dead-lettering and replaying undecodable / unmappable events"""
+import importlib.util
+import json
+import os
+import sys
+import unittest
+
+from src.replay.dead_letter_store import (
+    STAGE_DECODE,
+    STAGE_TRANSFORM,
+    DeadLetterStore,
+    advance_past_dead_letters,
+    make_dead_letter,
+)
+from src.utils import routing
+from src.utils.routing import EventRouter
+from src.utils.transform import transform_for_snowflake
+
+_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(__file__)), "scripts", "replay_dead_letters.py")
+_spec = importlib.util.spec_from_file_location("replay_dead_letters", _SCRIPT)
+replay_dead_letters = importlib.util.module_from_spec(_spec)
+sys.modules["replay_dead_letters"] = replay_dead_letters
+_spec.loader.exec_module(replay_dead_letters)
+
+CHANNEL = "/event/Delete_Logs__e"
+
+
+def event(topic=CHANNEL, payload=None):
+    return {"topic": topic, "event_id": "e-1", "schema_id": "s-1", "replay_id": b"\x01", "payload": payload or {}}
+
+
+class FakeCursor:
+    def __init__(self, rows=None):
+        self.rows = rows or []
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def executemany(self, sql, seq):
+        self.executed.append((sql, list(seq)))
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, rows=None):
+        self.cursor_obj = FakeCursor(rows)
+        self.commits = 0
+
+    def cursor(self):
+        return self.cursor_obj
+
+    def commit(self):
+        self.commits += 1
+
+
+class TestTransformDeadLetters(unittest.TestCase):
+    def setUp(self):
+        routing._prefix_cache.update(loaded_at=None, prefixes=None)
+
+    def test_unroutable_and_missing_id_are_dead_lettered(self):
+        sink = []
+        rows = transform_for_snowflake([
+            event(payload={"RecordId": "zzz000000000001"}),
+            event(topic="/event/Account_Delete__e", payload={}),
+            event(topic="/event/Account_Delete__e", payload={"Account_Id__c": "001000000000001"}),
+        ], EventRouter(), sink)
+
+        self.assertEqual([r["record_id"] for r in rows], ["001000000000001"])
+        self.assertEqual([d["error"] for d in sink], ["could not route event to an object", "no record id in payload"])
+        self.assertEqual(sink[0]["stage"], STAGE_TRANSFORM)
+        self.assertEqual(sink[0]["decoded_payload"], {"RecordId": "zzz000000000001"})
+
+    def test_without_sink_unrouted_events_are_kept(self):
+        rows = transform_for_snowflake([event(payload={"RecordId": "zzz000000000001"})], EventRouter())
+        self.assertEqual(rows[0]["object_name"], routing.UNROUTED_OBJECT)
+
+    def test_decode_letter_keeps_raw_payload_only(self):
+        letter = make_dead_letter(event(payload=None), STAGE_DECODE, "bad avro", payload=b"\x00\x01")
+        self.assertEqual(letter["payload"], b"\x00\x01")
+        self.assertIsNone(letter["decoded_payload"])
+
+
+class TestDeadLetterStore(unittest.TestCase):
+    def test_add_all_merges_one_batch_on_topic_and_replay_id(self):
+        conn = FakeConnection()
+        store = DeadLetterStore(conn)
+        first = make_dead_letter(event(payload={"RecordId": "x"}), STAGE_TRANSFORM, "no route")
+        second = dict(first, replay_id=b"\x02")
+
+        self.assertEqual(store.add_all([first, second, first]), 2)
+
+        sql, params = conn.cursor_obj.executed[-1]
+        self.assertIn("MERGE INTO dead_letters", sql)
+        self.assertIn("ON target.topic = source.topic AND target.replay_id = source.replay_id", sql)
+        self.assertEqual(len(params), 16)
+        self.assertEqual(json.loads(params[5]), {"RecordId": "x"})
+
+    def test_cursor_moves_past_trailing_dead_letters(self):
+        latest = {CHANNEL: b"\x05", "/event/Other": b"\x09"}
+        letters = [
+            make_dead_letter(dict(event(), replay_id=b"\x07"), STAGE_DECODE, "bad avro", payload=b"\x00"),
+            make_dead_letter(dict(event(), replay_id=b"\x03"), STAGE_DECODE, "bad avro", payload=b"\x00"),
+            make_dead_letter(event(topic="/event/Only_Bad"), STAGE_DECODE, "bad avro", payload=b"\x00"),
+        ]
+
+        advance_past_dead_letters(latest, letters)
+
+        self.assertEqual(latest, {CHANNEL: b"\x07", "/event/Other": b"\x09", "/event/Only_Bad": b"\x01"})
+
+    def test_fetch_pending_filters_topic_and_converts_binary(self):
+        conn = FakeConnection(rows=[(7, CHANNEL, "e-1", "s-1", bytearray(b"\x01"), None, '{"RecordId": "x"}',
+                                     STAGE_TRANSFORM, "no route")])
+        store = DeadLetterStore(conn)
+
+        letters = store.fetch_pending(topic=CHANNEL, limit=10)
+
+        sql, params = conn.cursor_obj.executed[-1]
+        self.assertIn("AND topic = %s", sql)
+        self.assertEqual(params, [CHANNEL, 10])
+        self.assertEqual(letters[0]["id"], 7)
+        self.assertEqual(letters[0]["replay_id"], b"\x01")
+        self.assertEqual(letters[0]["decoded_payload"], {"RecordId": "x"})
+
+
+class TestReplayLetters(unittest.TestCase):
+    def setUp(self):
+        routing._prefix_cache.update(loaded_at=None, prefixes=None)
+
+    def letter(self, letter_id, stage, decoded=None, payload=None):
+        return {"id": letter_id, "topic": CHANNEL, "event_id": "e", "schema_id": "s-1", "replay_id": b"\x01",
+                "payload": payload, "decoded_payload": decoded, "stage": stage, "error": "old"}
+
+    def test_replay_decodes_routes_and_reports_failures(self):
+        def decode(schema_id, payload):
+            if payload == b"bad":
+                raise ValueError("still bad")
+            return {"ObjectName": "Fund", "RecordId": "a0I000000000001"}
+
+        router = EventRouter(prefix_loader=lambda: {"a0I": "Investment"})
+        rows, replayed, failures = replay_dead_letters.replay_letters([
+            self.letter(1, STAGE_DECODE, payload=b"ok"),
+            self.letter(2, STAGE_DECODE, payload=b"bad"),
+            self.letter(3, STAGE_TRANSFORM, decoded={"RecordId": "a0I000000000002"}),
+            self.letter(4, STAGE_TRANSFORM, decoded={"RecordId": "zzz000000000003"}),
+        ], decode, router)
+
+        self.assertEqual([(r["object_name"], r["record_id"]) for r in rows],
+                         [("Fund", "a0I000000000001"), ("Investment", "a0I000000000002")])
+        self.assertEqual(replayed, [1, 3])
+        self.assertEqual(failures, [(2, "decode: still bad"), (4, "could not route event to an object")])
+
+
+if __name__ == "__main__":
+    unittest.main()
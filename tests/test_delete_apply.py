@@ -0,0 +1,154 @@
+"""Unit tests for applying deletes only for objects that received new deletes"""
+import json
+import unittest
+from unittest import mock
+
+from src.snowflake.connector import SnowflakeConnector
+from src.snowflake.delete_apply import (
+    STATUS_FAILED,
+    STATUS_SUCCESS,
+    DeleteApplier,
+    normalize_procedure_name,
+    parse_procedure_result,
+)
+from src.utils.routing import UNROUTED_OBJECT
+from src.utils.transform import dirty_objects
+from src.warehouse import sqlite_backend
+from src.warehouse.sqlite_backend import SQLiteConnection, delete_procedure, register_procedure
+
+
+def rows(connection, sql, params=()):
+    cursor = connection.cursor()
+    try:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+class TestDirtyObjects(unittest.TestCase):
+    def test_distinct_routed_objects(self):
+        batch = [
+            {"object_name": "Account", "record_id": "001A"},
+            {"object_name": "Account", "record_id": "001B"},
+            {"object_name": "Contact", "record_id": "003A"},
+            {"object_name": UNROUTED_OBJECT, "record_id": "zzzA"},
+        ]
+        self.assertEqual(dirty_objects(batch), {"Account", "Contact"})
+        self.assertEqual(dirty_objects([]), set())
+
+
+class TestParseProcedureResult(unittest.TestCase):
+    def test_success_count(self):
+        self.assertEqual(parse_procedure_result("Account", "SUCCESS,12").deleted, 12)
+
+    def test_error_object_is_a_failure(self):
+        result = parse_procedure_result("Account", '{"Error Type": "STATEMENT_ERROR", "SQLCODE": 2003}')
+        self.assertEqual(result.status, STATUS_FAILED)
+        self.assertIn("STATEMENT_ERROR", result.message)
+
+
+class TestNormalizeProcedureName(unittest.TestCase):
+    def test_entity_mapping_forms(self):
+        for value in ("DELETE_fund", " DELETE_fund() ", "CALL DELETE_fund();", "call DELETE_fund()"):
+            self.assertEqual(normalize_procedure_name(value), "DELETE_fund")
+        self.assertEqual(normalize_procedure_name("IC_CRM.DELETE_fund"), "IC_CRM.DELETE_fund")
+
+    def test_rejects_non_identifiers(self):
+        for value in (None, "", "DELETE_fund(); DROP TABLE Fund", "DELETE fund"):
+            self.assertIsNone(normalize_procedure_name(value))
+
+
+class TestDeleteApplier(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(sqlite_backend._procedures, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.conn = SnowflakeConnector("acct", "user", "wh", "DB", "PUBLIC", "delete_tracker", "key.p8",
+                                       backend="sqlite")
+        self.conn.connection = SQLiteConnection()
+        self.conn.ensure_table_exists()
+        self.db = self.conn.connection
+        rows(self.db, "CREATE TABLE EXECUTION_TRACKER (ID INTEGER AUTOINCREMENT, TYPE VARCHAR, STATUS VARCHAR, "
+                      "LOG_MESSAGE VARCHAR, REPORT VARCHAR, OBJECT_NAME VARCHAR, PRIMARY KEY (ID))")
+        self.calls = []
+        # Procedure names as in the *_delete_proc.sql files, not DELETE_<object>
+        for object_name, table, procedure_name in (
+            ("Account", "Account", "DELETE_account"),
+            ("Contact", "Contact", "DELETE_contact"),
+            ("LP_Consultant_Relationship", "LPCONRELATIONSHIP", "DELETE_lpconsultantrelationship"),
+        ):
+            rows(self.db, f"CREATE TABLE {table} (id VARCHAR(18))")
+            procedure = delete_procedure(object_name, table)
+            register_procedure(procedure_name, self.tracking(object_name, procedure))
+
+    def tracking(self, object_name, procedure):
+        def call(connection):
+            self.calls.append(object_name)
+            return procedure(connection)
+        return call
+
+    def test_only_dirty_objects_are_applied(self):
+        rows(self.db, "INSERT INTO Account VALUES ('001A'), ('001B')")
+        rows(self.db, "INSERT INTO Contact VALUES ('003A')")
+        self.conn.insert_events([{"object_name": "Account", "record_id": "001A"},
+                                 {"object_name": "Contact", "record_id": "003A"}])
+
+        applier = DeleteApplier(self.db)
+        results = applier.apply({"Account"})
+        applier.record(results)
+
+        self.assertEqual(self.calls, ["Account"])
+        self.assertEqual(rows(self.db, "SELECT id FROM Account"), [("001B",)])
+        self.assertEqual(rows(self.db, "SELECT object_name, status FROM delete_tracker ORDER BY id"),
+                         [("Account", "applied"), ("Contact", "open")])
+        self.assertEqual(rows(self.db, "SELECT TYPE, STATUS, REPORT, OBJECT_NAME FROM EXECUTION_TRACKER"),
+                         [("azure_func/delete/Account", STATUS_SUCCESS, json.dumps({"Account": 1}), "Account")])
+
+    def test_procedure_name_differs_from_object_name(self):
+        """LP_Consultant_Relationship is applied by DELETE_lpconsultantrelationship"""
+        rows(self.db, "INSERT INTO LPCONRELATIONSHIP VALUES ('a0XA'), ('a0XB')")
+        self.conn.insert_events([{"object_name": "LP_Consultant_Relationship", "record_id": "a0XA"}])
+
+        results = DeleteApplier(self.db).apply({"LP_Consultant_Relationship"})
+
+        self.assertEqual([(r.status, r.deleted) for r in results], [(STATUS_SUCCESS, 1)])
+        self.assertEqual(rows(self.db, "SELECT id FROM LPCONRELATIONSHIP"), [("a0XB",)])
+
+    def test_entity_mapping_procedures_override_the_defaults(self):
+        rows(self.db, "CREATE TABLE ENTITYMAPPING (ENTITYNAME VARCHAR, DELETE_PROCEDURE VARCHAR)")
+        rows(self.db, "INSERT INTO ENTITYMAPPING VALUES ('Account', 'CALL DELETE_account_v2();'), "
+                      "('Fund', NULL), ('Lead', 'DELETE_lead')")
+        register_procedure("DELETE_account_v2", self.tracking("Account v2", lambda connection: "SUCCESS,0"))
+        register_procedure("DELETE_lead", self.tracking("Lead", lambda connection: "SUCCESS,0"))
+
+        procedures = self.conn.fetch_delete_procedures()
+        self.assertEqual(procedures, {"Account": "CALL DELETE_account_v2();", "Lead": "DELETE_lead"})
+
+        results = DeleteApplier(self.db, procedures=procedures).apply(["Account", "Contact", "Lead"])
+
+        self.assertEqual(self.calls, ["Account v2", "Contact", "Lead"])
+        self.assertEqual({r.status for r in results}, {STATUS_SUCCESS})
+
+    def test_failed_object_does_not_stop_the_others(self):
+        self.conn.insert_events([{"object_name": "Contact", "record_id": "003A"},
+                                 {"object_name": "Lead", "record_id": "00QA"}])
+
+        register_procedure("DELETE_fund", lambda connection: '{"Error Type": "STATEMENT_ERROR"}')
+        applier = DeleteApplier(self.db, procedures={"Bad Name; DROP TABLE Contact": "DELETE_x; DROP TABLE Contact"})
+        results = applier.apply(["Lead", "Fund", "Contact", "Bad Name; DROP TABLE Contact"])
+        applier.record(results)
+
+        self.assertEqual([(r.object_name, r.status) for r in results], [
+            ("Bad Name; DROP TABLE Contact", STATUS_FAILED), ("Contact", STATUS_SUCCESS), ("Fund", STATUS_FAILED),
+            ("Lead", STATUS_FAILED),
+        ])
+        self.assertIn("no valid delete procedure", results[3].message)
+        self.assertEqual(rows(self.db, "SELECT status FROM delete_tracker WHERE object_name = 'Lead'"), [("open",)])
+        self.assertEqual(rows(self.db, "SELECT COUNT(*) FROM EXECUTION_TRACKER WHERE STATUS = %s", (STATUS_FAILED,)),
+                         [(3,)])
+
+
+if __name__ == "__main__":
+    unittest.main()
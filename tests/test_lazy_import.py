@@ -0,0 +1,45 @@
+"""Unit tests for deferred module imports"""
+import os
+import sys
+import tempfile
+import unittest
+
+from src.utils.lazy_import import lazy_import
+
+
+class TestLazyImport(unittest.TestCase):
+    """Test that modules only execute on first attribute access"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.tmpdir.name, "lazy_probe_module.py"), "w") as f:
+            f.write("import builtins\nbuiltins.lazy_probe_executed = True\nVALUE = 42\n")
+        sys.path.insert(0, self.tmpdir.name)
+
+    def tearDown(self):
+        sys.path.remove(self.tmpdir.name)
+        sys.modules.pop("lazy_probe_module", None)
+        import builtins
+        if hasattr(builtins, "lazy_probe_executed"):
+            del builtins.lazy_probe_executed
+        self.tmpdir.cleanup()
+
+    def test_module_executes_on_first_use(self):
+        import builtins
+        module = lazy_import("lazy_probe_module")
+        self.assertFalse(hasattr(builtins, "lazy_probe_executed"))
+
+        self.assertEqual(module.VALUE, 42)
+        self.assertTrue(builtins.lazy_probe_executed)
+
+    def test_returns_already_loaded_module(self):
+        import json
+        self.assertIs(lazy_import("json"), json)
+
+    def test_missing_module_raises(self):
+        with self.assertRaises(ModuleNotFoundError):
+            lazy_import("no_such_module_for_lazy_import")
+
+
+if __name__ == "__main__":
+    unittest.main()
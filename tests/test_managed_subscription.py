@@ -0,0 +1,105 @@
+"""Unit tests for ManagedSubscribe fetch and commit"""
+import io
+import unittest
+
+try:
+    import fastavro
+    from src.salesforce.proto import pubsub_api_pb2 as pb2
+    from src.salesforce.pubsub_client import ManagedSubscription
+except ImportError:
+    # grpc / protobuf / fastavro not installed
+    ManagedSubscription = None
+
+
+SCHEMA = {
+    "type": "record",
+    "name": "Account_Delete__e",
+    "fields": [{"name": "Record_Id__c", "type": "string"}],
+}
+
+
+def consumer_event(n):
+    payload = io.BytesIO()
+    fastavro.schemaless_writer(payload, SCHEMA, {"Record_Id__c": f"001{n:012d}"})
+    return pb2.ConsumerEvent(
+        event=pb2.ProducerEvent(id=f"e{n}", schema_id="schema-1", payload=payload.getvalue()),
+        replay_id=n.to_bytes(8, "big"),
+    )
+
+
+class FakeStub:
+    """ManagedSubscribe stand-in: records requests and plays back scripted responses"""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.requests = []
+        self.timeout = None
+
+    def ManagedSubscribe(self, request_iterator, metadata=None, timeout=None):
+        self.timeout = timeout
+        for response in self.responses:
+            self.requests.append(next(request_iterator))
+            yield response
+
+
+class FakeClient:
+    def __init__(self, responses):
+        self.stub = FakeStub(responses)
+
+    def _get_metadata(self):
+        return []
+
+    def get_schema(self, schema_id):
+        return SCHEMA
+
+    def _decode_batch(self, response, topic_name, schema_for, controller=None):
+        from src.salesforce.pubsub_client import PubSubClient
+        return PubSubClient._decode_batch(self, response, topic_name, schema_for, controller)
+
+
+@unittest.skipIf(ManagedSubscription is None, "grpc/protobuf/fastavro not installed")
+class TestManagedSubscription(unittest.TestCase):
+    def test_fetch_then_commit_last_replay_id(self):
+        responses = [
+            pb2.ManagedFetchResponse(events=[consumer_event(1), consumer_event(2)]),
+            pb2.ManagedFetchResponse(events=[consumer_event(3)], pending_num_requested=1),
+            pb2.ManagedFetchResponse(commit_response=pb2.CommitReplayResponse(replay_id=(3).to_bytes(8, "big"))),
+        ]
+        client = FakeClient(responses)
+        session = ManagedSubscription(client, "/event/Account_Delete__e", "Account_Delete_Sub")
+
+        events = session.fetch(max_events=4)
+
+        self.assertEqual([e["payload"]["Record_Id__c"][-1] for e in events], ["1", "2", "3"])
+        first, more = client.stub.requests[:2]
+        self.assertEqual((first.developer_name, first.num_requested), ("Account_Delete_Sub", 4))
+        self.assertEqual(more.num_requested, 2)
+
+        self.assertTrue(session.commit(events[-1]["replay_id"]))
+        commit = client.stub.requests[2].commit_replay_id_request
+        self.assertEqual(commit.replay_id, (3).to_bytes(8, "big"))
+        session.close()
+
+    def test_rejected_commit_reports_failure(self):
+        responses = [
+            pb2.ManagedFetchResponse(events=[consumer_event(1)], pending_num_requested=5),
+            pb2.ManagedFetchResponse(commit_response=pb2.CommitReplayResponse(
+                error=pb2.Error(code=pb2.ErrorCode.COMMIT, msg="stale replay id"))),
+        ]
+        session = ManagedSubscription(FakeClient(responses), "/event/Account_Delete__e", "Account_Delete_Sub")
+
+        events = session.fetch(max_events=10)
+
+        self.assertFalse(session.commit(events[-1]["replay_id"]))
+
+    def test_commit_fails_when_stream_ends(self):
+        responses = [pb2.ManagedFetchResponse(events=[consumer_event(1)], pending_num_requested=5)]
+        session = ManagedSubscription(FakeClient(responses), "/event/Account_Delete__e", "Account_Delete_Sub")
+
+        events = session.fetch(max_events=10)
+
+        self.assertFalse(session.commit(events[-1]["replay_id"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
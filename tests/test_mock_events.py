@@ -0,0 +1,89 @@
+"""Unit tests for the streaming mock event source and the synthetic event generator"""
+import importlib.util
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+from src.mock_events import iter_mock_events, load_mock_events_for_topic
+from src.utils import routing
+from src.utils.routing import UNROUTED_OBJECT, EventRouter
+
+_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(__file__)), "scripts", "generate_mock_events.py")
+_spec = importlib.util.spec_from_file_location("generate_mock_events", _SCRIPT)
+generate_mock_events = importlib.util.module_from_spec(_spec)
+sys.modules["generate_mock_events"] = generate_mock_events
+_spec.loader.exec_module(generate_mock_events)
+
+MOCK_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "mock_data")
+TOPIC = "/event/Account_Delete__e"
+CHANNEL = "/event/Delete_Logs__e"
+
+
+def replay(n):
+    return n.to_bytes(8, "big")
+
+
+class TestMockEventSource(unittest.TestCase):
+    def setUp(self):
+        routing._prefix_cache.update(loaded_at=None, prefixes=None)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def generate(self, topic, count, suffix=".ndjson", append=False):
+        path = os.path.join(self.tmp.name, topic.split("/")[-1] + suffix)
+        start = generate_mock_events.last_replay_id(path) + 1 if append else 1
+        events = generate_mock_events.generate_events(topic, count, start, random.Random(7))
+        return generate_mock_events.write_events(path, events, append=append)
+
+    def test_json_fixtures_still_load(self):
+        events = load_mock_events_for_topic(MOCK_DATA_DIR, "/event/ActivityContent_Delete__e")
+        self.assertEqual(len(events), 3)
+        self.assertEqual(events[0]["replay_id"], b"\x01\x01\x01\x01")
+
+    def test_batches_and_resume_from_cursor(self):
+        self.generate(TOPIC, 1000)
+
+        first = load_mock_events_for_topic(self.tmp.name, TOPIC, max_events=300)
+        second = load_mock_events_for_topic(self.tmp.name, TOPIC, replay_id=first[-1]["replay_id"], max_events=300)
+
+        self.assertEqual(first[0]["replay_id"], replay(1))
+        self.assertEqual([e["replay_id"] for e in second], [replay(n) for n in range(301, 601)])
+
+    def test_resume_at_every_position(self):
+        """The binary search lands on the event right after the cursor, including both ends"""
+        self.generate(TOPIC, 50)
+        for cursor in (0, 1, 17, 49, 50, 99):
+            events = list(iter_mock_events(self.tmp.name, TOPIC, replay(cursor)))
+            self.assertEqual(len(events), max(0, 50 - cursor), cursor)
+            if events:
+                self.assertEqual(events[0]["replay_id"], replay(cursor + 1))
+
+    def test_gzip_and_append_continue_replay_ids(self):
+        self.generate(CHANNEL, 100, suffix=".ndjson.gz")
+        self.generate(CHANNEL, 50, suffix=".ndjson.gz", append=True)
+
+        events = list(iter_mock_events(self.tmp.name, CHANNEL, replay(120)))
+
+        self.assertEqual([e["replay_id"] for e in events], [replay(n) for n in range(121, 151)])
+
+    def test_generated_events_route(self):
+        self.generate(TOPIC, 5)
+        self.generate(CHANNEL, 200)
+        router = EventRouter(prefix_loader=lambda: {"0XX": "ActivityContent", "a0F": "Fund", "a0I": "Investment",
+                                                    "a0L": "LegalEntity", "a0R": "LP_Consultant_Relationship"})
+
+        per_object = load_mock_events_for_topic(self.tmp.name, TOPIC)
+        self.assertEqual({router.route(TOPIC, e["payload"]) for e in per_object}, {"Account"})
+        self.assertTrue(per_object[0]["payload"]["RecordId"].startswith("001"))
+
+        channel = load_mock_events_for_topic(self.tmp.name, CHANNEL)
+        routed = {router.route(CHANNEL, e["payload"]) for e in channel}
+        self.assertNotIn(UNROUTED_OBJECT, routed)
+        self.assertGreater(len(routed), 5)
+        self.assertTrue(any("ObjectName" not in e["payload"] for e in channel))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+"""Unit tests for the cold-start import profiler"""
+import importlib.util
+import os
+import sys
+import unittest
+
+_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(__file__)), "scripts", "profile_imports.py")
+_spec = importlib.util.spec_from_file_location("profile_imports", _SCRIPT)
+profile_imports = importlib.util.module_from_spec(_spec)
+sys.modules["profile_imports"] = profile_imports
+_spec.loader.exec_module(profile_imports)
+
+SAMPLE_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       300 |        300 |     grpc._cython
+import time:       900 |       1200 |   grpc
+import time:       250 |        250 |   src.utils.transform
+import time:       400 |       1970 | TimerPoller
+Traceback (most recent call last):
+"""
+
+
+class TestProfileImports(unittest.TestCase):
+    """Test -X importtime parsing and budget checks"""
+
+    def setUp(self):
+        self.records = profile_imports.parse_importtime(SAMPLE_OUTPUT)
+        self.target = profile_imports.FunctionProfileTarget(
+            name="TimerPoller", cwd=".", module="TimerPoller", budget_ms=1.5, forbidden=("grpc", "fastavro"),
+        )
+
+    def test_parse_importtime(self):
+        """Header and non-importtime lines are skipped, depth follows indentation"""
+        self.assertEqual([r.name for r in self.records],
+                         ["_io", "grpc._cython", "grpc", "src.utils.transform", "TimerPoller"])
+        self.assertEqual(self.records[1].depth, 2)
+        self.assertEqual(self.records[4].depth, 0)
+        self.assertEqual(self.records[4].cumulative_us, 1970)
+
+    def test_top_packages_aggregates_submodules(self):
+        """Self time is summed per top-level package"""
+        top = profile_imports.top_packages(self.records, limit=2)
+        self.assertEqual(top, [("grpc", 1.2), ("TimerPoller", 0.4)])
+
+    def test_budget_and_forbidden_modules(self):
+        """Entry cumulative time is checked against the budget; eager client imports are flagged"""
+        profile = profile_imports.ImportProfile(target=self.target, records=self.records)
+
+        self.assertAlmostEqual(profile.total_ms, 1.97)
+        self.assertTrue(profile.over_budget)
+        self.assertEqual(profile.forbidden_loaded, ["grpc"])
+        self.assertFalse(profile.ok)
+
+    def test_failed_import_is_not_ok(self):
+        """A Function that fails to import never passes the gate"""
+        profile = profile_imports.ImportProfile(target=self.target, records=[], error="ModuleNotFoundError")
+        self.assertIsNone(profile.total_ms)
+        self.assertFalse(profile.ok)
+
+
+if __name__ == "__main__":
+    unittest.main()
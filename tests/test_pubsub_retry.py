@@ -0,0 +1,239 @@
+"""Unit tests for Pub/Sub retry classification and resume-from-replay"""
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+try:
+    from src.salesforce import pubsub_client
+    from src.salesforce.pubsub_client import (
+        RPC_FATAL,
+        RPC_REAUTH,
+        RPC_RETRY,
+        backoff_delay,
+        classify_rpc_error,
+        fetch_events_via_pubsub,
+    )
+except ModuleNotFoundError:
+    # grpc / fastavro not installed
+    pubsub_client = None
+
+
+class FakeRpcError(Exception):
+    """Stands in for grpc.RpcError (code() / trailing_metadata())"""
+
+    def __init__(self, name, trailers=()):
+        super().__init__(name)
+        self._code = SimpleNamespace(name=name)
+        self._trailers = list(trailers)
+
+    def code(self):
+        return self._code
+
+    def trailing_metadata(self):
+        return self._trailers
+
+
+def event(n):
+    return {"replay_id": n.to_bytes(8, "big"), "payload": {"n": n}}
+
+
+class FakeClient:
+    """Replays a script of streams; each stream yields events and then optionally raises"""
+
+    script = []
+    instances = []
+
+    def __init__(self, access_token, instance_url, tenant_id):
+        self.access_token = access_token
+        self.instance_url = instance_url
+        self.tenant_id = tenant_id
+        self.connects = 0
+        self.subscriptions = []
+        FakeClient.instances.append(self)
+
+    def connect(self):
+        self.connects += 1
+
+    def close(self):
+        pass
+
+    def _get_metadata(self):
+        return []
+
+    def subscribe_to_events(self, topic_name, replay_id=None, controller=None, already_fetched=0):
+        self.subscriptions.append((replay_id, self.access_token, already_fetched))
+        events, error = FakeClient.script.pop(0)
+        for e in events:
+            yield e
+        if error:
+            raise error
+
+
+class ManagedStub:
+    """ManagedSubscribe stream that is cut if its client's channel is closed before the commit"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def ManagedSubscribe(self, request_iterator, metadata=None, timeout=None):
+        pb2 = pubsub_client.pb2
+        next(request_iterator)
+        yield pb2.ManagedFetchResponse()
+        commit = next(request_iterator).commit_replay_id_request
+        if self.client.close.called:
+            raise FakeRpcError("CANCELLED")
+        yield pb2.ManagedFetchResponse(commit_response=pb2.CommitReplayResponse(replay_id=commit.replay_id))
+
+
+@unittest.skipIf(pubsub_client is None, "grpc not installed")
+class TestClassifyRpcError(unittest.TestCase):
+    def test_transient_codes_retry(self):
+        self.assertEqual(classify_rpc_error(FakeRpcError("UNAVAILABLE")), RPC_RETRY)
+        self.assertEqual(classify_rpc_error(FakeRpcError("DEADLINE_EXCEEDED")), RPC_RETRY)
+
+    def test_expired_session_reauths(self):
+        self.assertEqual(classify_rpc_error(FakeRpcError("UNAUTHENTICATED")), RPC_REAUTH)
+        trailers = [("error-code", "sfdc.platform.eventbus.grpc.service.auth.error")]
+        self.assertEqual(classify_rpc_error(FakeRpcError("PERMISSION_DENIED", trailers)), RPC_REAUTH)
+
+    def test_other_errors_are_fatal(self):
+        self.assertEqual(classify_rpc_error(FakeRpcError("INVALID_ARGUMENT")), RPC_FATAL)
+        self.assertEqual(classify_rpc_error(ValueError("bad schema")), RPC_FATAL)
+
+    def test_backoff_is_jittered_and_capped(self):
+        for attempt in range(1, 10):
+            self.assertLessEqual(backoff_delay(attempt, 1.0, 30.0), min(30.0, 2 ** (attempt - 1)))
+
+
+@unittest.skipIf(pubsub_client is None, "grpc not installed")
+class TestFetchEventsRetry(unittest.TestCase):
+    def setUp(self):
+        FakeClient.instances = []
+        patches = [
+            mock.patch.object(pubsub_client, "PubSubClient", FakeClient),
+            mock.patch.object(pubsub_client.time, "sleep"),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def fetch(self, **kwargs):
+        return fetch_events_via_pubsub("token", "https://x", "org", "/event/A", replay_id=b"start", **kwargs)
+
+    def test_resumes_from_last_event_after_transient_error(self):
+        FakeClient.script = [([event(1), event(2)], FakeRpcError("UNAVAILABLE")), ([event(3)], None)]
+
+        events = self.fetch()
+
+        self.assertEqual([e["payload"]["n"] for e in events], [1, 2, 3])
+        client = FakeClient.instances[0]
+        self.assertEqual(client.subscriptions[0][0], b"start")
+        self.assertEqual(client.subscriptions[1], (event(2)["replay_id"], "token", 2))
+        self.assertEqual(client.connects, 2)
+
+    def test_refreshes_token_on_expired_session(self):
+        FakeClient.script = [([], FakeRpcError("UNAUTHENTICATED")), ([event(1)], None)]
+        provider = mock.Mock(return_value=("fresh", "https://y", "org"))
+
+        events = self.fetch(token_provider=provider)
+
+        self.assertEqual(len(events), 1)
+        provider.assert_called_once_with()
+        self.assertEqual(FakeClient.instances[0].subscriptions[1][1], "fresh")
+
+    def test_fatal_error_without_events_raises(self):
+        FakeClient.script = [([], FakeRpcError("INVALID_ARGUMENT"))]
+        with self.assertRaises(FakeRpcError):
+            self.fetch()
+
+    def test_keeps_received_events_when_retries_run_out(self):
+        FakeClient.script = [([event(1)], FakeRpcError("UNAVAILABLE"))] + [([], FakeRpcError("UNAVAILABLE"))] * 2
+
+        events = self.fetch(max_retries=2)
+
+        self.assertEqual(len(events), 1)
+        self.assertEqual(FakeClient.script, [])
+
+    def test_shared_client_is_reused_and_left_open(self):
+        FakeClient.script = [([event(1)], None)]
+        shared = FakeClient("shared-token", "https://x", "org")
+        shared.stub = object()
+        shared.dead_letters = [{"event_id": "managed"}]
+        shared.close = mock.Mock()
+
+        def subscribe(topic_name, replay_id=None, controller=None, already_fetched=0):
+            shared.dead_letters.append({"event_id": "bad"})
+            return FakeClient.subscribe_to_events(shared, topic_name, replay_id, controller, already_fetched)
+
+        shared.subscribe_to_events = subscribe
+        dead_letters = []
+
+        events = self.fetch(client=shared, dead_letters=dead_letters)
+
+        self.assertEqual(len(events), 1)
+        self.assertEqual(FakeClient.instances, [shared])
+        self.assertEqual((shared.connects, shared.subscriptions[0][1]), (0, "shared-token"))
+        shared.close.assert_not_called()
+        self.assertEqual(dead_letters, [{"event_id": "bad"}])
+        self.assertEqual(shared.dead_letters, [{"event_id": "managed"}])
+
+    def test_retry_keeps_managed_streams_on_the_shared_client_open(self):
+        # One run: a managed topic waits to commit while an unmanaged topic's stream fails and is retried
+        FakeClient.script = [([event(1)], FakeRpcError("UNAVAILABLE")), ([event(2)], None)]
+        shared = FakeClient("shared-token", "https://x", "org")
+        shared.stub = ManagedStub(shared)
+        shared.dead_letters = []
+        shared.close = mock.Mock()
+        session = pubsub_client.ManagedSubscription(shared, "/event/Managed", "Managed_Sub")
+        session.fetch()
+
+        events = self.fetch(client=shared)
+
+        self.assertEqual([e["payload"]["n"] for e in events], [1, 2])
+        shared.close.assert_not_called()
+        self.assertEqual(shared.connects, 0)
+        retry_client = FakeClient.instances[1]
+        self.assertEqual(retry_client.subscriptions, [(event(1)["replay_id"], "shared-token", 1)])
+        self.assertEqual(retry_client.connects, 1)
+        self.assertTrue(session.commit(event(7)["replay_id"]))
+
+
+@unittest.skipIf(pubsub_client is None, "grpc not installed")
+class TestWarmUp(unittest.TestCase):
+    def setUp(self):
+        for cache in (pubsub_client._schema_cache, pubsub_client._topic_schema_ids):
+            patcher = mock.patch.dict(cache, clear=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(pubsub_client, "grpc")
+        self.grpc = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_prefetches_schema_ids_and_schemas_per_topic(self):
+        client = pubsub_client.PubSubClient("token", "https://x", "org")
+        client.stub = mock.Mock()
+        client.stub.GetTopic.side_effect = lambda request, metadata: SimpleNamespace(
+            schema_id="schema-" + request.topic_name[-1])
+        client.fetch_avro_schema_via_rest = mock.Mock(side_effect=lambda schema_id: {"name": schema_id})
+        client.get_topic_info = lambda topic_name: client.stub.GetTopic(SimpleNamespace(topic_name=topic_name), [])
+
+        client.warm_up(["/event/A", "/event/B"])
+        client.warm_up(["/event/A", "/event/B"])
+
+        self.grpc.channel_ready_future.assert_called_with(client.channel)
+        self.assertEqual(client.stub.GetTopic.call_count, 2)
+        self.assertEqual(client.fetch_avro_schema_via_rest.call_count, 2)
+        self.assertEqual(client.get_topic_schema_id("/event/B"), "schema-B")
+
+    def test_failed_topic_is_left_for_subscribe(self):
+        client = pubsub_client.PubSubClient("token", "https://x", "org")
+        client.stub = mock.Mock()
+        client.get_topic_info = mock.Mock(side_effect=FakeRpcError("NOT_FOUND"))
+
+        client.warm_up(["/event/Missing"])
+
+        self.assertEqual(pubsub_client._topic_schema_ids, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+"""Unit tests for delete event routing and the Snowflake transform"""
+import unittest
+
+from src.utils import routing
+from src.utils.routing import UNROUTED_OBJECT, EventRouter, cached_key_prefixes
+from src.utils.transform import transform_for_snowflake
+
+CHANNEL = "/event/Delete_Logs__e"
+
+
+class TestEventRouter(unittest.TestCase):
+    def setUp(self):
+        routing._prefix_cache.update(loaded_at=None, prefixes=None)
+        self.loads = 0
+
+    def loader(self):
+        self.loads += 1
+        return {"a0I": "Investment", "001": "Account"}
+
+    def test_per_object_topic_wins(self):
+        router = EventRouter()
+        self.assertEqual(router.route("/event/LP_Consultant_Relationship_Delete__e", {}), "LP_Consultant_Relationship")
+
+    def test_channel_uses_payload_object_name(self):
+        router = EventRouter(self.loader)
+        self.assertEqual(router.route(CHANNEL, {"ObjectName": "Fund", "RecordId": "a0I000000000001"}), "Fund")
+        self.assertEqual(self.loads, 0)
+
+    def test_channel_falls_back_to_key_prefix(self):
+        router = EventRouter(self.loader)
+        self.assertEqual(router.route(CHANNEL, {"RecordId": "a0I3t000000DEF001"}), "Investment")
+        self.assertEqual(router.route(CHANNEL, {"Record_Id__c": "0063t000000ABC001"}), "Opportunity")
+        self.assertEqual(router.route(CHANNEL, {"RecordId": "zzz000000000001"}), UNROUTED_OBJECT)
+        self.assertEqual(self.loads, 1)
+
+    def test_prefix_map_is_cached_across_routers(self):
+        for _ in range(3):
+            EventRouter(self.loader).route(CHANNEL, {"RecordId": "001000000000001"})
+        self.assertEqual(self.loads, 1)
+
+    def test_failed_load_keeps_previous_map(self):
+        cached_key_prefixes(self.loader)
+        routing._prefix_cache["loaded_at"] -= 7200
+
+        def broken():
+            raise RuntimeError("warehouse suspended")
+
+        self.assertEqual(cached_key_prefixes(broken)["a0I"], "Investment")
+
+
+class TestTransform(unittest.TestCase):
+    def test_mixed_channel_events(self):
+        routing._prefix_cache.update(loaded_at=None, prefixes=None)
+        events = [
+            {"topic": "/event/Account_Delete__e", "payload": {"Account_Id__c": "001A", "Deleted_By__c": "005X"}},
+            {"topic": CHANNEL, "payload": {"ObjectName": "Investment", "RecordId": "a0IB", "DeletedBy": "005Y"}},
+            {"topic": CHANNEL, "payload": {"RecordId": "003C"}},
+        ]
+
+        rows = transform_for_snowflake(events)
+
+        self.assertEqual(
+            [(r["object_name"], r["record_id"], r["deleted_by"]) for r in rows],
+            [("Account", "001A", "005X"), ("Investment", "a0IB", "005Y"), ("Contact", "003C", None)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+"""Unit tests for the local spill log"""
+import os
+import tempfile
+import unittest
+
+from src.spill.segment_log import RECORD_HEADER, LogPosition, SegmentLog
+from src.spill.spill_buffer import SpillBuffer
+
+
+class TestSegmentLog(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = self.tmpdir.name
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def bodies(self, log, start=None):
+        return [body for _, body in log.read(start)]
+
+    def test_append_and_read_across_segments(self):
+        log = SegmentLog(self.dir, segment_max_bytes=64)
+        for i in range(10):
+            log.append([f"record-{i}".encode()] * 2)
+
+        self.assertGreater(len(log.segments()), 1)
+        self.assertEqual(len(self.bodies(log)), 20)
+        self.assertEqual(self.bodies(SegmentLog(self.dir))[-1], b"record-9")
+
+    def test_commit_resumes_after_checkpoint_and_drops_segments(self):
+        log = SegmentLog(self.dir, segment_max_bytes=64)
+        for i in range(10):
+            log.append([f"record-{i}".encode()])
+        records = list(log.read())
+
+        log.commit(records[6][0])
+
+        reopened = SegmentLog(self.dir, segment_max_bytes=64)
+        self.assertEqual(self.bodies(reopened), [f"record-{i}".encode() for i in range(7, 10)])
+        self.assertLess(len(reopened.segments()), 10)
+        self.assertGreaterEqual(reopened.segments()[0], records[6][0].segment)
+
+    def test_torn_tail_is_truncated_on_reopen(self):
+        log = SegmentLog(self.dir)
+        log.append([b"complete"])
+        path = os.path.join(self.dir, os.listdir(self.dir)[0])
+        with open(path, "ab") as f:
+            f.write(RECORD_HEADER.pack(100, 0) + b"partial")
+
+        reopened = SegmentLog(self.dir)
+        reopened.append([b"next"])
+
+        self.assertEqual(self.bodies(reopened), [b"complete", b"next"])
+
+    def test_corrupt_record_stops_reading(self):
+        log = SegmentLog(self.dir)
+        log.append([b"good", b"flipped"])
+        path = os.path.join(self.dir, os.listdir(self.dir)[0])
+        with open(path, "r+b") as f:
+            f.seek(-1, os.SEEK_END)
+            f.write(b"X")
+
+        self.assertEqual(self.bodies(log), [b"good"])
+
+    def test_empty_log(self):
+        log = SegmentLog(self.dir)
+        self.assertFalse(log.has_pending())
+        self.assertEqual(log.checkpoint(), LogPosition(0, 0))
+
+
+class TestSpillBuffer(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.buffer = SpillBuffer(SegmentLog(self.tmpdir.name), drain_batch_size=2)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def rows(self, n):
+        return [{"object_name": "Account", "record_id": f"001{i}", "deleted_by": None, "status": "open"}
+                for i in range(n)]
+
+    def test_failed_load_keeps_rows_for_next_drain(self):
+        self.buffer.append(self.rows(5))
+        loaded = []
+
+        def flaky_load(chunk):
+            if len(loaded) >= 2:
+                raise RuntimeError("warehouse unavailable")
+            loaded.extend(chunk)
+            return len(chunk)
+
+        with self.assertRaises(RuntimeError):
+            self.buffer.drain(flaky_load)
+
+        retried = []
+        drained = SpillBuffer(SegmentLog(self.tmpdir.name)).drain(lambda chunk: retried.extend(chunk))
+
+        self.assertEqual(drained, 3)
+        self.assertEqual([r["record_id"] for r in loaded + retried], [f"001{i}" for i in range(5)])
+        self.assertFalse(self.buffer.log.has_pending())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+"""Tests running the Snowflake stores unchanged against the SQLite stand-in backend"""
+import unittest
+
+from src.replay.batch_tuning import BatchSizeController, BatchTuningStore
+from src.replay.cursor_store import CursorStore
+from src.replay.dead_letter_store import STAGE_DECODE, STAGE_TRANSFORM, DeadLetterStore, make_dead_letter
+from src.snowflake.connector import SnowflakeConnector
+from src.warehouse.sqlite_backend import SQLiteConnection, delete_procedure, register_procedure, translate
+
+
+def connector(path=":memory:"):
+    conn = SnowflakeConnector("acct", "user", "wh", "DB", "PUBLIC", "delete_tracker", "key.p8",
+                              backend="sqlite", sqlite_path=path)
+    conn.connection = SQLiteConnection(path)
+    conn.ensure_table_exists()
+    return conn
+
+
+def rows(connection, sql, params=()):
+    cursor = connection.cursor()
+    try:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+class TestTranslate(unittest.TestCase):
+    def test_snowflake_ddl_and_params(self):
+        [sql] = translate("CREATE TABLE t (id INTEGER AUTOINCREMENT, ts TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(), "
+                          "PRIMARY KEY (id)) -- %s %(name)s")
+        self.assertEqual(sql, "CREATE TABLE t (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                              "ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP) -- ? :name")
+
+    def test_create_or_replace_temporary(self):
+        self.assertEqual(translate("CREATE OR REPLACE TEMPORARY TABLE s (a INT)"),
+                         ["DROP TABLE IF EXISTS temp.s", "CREATE TEMP TABLE s (a INT)"])
+
+
+class TestStoresOnSQLite(unittest.TestCase):
+    def setUp(self):
+        self.conn = connector()
+        self.db = self.conn.connection
+
+    def test_insert_and_staged_merge_are_idempotent(self):
+        self.conn.insert_events([{"object_name": "Account", "record_id": "001A", "deleted_by": "005X"}])
+        self.conn.create_staging_table("delete_tracker_backfill")
+        self.conn.stage_events("delete_tracker_backfill", [
+            {"object_name": "Account", "record_id": "001A"},
+            {"object_name": "Account", "record_id": "001B"},
+            {"object_name": "Account", "record_id": "001B"},
+        ])
+
+        self.assertEqual(self.conn.merge_staged_events("delete_tracker_backfill"), 1)
+        self.assertEqual(self.conn.merge_staged_events("delete_tracker_backfill"), 0)
+        self.assertEqual(rows(self.db, "SELECT record_id, status FROM delete_tracker ORDER BY id"),
+                         [("001A", "open"), ("001B", "open")])
+
+    def test_cursor_store_merge_and_history(self):
+        store = CursorStore(self.db, run_id="run-1")
+        store.set("/event/A", b"\x01")
+        store.set("/event/A", b"\x02")
+        store.set("/event/B", b"\x05")
+
+        self.assertEqual(store.get_cursors_for_topics(["/event/A", "/event/B"]), {"/event/A": b"\x02", "/event/B": b"\x05"})
+        self.assertEqual(len(rows(self.db, "SELECT * FROM cursor_history WHERE run_id = %s", ("run-1",))), 3)
+
+    def test_history_lookup_with_qualify(self):
+        store = CursorStore(self.db)
+        self.db.cursor().executemany(
+            "INSERT INTO cursor_history (topic, replay_id, recorded_at) VALUES (%s, %s, %s)",
+            [("/event/A", b"\x01", "2025-10-16 01:00:00"), ("/event/A", b"\x02", "2025-10-16 02:00:00"),
+             ("/event/A", b"\x03", "2025-10-16 03:00:00")],
+        )
+
+        self.assertEqual(store.get_history_cursors(["/event/A"], "2025-10-16 02:30:00"), {"/event/A": b"\x02"})
+        self.assertEqual(store.get_history_cursors(["/event/A"], "2025-10-16 02:30:00", after=True), {"/event/A": b"\x03"})
+
+    def test_batch_tuning_merge_from_values(self):
+        store = BatchTuningStore(self.db)
+        store.save([BatchSizeController("/event/A", batch_size=200), BatchSizeController("/event/B")])
+        store.save([BatchSizeController("/event/A", batch_size=400)])
+
+        controllers = store.load_controllers(["/event/A", "/event/B"])
+        self.assertEqual(controllers["/event/A"].batch_size, 400)
+        self.assertEqual(controllers["/event/B"].batch_size, 100)
+
+    def test_dead_letters_round_trip(self):
+        store = DeadLetterStore(self.db)
+        event = {"topic": "/event/X", "event_id": "e", "schema_id": "s", "replay_id": b"\x09", "payload": {"a": 1}}
+        store.add_all([make_dead_letter(event, STAGE_TRANSFORM, "no route")])
+
+        [letter] = store.fetch_pending(topic="/event/X")
+        self.assertEqual((letter["replay_id"], letter["decoded_payload"]), (b"\x09", {"a": 1}))
+        store.mark_replayed([letter["id"]])
+        self.assertEqual(store.fetch_pending(), [])
+
+    def test_dead_letters_are_not_duplicated_when_refetched(self):
+        store = DeadLetterStore(self.db)
+        event = {"topic": "/event/X", "event_id": "e", "schema_id": "s", "replay_id": b"\x09", "payload": None}
+        store.add_all([make_dead_letter(event, STAGE_DECODE, "bad avro", payload=b"\x00")])
+        store.add_all([make_dead_letter(event, STAGE_DECODE, "still bad", payload=b"\x00"),
+                       make_dead_letter(dict(event, replay_id=b"\x0a"), STAGE_DECODE, "bad avro", payload=b"\x01")])
+
+        self.assertEqual(rows(self.db, "SELECT replay_id, error FROM dead_letters ORDER BY id"),
+                         [(b"\x09", "still bad"), (b"\x0a", "bad avro")])
+
+    def test_delete_procedure_call(self):
+        cursor = self.db.cursor()
+        cursor.execute("CREATE TABLE Account (id VARCHAR(18), name VARCHAR(255))")
+        cursor.executemany("INSERT INTO Account VALUES (%s, %s)", [("001A", "a"), ("001B", "b")])
+        self.conn.insert_events([{"object_name": "Account", "record_id": "001A"}])
+        register_procedure("DELETE_account", delete_procedure("Account", "Account"))
+
+        cursor.execute("CALL IC_CRM.DELETE_ACCOUNT()")
+
+        self.assertEqual(cursor.fetchone(), ("SUCCESS,1",))
+        self.assertEqual(rows(self.db, "SELECT id FROM Account"), [("001B",)])
+        self.assertEqual(rows(self.db, "SELECT status FROM delete_tracker"), [("applied",)])
+
+
+if __name__ == "__main__":
+    unittest.main()
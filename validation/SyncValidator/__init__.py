@@ -3,16 +3,36 @@ Azure Function: Sync Validator
 Validates Salesforce-Snowflake data synchronization
 """
 
+import time
+_IMPORT_STARTED = time.perf_counter()
+
 import logging
 import json
 import os
 import sys
 import azure.functions as func
 
-# Add parent directory to path for imports
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+# Add src to path (modules in src import each other by bare name)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'src'))
+
+from sync_validation_core import run_sync_validation
+
+# Module import time is measured once per worker and checked against this budget
+COLD_START_IMPORT_BUDGET_MS = float(os.environ.get('COLD_START_IMPORT_BUDGET_MS', '500'))
+_IMPORT_MS = (time.perf_counter() - _IMPORT_STARTED) * 1000
+_cold_start_reported = False
+
 
-from src.sync_validation_core import run_sync_validation
+def _report_cold_start():
+    """Log the cold-start import cost once per worker"""
+    global _cold_start_reported
+    if _cold_start_reported:
+        return
+    _cold_start_reported = True
+    if _IMPORT_MS > COLD_START_IMPORT_BUDGET_MS:
+        logging.warning(f"Cold start imports took {_IMPORT_MS:.0f} ms (budget {COLD_START_IMPORT_BUDGET_MS:.0f} ms)")
+    else:
+        logging.info(f"Cold start imports took {_IMPORT_MS:.0f} ms (budget {COLD_START_IMPORT_BUDGET_MS:.0f} ms)")
 
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
@@ -21,12 +41,14 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
     
     Usage:
         POST/GET https://<function-app>.azurewebsites.net/api/SyncValidator
+        POST/GET https://<function-app>.azurewebsites.net/api/SyncValidator?mode=incremental
     """
     logging.info('Sync Validator function triggered')
+    _report_cold_start()
     
     try:
-        # Run validation
-        result = run_sync_validation()
+        # Run validation (?mode=full|incremental|reconcile, defaults to VALIDATION_MODE)
+        result = run_sync_validation(mode=req.params.get('mode'))
         
         # Return response
         response_body = {
@@ -0,0 +1,361 @@
+"""
+Incremental sync validation.
+
+Instead of full COUNT() queries, compares per-day counts of records modified
+since the last successful incremental validation (the watermark) on both
+sides. Only days whose counts disagree are drilled into with per-hour buckets,
+so the cost scales with change volume rather than table size.
+
+A delete removes the record from the Salesforce day buckets, so deletes of
+records modified inside the window show up as mismatches. A deleted record
+last modified before the watermark is in no bucket; those are caught by
+comparing the count of records modified before the window
+(INCREMENTAL_CHECK_UNTOUCHED, on by default), which is one filtered COUNT per
+side rather than a per-record comparison.
+"""
+
+import logging
+import os
+from datetime import date, datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from result_rows import iter_batches
+from salesforce import query_many
+from sync_validation_core import _sql_literal, extract_count, save_validation_reports
+
+VALIDATION_TYPE = 'SYNC_VALIDATION_INCREMENTAL'
+
+# Modification timestamp compared on each side
+SF_MODSTAMP_FIELD = os.environ.get('INCREMENTAL_SF_MODSTAMP_FIELD', 'LastModifiedDate')
+SNOWFLAKE_MODSTAMP_COLUMN = os.environ.get('INCREMENTAL_SNOWFLAKE_MODSTAMP_COLUMN', 'LASTMODIFIEDDATE')
+
+# Window used when an object has never been validated incrementally
+DEFAULT_LOOKBACK_DAYS = int(os.environ.get('INCREMENTAL_DEFAULT_LOOKBACK_DAYS', '7'))
+
+# Also compare the count of records modified before the window (catches deletes of older records)
+CHECK_UNTOUCHED = os.environ.get('INCREMENTAL_CHECK_UNTOUCHED', 'true').lower() in ('true', '1', 'yes')
+
+# Pseudo-bucket holding the count of records modified before the window
+UNTOUCHED_BUCKET = 'untouched'
+_UNTOUCHED_SUFFIX = '|untouched'
+
+
+def _soql_datetime(day):
+    return f"{day.isoformat()}T00:00:00Z"
+
+
+def _snowflake_modstamp_expr(data_type=None):
+    """Normalise the modstamp column to a UTC TIMESTAMP_NTZ according to its column type.
+
+    Most staging tables store LASTMODIFIEDDATE as text, which TRY_TO_TIMESTAMP_TZ
+    parses; OPPORTUNITY stores a TIMESTAMP_NTZ (UTC, as loaded from Salesforce),
+    which TRY_TO_TIMESTAMP_TZ rejects, so timestamp columns are cast directly.
+    """
+    column = SNOWFLAKE_MODSTAMP_COLUMN
+    data_type = (data_type or 'TEXT').upper()
+    if data_type == 'TIMESTAMP_NTZ':
+        return column
+    if data_type in ('TIMESTAMP_TZ', 'TIMESTAMP_LTZ'):
+        return f"CONVERT_TIMEZONE('UTC', {column})::TIMESTAMP_NTZ"
+    if data_type == 'DATE':
+        return f"{column}::TIMESTAMP_NTZ"
+    return f"CONVERT_TIMEZONE('UTC', TRY_TO_TIMESTAMP_TZ({column}))::TIMESTAMP_NTZ"
+
+
+def get_modstamp_types(cursor, tables):
+    """Return TABLE -> DATA_TYPE of the modstamp column, in one round trip (empty on error)"""
+    names = sorted({table.split('.')[-1].upper() for table in tables})
+    if not names:
+        return {}
+    try:
+        placeholders = ", ".join(["%s"] * len(names))
+        cursor.execute(f"""
+            SELECT TABLE_NAME, DATA_TYPE
+            FROM INFORMATION_SCHEMA.COLUMNS
+            WHERE TABLE_SCHEMA = CURRENT_SCHEMA()
+              AND COLUMN_NAME = %s
+              AND TABLE_NAME IN ({placeholders})
+        """, [SNOWFLAKE_MODSTAMP_COLUMN.upper()] + names)
+        return {row[0].upper(): row[1] for row in cursor.fetchall()}
+    except Exception as e:
+        logging.warning(f"Error reading {SNOWFLAKE_MODSTAMP_COLUMN} column types: {e}. Assuming text.")
+        return {}
+
+
+def get_watermarks(cursor):
+    """Return sf_object -> date up to which the last successful incremental validation ran.
+
+    A run whose day buckets all matched counts as successful even if the
+    untouched count differs, so a standing difference doesn't widen every
+    later window.
+    """
+    try:
+        cursor.execute(f"""
+            SELECT OBJECT_NAME, MAX(PARSE_JSON(REPORT):window:until::STRING)
+            FROM EXECUTION_TRACKER
+            WHERE TYPE = '{VALIDATION_TYPE}'
+              AND (STATUS = 'SUCCESS' OR PARSE_JSON(REPORT):changes_match::BOOLEAN)
+            GROUP BY OBJECT_NAME
+        """)
+        return {
+            row[0]: date.fromisoformat(row[1])
+            for row in cursor.fetchall()
+            if row[1]
+        }
+    except Exception as e:
+        logging.warning(f"Error reading incremental validation watermarks: {e}. Using default lookback.")
+        return {}
+
+
+def _salesforce_bucket_queries(entity_windows, granularity, untouched=False):
+    """SOQL GROUP BY queries per entity. granularity is 'day' or 'hour'.
+
+    With untouched, a COUNT() of records modified before each window is added
+    under "<key>|untouched".
+    """
+    group_expr = (
+        f"DAY_ONLY({SF_MODSTAMP_FIELD})" if granularity == 'day' else f"HOUR_IN_DAY({SF_MODSTAMP_FIELD})"
+    )
+    queries = {}
+    for key, (sf_object, start, end) in entity_windows.items():
+        queries[key] = (
+            f"SELECT {group_expr}, COUNT(Id) FROM {sf_object} "
+            f"WHERE {SF_MODSTAMP_FIELD} >= {_soql_datetime(start)} "
+            f"AND {SF_MODSTAMP_FIELD} < {_soql_datetime(end)} "
+            f"GROUP BY {group_expr}"
+        )
+        if untouched:
+            queries[f"{key}{_UNTOUCHED_SUFFIX}"] = (
+                f"SELECT COUNT() FROM {sf_object} WHERE {SF_MODSTAMP_FIELD} < {_soql_datetime(start)}"
+            )
+    return queries
+
+
+def _failed(result):
+    return result is None or isinstance(result, Exception)
+
+
+def fetch_salesforce_buckets(sf, entity_windows, granularity, untouched=False):
+    """Return key -> {bucket: count} for Salesforce, or None for keys whose query failed"""
+    results = query_many(sf, _salesforce_bucket_queries(entity_windows, granularity, untouched))
+    buckets = {}
+    for key in entity_windows:
+        result = results.get(key)
+        untouched_result = results.get(f"{key}{_UNTOUCHED_SUFFIX}") if untouched else {}
+        if _failed(result) or _failed(untouched_result):
+            error = result if _failed(result) else untouched_result
+            logging.error(f"Error fetching Salesforce buckets for {key}: {error}")
+            buckets[key] = None
+            continue
+        buckets[key] = {
+            str(record['expr0']): record['expr1']
+            for record in result.get('records', [])
+        }
+        if untouched:
+            buckets[key][UNTOUCHED_BUCKET] = extract_count(untouched_result)
+    return buckets
+
+
+def build_snowflake_buckets_query(entity_windows, tables, granularity, column_types=None, untouched=False):
+    """One UNION ALL query returning (key, bucket, count) for every entity window.
+
+    column_types maps TABLE -> modstamp DATA_TYPE (see get_modstamp_types). With
+    untouched, each entity also gets an "untouched" row counting records modified
+    before its window; unparseable modstamps are counted there too, since they
+    fall in no day bucket.
+    """
+    column_types = column_types or {}
+    branches = []
+    for key, (_, start, end) in entity_windows.items():
+        table = tables[key]
+        modstamp = _snowflake_modstamp_expr(column_types.get(table.split('.')[-1].upper()))
+        bucket_expr = f"TO_VARCHAR({modstamp}::DATE)" if granularity == 'day' else f"TO_VARCHAR(HOUR({modstamp}))"
+        branches.append(
+            f"SELECT {_sql_literal(key)} AS BUCKET_KEY, {bucket_expr} AS BUCKET, COUNT(*) AS CNT "
+            f"FROM {table} "
+            f"WHERE {modstamp} >= {_sql_literal(start.isoformat())} "
+            f"AND {modstamp} < {_sql_literal(end.isoformat())} "
+            f"GROUP BY 2"
+        )
+        if untouched:
+            branches.append(
+                f"SELECT {_sql_literal(key)}, {_sql_literal(UNTOUCHED_BUCKET)}, COUNT(*) "
+                f"FROM {table} "
+                f"WHERE {modstamp} < {_sql_literal(start.isoformat())} OR {modstamp} IS NULL"
+            )
+    return "\nUNION ALL\n".join(branches)
+
+
+def _query_snowflake_buckets(cursor, entity_windows, tables, granularity, column_types, untouched):
+    buckets = {key: {} for key in entity_windows}
+    cursor.execute(build_snowflake_buckets_query(entity_windows, tables, granularity, column_types, untouched))
+    for batch in iter_batches(cursor):
+        for bucket_key, bucket, count in batch.tuples():
+            buckets[bucket_key][str(bucket)] = count
+    return buckets
+
+
+def fetch_snowflake_buckets(cursor, entity_windows, tables, granularity, column_types=None, untouched=False):
+    """Return key -> {bucket: count} for Snowflake, or None for keys whose query failed.
+
+    All entities are read with one UNION ALL query; if it fails (one bad table or
+    column fails the whole statement), each entity is queried on its own so only
+    the broken ones are reported as failed.
+    """
+    try:
+        return _query_snowflake_buckets(cursor, entity_windows, tables, granularity, column_types, untouched)
+    except Exception as e:
+        if len(entity_windows) == 1:
+            logging.error(f"Error fetching Snowflake buckets for {next(iter(entity_windows))}: {e}")
+            return {key: None for key in entity_windows}
+        logging.warning(f"Combined Snowflake bucket query failed ({e}); "
+                        f"querying {len(entity_windows)} entities individually")
+
+    buckets = {}
+    for key, window in entity_windows.items():
+        try:
+            buckets.update(_query_snowflake_buckets(cursor, {key: window}, tables, granularity,
+                                                    column_types, untouched))
+        except Exception as e:
+            logging.error(f"Error fetching Snowflake buckets for {key}: {e}")
+            buckets[key] = None
+    return buckets
+
+
+def diff_buckets(sf_buckets, snowflake_buckets):
+    """Return buckets whose counts disagree, sorted by bucket"""
+    mismatches = []
+    for bucket in sorted(set(sf_buckets) | set(snowflake_buckets)):
+        sf_count = sf_buckets.get(bucket, 0)
+        snowflake_count = snowflake_buckets.get(bucket, 0)
+        if sf_count != snowflake_count:
+            mismatches.append({
+                'bucket': bucket,
+                'salesforce': sf_count,
+                'snowflake': snowflake_count,
+                'diff': snowflake_count - sf_count
+            })
+    return mismatches
+
+
+def _fetch_both_sides(sf, cursor, entity_windows, tables, granularity, column_types=None, untouched=False):
+    """Run the Salesforce and Snowflake bucket queries concurrently"""
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        sf_future = executor.submit(fetch_salesforce_buckets, sf, entity_windows, granularity, untouched)
+        snowflake_buckets = fetch_snowflake_buckets(cursor, entity_windows, tables, granularity,
+                                                    column_types, untouched)
+        return sf_future.result(), snowflake_buckets
+
+
+def run_incremental_validation(sf, conn, entity_mappings):
+    """Validate only the days changed since each object's watermark.
+
+    Returns:
+        List of per-object reports (already saved to EXECUTION_TRACKER)
+    """
+    cursor = conn.cursor()
+    try:
+        until = datetime.now(timezone.utc).date()
+        watermarks = get_watermarks(cursor)
+
+        day_windows = {}
+        tables = {}
+        for mapping in entity_mappings:
+            since = watermarks.get(mapping['sf_object'], until - timedelta(days=DEFAULT_LOOKBACK_DAYS))
+            if since >= until:
+                logging.info(f"{mapping['entity_name']}: already validated up to {until}")
+                continue
+            day_windows[mapping['entity_name']] = (mapping['sf_object'], since, until)
+            tables[mapping['entity_name']] = mapping['snowflake_table']
+
+        if not day_windows:
+            return []
+
+        column_types = get_modstamp_types(cursor, tables.values())
+        sf_days, snowflake_days = _fetch_both_sides(sf, cursor, day_windows, tables, 'day',
+                                                    column_types, CHECK_UNTOUCHED)
+
+        # Drill into disagreeing days only, one hour bucket at a time
+        day_mismatches = {}
+        untouched_counts = {}
+        hour_windows = {}
+        hour_tables = {}
+        for entity_name in day_windows:
+            if sf_days[entity_name] is None or snowflake_days[entity_name] is None:
+                continue
+            if CHECK_UNTOUCHED:
+                untouched_counts[entity_name] = {
+                    'salesforce': sf_days[entity_name].pop(UNTOUCHED_BUCKET, 0),
+                    'snowflake': snowflake_days[entity_name].pop(UNTOUCHED_BUCKET, 0),
+                }
+            day_mismatches[entity_name] = diff_buckets(sf_days[entity_name], snowflake_days[entity_name])
+            for mismatch in day_mismatches[entity_name]:
+                day = date.fromisoformat(mismatch['bucket'])
+                key = f"{entity_name}|{day.isoformat()}"
+                hour_windows[key] = (day_windows[entity_name][0], day, day + timedelta(days=1))
+                hour_tables[key] = tables[entity_name]
+
+        hour_mismatches = {}
+        if hour_windows:
+            sf_hours, snowflake_hours = _fetch_both_sides(sf, cursor, hour_windows, hour_tables, 'hour', column_types)
+            for key in hour_windows:
+                if sf_hours[key] is not None and snowflake_hours[key] is not None:
+                    hour_mismatches[key] = diff_buckets(sf_hours[key], snowflake_hours[key])
+
+        reports = []
+        for mapping in entity_mappings:
+            entity_name = mapping['entity_name']
+            if entity_name not in day_windows:
+                continue
+            _, since, _ = day_windows[entity_name]
+
+            if entity_name not in day_mismatches:
+                status = "WARNING"
+                log_message = f"{entity_name}: Incremental bucket queries failed."
+                mismatched_days = None
+            else:
+                mismatched_days = []
+                for mismatch in day_mismatches[entity_name]:
+                    mismatch = dict(mismatch)
+                    mismatch['hours'] = hour_mismatches.get(f"{entity_name}|{mismatch['bucket']}")
+                    mismatched_days.append(mismatch)
+                untouched = untouched_counts.get(entity_name)
+                untouched_diff = untouched['snowflake'] - untouched['salesforce'] if untouched else 0
+                if mismatched_days:
+                    status = "WARNING"
+                    log_message = (f"{entity_name}: {len(mismatched_days)} day(s) with mismatched changes "
+                                   f"between {since} and {until}.")
+                elif untouched_diff:
+                    status = "WARNING"
+                    log_message = (f"{entity_name}: Changes match between {since} and {until}, but records "
+                                   f"modified before {since} differ by {untouched_diff:+d} (deletes not applied?).")
+                else:
+                    status = "SUCCESS"
+                    log_message = f"{entity_name}: Changes match between {since} and {until}."
+
+            reports.append({
+                'validation_type': VALIDATION_TYPE,
+                'timestamp': datetime.now().isoformat(),
+                'entity_name': entity_name,
+                'object': mapping['sf_object'],
+                'window': {'since': since.isoformat(), 'until': until.isoformat()},
+                'counts': {
+                    'salesforce': sum((sf_days[entity_name] or {}).values()),
+                    'snowflake_staging': sum((snowflake_days[entity_name] or {}).values())
+                },
+                'mismatched_days': mismatched_days,
+                'untouched_counts': untouched_counts.get(entity_name),
+                'changes_match': mismatched_days == [],
+                'status': status,
+                'log_message': log_message
+            })
+
+        try:
+            save_validation_reports(conn, cursor, reports)
+            for report in reports:
+                logging.info(f"✅ {report['entity_name']}: {report['status']} - {report['log_message']}")
+        except Exception as e:
+            logging.error(f"Failed to save incremental validation reports: {e}")
+
+        return reports
+    finally:
+        cursor.close()
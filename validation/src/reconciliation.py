@@ -0,0 +1,224 @@
+"""
+Record-level reconciliation between Salesforce and Snowflake.
+
+When counts disagree, finds exactly which record IDs are missing from or extra
+in Snowflake without holding either full ID set in memory:
+
+1. Every ID is hashed with MD5 (lower 64 bits, identical to Snowflake's
+   MD5_NUMBER_LOWER64) into one of NUM_BUCKETS buckets. Each bucket keeps a
+   count and a sum of hashes as an order-independent checksum.
+   Salesforce IDs are streamed from a Bulk API 2.0 query job; the Snowflake
+   side is aggregated inside the warehouse.
+2. Only buckets whose checksums differ are re-read: the Salesforce job results
+   are streamed again and Snowflake IDs for those buckets are streamed as
+   Arrow batches (see result_rows), then diffed. The Bulk API job is deleted
+   once both passes have read it.
+
+Memory is bounded by NUM_BUCKETS plus the IDs that fall into differing buckets.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from datetime import datetime
+from result_rows import iter_batches
+from salesforce import create_bulk_query_job, delete_bulk_query_job, iter_bulk_query_results
+from sync_validation_core import save_validation_reports
+
+VALIDATION_TYPE = 'SYNC_RECONCILIATION'
+
+NUM_BUCKETS = int(os.environ.get('RECONCILE_NUM_BUCKETS', '4096'))
+# IDs listed in the EXECUTION_TRACKER report per direction (totals are always exact)
+MAX_REPORTED_IDS = int(os.environ.get('RECONCILE_MAX_REPORTED_IDS', '1000'))
+# Enqueue IDs that exist in Snowflake but not in Salesforce into DELETE_TRACKER
+ENQUEUE_MISSED_DELETES = os.environ.get('RECONCILE_ENQUEUE_DELETES', 'false').lower() == 'true'
+ENQUEUE_BATCH_SIZE = 1000
+
+_COUNT_SELECT = re.compile(r"^\s*SELECT\s+COUNT\s*\([^)]*\)\s+FROM\s+", re.IGNORECASE)
+
+
+def id_hash(record_id):
+    """Lower 64 bits of the MD5 digest, matching Snowflake's MD5_NUMBER_LOWER64"""
+    return int.from_bytes(hashlib.md5(record_id.encode('utf-8')).digest()[8:], 'big')
+
+
+def id_query_from_count_query(count_query, id_column, fallback_table):
+    """Turn a stored 'SELECT COUNT(...) FROM ...' query into 'SELECT <id> FROM ...'
+
+    Keeps the stored query's filters so both sides reconcile the same population.
+    """
+    query = count_query.strip().rstrip(';')
+    if _COUNT_SELECT.match(query):
+        return _COUNT_SELECT.sub(f"SELECT {id_column} FROM ", query, count=1)
+    logging.warning(f"Could not derive ID query from '{count_query}'; reading all of {fallback_table}")
+    return f"SELECT {id_column} FROM {fallback_table}"
+
+
+class BucketChecksums:
+    """Per-bucket count and hash sum for a stream of IDs"""
+
+    def __init__(self, num_buckets=NUM_BUCKETS):
+        self.num_buckets = num_buckets
+        self.counts = [0] * num_buckets
+        self.sums = [0] * num_buckets
+
+    def add(self, record_id):
+        h = id_hash(record_id)
+        bucket = h % self.num_buckets
+        self.counts[bucket] += 1
+        self.sums[bucket] += h
+
+    def differing_buckets(self, other_counts, other_sums):
+        """Return bucket numbers whose count or checksum differ from the other side"""
+        return {
+            bucket for bucket in range(self.num_buckets)
+            if self.counts[bucket] != other_counts.get(bucket, 0)
+            or self.sums[bucket] != other_sums.get(bucket, 0)
+        }
+
+
+def diff_ids(source_ids, target_ids):
+    """Return (missing, extra): IDs only in the source, and IDs only in the target"""
+    return sorted(source_ids - target_ids), sorted(target_ids - source_ids)
+
+
+def snowflake_bucket_checksums(cursor, id_query, num_buckets=NUM_BUCKETS):
+    """Aggregate Snowflake IDs into bucket counts/checksums inside the warehouse"""
+    cursor.execute(f"""
+        SELECT MOD(H, {num_buckets}) AS BUCKET, COUNT(*) AS CNT, SUM(H) AS CHECKSUM
+        FROM (SELECT MD5_NUMBER_LOWER64(TO_VARCHAR(ID_VALUE)) AS H
+              FROM ({id_query})
+              WHERE ID_VALUE IS NOT NULL)
+        GROUP BY 1
+    """)
+    counts, sums = {}, {}
+    for batch in iter_batches(cursor):
+        for bucket, count, checksum in batch.tuples():
+            counts[int(bucket)] = int(count)
+            sums[int(bucket)] = int(checksum)
+    return counts, sums
+
+
+def iter_snowflake_ids_in_buckets(cursor, id_query, buckets, num_buckets=NUM_BUCKETS):
+    """Stream Snowflake IDs that fall into the given buckets, batch by batch"""
+    bucket_list = ", ".join(str(b) for b in sorted(buckets))
+    cursor.execute(f"""
+        SELECT TO_VARCHAR(ID_VALUE) AS ID_VALUE
+        FROM ({id_query})
+        WHERE ID_VALUE IS NOT NULL
+          AND MOD(MD5_NUMBER_LOWER64(TO_VARCHAR(ID_VALUE)), {num_buckets}) IN ({bucket_list})
+    """)
+    for batch in iter_batches(cursor):
+        yield from batch.column('ID_VALUE')
+
+
+def enqueue_missed_deletes(conn, cursor, sf_object, record_ids):
+    """Insert IDs deleted in Salesforce but still in Snowflake into DELETE_TRACKER (skipping open entries)"""
+    enqueued = 0
+    for start in range(0, len(record_ids), ENQUEUE_BATCH_SIZE):
+        chunk = record_ids[start:start + ENQUEUE_BATCH_SIZE]
+        placeholders = ", ".join(["(%s)"] * len(chunk))
+        cursor.execute(f"""
+            INSERT INTO DELETE_TRACKER (OBJECT_NAME, RECORD_ID, DELETED_BY, STATUS)
+            SELECT %s, src.column1, 'sync_reconciliation', 'open'
+            FROM VALUES {placeholders} AS src
+            WHERE NOT EXISTS (
+                SELECT 1 FROM DELETE_TRACKER dt
+                WHERE dt.OBJECT_NAME = %s AND dt.RECORD_ID = src.column1 AND dt.STATUS = 'open'
+            )
+        """, [sf_object, *chunk, sf_object])
+        enqueued += cursor.rowcount or 0
+    conn.commit()
+    return enqueued
+
+
+def reconcile_entity(sf, conn, cursor, mapping):
+    """Find the exact IDs missing from / extra in Snowflake staging for one entity"""
+    entity_name = mapping['entity_name']
+    sf_object = mapping['sf_object']
+    id_column = mapping.get('id_column') or 'ID'
+
+    sf_query = id_query_from_count_query(mapping['count_soql'], 'Id', sf_object)
+    snowflake_query = id_query_from_count_query(
+        mapping['count_staging'], f"{id_column} AS ID_VALUE", mapping['snowflake_table'])
+
+    job_id = create_bulk_query_job(sf, sf_query)
+    try:
+        # Pass 1: bucket checksums on both sides
+        sf_checksums = BucketChecksums()
+        for record_id in iter_bulk_query_results(sf, job_id):
+            sf_checksums.add(record_id)
+        snowflake_counts, snowflake_sums = snowflake_bucket_checksums(cursor, snowflake_query)
+        differing = sf_checksums.differing_buckets(snowflake_counts, snowflake_sums)
+        logging.info(f"{entity_name}: {len(differing)}/{NUM_BUCKETS} buckets differ")
+
+        missing, extra = [], []
+        if differing:
+            # Pass 2: only IDs in differing buckets are held in memory
+            sf_ids = {
+                record_id for record_id in iter_bulk_query_results(sf, job_id)
+                if id_hash(record_id) % NUM_BUCKETS in differing
+            }
+            snowflake_ids = set(iter_snowflake_ids_in_buckets(cursor, snowflake_query, differing))
+            missing, extra = diff_ids(sf_ids, snowflake_ids)
+    finally:
+        delete_bulk_query_job(sf, job_id)
+
+    enqueued = 0
+    if extra and ENQUEUE_MISSED_DELETES:
+        enqueued = enqueue_missed_deletes(conn, cursor, sf_object, extra)
+        logging.info(f"{entity_name}: enqueued {enqueued} missed deletes into DELETE_TRACKER")
+
+    if not missing and not extra:
+        status = "SUCCESS"
+        log_message = f"{entity_name}: Record IDs match."
+    else:
+        status = "WARNING"
+        log_message = (f"{entity_name}: {len(missing)} IDs missing from Snowflake, "
+                       f"{len(extra)} extra IDs in Snowflake, {enqueued} enqueued for delete.")
+
+    return {
+        'validation_type': VALIDATION_TYPE,
+        'timestamp': datetime.now().isoformat(),
+        'entity_name': entity_name,
+        'object': sf_object,
+        'counts': {
+            'salesforce': sum(sf_checksums.counts),
+            'snowflake_staging': sum(snowflake_counts.values())
+        },
+        'differing_buckets': len(differing),
+        'missing_in_snowflake': {'total': len(missing), 'ids': missing[:MAX_REPORTED_IDS]},
+        'extra_in_snowflake': {'total': len(extra), 'ids': extra[:MAX_REPORTED_IDS]},
+        'enqueued_deletes': enqueued,
+        'status': status,
+        'log_message': log_message
+    }
+
+
+def run_reconciliation(sf, conn, entity_mappings):
+    """Reconcile record IDs for each mapping and save one report per object"""
+    cursor = conn.cursor()
+    reports = []
+    try:
+        for mapping in entity_mappings:
+            try:
+                reports.append(reconcile_entity(sf, conn, cursor, mapping))
+            except Exception as e:
+                logging.error(f"Reconciliation failed for {mapping['entity_name']}: {e}")
+
+        try:
+            save_validation_reports(conn, cursor, reports)
+            for report in reports:
+                logging.info(f"✅ {report['entity_name']}: {report['status']} - {report['log_message']}")
+                if report['missing_in_snowflake']['total'] or report['extra_in_snowflake']['total']:
+                    logging.info(json.dumps({
+                        'missing': report['missing_in_snowflake'],
+                        'extra': report['extra_in_snowflake']
+                    }))
+        except Exception as e:
+            logging.error(f"Failed to save reconciliation reports: {e}")
+        return reports
+    finally:
+        cursor.close()
@@ -0,0 +1,88 @@
+"""
+Column-oriented access to Snowflake result sets.
+
+Large results (bucket checksums, reconciliation IDs, incremental buckets) are
+read as Arrow batches with cursor.fetch_arrow_batches, and a column is turned
+into Python values with one to_pylist() call the first time it is read, instead
+of the connector building a tuple per row. pandas is not needed, only pyarrow.
+
+Cursors without Arrow results (pyarrow missing, non-Arrow result format, other
+DB-API drivers) are read with fetchmany() into the same batches.
+"""
+
+import logging
+
+
+class RowBatch:
+    """One batch of a result set, held column by column"""
+
+    __slots__ = ('columns', 'num_rows', '_positions', '_values', '_table')
+
+    def __init__(self, columns, num_rows, values=None, table=None):
+        self.columns = list(columns)
+        self.num_rows = num_rows
+        self._positions = {name: i for i, name in enumerate(self.columns)}
+        self._values = values if values is not None else [None] * len(self.columns)
+        self._table = table
+
+    @classmethod
+    def from_arrow(cls, columns, table):
+        """Wrap a pyarrow Table; columns are converted lazily"""
+        return cls(columns, table.num_rows, table=table)
+
+    @classmethod
+    def from_rows(cls, columns, rows):
+        """Transpose DB-API row tuples into columns"""
+        values = [list(column) for column in zip(*rows)] if rows else [[] for _ in columns]
+        return cls(columns, len(rows), values=values)
+
+    def column(self, name):
+        """Python values of one column (KeyError for an unknown name)"""
+        position = self._positions[name]
+        values = self._values[position]
+        if values is None:
+            values = self._table.column(position).to_pylist()
+            self._values[position] = values
+        return values
+
+    def tuples(self):
+        """Rows as plain tuples, in column order"""
+        return zip(*(self.column(name) for name in self.columns))
+
+    def __len__(self):
+        return self.num_rows
+
+
+def _arrow_batches(cursor):
+    """Iterator of pyarrow Tables for the last query, or None if the cursor can't produce them"""
+    fetch_arrow_batches = getattr(cursor, 'fetch_arrow_batches', None)
+    if fetch_arrow_batches is None:
+        return None
+    try:
+        return fetch_arrow_batches()
+    except Exception as e:
+        # Raised before any row is consumed, so fetchmany() still sees the whole result
+        logging.debug(f"Arrow batches unavailable, fetching rows instead: {e}")
+        return None
+
+
+def iter_batches(cursor, columns=None, batch_size=10000):
+    """Stream the last query's result as non-empty RowBatch objects.
+
+    Arrow batches follow Snowflake's result chunks; the fetchmany() fallback
+    reads batch_size rows at a time. Columns are named after cursor.description
+    unless columns is given.
+    """
+    names = list(columns) if columns else [desc[0] for desc in cursor.description]
+    tables = _arrow_batches(cursor)
+    if tables is not None:
+        for table in tables:
+            if table.num_rows:
+                yield RowBatch.from_arrow(names, table)
+        return
+
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield RowBatch.from_rows(names, rows)
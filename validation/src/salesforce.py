@@ -1,8 +1,11 @@
 import os
+import csv
+import json
 import logging
 import time
 import requests
 import jwt
+from concurrent.futures import ThreadPoolExecutor
 from simple_salesforce import Salesforce
 from cryptography.hazmat.primitives import serialization
 import base64
@@ -64,3 +67,132 @@ def connect_salesforce():
 
     logging.info("✅ Connected to Salesforce")
     return Salesforce(instance_url=response_data['instance_url'], session_id=response_data['access_token'])
+
+
+# Upper bound on concurrent SOQL requests per validation run. Each query is its own
+# REST call: Composite Batch subrequests run one after another on the server, so
+# packing them into one call would not make the counts overlap.
+MAX_CONCURRENT_QUERIES = int(os.environ.get('SF_MAX_CONCURRENT_QUERIES', '8'))
+
+def _ensure_pooled_session(sf, pool_size):
+    """Size the shared HTTP connection pool for concurrent calls on one session.
+
+    A new adapter is mounted only when the current one is too small, so the
+    warm connections of the existing pool are kept across query_many calls.
+    """
+    current = sf.session.get_adapter('https://')
+    if getattr(current, '_pool_maxsize', 0) >= pool_size:
+        return
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    sf.session.mount('https://', adapter)
+
+def query_many(sf, queries):
+    """Run many SOQL queries concurrently on a bounded thread pool.
+
+    Each query is a separate REST request over one pooled session, with at most
+    MAX_CONCURRENT_QUERIES in flight, so wall time is roughly the slowest query
+    (per wave of MAX_CONCURRENT_QUERIES) rather than the sum of all queries.
+
+    Args:
+        sf: Connected Salesforce client
+        queries: Dict of key -> SOQL string
+
+    Returns:
+        Dict of key -> query result dict, or an Exception for queries that failed
+    """
+    if not queries:
+        return {}
+
+    workers = max(1, min(MAX_CONCURRENT_QUERIES, len(queries)))
+    _ensure_pooled_session(sf, workers)
+
+    def run_query(item):
+        key, soql = item
+        try:
+            return key, sf.query(soql)
+        except Exception as e:
+            return key, e
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(executor.map(run_query, queries.items()))
+
+
+
+# Bulk API 2.0 query job polling and result paging
+BULK_POLL_INTERVAL_SECONDS = 2
+BULK_JOB_TIMEOUT_SECONDS = 1800
+BULK_RESULTS_PAGE_SIZE = 500000
+
+def _bulk_base_url(sf):
+    return f"{sf.base_url}jobs/query"
+
+def create_bulk_query_job(sf, soql):
+    """Start a Bulk API 2.0 query job and wait for it to complete. Returns the job id.
+
+    The caller deletes the job with delete_bulk_query_job once its results are
+    read; a job that fails or times out here is deleted before raising.
+    """
+    response = sf.session.post(
+        _bulk_base_url(sf),
+        headers=sf.headers,
+        data=json.dumps({'operation': 'query', 'query': soql, 'contentType': 'CSV'})
+    )
+    response.raise_for_status()
+    job_id = response.json()['id']
+    logging.info(f"Started Bulk API 2.0 query job {job_id}")
+
+    try:
+        deadline = time.monotonic() + BULK_JOB_TIMEOUT_SECONDS
+        while True:
+            status = sf.session.get(f"{_bulk_base_url(sf)}/{job_id}", headers=sf.headers)
+            status.raise_for_status()
+            state = status.json()['state']
+            if state == 'JobComplete':
+                return job_id
+            if state in ('Failed', 'Aborted'):
+                raise Exception(f"Bulk query job {job_id} {state}: {status.json().get('errorMessage')}")
+            if time.monotonic() > deadline:
+                # A running job has to be aborted before it can be deleted
+                sf.session.patch(f"{_bulk_base_url(sf)}/{job_id}", headers=sf.headers,
+                                 data=json.dumps({'state': 'Aborted'}))
+                raise Exception(f"Bulk query job {job_id} did not complete within {BULK_JOB_TIMEOUT_SECONDS}s")
+            time.sleep(BULK_POLL_INTERVAL_SECONDS)
+    except Exception:
+        delete_bulk_query_job(sf, job_id)
+        raise
+
+def delete_bulk_query_job(sf, job_id):
+    """Delete a Bulk API 2.0 query job and its stored results (failures are logged, not raised)"""
+    try:
+        response = sf.session.delete(f"{_bulk_base_url(sf)}/{job_id}", headers=sf.headers)
+        response.raise_for_status()
+        logging.info(f"Deleted Bulk API 2.0 query job {job_id}")
+    except Exception as e:
+        logging.warning(f"Could not delete Bulk API 2.0 query job {job_id}: {e}")
+
+def iter_bulk_query_results(sf, job_id):
+    """Stream the first column of a completed Bulk API 2.0 query job, one value at a time.
+
+    Results are paged with Sforce-Locator and parsed line by line, so memory
+    stays flat regardless of result size. A job's results can be read more
+    than once, which lets callers make a second pass without re-querying.
+    """
+    locator = None
+    while True:
+        params = {'maxRecords': BULK_RESULTS_PAGE_SIZE}
+        if locator:
+            params['locator'] = locator
+        headers = dict(sf.headers, Accept='text/csv')
+        with sf.session.get(f"{_bulk_base_url(sf)}/{job_id}/results", headers=headers,
+                            params=params, stream=True) as response:
+            response.raise_for_status()
+            response.encoding = 'utf-8'
+            lines = response.iter_lines(decode_unicode=True)
+            reader = csv.reader(line for line in lines if line)
+            next(reader, None)  # header row
+            for row in reader:
+                if row:
+                    yield row[0]
+            locator = response.headers.get('Sforce-Locator')
+        if not locator or locator == 'null':
+            return
@@ -0,0 +1,53 @@
+import os
+import logging
+from connection_manager import der_from_pem, get_connection_manager, is_session_expired_error  # noqa: F401
+
+def _connection_params():
+    """Read the Snowflake connection parameters from the environment"""
+    account = os.environ.get('SNOWFLAKE_ACCOUNT')
+    user = os.environ.get('SNOWFLAKE_USER')
+    private_key = os.environ.get('SNOWFLAKE_PRIVATE_KEY')
+
+    if not account or not user:
+        raise Exception("SNOWFLAKE_ACCOUNT and SNOWFLAKE_USER must be set")
+    if not private_key:
+        raise Exception("SNOWFLAKE_PRIVATE_KEY must be set in environment")
+
+    conn_params = {
+        'account': account,
+        'user': user,
+        'role': os.environ.get('SNOWFLAKE_ROLE', 'IC_CRM_DEVELOPER'),
+        'warehouse': os.environ.get('SNOWFLAKE_WAREHOUSE', 'IC_CRM_WH_XS'),
+        'database': os.environ.get('SNOWFLAKE_DATABASE', 'IC_CRM_DB'),
+        'schema': os.environ.get('SNOWFLAKE_SCHEMA', 'IC_CRM'),
+        'authenticator': os.environ.get('SNOWFLAKE_AUTHENTICATOR', 'snowflake'),
+    }
+    return conn_params, private_key
+
+def connect_snowflake():
+    """Connect to Snowflake using key-pair authentication.
+
+    The connection comes from the shared connection pool (connection_manager.py),
+    so later warm invocations reuse it; it is health checked first and replaced
+    if the session expired. Hand it back with release_snowflake_connection().
+    """
+    conn_params, private_key = _connection_params()
+
+    def load_key():
+        try:
+            return der_from_pem(private_key.encode())
+        except Exception as e:
+            raise Exception(f"Failed to load private key: {e}")
+
+    logging.info("Connecting to Snowflake using private key...")
+    conn = get_connection_manager().acquire(private_key_loader=load_key, **conn_params)
+    logging.info("✅ Connected to Snowflake using key-pair authentication")
+    return conn
+
+def release_snowflake_connection(conn):
+    """Return the connection to the pool with its session rolled back and reset"""
+    get_connection_manager().release(conn)
+
+def invalidate_snowflake_connection(conn):
+    """Close the connection and drop it from the pool"""
+    get_connection_manager().invalidate(conn)
@@ -1,9 +1,13 @@
+import os
 import json
 import logging
-import pandas as pd
 from datetime import datetime
-from salesforce import connect_salesforce
-from snowflake import connect_snowflake
+from concurrent.futures import ThreadPoolExecutor
+from result_rows import iter_batches
+
+# Salesforce and Snowflake client modules (simple_salesforce, snowflake.connector,
+# cryptography) are imported inside the functions that use them, so importing
+# this module at Function startup stays cheap.
 
 def get_successfully_synced_objects(cursor):
     """Get list of objects that synced successfully from EXECUTION_TRACKER"""
@@ -29,7 +33,7 @@ def load_entity_mappings(cursor, synced_objects=None):
     try:
         cursor.execute("""
             SELECT ENTITYNAME, MAPPINGTO_SALESFORCE, SNOWFLAKE_TABLENAME,
-                   COUNT_SOQL, COUNT_STAGING, COUNT_FINAL
+                   COUNT_SOQL, COUNT_STAGING, COUNT_FINAL, COLUMNUNIQUE_IDNAME
             FROM ENTITYMAPPING
             WHERE COUNT_SOQL IS NOT NULL 
               AND COUNT_STAGING IS NOT NULL 
@@ -53,7 +57,8 @@ def load_entity_mappings(cursor, synced_objects=None):
                 'snowflake_table': row[2],
                 'count_soql': row[3],
                 'count_staging': row[4],
-                'count_final': row[5]
+                'count_final': row[5],
+                'id_column': row[6]
             })
         logging.info(f"Loaded {len(mappings)} entity mappings for validation")
         return mappings
@@ -61,15 +66,41 @@ def load_entity_mappings(cursor, synced_objects=None):
         logging.error(f"Error loading entity mappings: {e}")
         return []
 
+def extract_count(result):
+    """Read the count from a COUNT(Id) (expr0) or COUNT() (totalSize) query result"""
+    records = result.get('records') or []
+    if records:
+        return records[0].get('expr0', 0)
+    return result.get('totalSize', 0)
+
 def execute_salesforce_query(sf, query, entity_name):
     """Execute custom Salesforce query"""
     try:
-        result = sf.query(query)
-        return result['records'][0].get('expr0', 0)
+        return extract_count(sf.query(query))
     except Exception as e:
         logging.error(f"Error executing Salesforce query for {entity_name}: {e}")
         return -1
 
+def fetch_salesforce_counts(sf, entity_mappings):
+    """Run every entity's COUNT_SOQL concurrently and return entity_name -> count (-1 on error)"""
+    from salesforce import query_many
+
+    results = query_many(sf, {m['entity_name']: m['count_soql'] for m in entity_mappings})
+    counts = {}
+    for mapping in entity_mappings:
+        entity_name = mapping['entity_name']
+        result = results.get(entity_name)
+        if result is None or isinstance(result, Exception):
+            logging.error(f"Error executing Salesforce query for {entity_name}: {result}")
+            counts[entity_name] = -1
+            continue
+        try:
+            counts[entity_name] = extract_count(result)
+        except Exception as e:
+            logging.error(f"Error reading Salesforce count for {entity_name}: {e}")
+            counts[entity_name] = -1
+    return counts
+
 def execute_snowflake_query(cursor, query, entity_name):
     """Execute custom Snowflake query"""
     try:
@@ -80,23 +111,24 @@ def execute_snowflake_query(cursor, query, entity_name):
         return -1
 
 def get_delete_tracker_stats(cursor):
-    cursor.execute("""
-        SELECT OBJECT_NAME, STATUS, COUNT(*) as COUNT
-        FROM DELETE_TRACKER
-        GROUP BY OBJECT_NAME, STATUS
-        ORDER BY OBJECT_NAME, STATUS
-    """)
-    results = cursor.fetchall()
-    columns = [desc[0] for desc in cursor.description]
-    return pd.DataFrame(results, columns=columns)
-
-def get_delete_tracker_count(cursor, object_name):
+    """Return DELETE_TRACKER row counts as {object_name: {status: count}} in one query"""
     try:
-        cursor.execute(f"SELECT COUNT(*) FROM DELETE_TRACKER WHERE OBJECT_NAME = '{object_name}' AND STATUS = 'open'")
-        return cursor.fetchone()[0]
+        cursor.execute("""
+            SELECT OBJECT_NAME, STATUS, COUNT(*) as COUNT
+            FROM DELETE_TRACKER
+            GROUP BY OBJECT_NAME, STATUS
+        """)
+        stats = {}
+        for object_name, status, count in cursor.fetchall():
+            stats.setdefault(object_name, {})[status] = count
+        return stats
     except Exception as e:
-        logging.error(f"Error querying DELETE_TRACKER for {object_name}: {e}")
-        return 0
+        logging.error(f"Error querying DELETE_TRACKER stats: {e}")
+        return {}
+
+def get_pending_deletes(delete_stats, object_name):
+    """Open (not yet applied) deletes for an object from pre-fetched stats"""
+    return delete_stats.get(object_name, {}).get('open', 0)
 
 def get_history_counts(cursor, base_table):
     try:
@@ -109,9 +141,243 @@ def get_history_counts(cursor, base_table):
         logging.warning(f"Error getting history counts for {base_table}: {e}")
         return 0, 0
 
-def run_sync_validation():
-    sf = connect_salesforce()
-    conn = connect_snowflake()
+def _sql_literal(value):
+    """Quote a value as a SQL string literal"""
+    return "'" + str(value).replace("'", "''") + "'"
+
+def _as_scalar_subquery(query):
+    """Wrap a stored COUNT query so it can be embedded as a column expression"""
+    return f"({query.strip().rstrip(';')})"
+
+def get_existing_history_tables(cursor, entity_mappings):
+    """Return the set of HISTORY_<table> names that exist, in one round trip"""
+    history_tables = sorted({f"HISTORY_{m['snowflake_table']}".upper() for m in entity_mappings})
+    try:
+        placeholders = ", ".join(["%s"] * len(history_tables))
+        cursor.execute(f"""
+            SELECT TABLE_NAME
+            FROM INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_SCHEMA = CURRENT_SCHEMA()
+              AND TABLE_NAME IN ({placeholders})
+        """, history_tables)
+        return {row[0].upper() for row in cursor.fetchall()}
+    except Exception as e:
+        logging.warning(f"Error checking history tables: {e}. Assuming all exist.")
+        return set(history_tables)
+
+def build_snowflake_counts_query(entity_mappings, existing_history_tables):
+    """Build one UNION ALL query returning every Snowflake-side count for every entity.
+
+    Each branch yields one row per entity: staging count, final count, and
+    total/deleted rows in HISTORY_<table>.
+    """
+    branches = []
+    for mapping in entity_mappings:
+        history_table = f"HISTORY_{mapping['snowflake_table']}"
+        if history_table.upper() in existing_history_tables:
+            history_total = f"(SELECT COUNT(*) FROM {history_table})"
+            history_deleted = f"(SELECT COUNT(*) FROM {history_table} WHERE STATUS = 'DELETED')"
+        else:
+            history_total = history_deleted = "0"
+
+        branches.append(
+            f"SELECT {_sql_literal(mapping['entity_name'])} AS ENTITY_NAME, "
+            f"{_as_scalar_subquery(mapping['count_staging'])} AS STAGING_COUNT, "
+            f"{_as_scalar_subquery(mapping['count_final'])} AS FINAL_COUNT, "
+            f"{history_total} AS HISTORY_TOTAL, "
+            f"{history_deleted} AS HISTORY_DELETED"
+        )
+    return "\nUNION ALL\n".join(branches)
+
+def fetch_snowflake_counts(cursor, entity_mappings):
+    """Fetch all Snowflake-side counts in a single round trip.
+
+    Falls back to per-entity queries if the batched query fails (for example
+    because one entity's stored COUNT query is invalid), so one bad mapping
+    does not hide results for the others.
+    """
+    existing_history_tables = get_existing_history_tables(cursor, entity_mappings)
+    query = build_snowflake_counts_query(entity_mappings, existing_history_tables)
+    try:
+        cursor.execute(query)
+        counts = {}
+        for batch in iter_batches(cursor):
+            for entity_name, staging, final, history_total, history_deleted in batch.tuples():
+                counts[entity_name] = {
+                    'staging': staging,
+                    'final': final,
+                    'history_total': history_total,
+                    'history_deleted': history_deleted
+                }
+        logging.info(f"Fetched Snowflake counts for {len(counts)} entities in one query")
+        return counts
+    except Exception as e:
+        logging.warning(f"Batched Snowflake count query failed: {e}. Falling back to per-entity queries.")
+
+    counts = {}
+    for mapping in entity_mappings:
+        entity_name = mapping['entity_name']
+        history_total, history_deleted = get_history_counts(cursor, mapping['snowflake_table'])
+        counts[entity_name] = {
+            'staging': execute_snowflake_query(cursor, mapping['count_staging'], entity_name),
+            'final': execute_snowflake_query(cursor, mapping['count_final'], entity_name),
+            'history_total': history_total,
+            'history_deleted': history_deleted
+        }
+    return counts
+
+def build_validation_report(mapping, sf_count, counts, pending_deletes):
+    """Compare counts for one entity and build its EXECUTION_TRACKER report"""
+    entity_name = mapping['entity_name']
+    sf_object = mapping['sf_object']
+    snowflake_staging_count = counts['staging']
+    snowflake_final_count = counts['final']
+    history_total = counts['history_total']
+    history_deleted = counts['history_deleted']
+
+    staging_match = (sf_count == snowflake_staging_count)
+    final_match = (sf_count == snowflake_final_count)
+    staging_diff = snowflake_staging_count - sf_count if sf_count >= 0 and snowflake_staging_count >= 0 else None
+    final_diff = snowflake_final_count - sf_count if sf_count >= 0 and snowflake_final_count >= 0 else None
+
+    # Determine status for this object
+    if staging_match and final_match and pending_deletes == 0:
+        status = "SUCCESS"
+        log_message = f"{entity_name}: All counts match. {history_deleted} records in history."
+    elif staging_match and final_match and pending_deletes > 0:
+        status = "PENDING"
+        log_message = f"{entity_name}: Counts match but {pending_deletes} deletes pending."
+    else:
+        status = "WARNING"
+        log_message = f"{entity_name}: Count mismatch. Staging diff: {staging_diff}, Final diff: {final_diff}, Pending: {pending_deletes}"
+
+    return {
+        'validation_type': 'SYNC_VALIDATION',
+        'timestamp': datetime.now().isoformat(),
+        'entity_name': entity_name,
+        'object': sf_object,
+        'counts': {
+            'salesforce': sf_count,
+            'snowflake_staging': snowflake_staging_count,
+            'snowflake_final': snowflake_final_count
+        },
+        'matches': {
+            'staging_match': staging_match,
+            'final_match': final_match
+        },
+        'differences': {
+            'staging_diff': staging_diff,
+            'final_diff': final_diff
+        },
+        'deletes': {
+            'pending_deletes': pending_deletes,
+            'history_total': history_total,
+            'history_deleted': history_deleted
+        },
+        'status': status,
+        'log_message': log_message
+    }
+
+def save_validation_reports(conn, cursor, reports):
+    """Save all per-object reports to EXECUTION_TRACKER with one multi-row insert and one commit"""
+    if not reports:
+        return 0
+    placeholders = ", ".join(["(%s, %s, %s, %s, %s)"] * len(reports))
+    params = []
+    for report in reports:
+        params.extend([report['validation_type'], report['status'], report['log_message'], json.dumps(report), report['object']])
+    cursor.execute(f"""
+        INSERT INTO EXECUTION_TRACKER (TYPE, STATUS, LOG_MESSAGE, REPORT, OBJECT_NAME)
+        VALUES {placeholders}
+    """, params)
+    conn.commit()
+    return len(reports)
+
+VALIDATION_MODES = ('full', 'incremental', 'reconcile')
+
+def _connect():
+    """Import the client libraries and log in to Salesforce and Snowflake concurrently"""
+    def salesforce_login():
+        from salesforce import connect_salesforce
+        return connect_salesforce()
+
+    def snowflake_login():
+        from snowflake_client import connect_snowflake
+        return connect_snowflake()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        sf_future = executor.submit(salesforce_login)
+        conn_future = executor.submit(snowflake_login)
+        return sf_future.result(), conn_future.result()
+
+def run_sync_validation(mode=None):
+    """Run sync validation.
+
+    Args:
+        mode: 'full' compares total counts; 'incremental' compares per-day
+            buckets of records modified since the last successful incremental
+            run; 'reconcile' runs the full comparison and then diffs record IDs
+            for objects whose counts mismatch. Defaults to the VALIDATION_MODE
+            environment variable, then 'full'.
+    """
+    mode = (mode or os.environ.get('VALIDATION_MODE') or 'full').lower()
+    if mode not in VALIDATION_MODES:
+        raise ValueError(f"Unknown validation mode '{mode}'. Expected one of {VALIDATION_MODES}")
+
+    from snowflake_client import (
+        invalidate_snowflake_connection,
+        is_session_expired_error,
+        release_snowflake_connection,
+    )
+
+    sf, conn = _connect()
+    try:
+        if mode == 'incremental':
+            return _run_incremental_validation(sf, conn)
+        result = _run_sync_validation(sf, conn)
+        if mode == 'reconcile':
+            _run_reconciliation(sf, conn, result['mismatched_mappings'])
+        return result
+    except Exception as e:
+        if is_session_expired_error(e):
+            invalidate_snowflake_connection(conn)
+            conn = None
+        raise
+    finally:
+        if conn is not None:
+            release_snowflake_connection(conn)
+
+def _run_incremental_validation(sf, conn):
+    from incremental_validation import run_incremental_validation
+
+    cursor = conn.cursor()
+    try:
+        synced_objects = get_successfully_synced_objects(cursor)
+        entity_mappings = load_entity_mappings(cursor, synced_objects)
+    finally:
+        cursor.close()
+    if not entity_mappings:
+        raise Exception("No entity mappings found for validation")
+
+    reports = run_incremental_validation(sf, conn, entity_mappings)
+    logging.info(f"Incremental validation completed for {len(reports)} objects")
+    return {
+        'success': True,
+        'message': f'Incremental validation completed for {len(reports)} objects',
+        'total_objects': len(reports)
+    }
+
+def _run_reconciliation(sf, conn, entity_mappings):
+    from reconciliation import run_reconciliation
+
+    if not entity_mappings:
+        logging.info("All counts match; nothing to reconcile")
+        return []
+    reports = run_reconciliation(sf, conn, entity_mappings)
+    logging.info(f"Reconciliation completed for {len(reports)} objects")
+    return reports
+
+def _run_sync_validation(sf, conn):
     cursor = conn.cursor()
     logging.info("Starting sync validation...")
 
@@ -123,84 +389,44 @@ def run_sync_validation():
     if not entity_mappings:
         raise Exception("No entity mappings found for validation")
 
-    delete_stats_df = get_delete_tracker_stats(cursor)
-    
+    # One GROUP BY over DELETE_TRACKER supplies every object's pending count
+    delete_stats = get_delete_tracker_stats(cursor)
+
+    # Salesforce counts fan out concurrently while the Snowflake-side
+    # counts run in a single round trip on this thread
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        sf_counts_future = executor.submit(fetch_salesforce_counts, sf, entity_mappings)
+        snowflake_counts = fetch_snowflake_counts(cursor, entity_mappings)
+        sf_counts = sf_counts_future.result()
+
+    reports = []
     for mapping in entity_mappings:
         entity_name = mapping['entity_name']
-        sf_object = mapping['sf_object']
-        snowflake_table = mapping['snowflake_table']
-        
-        logging.info(f"Validating {entity_name} ({sf_object})...")
-
-        # Execute stored queries
-        sf_count = execute_salesforce_query(sf, mapping['count_soql'], entity_name)
-        snowflake_staging_count = execute_snowflake_query(cursor, mapping['count_staging'], entity_name)
-        snowflake_final_count = execute_snowflake_query(cursor, mapping['count_final'], entity_name)
-        
-        pending_deletes = get_delete_tracker_count(cursor, sf_object)
-        history_total, history_deleted = get_history_counts(cursor, snowflake_table)
-
-        staging_match = (sf_count == snowflake_staging_count)
-        final_match = (sf_count == snowflake_final_count)
-
-        # Determine status for this object
-        if staging_match and final_match and pending_deletes == 0:
-            status = "SUCCESS"
-            log_message = f"{entity_name}: All counts match. {history_deleted} records in history."
-        elif staging_match and final_match and pending_deletes > 0:
-            status = "PENDING"
-            log_message = f"{entity_name}: Counts match but {pending_deletes} deletes pending."
-        else:
-            status = "WARNING"
-            staging_diff = snowflake_staging_count - sf_count if sf_count >= 0 and snowflake_staging_count >= 0 else None
-            final_diff = snowflake_final_count - sf_count if sf_count >= 0 and snowflake_final_count >= 0 else None
-            log_message = f"{entity_name}: Count mismatch. Staging diff: {staging_diff}, Final diff: {final_diff}, Pending: {pending_deletes}"
-
-        # Build per-object report
-        report_data = {
-            'validation_type': 'SYNC_VALIDATION',
-            'timestamp': datetime.now().isoformat(),
-            'entity_name': entity_name,
-            'object': sf_object,
-            'counts': {
-                'salesforce': sf_count,
-                'snowflake_staging': snowflake_staging_count,
-                'snowflake_final': snowflake_final_count
-            },
-            'matches': {
-                'staging_match': staging_match,
-                'final_match': final_match
-            },
-            'differences': {
-                'staging_diff': snowflake_staging_count - sf_count if sf_count >= 0 and snowflake_staging_count >= 0 else None,
-                'final_diff': snowflake_final_count - sf_count if sf_count >= 0 and snowflake_final_count >= 0 else None
-            },
-            'deletes': {
-                'pending_deletes': pending_deletes,
-                'history_total': history_total,
-                'history_deleted': history_deleted
-            },
-            'status': status,
-            'log_message': log_message
-        }
+        logging.info(f"Validating {entity_name} ({mapping['sf_object']})...")
+        reports.append(build_validation_report(
+            mapping,
+            sf_counts[entity_name],
+            snowflake_counts[entity_name],
+            get_pending_deletes(delete_stats, mapping['sf_object'])
+        ))
 
-        # Save per-object report to EXECUTION_TRACKER
-        try:
-            cursor.execute("""
-                INSERT INTO EXECUTION_TRACKER (TYPE, STATUS, LOG_MESSAGE, REPORT, OBJECT_NAME)
-                VALUES (%s, %s, %s, %s, %s)
-            """, ('SYNC_VALIDATION', status, log_message, json.dumps(report_data), sf_object))
-            conn.commit()
-            logging.info(f"✅ {entity_name}: {status} - {log_message}")
-        except Exception as e:
-            logging.error(f"Failed to save report for {entity_name}: {e}")
+    # Save all per-object reports to EXECUTION_TRACKER in one statement
+    try:
+        save_validation_reports(conn, cursor, reports)
+        for report in reports:
+            logging.info(f"✅ {report['entity_name']}: {report['status']} - {report['log_message']}")
+    except Exception as e:
+        logging.error(f"Failed to save validation reports: {e}")
 
+    # Connection stays open for reuse by the next warm invocation
     cursor.close()
-    conn.close()
     logging.info(f"Validation completed for {len(entity_mappings)} objects")
     
     return {
         'success': True,
         'message': f'Validation completed for {len(entity_mappings)} objects',
-        'total_objects': len(entity_mappings)
+        'total_objects': len(entity_mappings),
+        'mismatched_mappings': [
+            mapping for mapping, report in zip(entity_mappings, reports) if report['status'] == 'WARNING'
+        ]
     }
\ No newline at end of file
@@ -58,7 +58,7 @@ if __name__ == '__main__':
     try:
         logging.info("🚀 Starting Sync Validator (Local Mode)")
         setup_local_env()
-        run_sync_validation()
+        run_sync_validation(mode=sys.argv[1] if len(sys.argv) > 1 else None)
     except Exception as e:
         logging.error(f"❌ Validation failed: {e}")
         sys.exit(1)
\ No newline at end of file
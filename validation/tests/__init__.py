@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Modules in src import each other by bare name (see SyncValidator/__init__.py)
+_SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+if _SRC not in sys.path:
+    sys.path.insert(0, _SRC)
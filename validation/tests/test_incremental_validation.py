@@ -0,0 +1,196 @@
+"""Unit tests for the incremental (per-day / per-hour bucket) validation"""
+import json
+import unittest
+from datetime import date, datetime, timedelta, timezone
+from unittest import mock
+
+try:
+    import incremental_validation
+    from incremental_validation import (
+        _salesforce_bucket_queries,
+        build_snowflake_buckets_query,
+        diff_buckets,
+        run_incremental_validation,
+    )
+except ImportError:  # requests / simple_salesforce / PyJWT / cryptography not installed
+    incremental_validation = None
+
+
+class FakeCursor:
+    """Answers the validator's Snowflake queries from canned rows and records the SQL it ran"""
+
+    def __init__(self, watermark_rows=None, column_types=None, watermark_error=None):
+        self.watermark_rows = watermark_rows or []
+        self.column_types = column_types or []
+        self.watermark_error = watermark_error
+        self.executed = []
+        self.inserted = []
+        self.description = None
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        self.executed.append(sql)
+        self.description = None
+        self._rows = []
+        if 'FROM EXECUTION_TRACKER' in sql and 'PARSE_JSON' in sql:
+            if self.watermark_error is not None:
+                raise self.watermark_error
+            self._rows = list(self.watermark_rows)
+        elif 'INFORMATION_SCHEMA.COLUMNS' in sql:
+            self._rows = list(self.column_types)
+        elif 'BUCKET_KEY' in sql:
+            # No Snowflake rows in any bucket
+            self.description = [('BUCKET_KEY',), ('BUCKET',), ('CNT',)]
+        elif sql.lstrip().startswith('INSERT INTO EXECUTION_TRACKER'):
+            self.inserted.append(params)
+
+    def fetchall(self):
+        return self._rows
+
+    def fetchmany(self, size):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        pass
+
+
+def mapping(entity_name, table):
+    return {'entity_name': entity_name, 'sf_object': entity_name, 'snowflake_table': table}
+
+
+@unittest.skipIf(incremental_validation is None, "requests / simple_salesforce not installed")
+class TestDiffBuckets(unittest.TestCase):
+    def test_day_buckets(self):
+        sf_days = {'2025-11-01': 10, '2025-11-02': 5, '2025-11-03': 1}
+        snowflake_days = {'2025-11-01': 10, '2025-11-02': 4, '2025-11-04': 2}
+
+        self.assertEqual(diff_buckets(sf_days, snowflake_days), [
+            {'bucket': '2025-11-02', 'salesforce': 5, 'snowflake': 4, 'diff': -1},
+            {'bucket': '2025-11-03', 'salesforce': 1, 'snowflake': 0, 'diff': -1},
+            {'bucket': '2025-11-04', 'salesforce': 0, 'snowflake': 2, 'diff': 2},
+        ])
+
+    def test_hour_buckets(self):
+        self.assertEqual(diff_buckets({'9': 3, '13': 1}, {'9': 3, '13': 2}),
+                         [{'bucket': '13', 'salesforce': 1, 'snowflake': 2, 'diff': 1}])
+        self.assertEqual(diff_buckets({}, {}), [])
+
+
+@unittest.skipIf(incremental_validation is None, "requests / simple_salesforce not installed")
+class TestBucketQueries(unittest.TestCase):
+    def setUp(self):
+        self.windows = {'Account': ('Account', date(2025, 11, 1), date(2025, 11, 3))}
+        self.tables = {'Account': 'IC_CRM.ACCOUNT'}
+
+    def build(self, data_type, granularity='day', untouched=False):
+        return build_snowflake_buckets_query(self.windows, self.tables, granularity,
+                                             {'ACCOUNT': data_type} if data_type else None, untouched)
+
+    def test_modstamp_expression_per_column_type(self):
+        expected = {
+            None: "CONVERT_TIMEZONE('UTC', TRY_TO_TIMESTAMP_TZ(LASTMODIFIEDDATE))::TIMESTAMP_NTZ",
+            'TEXT': "CONVERT_TIMEZONE('UTC', TRY_TO_TIMESTAMP_TZ(LASTMODIFIEDDATE))::TIMESTAMP_NTZ",
+            'TIMESTAMP_NTZ': "LASTMODIFIEDDATE",
+            'TIMESTAMP_TZ': "CONVERT_TIMEZONE('UTC', LASTMODIFIEDDATE)::TIMESTAMP_NTZ",
+            'TIMESTAMP_LTZ': "CONVERT_TIMEZONE('UTC', LASTMODIFIEDDATE)::TIMESTAMP_NTZ",
+            'DATE': "LASTMODIFIEDDATE::TIMESTAMP_NTZ",
+        }
+        for data_type, modstamp in expected.items():
+            with self.subTest(data_type=data_type):
+                self.assertEqual(self.build(data_type), (
+                    f"SELECT 'Account' AS BUCKET_KEY, TO_VARCHAR({modstamp}::DATE) AS BUCKET, COUNT(*) AS CNT "
+                    f"FROM IC_CRM.ACCOUNT "
+                    f"WHERE {modstamp} >= '2025-11-01' AND {modstamp} < '2025-11-03' GROUP BY 2"
+                ))
+
+    def test_timestamp_ntz_is_not_parsed(self):
+        """TRY_TO_TIMESTAMP_TZ rejects TIMESTAMP_NTZ input (OPPORTUNITY.LASTMODIFIEDDATE)"""
+        self.assertNotIn('TRY_TO_TIMESTAMP_TZ', self.build('timestamp_ntz', 'hour', untouched=True))
+
+    def test_hour_buckets_and_untouched_row(self):
+        branches = self.build('TIMESTAMP_NTZ', 'hour', untouched=True).split('\nUNION ALL\n')
+
+        self.assertIn('TO_VARCHAR(HOUR(LASTMODIFIEDDATE)) AS BUCKET', branches[0])
+        self.assertEqual(branches[1], (
+            "SELECT 'Account', 'untouched', COUNT(*) FROM IC_CRM.ACCOUNT "
+            "WHERE LASTMODIFIEDDATE < '2025-11-01' OR LASTMODIFIEDDATE IS NULL"
+        ))
+
+    def test_salesforce_queries(self):
+        queries = _salesforce_bucket_queries(self.windows, 'day', untouched=True)
+
+        self.assertEqual(queries, {
+            'Account': ("SELECT DAY_ONLY(LastModifiedDate), COUNT(Id) FROM Account "
+                        "WHERE LastModifiedDate >= 2025-11-01T00:00:00Z AND LastModifiedDate < 2025-11-03T00:00:00Z "
+                        "GROUP BY DAY_ONLY(LastModifiedDate)"),
+            'Account|untouched': "SELECT COUNT() FROM Account WHERE LastModifiedDate < 2025-11-01T00:00:00Z",
+        })
+        hour_queries = _salesforce_bucket_queries(self.windows, 'hour')
+        self.assertIn('GROUP BY HOUR_IN_DAY(LastModifiedDate)', hour_queries['Account'])
+
+
+@unittest.skipIf(incremental_validation is None, "requests / simple_salesforce not installed")
+class TestWatermarks(unittest.TestCase):
+    def setUp(self):
+        self.until = datetime.now(timezone.utc).date()
+        self.soql = {}
+
+        def query_many(sf, queries):
+            self.soql.update(queries)
+            return {key: {'totalSize': 0, 'records': []} for key in queries}
+
+        patcher = mock.patch.object(incremental_validation, 'query_many', query_many)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_validation(self, cursor):
+        reports = run_incremental_validation(None, FakeConnection(cursor),
+                                             [mapping('Account', 'ACCOUNT'), mapping('Contact', 'CONTACT')])
+        return {report['entity_name']: report for report in reports}
+
+    def test_object_without_watermark_uses_the_default_lookback(self):
+        since = self.until - timedelta(days=2)
+        cursor = FakeCursor(watermark_rows=[('Account', since.isoformat()), ('Contact', None)],
+                            column_types=[('ACCOUNT', 'TIMESTAMP_NTZ')])
+
+        reports = self.run_validation(cursor)
+
+        default_since = self.until - timedelta(days=incremental_validation.DEFAULT_LOOKBACK_DAYS)
+        self.assertEqual(reports['Account']['window'], {'since': since.isoformat(), 'until': self.until.isoformat()})
+        self.assertEqual(reports['Contact']['window']['since'], default_since.isoformat())
+        self.assertIn(f"LastModifiedDate >= {default_since.isoformat()}T00:00:00Z", self.soql['Contact'])
+        self.assertEqual({report['status'] for report in reports.values()}, {'SUCCESS'})
+        self.assertEqual(len(cursor.inserted), 1)
+        self.assertEqual(json.loads(cursor.inserted[0][3])['changes_match'], True)
+
+    def test_unreadable_watermarks_fall_back_to_the_default_lookback(self):
+        cursor = FakeCursor(watermark_error=Exception('Object EXECUTION_TRACKER does not exist'))
+
+        with self.assertLogs(level='WARNING'):
+            reports = self.run_validation(cursor)
+
+        default_since = (self.until - timedelta(days=incremental_validation.DEFAULT_LOOKBACK_DAYS)).isoformat()
+        self.assertEqual({report['window']['since'] for report in reports.values()}, {default_since})
+
+    def test_object_validated_up_to_today_is_skipped(self):
+        cursor = FakeCursor(watermark_rows=[('Account', self.until.isoformat())])
+
+        reports = self.run_validation(cursor)
+
+        self.assertEqual(list(reports), ['Contact'])
+
+
+if __name__ == '__main__':
+    unittest.main()
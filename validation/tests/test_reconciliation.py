@@ -0,0 +1,180 @@
+"""Unit tests for the hash-bucket record ID reconciliation"""
+import unittest
+from unittest import mock
+
+try:
+    import reconciliation
+    from reconciliation import (
+        BucketChecksums,
+        diff_ids,
+        enqueue_missed_deletes,
+        id_hash,
+        id_query_from_count_query,
+        reconcile_entity,
+    )
+except ImportError:  # requests / simple_salesforce / PyJWT / cryptography not installed
+    reconciliation = None
+
+NUM_BUCKETS = 16
+
+
+def record_ids(count, prefix='001'):
+    return [f"{prefix}{n:015d}" for n in range(count)]
+
+
+def snowflake_side(ids, num_buckets=NUM_BUCKETS):
+    """What snowflake_bucket_checksums returns for these IDs"""
+    checksums = BucketChecksums(num_buckets)
+    for record_id in ids:
+        checksums.add(record_id)
+    counts = {bucket: count for bucket, count in enumerate(checksums.counts) if count}
+    sums = {bucket: total for bucket, total in enumerate(checksums.sums) if total}
+    return counts, sums
+
+
+class FakeCursor:
+    def __init__(self):
+        self.executed = []
+        self.rowcount = None
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+        # Pretend every ID but one per batch was already open in DELETE_TRACKER
+        self.rowcount = len(params) - 3
+
+
+@unittest.skipIf(reconciliation is None, "requests / simple_salesforce not installed")
+class TestIdHash(unittest.TestCase):
+    def test_matches_snowflake_md5_number_lower64(self):
+        # SELECT MD5_NUMBER_LOWER64('Snowflake') -> 9203306159527282910 (Snowflake documentation)
+        self.assertEqual(id_hash('Snowflake'), 9203306159527282910)
+        # MD5('0015g00000ABCDEAAA') = e5b55a50a951cd36 b0e59f742a2d1a9d; the lower 64 bits, unsigned
+        self.assertEqual(id_hash('0015g00000ABCDEAAA'), 0xb0e59f742a2d1a9d)
+
+
+@unittest.skipIf(reconciliation is None, "requests / simple_salesforce not installed")
+class TestBucketChecksums(unittest.TestCase):
+    def test_differing_buckets_are_exactly_the_changed_ones(self):
+        salesforce_ids = record_ids(200)
+        removed, added = salesforce_ids[7], '001zzzzzzzzzzzzzzz'
+        snowflake_ids = [record_id for record_id in salesforce_ids if record_id != removed] + [added]
+
+        checksums = BucketChecksums(NUM_BUCKETS)
+        for record_id in salesforce_ids:
+            checksums.add(record_id)
+
+        self.assertEqual(checksums.differing_buckets(*snowflake_side(snowflake_ids)),
+                         {id_hash(removed) % NUM_BUCKETS, id_hash(added) % NUM_BUCKETS})
+        self.assertEqual(checksums.differing_buckets(*snowflake_side(salesforce_ids)), set())
+
+    def test_same_count_with_a_different_id_is_caught_by_the_checksum(self):
+        by_bucket = {}
+        for record_id in record_ids(200):
+            by_bucket.setdefault(id_hash(record_id) % NUM_BUCKETS, []).append(record_id)
+        bucket, (kept, swapped_out, swapped_in) = next(
+            (bucket, ids[:3]) for bucket, ids in sorted(by_bucket.items()) if len(ids) >= 3
+        )
+
+        checksums = BucketChecksums(NUM_BUCKETS)
+        checksums.add(kept)
+        checksums.add(swapped_out)
+        counts, sums = snowflake_side([kept, swapped_in])
+
+        self.assertEqual(counts, {bucket: 2})
+        self.assertEqual(checksums.differing_buckets(counts, sums), {bucket})
+
+
+@unittest.skipIf(reconciliation is None, "requests / simple_salesforce not installed")
+class TestDiffIds(unittest.TestCase):
+    def test_missing_and_extra(self):
+        missing, extra = diff_ids({'001C', '001A', '001B'}, {'001B', '001D', '001E'})
+
+        self.assertEqual(missing, ['001A', '001C'])
+        self.assertEqual(extra, ['001D', '001E'])
+        self.assertEqual(diff_ids({'001A'}, {'001A'}), ([], []))
+
+
+@unittest.skipIf(reconciliation is None, "requests / simple_salesforce not installed")
+class TestIdQueryFromCountQuery(unittest.TestCase):
+    def test_keeps_the_stored_filters(self):
+        self.assertEqual(
+            id_query_from_count_query("select count(Id) from Account where IsDeleted = false;", 'Id', 'Account'),
+            "SELECT Id FROM Account where IsDeleted = false"
+        )
+        self.assertEqual(
+            id_query_from_count_query(" SELECT COUNT(*) FROM STG_ACCOUNT WHERE X = 1 ", 'ID AS ID_VALUE', 'ACCOUNT'),
+            "SELECT ID AS ID_VALUE FROM STG_ACCOUNT WHERE X = 1"
+        )
+
+    def test_falls_back_to_the_whole_table(self):
+        with self.assertLogs(level='WARNING'):
+            query = id_query_from_count_query("SELECT SUM(N) FROM STG_ACCOUNT", 'ID AS ID_VALUE', 'ACCOUNT')
+
+        self.assertEqual(query, "SELECT ID AS ID_VALUE FROM ACCOUNT")
+
+
+@unittest.skipIf(reconciliation is None, "requests / simple_salesforce not installed")
+class TestEnqueueMissedDeletes(unittest.TestCase):
+    def test_inserts_in_batches_and_commits_once(self):
+        conn, cursor = mock.Mock(), FakeCursor()
+
+        with mock.patch.object(reconciliation, 'ENQUEUE_BATCH_SIZE', 2):
+            enqueued = enqueue_missed_deletes(conn, cursor, 'Account', ['001A', '001B', '001C'])
+
+        self.assertEqual([params for _, params in cursor.executed], [
+            ['Account', '001A', '001B', 'Account'],
+            ['Account', '001C', 'Account'],
+        ])
+        self.assertIn('WHERE NOT EXISTS', cursor.executed[0][0])
+        self.assertEqual(enqueued, 1)
+        conn.commit.assert_called_once_with()
+
+
+@unittest.skipIf(reconciliation is None, "requests / simple_salesforce not installed")
+class TestReconcileEntity(unittest.TestCase):
+    def setUp(self):
+        self.mapping = {
+            'entity_name': 'Account', 'sf_object': 'Account', 'snowflake_table': 'ACCOUNT',
+            'count_soql': 'SELECT COUNT(Id) FROM Account', 'count_staging': 'SELECT COUNT(*) FROM STG_ACCOUNT',
+            'id_column': 'ID'
+        }
+        self.salesforce_ids = record_ids(50)
+        self.snowflake_ids = self.salesforce_ids[1:] + ['001zzzzzzzzzzzzzzz']
+        self.deleted_jobs = []
+
+        def iter_ids_in_buckets(cursor, id_query, buckets, num_buckets=reconciliation.NUM_BUCKETS):
+            return (record_id for record_id in self.snowflake_ids if id_hash(record_id) % num_buckets in buckets)
+
+        for name, replacement in (
+            ('create_bulk_query_job', lambda sf, soql: '750JOB'),
+            ('iter_bulk_query_results', lambda sf, job_id: iter(self.salesforce_ids)),
+            ('delete_bulk_query_job', lambda sf, job_id: self.deleted_jobs.append(job_id)),
+            ('snowflake_bucket_checksums',
+             lambda cursor, id_query: snowflake_side(self.snowflake_ids, reconciliation.NUM_BUCKETS)),
+            ('iter_snowflake_ids_in_buckets', iter_ids_in_buckets),
+        ):
+            patcher = mock.patch.object(reconciliation, name, replacement)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_reports_missing_and_extra_ids_and_deletes_the_job(self):
+        report = reconcile_entity(None, mock.Mock(), FakeCursor(), self.mapping)
+
+        self.assertEqual(report['missing_in_snowflake'], {'total': 1, 'ids': [self.salesforce_ids[0]]})
+        self.assertEqual(report['extra_in_snowflake'], {'total': 1, 'ids': ['001zzzzzzzzzzzzzzz']})
+        self.assertEqual(report['status'], 'WARNING')
+        self.assertEqual(self.deleted_jobs, ['750JOB'])
+
+    def test_job_is_deleted_when_reading_fails(self):
+        def failing_results(sf, job_id):
+            raise ConnectionError('stream reset')
+
+        with mock.patch.object(reconciliation, 'iter_bulk_query_results', failing_results):
+            with self.assertRaises(ConnectionError):
+                reconcile_entity(None, mock.Mock(), FakeCursor(), self.mapping)
+
+        self.assertEqual(self.deleted_jobs, ['750JOB'])
+
+
+if __name__ == '__main__':
+    unittest.main()
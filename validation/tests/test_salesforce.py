@@ -0,0 +1,172 @@
+"""Unit tests for the concurrent SOQL counts, their pooled HTTP session and Bulk API 2.0 jobs"""
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+try:
+    import requests
+    import salesforce
+except ImportError:  # requests / simple_salesforce / PyJWT / cryptography not installed
+    salesforce = None
+
+
+class FakeSalesforce:
+    """Answers sf.query with the SOQL it was given; queries containing FAIL raise"""
+
+    def __init__(self, barrier=None):
+        self.session = requests.Session()
+        self.barrier = barrier
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def query(self, soql):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.barrier is not None:
+                self.barrier.wait()
+            if 'FAIL' in soql:
+                raise ValueError(soql)
+            return {'totalSize': len(soql), 'records': []}
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+@unittest.skipIf(salesforce is None, "requests / simple_salesforce not installed")
+class TestQueryMany(unittest.TestCase):
+    def test_results_keep_the_order_of_the_queries(self):
+        queries = {f"Object{i}": f"SELECT COUNT() FROM Object{i}" for i in range(12, 0, -1)}
+        queries['Broken'] = 'SELECT FAIL'
+
+        results = salesforce.query_many(FakeSalesforce(), queries)
+
+        self.assertEqual(list(results), list(queries))
+        self.assertEqual(results['Object3']['totalSize'], len(queries['Object3']))
+        self.assertIsInstance(results['Broken'], ValueError)
+
+    def test_concurrency_is_bounded(self):
+        # Every query waits until three are in flight, so the pool must run exactly three at a time
+        sf = FakeSalesforce(barrier=threading.Barrier(3, timeout=5))
+        queries = {f"Object{i}": f"SELECT COUNT() FROM Object{i}" for i in range(9)}
+
+        with mock.patch.object(salesforce, 'MAX_CONCURRENT_QUERIES', 3):
+            results = salesforce.query_many(sf, queries)
+
+        self.assertEqual(sf.max_in_flight, 3)
+        self.assertFalse(any(isinstance(result, Exception) for result in results.values()))
+
+    def test_no_queries(self):
+        self.assertEqual(salesforce.query_many(FakeSalesforce(), {}), {})
+
+
+@unittest.skipIf(salesforce is None, "requests / simple_salesforce not installed")
+class TestPooledSession(unittest.TestCase):
+    def test_adapter_is_mounted_once(self):
+        sf = SimpleNamespace(session=requests.Session())
+
+        salesforce._ensure_pooled_session(sf, 32)
+        adapter = sf.session.get_adapter('https://')
+        salesforce._ensure_pooled_session(sf, 32)
+        salesforce._ensure_pooled_session(sf, 4)
+
+        self.assertIs(sf.session.get_adapter('https://'), adapter)
+        self.assertEqual(adapter._pool_maxsize, 32)
+
+    def test_default_pool_is_kept_when_large_enough(self):
+        sf = SimpleNamespace(session=requests.Session())
+        adapter = sf.session.get_adapter('https://')
+
+        salesforce._ensure_pooled_session(sf, requests.adapters.DEFAULT_POOLSIZE)
+
+        self.assertIs(sf.session.get_adapter('https://'), adapter)
+
+
+class FakeResponse:
+    def __init__(self, payload=None, status_code=200):
+        self.payload = payload or {}
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error")
+
+    def json(self):
+        return self.payload
+
+
+class FakeBulkSession:
+    """Bulk API 2.0 job endpoints; the job reports the given states in turn"""
+
+    def __init__(self, states, delete_status=204):
+        self.states = list(states)
+        self.delete_status = delete_status
+        self.calls = []
+
+    def post(self, url, headers=None, data=None):
+        self.calls.append(('POST', url))
+        return FakeResponse({'id': '750JOB'})
+
+    def get(self, url, headers=None):
+        self.calls.append(('GET', url))
+        return FakeResponse({'state': self.states.pop(0), 'errorMessage': 'INVALID_FIELD'})
+
+    def patch(self, url, headers=None, data=None):
+        self.calls.append(('PATCH', url, data))
+        return FakeResponse()
+
+    def delete(self, url, headers=None):
+        self.calls.append(('DELETE', url))
+        return FakeResponse(status_code=self.delete_status)
+
+
+@unittest.skipIf(salesforce is None, "requests / simple_salesforce not installed")
+class TestBulkQueryJobs(unittest.TestCase):
+    JOB_URL = 'https://example.my.salesforce.com/services/data/v59.0/jobs/query/750JOB'
+
+    def sf(self, session):
+        return SimpleNamespace(session=session, headers={},
+                               base_url='https://example.my.salesforce.com/services/data/v59.0/')
+
+    def test_completed_job_is_left_for_the_caller(self):
+        session = FakeBulkSession(['InProgress', 'JobComplete'])
+
+        with mock.patch.object(salesforce, 'BULK_POLL_INTERVAL_SECONDS', 0):
+            self.assertEqual(salesforce.create_bulk_query_job(self.sf(session), 'SELECT Id FROM Account'), '750JOB')
+
+        self.assertNotIn(('DELETE', self.JOB_URL), session.calls)
+
+    def test_failed_job_is_deleted(self):
+        session = FakeBulkSession(['Failed'])
+
+        with self.assertRaisesRegex(Exception, 'Failed: INVALID_FIELD'):
+            salesforce.create_bulk_query_job(self.sf(session), 'SELECT Id FROM Account')
+
+        self.assertEqual(session.calls[-1], ('DELETE', self.JOB_URL))
+
+    def test_timed_out_job_is_aborted_then_deleted(self):
+        session = FakeBulkSession(['InProgress'])
+
+        with mock.patch.object(salesforce, 'BULK_JOB_TIMEOUT_SECONDS', -1):
+            with self.assertRaisesRegex(Exception, 'did not complete'):
+                salesforce.create_bulk_query_job(self.sf(session), 'SELECT Id FROM Account')
+
+        self.assertEqual(session.calls[-2:], [
+            ('PATCH', self.JOB_URL, '{"state": "Aborted"}'),
+            ('DELETE', self.JOB_URL),
+        ])
+
+    def test_delete_failure_is_only_logged(self):
+        session = FakeBulkSession([], delete_status=404)
+
+        with self.assertLogs(level='WARNING') as logs:
+            salesforce.delete_bulk_query_job(self.sf(session), '750JOB')
+
+        self.assertIn('Could not delete Bulk API 2.0 query job 750JOB', logs.output[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+"""Unit tests for the batched Snowflake counts and DELETE_TRACKER stats of the full validation"""
+import sqlite3
+import unittest
+
+from sync_validation_core import (
+    build_snowflake_counts_query,
+    build_validation_report,
+    fetch_snowflake_counts,
+    get_delete_tracker_stats,
+    get_pending_deletes,
+)
+
+
+def mapping(entity_name, table):
+    return {
+        'entity_name': entity_name,
+        'sf_object': entity_name,
+        'snowflake_table': table,
+        'count_soql': f"SELECT COUNT() FROM {entity_name}",
+        'count_staging': f"SELECT COUNT(*) FROM STG_{table};",
+        'count_final': f"SELECT COUNT(*) FROM {table}",
+        'id_column': 'ID'
+    }
+
+
+class TestBuildSnowflakeCountsQuery(unittest.TestCase):
+    def test_one_branch_per_entity(self):
+        query = build_snowflake_counts_query(
+            [mapping('Account', 'ACCOUNT'), mapping("O'Brien", 'OBRIEN')], {'HISTORY_ACCOUNT', 'HISTORY_OBRIEN'}
+        )
+
+        branches = query.split('\nUNION ALL\n')
+        self.assertEqual(branches[0], (
+            "SELECT 'Account' AS ENTITY_NAME, (SELECT COUNT(*) FROM STG_ACCOUNT) AS STAGING_COUNT, "
+            "(SELECT COUNT(*) FROM ACCOUNT) AS FINAL_COUNT, "
+            "(SELECT COUNT(*) FROM HISTORY_ACCOUNT) AS HISTORY_TOTAL, "
+            "(SELECT COUNT(*) FROM HISTORY_ACCOUNT WHERE STATUS = 'DELETED') AS HISTORY_DELETED"
+        ))
+        self.assertEqual(len(branches), 2)
+        self.assertTrue(branches[1].startswith("SELECT 'O''Brien' AS ENTITY_NAME, "))
+
+    def test_missing_history_table_counts_as_zero(self):
+        query = build_snowflake_counts_query([mapping('Contact', 'Contact')], set())
+
+        self.assertNotIn('HISTORY_Contact', query)
+        self.assertTrue(query.endswith('0 AS HISTORY_TOTAL, 0 AS HISTORY_DELETED'))
+
+    def test_history_table_names_compare_case_insensitively(self):
+        query = build_snowflake_counts_query([mapping('Contact', 'Contact')], {'HISTORY_CONTACT'})
+
+        self.assertIn('(SELECT COUNT(*) FROM HISTORY_Contact) AS HISTORY_TOTAL', query)
+
+
+class TestFetchSnowflakeCounts(unittest.TestCase):
+    """Runs the generated SQL against SQLite (INFORMATION_SCHEMA is missing, so every history table is assumed)"""
+
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        for table, staging, final, history in (('ACCOUNT', 3, 2, ['ACTIVE', 'DELETED']), ('CONTACT', 1, 1, [])):
+            self.conn.execute(f"CREATE TABLE STG_{table} (ID TEXT)")
+            self.conn.execute(f"CREATE TABLE {table} (ID TEXT)")
+            self.conn.execute(f"CREATE TABLE HISTORY_{table} (ID TEXT, STATUS TEXT)")
+            self.conn.executemany(f"INSERT INTO STG_{table} VALUES (?)", [(str(i),) for i in range(staging)])
+            self.conn.executemany(f"INSERT INTO {table} VALUES (?)", [(str(i),) for i in range(final)])
+            self.conn.executemany(f"INSERT INTO HISTORY_{table} VALUES ('x', ?)", [(s,) for s in history])
+        self.cursor = self.conn.cursor()
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_batched_query(self):
+        counts = fetch_snowflake_counts(self.cursor, [mapping('Account', 'ACCOUNT'), mapping('Contact', 'CONTACT')])
+
+        self.assertEqual(counts, {
+            'Account': {'staging': 3, 'final': 2, 'history_total': 2, 'history_deleted': 1},
+            'Contact': {'staging': 1, 'final': 1, 'history_total': 0, 'history_deleted': 0},
+        })
+
+    def test_falls_back_to_per_entity_queries_when_the_batch_fails(self):
+        broken = mapping('Lead', 'LEAD')
+        broken['count_staging'] = "SELECT COUNT(*) FROM STG_MISSING"
+
+        with self.assertLogs(level='WARNING') as logs:
+            counts = fetch_snowflake_counts(self.cursor, [mapping('Account', 'ACCOUNT'), broken])
+
+        self.assertTrue(any('Falling back to per-entity queries' in line for line in logs.output))
+        self.assertEqual(counts['Account'], {'staging': 3, 'final': 2, 'history_total': 2, 'history_deleted': 1})
+        # Only the broken entity's failing queries report -1 / 0
+        self.assertEqual(counts['Lead'], {'staging': -1, 'final': -1, 'history_total': 0, 'history_deleted': 0})
+
+
+class StubCursor:
+    def __init__(self, rows=None, error=None):
+        self.rows = rows or []
+        self.error = error
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append(sql)
+        if self.error is not None:
+            raise self.error
+
+    def fetchall(self):
+        return self.rows
+
+
+class TestDeleteTrackerStats(unittest.TestCase):
+    def setUp(self):
+        self.cursor = StubCursor([('Account', 'open', 4), ('Account', 'applied', 10), ('Contact', 'applied', 2)])
+
+    def test_stats_by_object_and_status(self):
+        stats = get_delete_tracker_stats(self.cursor)
+
+        self.assertEqual(stats, {'Account': {'open': 4, 'applied': 10}, 'Contact': {'applied': 2}})
+        self.assertEqual(len(self.cursor.executed), 1)
+        self.assertIn('GROUP BY OBJECT_NAME, STATUS', self.cursor.executed[0])
+
+    def test_pending_deletes(self):
+        stats = get_delete_tracker_stats(self.cursor)
+
+        self.assertEqual(get_pending_deletes(stats, 'Account'), 4)
+        self.assertEqual(get_pending_deletes(stats, 'Contact'), 0)
+        self.assertEqual(get_pending_deletes(stats, 'Lead'), 0)
+
+    def test_query_error_means_no_pending_deletes(self):
+        with self.assertLogs(level='ERROR'):
+            stats = get_delete_tracker_stats(StubCursor(error=Exception('DELETE_TRACKER does not exist')))
+
+        self.assertEqual(stats, {})
+        self.assertEqual(get_pending_deletes(stats, 'Account'), 0)
+
+    def test_pending_deletes_set_the_report_status(self):
+        stats = get_delete_tracker_stats(self.cursor)
+        counts = {'staging': 5, 'final': 5, 'history_total': 0, 'history_deleted': 0}
+
+        pending, applied = (
+            build_validation_report(mapping(name, name.upper()), 5, counts, get_pending_deletes(stats, name))
+            for name in ('Account', 'Contact')
+        )
+
+        self.assertEqual((pending['status'], pending['deletes']['pending_deletes']), ('PENDING', 4))
+        self.assertEqual((applied['status'], applied['deletes']['pending_deletes']), ('SUCCESS', 0))
+
+
+if __name__ == '__main__':
+    unittest.main()